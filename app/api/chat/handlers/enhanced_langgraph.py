@@ -16,6 +16,7 @@ from app.rag.agents.enhanced_langgraph_rag_agent import EnhancedLangGraphRAGAgen
 from app.db.dependencies import get_db, get_conversation_repository
 from app.db.repositories.conversation_repository import ConversationRepository
 from app.core.security import get_current_active_user
+from app.rag.deadline import create_request_deadline
 from app.core.config import DEFAULT_MODEL, USE_LANGGRAPH_RAG, USE_ENHANCED_LANGGRAPH_RAG
 
 from app.api.chat.utils.streaming import create_event_generator, create_streaming_response
@@ -46,6 +47,9 @@ async def enhanced_langgraph_query_chat(
     if not USE_LANGGRAPH_RAG or not USE_ENHANCED_LANGGRAPH_RAG or not enhanced_langgraph_rag_agent:
         raise HTTPException(status_code=400, detail="Enhanced LangGraph RAG Agent is not enabled")
     
+    # The request's latency budget starts when it arrives
+    deadline = create_request_deadline()
+    
     try:
         # Get or create conversation
         conversation_id, is_new = await get_or_create_conversation(
@@ -98,7 +102,8 @@ async def enhanced_langgraph_query_chat(
                 conversation_context=conversation_context,
                 metadata_filters=metadata_filters,
                 user_id=current_user.id,
-                use_rag=query.use_rag
+                use_rag=query.use_rag,
+                deadline=deadline
             )
             
             # Get sources (with safety check)
@@ -109,7 +114,8 @@ async def enhanced_langgraph_query_chat(
                 conversation_id,
                 enhanced_response["stream"],
                 conversation_repository,
-                sources
+                sources,
+                enhanced_response.get("degradations")
             )
             
             # Return streaming response
@@ -128,7 +134,8 @@ async def enhanced_langgraph_query_chat(
                 conversation_context=conversation_context,
                 metadata_filters=metadata_filters,
                 user_id=current_user.id,
-                use_rag=query.use_rag
+                use_rag=query.use_rag,
+                deadline=deadline
             )
             
             # Get response and sources
@@ -160,7 +167,8 @@ async def enhanced_langgraph_query_chat(
                 message=response_text,
                 conversation_id=conversation_id,
                 citations=sources,
-                execution_trace=execution_trace
+                execution_trace=execution_trace,
+                degradations=deadline.degradations or None
             )
     except Exception as e:
         # Handle errors
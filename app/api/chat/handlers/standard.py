@@ -17,6 +17,7 @@ from app.rag.engine.rag_engine import RAGEngine
 from app.db.dependencies import get_db, get_conversation_repository
 from app.db.repositories.conversation_repository import ConversationRepository
 from app.core.security import get_current_active_user
+from app.rag.deadline import create_request_deadline
 from app.core.config import DEFAULT_MODEL
 
 from app.api.chat.utils.streaming import create_event_generator, create_streaming_response
@@ -46,6 +47,9 @@ async def query_chat(
     """
     Send a chat query and get a response
     """
+    # The request's latency budget starts when it arrives
+    deadline = create_request_deadline()
+    
     try:
         # Get or create conversation
         conversation_id, is_new = await get_or_create_conversation(
@@ -90,7 +94,8 @@ async def query_chat(
                 conversation_history=conversation_messages,
                 metadata_filters=metadata_filters,
                 user_id=current_user.id,
-                conversation_id=conversation_id  # Explicitly pass conversation_id
+                conversation_id=conversation_id,  # Explicitly pass conversation_id
+                deadline=deadline
             )
             
             # Get sources (with safety check)
@@ -104,7 +109,8 @@ async def query_chat(
                 conversation_id,
                 rag_response["stream"],
                 conversation_repository,
-                sources
+                sources,
+                rag_response.get("degradations")
             )
             
             # Return streaming response
@@ -140,7 +146,8 @@ async def query_chat(
                     user_id=current_user.id,
                     conversation_id=conversation_id,  # Explicitly pass conversation_id
                     capture_raw_output=debug_raw,  # Pass the debug flag to capture raw output
-                    return_raw_ollama=raw_ollama_response  # Pass the raw Ollama response flag
+                    return_raw_ollama=raw_ollama_response,  # Pass the raw Ollama response flag
+                    deadline=deadline
                 )
                 
                 # If raw_ollama_response is true, return the raw output directly
@@ -204,7 +211,8 @@ async def query_chat(
                 conversation_id=conversation_id,
                 citations=sources,
                 warnings=warnings if warnings else None,
-                raw_ollama_output=raw_ollama_output
+                raw_ollama_output=raw_ollama_output,
+                degradations=deadline.degradations or None
             )
     except Exception as e:
         # Handle errors
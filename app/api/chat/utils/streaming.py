@@ -4,8 +4,9 @@ Streaming utilities for the chat API.
 This module contains utility functions for streaming responses in the chat API.
 """
 
+import json
 import logging
-from typing import AsyncGenerator, Dict, Any
+from typing import AsyncGenerator, Dict, Any, List, Optional
 from sse_starlette.sse import EventSourceResponse
 from uuid import UUID
 
@@ -16,7 +17,8 @@ async def create_event_generator(
     conversation_id: str,
     stream_generator: AsyncGenerator[str, None],
     conversation_repository,
-    sources: list = None
+    sources: list = None,
+    degradations: Optional[List[Dict[str, Any]]] = None
 ) -> AsyncGenerator[Dict[str, Any], None]:
     """
     Create an event generator for streaming responses.
@@ -26,6 +28,7 @@ async def create_event_generator(
         stream_generator: The generator that yields tokens
         conversation_repository: Repository for storing messages
         sources: List of sources for citations
+        degradations: Stages skipped to meet the request deadline
         
     Returns:
         An async generator that yields events for SSE
@@ -35,6 +38,10 @@ async def create_event_generator(
     # First, send the conversation ID as a separate event with a specific event type
     yield {"event": "conversation_id", "data": conversation_id}
     
+    # Tell the client which stages were skipped to answer in time
+    if degradations:
+        yield {"event": "degradations", "data": json.dumps(degradations)}
+    
     # Stream the response
     async for token in stream_generator:
         full_response += token
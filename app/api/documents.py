@@ -1,5 +1,10 @@
+import asyncio
 import logging
 import os
+import shutil
+import time
+import uuid
+import zipfile
 from typing import List, Dict, Any, Optional, Set
 from uuid import UUID
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks, Query, Depends
@@ -14,7 +19,12 @@ from app.models.user import User
 from app.db.models import Document as DBDocument
 from app.rag.document_processor import DocumentProcessor
 from app.rag.vector_store import VectorStore
-from app.utils.file_utils import validate_file, save_upload_file, delete_document_files
+from app.rag.ingest_metrics import get_ingest_monitor
+from app.utils.file_utils import (
+    validate_file, save_upload_file_streaming, delete_document_files,
+    write_stream_atomic, iter_upload_chunks, iter_zip_member_chunks, get_max_file_size,
+    UploadTooLargeError, ALLOWED_EXTENSIONS, MAX_ARCHIVE_SIZE
+)
 from app.core.config import UPLOAD_DIR, CHUNK_SIZE, CHUNK_OVERLAP
 from app.db.dependencies import get_db, get_document_repository
 from app.db.repositories.document_repository import DocumentRepository
@@ -32,6 +42,95 @@ document_processor = DocumentProcessor()
 # Vector store
 vector_store = VectorStore()
 
+# Processing tasks started by batch uploads
+_ingest_tasks: Set[asyncio.Task] = set()
+
+async def _create_document_record(
+    document_id,
+    filename: str,
+    folder: str,
+    tag_list: List[str],
+    user_id,
+    file_size: Optional[int] = None
+) -> None:
+    """
+    Create a document record and link its tags in a single transaction
+    """
+    from datetime import datetime
+    
+    # We'll use raw SQL to avoid async/sync issues
+    from app.db.session import AsyncSessionLocal
+    
+    db = AsyncSessionLocal()
+    try:
+        # Create document record
+        query = text("""
+            INSERT INTO documents (id, filename, folder, uploaded, processing_status, user_id, file_size, file_type)
+            VALUES (:id, :filename, :folder, :uploaded, :status, :user_id, :file_size, :file_type)
+        """)
+        
+        _, ext = os.path.splitext(filename.lower())
+        await db.execute(query, {
+            "id": document_id,
+            "filename": filename,
+            "folder": folder,
+            "uploaded": datetime.utcnow(),
+            "status": "pending",
+            "user_id": user_id,
+            "file_size": file_size,
+            "file_type": ext[1:] if ext else None
+        })
+        
+        # Add tags if provided
+        for tag_name in tag_list:
+            # Check if tag exists
+            tag_query = text("SELECT id FROM tags WHERE name = :name")
+            tag_result = await db.execute(tag_query, {"name": tag_name})
+            tag_row = tag_result.fetchone()
+            
+            if tag_row:
+                tag_id = tag_row[0]
+                # Update usage count
+                await db.execute(
+                    text("UPDATE tags SET usage_count = usage_count + 1 WHERE id = :id"),
+                    {"id": tag_id}
+                )
+            else:
+                # Create new tag
+                tag_insert = text("""
+                    INSERT INTO tags (name, created_at, usage_count)
+                    VALUES (:name, :created_at, 1)
+                    RETURNING id
+                """)
+                tag_result = await db.execute(
+                    tag_insert,
+                    {"name": tag_name, "created_at": datetime.utcnow()}
+                )
+                tag_id = tag_result.fetchone()[0]
+            
+            # Link tag to document
+            await db.execute(
+                text("INSERT INTO document_tags (document_id, tag_id) VALUES (:doc_id, :tag_id)"),
+                {"doc_id": document_id, "tag_id": tag_id}
+            )
+        
+        # Commit transaction
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise e
+    finally:
+        await db.close()
+
+def _parse_upload_form(tags: str, folder: str):
+    """
+    Normalize the tags and folder form fields shared by the upload endpoints
+    """
+    tag_list = [tag.strip() for tag in tags.split(",") if tag.strip()] if tags else []
+    if not folder.startswith("/"):
+        folder = "/" + folder
+    return tag_list, folder
+
 @router.post("/upload")
 async def upload_document(
     file: UploadFile = File(...),
@@ -44,97 +143,168 @@ async def upload_document(
     """
     try:
         # Validate file
-        if not validate_file(file):
-            raise HTTPException(status_code=400, detail=f"File type not allowed: {file.filename}")
+        is_valid, error_message = await validate_file(file)
+        if not is_valid:
+            raise HTTPException(status_code=400, detail=error_message)
         
-        # Parse tags
-        tag_list = [tag.strip() for tag in tags.split(",")] if tags else []
-        
-        # Validate folder
-        if not folder.startswith("/"):
-            folder = "/" + folder
-        
-        # Create a simple document record with minimal information
-        import uuid
-        from datetime import datetime
+        tag_list, folder = _parse_upload_form(tags, folder)
         
         # Generate a document ID
         document_id = uuid.uuid4()
         
-        # Save file to disk first
-        file_path = await save_upload_file(file, str(document_id))
+        # Stream file to disk first
+        saved = await save_upload_file_streaming(file, str(document_id))
         
-        # Create a simple document record in the database
-        # We'll use raw SQL to avoid async/sync issues
-        from sqlalchemy import text
-        from app.db.session import AsyncSessionLocal
+        await _create_document_record(
+            document_id, file.filename, folder, tag_list, current_user.id, saved["size"]
+        )
         
-        db = AsyncSessionLocal()
+        return {
+            "success": True,
+            "message": f"Document {file.filename} uploaded successfully",
+            "document_id": str(document_id),
+            "file_size": saved["size"],
+            "sha256": saved["sha256"]
+        }
+    except HTTPException:
+        raise
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error uploading document: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error uploading document: {str(e)}")
+
+def _schedule_processing(document_id) -> None:
+    """
+    Start processing a freshly uploaded document without waiting for the rest of the batch
+    """
+    task = asyncio.create_task(process_document_background([document_id]))
+    # Keep a reference so the task is not garbage collected while running
+    _ingest_tasks.add(task)
+    task.add_done_callback(_ingest_tasks.discard)
+
+async def _ingest_zip_upload(
+    file: UploadFile,
+    folder: str,
+    tag_list: List[str],
+    user_id,
+    process: bool
+) -> List[Dict[str, Any]]:
+    """
+    Expand a zip upload member by member, feeding each file to ingest as it is written
+    """
+    results = []
+    archive_dir = os.path.join(UPLOAD_DIR, f".archive-{uuid.uuid4().hex}")
+    archive_path = os.path.join(archive_dir, "upload.zip")
+    
+    try:
+        await write_stream_atomic(iter_upload_chunks(file), archive_path, MAX_ARCHIVE_SIZE)
+        archive = await asyncio.to_thread(zipfile.ZipFile, archive_path)
         try:
-            # Create document record
-            query = text("""
-                INSERT INTO documents (id, filename, folder, uploaded, processing_status, user_id)
-                VALUES (:id, :filename, :folder, :uploaded, :status, :user_id)
-            """)
-            
-            await db.execute(query, {
-                "id": document_id,
-                "filename": file.filename,
-                "folder": folder,
-                "uploaded": datetime.utcnow(),
-                "status": "pending",
-                "user_id": current_user.id
-            })
-            
-            # Add tags if provided
-            for tag_name in tag_list:
-                # Check if tag exists
-                tag_query = text("SELECT id FROM tags WHERE name = :name")
-                tag_result = await db.execute(tag_query, {"name": tag_name})
-                tag_row = tag_result.fetchone()
+            for member in archive.infolist():
+                if member.is_dir():
+                    continue
+                filename = os.path.basename(member.filename)
+                _, ext = os.path.splitext(filename.lower())
+                if not filename or ext not in ALLOWED_EXTENSIONS:
+                    results.append({"filename": member.filename, "success": False, "error": f"File type {ext} is not allowed"})
+                    continue
                 
-                if tag_row:
-                    tag_id = tag_row[0]
-                    # Update usage count
-                    await db.execute(
-                        text("UPDATE tags SET usage_count = usage_count + 1 WHERE id = :id"),
-                        {"id": tag_id}
-                    )
-                else:
-                    # Create new tag
-                    tag_insert = text("""
-                        INSERT INTO tags (name, created_at, usage_count)
-                        VALUES (:name, :created_at, 1)
-                        RETURNING id
-                    """)
-                    tag_result = await db.execute(
-                        tag_insert,
-                        {"name": tag_name, "created_at": datetime.utcnow()}
+                # Reject early from the declared size before decompressing anything
+                max_size = get_max_file_size(filename)
+                if member.file_size > max_size:
+                    results.append({"filename": member.filename, "success": False, "error": f"File exceeds maximum size of {max_size/(1024*1024):.1f}MB"})
+                    continue
+                
+                document_id = uuid.uuid4()
+                file_path = os.path.join(UPLOAD_DIR, str(document_id), filename)
+                try:
+                    # The limit is enforced again while streaming, since declared sizes can lie
+                    saved = await write_stream_atomic(
+                        iter_zip_member_chunks(archive, member), file_path, max_size
                     )
-                    tag_id = tag_result.fetchone()[0]
+                    await _create_document_record(document_id, filename, folder, tag_list, user_id, saved["size"])
+                except Exception as e:
+                    delete_document_files(str(document_id))
+                    results.append({"filename": member.filename, "success": False, "error": str(e)})
+                    continue
                 
-                # Link tag to document
-                await db.execute(
-                    text("INSERT INTO document_tags (document_id, tag_id) VALUES (:doc_id, :tag_id)"),
-                    {"doc_id": document_id, "tag_id": tag_id}
-                )
+                if process:
+                    _schedule_processing(document_id)
+                results.append({
+                    "filename": member.filename,
+                    "success": True,
+                    "document_id": str(document_id),
+                    "file_size": saved["size"],
+                    "sha256": saved["sha256"]
+                })
+        finally:
+            archive.close()
+    finally:
+        await file.close()
+        shutil.rmtree(archive_dir, ignore_errors=True)
+    
+    return results
+
+@router.post("/upload-batch")
+async def upload_documents_batch(
+    files: List[UploadFile] = File(...),
+    tags: str = Form(""),
+    folder: str = Form("/"),
+    process: bool = Form(True),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Upload several documents, or zip archives of documents, in one request.
+    
+    Each file is streamed to disk and registered as soon as it is read, and
+    (when process is set) its processing starts immediately rather than after
+    the whole batch has been stored.
+    """
+    tag_list, folder = _parse_upload_form(tags, folder)
+    results = []
+    
+    for file in files:
+        _, ext = os.path.splitext(file.filename.lower())
+        try:
+            if ext == ".zip":
+                results.extend(await _ingest_zip_upload(file, folder, tag_list, current_user.id, process))
+                continue
             
-            # Commit transaction
-            await db.commit()
+            is_valid, error_message = await validate_file(file)
+            if not is_valid:
+                await file.close()
+                results.append({"filename": file.filename, "success": False, "error": error_message})
+                continue
             
-            return {
+            document_id = uuid.uuid4()
+            saved = await save_upload_file_streaming(file, str(document_id))
+            try:
+                await _create_document_record(document_id, file.filename, folder, tag_list, current_user.id, saved["size"])
+            except Exception:
+                delete_document_files(str(document_id))
+                raise
+            
+            if process:
+                _schedule_processing(document_id)
+            results.append({
+                "filename": file.filename,
                 "success": True,
-                "message": f"Document {file.filename} uploaded successfully",
-                "document_id": str(document_id)
-            }
+                "document_id": str(document_id),
+                "file_size": saved["size"],
+                "sha256": saved["sha256"]
+            })
         except Exception as e:
-            await db.rollback()
-            raise e
-        finally:
-            await db.close()
-    except Exception as e:
-        logger.error(f"Error uploading document: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error uploading document: {str(e)}")
+            logger.error(f"Error uploading {file.filename} in batch: {str(e)}")
+            results.append({"filename": file.filename, "success": False, "error": str(e)})
+    
+    uploaded = sum(1 for r in results if r["success"])
+    return {
+        "success": uploaded > 0,
+        "message": f"Uploaded {uploaded} of {len(results)} documents",
+        "documents": results
+    }
+
 @router.get("/list", response_model=List[DocumentInfo])
 async def list_documents(
     tags: Optional[List[str]] = Query(None),
@@ -468,6 +638,38 @@ async def delete_document(
         logger.error(f"Error deleting document: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error deleting document: {str(e)}")
 
+async def _analyze_document_batch(
+    db: AsyncSession,
+    processor: DocumentProcessor,
+    document_ids: List[UUID]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Determine chunking decisions for a batch up front so similar files share one analysis
+    """
+    query = text("""
+        SELECT id, filename, content, doc_metadata, folder, uploaded
+        FROM documents WHERE id = :id
+    """)
+    documents = []
+    for document_id in document_ids:
+        result = await db.execute(query, {"id": document_id})
+        row = result.fetchone()
+        if row:
+            documents.append(Document(
+                id=str(row.id),
+                filename=row.filename,
+                content=row.content or "",
+                metadata=row.doc_metadata or {},
+                folder=row.folder,
+                uploaded=row.uploaded
+            ))
+    
+    try:
+        return await processor.analyze_documents(documents)
+    except Exception as e:
+        logger.error(f"Error analyzing document batch: {str(e)}")
+        return {}
+
 async def process_document_background(
     document_ids: List[UUID],
     force_reprocess: bool = False,
@@ -490,10 +692,13 @@ async def process_document_background(
             chunking_strategy=chunking_strategy
         )
         
+        decisions = {}
+        if len(document_ids) > 1:
+            decisions = await _analyze_document_batch(db, processor, document_ids)
+        
         for document_id in document_ids:
             try:
                 # Get document using raw SQL
-                from sqlalchemy import text
                 query = text("""
                     SELECT id, filename, content, doc_metadata, folder, uploaded, processing_status
                     FROM documents WHERE id = :id
@@ -533,12 +738,15 @@ async def process_document_background(
                 )
                 
                 # Process document with the configured processor
-                processed_document = await processor.process_document(document)
+                processed_document = await processor.process_document(
+                    document, analysis_result=decisions.get(str(doc_row.id))
+                )
                 
                 # Add to vector store
                 await vector_store.add_document(processed_document)
                 
                 # Update processing status to completed
+                persist_started = time.time()
                 await db.execute(
                     update_query,
                     {
@@ -548,6 +756,7 @@ async def process_document_background(
                     }
                 )
                 await db.commit()
+                get_ingest_monitor().observe("persist", time.time() - persist_started)
                 
                 logger.info(f"Document {document_id} processed successfully with {chunking_strategy} chunking strategy")
             except Exception as e:
@@ -588,7 +797,6 @@ async def process_documents(
             # Validate document IDs using raw SQL
             for doc_id in document_ids:
                 # Check if document exists and belongs to the current user
-                from sqlalchemy import text
                 query = text("SELECT id FROM documents WHERE id = :id AND user_id = :user_id")
                 result = await db.execute(query, {"id": doc_id, "user_id": current_user.id})
                 if not result.fetchone():
@@ -635,7 +843,6 @@ async def clear_all_documents(
     """
     try:
         # Get all document IDs using raw SQL for async compatibility
-        from sqlalchemy import text
         result = await db.execute(text("SELECT id FROM documents"))
         document_ids = [str(row[0]) for row in result.fetchall()]
         
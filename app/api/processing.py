@@ -9,7 +9,8 @@ from pydantic import BaseModel, Field
 from app.db.dependencies import get_db, get_document_repository, get_document_processor
 from app.db.repositories.document_repository import DocumentRepository
 from app.rag.document_processor import DocumentProcessor
-from app.rag.processing_job import DocumentProcessingService, ProcessingJob
+from app.rag.processing_job import DocumentProcessingService, ProcessingJob, DatabaseJobStore
+from app.rag.ingest_metrics import get_ingest_monitor
 
 # Initialize router
 router = APIRouter()
@@ -40,6 +41,7 @@ class ProcessingJobResponse(BaseModel):
     document_count: int = Field(..., description="Total number of documents")
     processed_count: int = Field(..., description="Number of processed documents")
     progress_percentage: float = Field(..., description="Progress percentage")
+    metadata: Dict[str, Any] = Field(default_factory=dict, description="Job metadata, including ingest metrics")
     error_message: Optional[str] = Field(None, description="Error message if failed")
 
 class ProcessingJobListResponse(BaseModel):
@@ -65,6 +67,12 @@ async def startup_event():
         processing_service.set_document_repository(document_repo)
         logger.info("Document repository set for processing service")
         
+        # Persist jobs so unfinished ones are resumed after a restart
+        processing_service.set_job_store(DatabaseJobStore(AsyncSessionLocal))
+        
+        # Chunk writes of concurrent jobs each use their own session
+        processing_service.set_session_factory(AsyncSessionLocal)
+        
         # Start processing service
         await processing_service.start()
         logger.info("Processing service started")
@@ -195,4 +203,15 @@ async def cancel_processing_job(
         raise
     except Exception as e:
         logger.error(f"Error cancelling processing job {job_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/metrics", tags=["processing"])
+async def get_ingest_metrics() -> Dict[str, Any]:
+    """
+    Get per-stage ingest timings and throughput
+    
+    Returns:
+        Stage histograms (load, analyze, split, embed, upsert, persist),
+        volume counters and recent chunks/sec and bytes/sec
+    """
+    return get_ingest_monitor().get_stats()
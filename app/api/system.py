@@ -7,6 +7,14 @@ from fastapi import APIRouter, HTTPException
 
 from app.models.system import SystemStats, ModelInfo, HealthCheck
 from app.rag.ollama_client import OllamaClient
+from app.rag.llm_scheduler import get_llm_scheduler
+from app.rag.single_flight import get_single_flight
+from app.rag.circuit_breaker import get_circuit_breakers
+from app.rag.hedged_requests import get_request_hedger
+from app.rag.model_residency import get_model_residency
+from app.rag.query_metrics import get_query_monitor
+from app.rag.agents.retrieval_judge import get_query_analysis_stats
+from app.rag.deadline import get_deadline_stats
 from app.rag.vector_store import VectorStore
 from app.db.dependencies import get_db, get_document_repository
 from app.db.repositories.document_repository import DocumentRepository
@@ -55,6 +63,41 @@ async def get_stats(
         logger.error(f"Error getting system stats: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting system stats: {str(e)}")
 
+@router.get("/llm-scheduler")
+async def get_llm_scheduler_stats():
+    """
+    Get LLM queue wait times per priority class, per-model load, request
+    coalescing, circuit breaker states and request hedging
+    """
+    return {
+        **get_llm_scheduler().get_stats(),
+        "single_flight": get_single_flight().get_stats(),
+        "circuit_breakers": get_circuit_breakers().get_stats(),
+        "hedging": get_request_hedger().get_stats()
+    }
+
+@router.get("/query-metrics")
+async def get_query_metrics():
+    """
+    Get per-stage RAG query timings, time-to-first-token, the most frequent
+    critical paths, how query analyses were served and which stages were
+    skipped to meet request deadlines
+    """
+    return {
+        **get_query_monitor().get_stats(),
+        "query_analysis": get_query_analysis_stats(),
+        "deadline_degradations": get_deadline_stats()
+    }
+
+@router.get("/model-residency")
+async def get_model_residency_stats():
+    """
+    Get configured and loaded models, their keep-alive and observed cold start times
+    """
+    residency = get_model_residency()
+    await residency.refresh()
+    return residency.get_stats()
+
 @router.get("/models", response_model=List[ModelInfo])
 async def get_models():
     """
@@ -8,6 +8,9 @@ from app.cache.base import Cache
 from app.cache.vector_search_cache import VectorSearchCache
 from app.cache.document_cache import DocumentCache
 from app.cache.llm_response_cache import LLMResponseCache
+from app.cache.chunking_decision_cache import ChunkingDecisionCache
+from app.cache.semantic_boundary_cache import SemanticBoundaryCache
+from app.cache.query_analysis_cache import QueryAnalysisCache
 from app.cache.cache_manager import CacheManager
 
 __all__ = [
@@ -15,5 +18,8 @@ __all__ = [
     "VectorSearchCache",
     "DocumentCache",
     "LLMResponseCache",
+    "ChunkingDecisionCache",
+    "SemanticBoundaryCache",
+    "QueryAnalysisCache",
     "CacheManager",
 ]
\ No newline at end of file
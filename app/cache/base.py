@@ -5,12 +5,66 @@ Base cache implementation for Metis_RAG.
 import os
 import time
 import json
+import atexit
 import logging
 import pickle
-from typing import Dict, Any, Optional, Generic, TypeVar, List
+import sqlite3
+import threading
+import weakref
+from typing import Dict, Any, Optional, Generic, TypeVar, List, Tuple, Iterator
+
+from app.core.config import CACHE_FLUSH_INTERVAL_SECONDS, CACHE_FLUSH_BATCH_SIZE
 
 T = TypeVar('T')
 
+# Persistent caches with writes waiting to be flushed by the background flusher
+_persistent_caches: "weakref.WeakSet[Cache]" = weakref.WeakSet()
+_flush_wakeup = threading.Event()
+_flusher_thread: Optional[threading.Thread] = None
+_flusher_lock = threading.Lock()
+
+def _flush_loop() -> None:
+    """Flush every persistent cache's pending writes by time, or sooner when a cache asks"""
+    while True:
+        _flush_wakeup.wait(CACHE_FLUSH_INTERVAL_SECONDS)
+        _flush_wakeup.clear()
+        for cache in list(_persistent_caches):
+            cache.flush()
+
+def _start_flusher() -> None:
+    """Start the shared background flusher thread once"""
+    global _flusher_thread
+    with _flusher_lock:
+        if _flusher_thread is None:
+            _flusher_thread = threading.Thread(target=_flush_loop, name="cache-flusher", daemon=True)
+            _flusher_thread.start()
+
+@atexit.register
+def flush_all_caches() -> None:
+    """Flush the pending writes of every persistent cache (runs at interpreter exit)"""
+    for cache in list(_persistent_caches):
+        cache.flush()
+
+
+class _LazyEntry(dict):
+    """
+    Cache entry loaded from disk whose value is unpickled on first access.
+
+    Startup only reads keys and timestamps, so a large cache no longer
+    unpickles every value before the first request.
+    """
+    def __init__(self, cache: "Cache", key: str, timestamp: float):
+        super().__init__(timestamp=timestamp)
+        self._cache = cache
+        self._key = key
+
+    def __missing__(self, name: str) -> Any:
+        if name != "value":
+            raise KeyError(name)
+        value = self._cache._read_value(self._key)
+        self["value"] = value
+        return value
+
 class Cache(Generic[T]):
     """
     Generic cache implementation with disk persistence.
@@ -18,12 +72,19 @@ class Cache(Generic[T]):
     This class provides a generic caching mechanism with optional disk persistence,
     TTL-based expiration, and size-based pruning.
     
+    Entries are persisted incrementally to a SQLite file: set, delete and prune
+    only queue the changed keys, and a background thread writes them once
+    CACHE_FLUSH_INTERVAL_SECONDS have passed or flush_batch_size changes are
+    pending, so a cache write no longer rewrites the whole cache on the
+    event loop.
+    
     Attributes:
         name (str): Name of the cache, used for logging and persistence
         ttl (int): Time-to-live in seconds for cache entries
         max_size (int): Maximum number of entries in the cache
         persist (bool): Whether to persist the cache to disk
         persist_dir (str): Directory for cache persistence
+        flush_batch_size (int): Pending changes that trigger a background flush
         cache (Dict[str, Dict[str, Any]]): In-memory cache storage
         hits (int): Number of cache hits
         misses (int): Number of cache misses
@@ -36,7 +97,8 @@ class Cache(Generic[T]):
         ttl: int = 3600,
         max_size: int = 1000,
         persist: bool = True,
-        persist_dir: str = "data/cache"
+        persist_dir: str = "data/cache",
+        flush_batch_size: Optional[int] = None
     ):
         """
         Initialize a new cache instance.
@@ -47,21 +109,37 @@ class Cache(Generic[T]):
             max_size: Maximum number of entries in the cache (default: 1000)
             persist: Whether to persist the cache to disk (default: True)
             persist_dir: Directory for cache persistence (default: "data/cache")
+            flush_batch_size: Pending changes that trigger a background flush
+                (default: CACHE_FLUSH_BATCH_SIZE)
         """
         self.name = name
         self.ttl = ttl
         self.max_size = max_size
         self.persist = persist
         self.persist_dir = persist_dir
+        self.flush_batch_size = flush_batch_size or CACHE_FLUSH_BATCH_SIZE
         self.cache: Dict[str, Dict[str, Any]] = {}
         self.hits = 0
         self.misses = 0
         self.logger = logging.getLogger(f"app.cache.{name}")
         
+        # Changed entries waiting to be written (None marks a deletion)
+        self._pending: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._pending_clear = False
+        self._pending_lock = threading.Lock()
+        self._db_lock = threading.RLock()
+        self._db: Optional[sqlite3.Connection] = None
+        
         # Create persist directory if needed
         if self.persist:
             os.makedirs(os.path.join(self.persist_dir, self.name), exist_ok=True)
+            self.db_file = os.path.join(self.persist_dir, self.name, "cache.sqlite3")
+            # Reason: another instance of the same cache may still hold unflushed writes
+            for other in list(_persistent_caches):
+                if other.db_file == self.db_file:
+                    other.flush()
             self._load_from_disk()
+            _persistent_caches.add(self)
             self.logger.info(f"Loaded {len(self.cache)} items from disk cache")
     
     def get(self, key: str) -> Optional[T]:
@@ -77,12 +155,19 @@ class Cache(Generic[T]):
         if key in self.cache:
             entry = self.cache[key]
             if time.time() - entry["timestamp"] < self.ttl:
-                self.hits += 1
-                self.logger.debug(f"Cache hit for key: {key}")
-                return entry["value"]
+                try:
+                    value = entry["value"]
+                except KeyError:
+                    # The value's row is gone from disk
+                    del self.cache[key]
+                else:
+                    self.hits += 1
+                    self.logger.debug(f"Cache hit for key: {key}")
+                    return value
             else:
                 # Expired, remove from cache
                 del self.cache[key]
+                self._mark_dirty(key, None)
                 self.logger.debug(f"Cache entry expired for key: {key}")
         
         self.misses += 1
@@ -97,19 +182,19 @@ class Cache(Generic[T]):
             key: Cache key
             value: Value to cache
         """
-        self.cache[key] = {
+        entry = {
             "value": value,
             "timestamp": time.time()
         }
+        self.cache[key] = entry
         self.logger.debug(f"Cache set for key: {key}")
         
         # Prune cache if it gets too large
         if len(self.cache) > self.max_size:
             self._prune()
             
-        # Persist to disk if enabled
-        if self.persist:
-            self._save_to_disk()
+        # Queue the entry for the background flush
+        self._mark_dirty(key, entry)
     
     def delete(self, key: str) -> bool:
         """
@@ -124,11 +209,7 @@ class Cache(Generic[T]):
         if key in self.cache:
             del self.cache[key]
             self.logger.debug(f"Cache entry deleted for key: {key}")
-            
-            # Persist changes to disk if enabled
-            if self.persist:
-                self._save_to_disk()
-            
+            self._mark_dirty(key, None)
             return True
         
         return False
@@ -140,9 +221,11 @@ class Cache(Generic[T]):
         self.cache = {}
         self.logger.info(f"Cache '{self.name}' cleared")
         
-        # Persist changes to disk if enabled
         if self.persist:
-            self._save_to_disk()
+            with self._pending_lock:
+                self._pending = {}
+                self._pending_clear = True
+            self._request_flush()
     
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -162,7 +245,8 @@ class Cache(Generic[T]):
             "misses": self.misses,
             "hit_ratio": hit_ratio,
             "ttl_seconds": self.ttl,
-            "persist": self.persist
+            "persist": self.persist,
+            "pending_writes": len(self._pending)
         }
     
     def _prune(self) -> None:
@@ -181,54 +265,196 @@ class Cache(Generic[T]):
         self.cache = dict(sorted_cache[:keep_count])
         self.logger.info(f"Pruned cache to {keep_count} entries")
         
-        # Persist changes to disk if enabled
-        if self.persist:
-            self._save_to_disk()
+        # Queue deletions for the dropped entries
+        for key, _ in sorted_cache[keep_count:]:
+            self._mark_dirty(key, None)
     
-    def _save_to_disk(self) -> None:
+    def flush(self) -> None:
         """
-        Save the cache to disk.
+        Write pending changes to disk.
+        
+        Only the changed entries are written, in one transaction. If the
+        write fails, the changes are queued again for the next flush. Called
+        by the background flusher, at exit, and by callers that need the disk
+        state to be current.
         """
-        try:
-            cache_file = os.path.join(self.persist_dir, self.name, "cache.pickle")
-            with open(cache_file, "wb") as f:
-                pickle.dump(self.cache, f)
+        if not self.persist or self._db is None:
+            return
+        with self._db_lock:
+            with self._pending_lock:
+                if not self._pending and not self._pending_clear:
+                    return
+                pending, self._pending = self._pending, {}
+                clear, self._pending_clear = self._pending_clear, False
             
-            # Save stats separately as JSON for easier inspection
-            stats_file = os.path.join(self.persist_dir, self.name, "stats.json")
-            with open(stats_file, "w") as f:
-                json.dump(self.get_stats(), f, indent=2)
-                
-            self.logger.debug(f"Cache saved to disk: {cache_file}")
-        except Exception as e:
-            self.logger.error(f"Error saving cache to disk: {str(e)}")
+            upserts = []
+            for key, entry in pending.items():
+                if entry is None:
+                    continue
+                try:
+                    upserts.append((key, pickle.dumps(entry["value"], protocol=pickle.HIGHEST_PROTOCOL), entry["timestamp"]))
+                except Exception as e:
+                    # Reason: retrying can't make a value picklable, so it stays memory-only
+                    self.logger.error(f"Error pickling cache entry {key}: {str(e)}")
+            deletes = [(key,) for key, entry in pending.items() if entry is None]
+            try:
+                with self._db:
+                    if clear:
+                        self._db.execute("DELETE FROM entries")
+                    self._db.executemany("DELETE FROM entries WHERE key = ?", deletes)
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO entries (key, value, timestamp) VALUES (?, ?, ?)",
+                        upserts
+                    )
+            except Exception as e:
+                self.logger.error(f"Error saving cache to disk, will retry: {str(e)}")
+                self._requeue(pending, clear)
+                return
+            
+            self.logger.debug(f"Flushed {len(upserts)} writes and {len(deletes)} deletions to {self.db_file}")
+            try:
+                # Save stats separately as JSON for easier inspection
+                stats_file = os.path.join(self.persist_dir, self.name, "stats.json")
+                with open(stats_file, "w") as f:
+                    json.dump(self.get_stats(), f, indent=2)
+            except Exception as e:
+                self.logger.error(f"Error saving cache stats: {str(e)}")
+    
+    def _requeue(self, pending: Dict[str, Optional[Dict[str, Any]]], clear: bool) -> None:
+        """
+        Put the changes of a failed flush back so the next flush retries them.
+        
+        Changes queued since the failed flush are newer and take precedence.
+        
+        Args:
+            pending: Changes the failed flush tried to write
+            clear: Whether the failed flush was to clear the table first
+        """
+        with self._pending_lock:
+            # A clear queued since then supersedes the failed changes
+            if not self._pending_clear:
+                for key, entry in pending.items():
+                    self._pending.setdefault(key, entry)
+                self._pending_clear = clear
+    
+    def _mark_dirty(self, key: str, entry: Optional[Dict[str, Any]]) -> None:
+        """
+        Queue a changed entry for the next flush.
+        
+        Args:
+            key: Cache key
+            entry: New entry, or None if the key was removed
+        """
+        if not self.persist:
+            return
+        with self._pending_lock:
+            self._pending[key] = entry
+            pending_count = len(self._pending)
+        if CACHE_FLUSH_INTERVAL_SECONDS <= 0:
+            # Write-through: still only the changed entry is written
+            self.flush()
+        else:
+            _start_flusher()
+            if pending_count >= self.flush_batch_size:
+                _flush_wakeup.set()
+    
+    def _request_flush(self) -> None:
+        """Flush soon, in the background unless writes go through immediately"""
+        if CACHE_FLUSH_INTERVAL_SECONDS <= 0:
+            self.flush()
+        else:
+            _start_flusher()
+            _flush_wakeup.set()
+    
+    def _read_value(self, key: str) -> Any:
+        """
+        Read and unpickle one entry's value from disk.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            The stored value
+            
+        Raises:
+            KeyError: If the entry is not on disk
+        """
+        with self._db_lock:
+            row = self._db.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return pickle.loads(row[0])
     
     def _load_from_disk(self) -> None:
         """
-        Load the cache from disk.
+        Load the cache index from disk.
+        
+        Only keys and timestamps are read; values are unpickled when first
+        accessed. A cache.pickle file from older versions is migrated once.
         """
         try:
-            cache_file = os.path.join(self.persist_dir, self.name, "cache.pickle")
-            if os.path.exists(cache_file):
-                with open(cache_file, "rb") as f:
-                    loaded_cache = pickle.load(f)
-                
-                # Filter out expired entries
-                current_time = time.time()
-                self.cache = {
-                    key: entry
-                    for key, entry in loaded_cache.items()
-                    if current_time - entry["timestamp"] < self.ttl
-                }
-                
-                self.logger.debug(f"Cache loaded from disk: {cache_file}")
-            else:
-                self.logger.debug(f"No cache file found at {cache_file}")
+            self._db = sqlite3.connect(self.db_file, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("PRAGMA mmap_size=268435456")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, timestamp REAL NOT NULL)"
+            )
+            self._migrate_pickle()
+            
+            # Drop expired entries, then index the rest
+            cutoff = time.time() - self.ttl
+            with self._db:
+                self._db.execute("DELETE FROM entries WHERE timestamp <= ?", (cutoff,))
+            rows = self._db.execute("SELECT key, timestamp FROM entries").fetchall()
+            self.cache = {key: _LazyEntry(self, key, timestamp) for key, timestamp in rows}
+            
+            self.logger.debug(f"Cache loaded from disk: {self.db_file}")
         except Exception as e:
             self.logger.error(f"Error loading cache from disk: {str(e)}")
             # Start with an empty cache if loading fails
             self.cache = {}
     
+    def _migrate_pickle(self) -> None:
+        """
+        Move the entries of a legacy cache.pickle file into the SQLite store.
+        """
+        cache_file = os.path.join(self.persist_dir, self.name, "cache.pickle")
+        if not os.path.exists(cache_file):
+            return
+        with open(cache_file, "rb") as f:
+            loaded_cache = pickle.load(f)
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, timestamp) VALUES (?, ?, ?)",
+                [
+                    (key, pickle.dumps(entry["value"], protocol=pickle.HIGHEST_PROTOCOL), entry["timestamp"])
+                    for key, entry in loaded_cache.items()
+                ]
+            )
+        os.remove(cache_file)
+        self.logger.info(f"Migrated {len(loaded_cache)} entries from {cache_file}")
+    
+    def iter_items(self) -> Iterator[Tuple[str, T]]:
+        """
+        Iterate over all keys and values in the cache.
+        
+        Values not loaded yet are read from disk as the iteration reaches
+        them; entries whose row is gone are dropped from the cache instead of
+        failing the caller. The cache may be changed while iterating.
+        
+        Yields:
+            (key, value) tuples
+        """
+        for key, entry in list(self.cache.items()):
+            try:
+                value = entry["value"]
+            except KeyError:
+                self.logger.warning(f"Cache entry {key} is missing on disk, dropping it")
+                self.cache.pop(key, None)
+                continue
+            yield key, value
+    
     def get_keys(self) -> List[str]:
         """
         Get all keys in the cache.
@@ -264,6 +490,7 @@ class Cache(Generic[T]):
             else:
                 # Expired, remove from cache
                 del self.cache[key]
+                self._mark_dirty(key, None)
         
         return False
     
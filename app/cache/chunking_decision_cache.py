@@ -0,0 +1,157 @@
+"""
+Chunking decision cache implementation for Metis_RAG.
+"""
+
+import re
+import math
+from typing import Dict, Any, Optional
+
+from app.cache.base import Cache
+
+_HEADER_PATTERN = re.compile(r'^\s*#{1,6}\s+\S')
+_LIST_PATTERN = re.compile(r'^\s*(?:[-*+]|\d+[.)])\s+\S')
+_PARAGRAPH_SPLIT = re.compile(r'\n\s*\n')
+
+class ChunkingDecisionCache(Cache[Dict[str, Any]]):
+    """
+    Cache implementation for chunking strategy decisions.
+
+    Chunking Judge and DocumentAnalysisService recommendations depend on the
+    file type and the overall shape of a document much more than on its exact
+    text, so decisions are keyed by file type plus a coarse structural
+    fingerprint of the content sample. Documents that look alike reuse the
+    decision instead of paying another LLM round-trip.
+
+    Attributes:
+        Inherits all attributes from the base Cache class
+    """
+
+    def __init__(
+        self,
+        ttl: int = 604800,  # 7 days default TTL for chunking decisions
+        max_size: int = 1000,
+        persist: bool = True,
+        persist_dir: str = "data/cache"
+    ):
+        """
+        Initialize a new chunking decision cache.
+
+        Args:
+            ttl: Time-to-live in seconds for cache entries (default: 604800)
+            max_size: Maximum number of entries in the cache (default: 1000)
+            persist: Whether to persist the cache to disk (default: True)
+            persist_dir: Directory for cache persistence (default: "data/cache")
+        """
+        super().__init__(
+            name="chunking_decision",
+            ttl=ttl,
+            max_size=max_size,
+            persist=persist,
+            persist_dir=persist_dir
+        )
+
+    @staticmethod
+    def compute_fingerprint(content_sample: str) -> str:
+        """
+        Compute a structural fingerprint of a content sample.
+
+        The fingerprint buckets the features the chunking analysis looks at
+        (headers, lists, tables, code blocks, line and paragraph length) so
+        that structurally similar documents map to the same value.
+
+        Args:
+            content_sample: Representative sample of the document content
+
+        Returns:
+            Fingerprint string
+        """
+        lines = [line for line in content_sample.splitlines() if line.strip()]
+        line_count = max(len(lines), 1)
+
+        header_ratio = sum(1 for line in lines if _HEADER_PATTERN.match(line)) / line_count
+        list_ratio = sum(1 for line in lines if _LIST_PATTERN.match(line)) / line_count
+        table_ratio = sum(1 for line in lines if line.count("|") >= 2) / line_count
+        has_code = "```" in content_sample
+
+        avg_line_length = sum(len(line) for line in lines) / line_count
+        paragraphs = [p for p in _PARAGRAPH_SPLIT.split(content_sample) if p.strip()]
+        avg_paragraph_length = sum(len(p) for p in paragraphs) / max(len(paragraphs), 1)
+
+        return (
+            f"h{ChunkingDecisionCache._bucket_ratio(header_ratio)}"
+            f"-l{ChunkingDecisionCache._bucket_ratio(list_ratio)}"
+            f"-t{ChunkingDecisionCache._bucket_ratio(table_ratio)}"
+            f"-c{int(has_code)}"
+            f"-ll{ChunkingDecisionCache._bucket_length(avg_line_length)}"
+            f"-pl{ChunkingDecisionCache._bucket_length(avg_paragraph_length)}"
+        )
+
+    def get_decision(self, file_type: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached chunking decision.
+
+        Args:
+            file_type: File extension without the dot (e.g. "pdf")
+            fingerprint: Structural fingerprint from compute_fingerprint
+
+        Returns:
+            Cached decision if found, None otherwise
+        """
+        return self.get(self._create_decision_key(file_type, fingerprint))
+
+    def set_decision(self, file_type: str, fingerprint: str, decision: Dict[str, Any]) -> None:
+        """
+        Cache a chunking decision.
+
+        Args:
+            file_type: File extension without the dot (e.g. "pdf")
+            fingerprint: Structural fingerprint from compute_fingerprint
+            decision: Decision with strategy, parameters and justification
+        """
+        self.set(self._create_decision_key(file_type, fingerprint), decision)
+
+    def _create_decision_key(self, file_type: str, fingerprint: str) -> str:
+        """
+        Create a cache key for a chunking decision.
+
+        Args:
+            file_type: File extension without the dot
+            fingerprint: Structural fingerprint
+
+        Returns:
+            Cache key string
+        """
+        return f"decision:{(file_type or 'unknown').lower()}:{fingerprint}"
+
+    @staticmethod
+    def _bucket_ratio(ratio: float) -> int:
+        """Bucket a line ratio into none / rare / common / dominant"""
+        if ratio == 0:
+            return 0
+        if ratio < 0.05:
+            return 1
+        if ratio < 0.2:
+            return 2
+        return 3
+
+    @staticmethod
+    def _bucket_length(length: float) -> int:
+        """Bucket a length on a log2 scale so small variations share a bucket"""
+        return int(math.log2(length)) if length >= 1 else 0
+
+
+# Singleton instance shared by all document processors
+_decision_cache: Optional[ChunkingDecisionCache] = None
+
+def get_chunking_decision_cache() -> ChunkingDecisionCache:
+    """
+    Get the shared chunking decision cache
+
+    Returns:
+        ChunkingDecisionCache instance
+    """
+    global _decision_cache
+    if _decision_cache is None:
+        from app.core.config import CHUNKING_DECISION_CACHE_TTL
+        _decision_cache = ChunkingDecisionCache(ttl=CHUNKING_DECISION_CACHE_TTL)
+    return _decision_cache
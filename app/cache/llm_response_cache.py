@@ -111,29 +111,7 @@ class LLMResponseCache(Cache[Dict[str, Any]]):
         Returns:
             Cache key string
         """
-        # Normalize the prompt by removing extra whitespace
-        normalized_prompt = " ".join(prompt.split())
-        
-        # Create a dictionary of all parameters
-        params = {
-            "model": model,
-            "temperature": temperature
-        }
-        
-        if max_tokens is not None:
-            params["max_tokens"] = max_tokens
-            
-        if additional_params:
-            params.update(additional_params)
-        
-        # Convert parameters to a stable string representation
-        params_str = json.dumps(params, sort_keys=True)
-        
-        # Create a hash of the combined parameters for a shorter key
-        key_data = f"{normalized_prompt}:{params_str}"
-        key_hash = hashlib.md5(key_data.encode()).hexdigest()
-        
-        return f"llm:{key_hash}"
+        return create_response_key(prompt, model, temperature, max_tokens, additional_params)
     
     def invalidate_by_model(self, model: str) -> int:
         """
@@ -149,8 +127,7 @@ class LLMResponseCache(Cache[Dict[str, Any]]):
         keys_to_delete = []
         
         # Find all cache entries for the specified model
-        for key, entry in list(self.cache.items()):
-            response = entry["value"]
+        for key, response in self.iter_items():
             if response.get("model") == model:
                 keys_to_delete.append(key)
                 invalidated_count += 1
@@ -176,11 +153,10 @@ class LLMResponseCache(Cache[Dict[str, Any]]):
         responses = []
         count = 0
         
-        for key, entry in list(self.cache.items()):
+        for key, response in self.iter_items():
             if count >= limit:
                 break
                 
-            response = entry["value"]
             if "prompt" in response and response["prompt"].startswith(prefix):
                 responses.append(response)
                 count += 1
@@ -229,4 +205,52 @@ class LLMResponseCache(Cache[Dict[str, Any]]):
         if response.get("error"):
             return False
             
-        return True
\ No newline at end of file
+        return True
+
+
+def create_response_key(
+    prompt: str,
+    model: str,
+    temperature: float = 0.0,
+    max_tokens: Optional[int] = None,
+    additional_params: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Create the key identifying an LLM request.
+    
+    Shared by the response cache and by request coalescing in the Ollama
+    client, so both treat the same requests as identical.
+    
+    Args:
+        prompt: The prompt sent to the LLM
+        model: The model identifier
+        temperature: The temperature parameter
+        max_tokens: The maximum tokens parameter
+        additional_params: Additional parameters sent to the LLM
+        
+    Returns:
+        Key string
+    """
+    # Normalize the prompt by removing extra whitespace
+    normalized_prompt = " ".join(prompt.split())
+    
+    # Create a dictionary of all parameters
+    params = {
+        "model": model,
+        "temperature": temperature
+    }
+    
+    if max_tokens is not None:
+        params["max_tokens"] = max_tokens
+        
+    if additional_params:
+        params.update(additional_params)
+    
+    # Convert parameters to a stable string representation
+    params_str = json.dumps(params, sort_keys=True)
+    
+    # Create a hash of the combined parameters for a shorter key
+    key_data = f"{normalized_prompt}:{params_str}"
+    key_hash = hashlib.md5(key_data.encode()).hexdigest()
+    
+    return f"llm:{key_hash}"
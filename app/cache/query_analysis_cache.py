@@ -0,0 +1,118 @@
+"""
+Query analysis cache implementation for Metis_RAG.
+"""
+
+import re
+import hashlib
+from typing import Dict, Any, Optional
+
+from app.cache.base import Cache
+
+_WHITESPACE = re.compile(r'\s+')
+_TRAILING_PUNCTUATION = re.compile(r'[\s?!.]+$')
+
+class QueryAnalysisCache(Cache[Dict[str, Any]]):
+    """
+    Cache implementation for Retrieval Judge query analyses.
+
+    The recommended retrieval parameters depend on the wording of a query,
+    not on the documents, so analyses are keyed by model and normalized
+    query text. Repeated and trivially re-worded questions (case,
+    whitespace, trailing punctuation) reuse the analysis instead of paying
+    another LLM round-trip.
+
+    Attributes:
+        Inherits all attributes from the base Cache class
+    """
+
+    def __init__(
+        self,
+        ttl: int = 86400,  # 1 day default TTL for query analyses
+        max_size: int = 5000,
+        persist: bool = True,
+        persist_dir: str = "data/cache"
+    ):
+        """
+        Initialize a new query analysis cache.
+
+        Args:
+            ttl: Time-to-live in seconds for cache entries (default: 86400)
+            max_size: Maximum number of entries in the cache (default: 5000)
+            persist: Whether to persist the cache to disk (default: True)
+            persist_dir: Directory for cache persistence (default: "data/cache")
+        """
+        super().__init__(
+            name="query_analysis",
+            ttl=ttl,
+            max_size=max_size,
+            persist=persist,
+            persist_dir=persist_dir
+        )
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """
+        Normalize a query for cache lookups.
+
+        Args:
+            query: The user query
+
+        Returns:
+            Lowercased query with collapsed whitespace and no trailing punctuation
+        """
+        return _TRAILING_PUNCTUATION.sub('', _WHITESPACE.sub(' ', query.strip().lower()))
+
+    def get_analysis(self, query: str, model: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached query analysis.
+
+        Args:
+            query: The user query
+            model: Model that produced the analysis
+
+        Returns:
+            Cached analysis if found, None otherwise
+        """
+        return self.get(self._create_analysis_key(query, model))
+
+    def set_analysis(self, query: str, model: str, analysis: Dict[str, Any]) -> None:
+        """
+        Cache a query analysis.
+
+        Args:
+            query: The user query
+            model: Model that produced the analysis
+            analysis: Analysis with complexity, parameters and justification
+        """
+        self.set(self._create_analysis_key(query, model), analysis)
+
+    def _create_analysis_key(self, query: str, model: str) -> str:
+        """
+        Create a cache key for a query analysis.
+
+        Args:
+            query: The user query
+            model: Model that produced the analysis
+
+        Returns:
+            Cache key string
+        """
+        query_hash = hashlib.sha256(self.normalize_query(query).encode('utf-8')).hexdigest()
+        return f"analysis:{model}:{query_hash}"
+
+
+# Singleton instance shared by all Retrieval Judges
+_analysis_cache: Optional[QueryAnalysisCache] = None
+
+def get_query_analysis_cache() -> QueryAnalysisCache:
+    """
+    Get the shared query analysis cache
+
+    Returns:
+        QueryAnalysisCache instance
+    """
+    global _analysis_cache
+    if _analysis_cache is None:
+        from app.core.config import RETRIEVAL_JUDGE_ANALYSIS_CACHE_TTL
+        _analysis_cache = QueryAnalysisCache(ttl=RETRIEVAL_JUDGE_ANALYSIS_CACHE_TTL)
+    return _analysis_cache
@@ -0,0 +1,102 @@
+"""
+Semantic boundary cache implementation for Metis_RAG.
+"""
+
+import hashlib
+from typing import List, Optional
+
+from app.cache.base import Cache
+
+class SemanticBoundaryCache(Cache[List[int]]):
+    """
+    Cache implementation for LLM-identified semantic boundaries.
+
+    Boundaries are stored per section of text, keyed by a hash of the
+    section together with the model and target chunk size, so retried jobs
+    and re-ingested documents don't ask the LLM about the same section again.
+
+    Attributes:
+        Inherits all attributes from the base Cache class
+    """
+
+    def __init__(
+        self,
+        ttl: int = 2592000,  # 30 days default TTL for section boundaries
+        max_size: int = 10000,
+        persist: bool = True,
+        persist_dir: str = "data/cache"
+    ):
+        """
+        Initialize a new semantic boundary cache.
+
+        Args:
+            ttl: Time-to-live in seconds for cache entries (default: 2592000)
+            max_size: Maximum number of entries in the cache (default: 10000)
+            persist: Whether to persist the cache to disk (default: True)
+            persist_dir: Directory for cache persistence (default: "data/cache")
+        """
+        super().__init__(
+            name="semantic_boundary",
+            ttl=ttl,
+            max_size=max_size,
+            persist=persist,
+            persist_dir=persist_dir
+        )
+
+    def get_boundaries(self, section: str, model: str, chunk_size: int) -> Optional[List[int]]:
+        """
+        Get cached boundaries for a section.
+
+        Args:
+            section: Section text sent to the LLM
+            model: Model that identified the boundaries
+            chunk_size: Target chunk size used in the prompt
+
+        Returns:
+            Cached boundary positions if found, None otherwise
+        """
+        return self.get(self._create_boundary_key(section, model, chunk_size))
+
+    def set_boundaries(self, section: str, model: str, chunk_size: int, boundaries: List[int]) -> None:
+        """
+        Cache boundaries for a section.
+
+        Args:
+            section: Section text sent to the LLM
+            model: Model that identified the boundaries
+            chunk_size: Target chunk size used in the prompt
+            boundaries: Character positions where chunks start
+        """
+        self.set(self._create_boundary_key(section, model, chunk_size), list(boundaries))
+
+    def _create_boundary_key(self, section: str, model: str, chunk_size: int) -> str:
+        """
+        Create a cache key for a section's boundaries.
+
+        Args:
+            section: Section text
+            model: Model name
+            chunk_size: Target chunk size
+
+        Returns:
+            Cache key string
+        """
+        section_hash = hashlib.sha256(section.encode("utf-8")).hexdigest()
+        return f"boundaries:{model}:{chunk_size}:{section_hash}"
+
+
+# Singleton instance shared by all semantic chunkers
+_boundary_cache: Optional[SemanticBoundaryCache] = None
+
+def get_semantic_boundary_cache() -> SemanticBoundaryCache:
+    """
+    Get the shared semantic boundary cache
+
+    Returns:
+        SemanticBoundaryCache instance
+    """
+    global _boundary_cache
+    if _boundary_cache is None:
+        from app.core.config import SEMANTIC_BOUNDARY_CACHE_TTL
+        _boundary_cache = SemanticBoundaryCache(ttl=SEMANTIC_BOUNDARY_CACHE_TTL)
+    return _boundary_cache
@@ -129,8 +129,7 @@ class VectorSearchCache(Cache[List[Dict[str, Any]]]):
         keys_to_delete = []
         
         # Find all cache entries that contain the document ID
-        for key, entry in list(self.cache.items()):
-            results = entry["value"]
+        for key, results in self.iter_items():
             for result in results:
                 if result.get("document_id") == document_id or result.get("metadata", {}).get("document_id") == document_id:
                     keys_to_delete.append(key)
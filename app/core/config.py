@@ -17,14 +17,81 @@ PROJECT_NAME = "Metis RAG"
 
 # Ollama settings
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "20"))
+OLLAMA_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OLLAMA_MAX_KEEPALIVE_CONNECTIONS", "10"))
+OLLAMA_KEEPALIVE_EXPIRY = float(os.getenv("OLLAMA_KEEPALIVE_EXPIRY", "30"))
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "30"))
+OLLAMA_REQUEST_TIMEOUT = float(os.getenv("OLLAMA_REQUEST_TIMEOUT", "30"))
+OLLAMA_STREAM_TIMEOUT = float(os.getenv("OLLAMA_STREAM_TIMEOUT", "300"))
+
+# LLM scheduler settings
+LLM_SINGLE_FLIGHT_ENABLED = os.getenv("LLM_SINGLE_FLIGHT_ENABLED", "True").lower() == "true"
+# Pacing of cached responses replayed to streaming clients
+STREAM_REPLAY_WORDS_PER_CHUNK = int(os.getenv("STREAM_REPLAY_WORDS_PER_CHUNK", "3"))
+STREAM_REPLAY_DELAY = float(os.getenv("STREAM_REPLAY_DELAY", "0.01"))  # seconds between chunks
+LLM_MAX_CONCURRENCY_PER_MODEL = int(os.getenv("LLM_MAX_CONCURRENCY_PER_MODEL", "2"))
+# Per-model overrides, e.g. "gemma3:4b=2,nomic-embed-text=8"
+def _parse_model_map(name: str, cast):
+    """Parse a "model=value,..." environment variable into a dict"""
+    return {
+        model.strip(): cast(value)
+        for model, _, value in (
+            item.rpartition("=") for item in os.getenv(name, "").split(",") if "=" in item
+        )
+    }
+
+LLM_MODEL_CONCURRENCY = _parse_model_map("LLM_MODEL_CONCURRENCY", int)
+# Context window packing: model window sizes in tokens, e.g. "llama3:8b=8192"
+LLM_CONTEXT_WINDOW = int(os.getenv("LLM_CONTEXT_WINDOW", "4096"))
+LLM_CONTEXT_WINDOWS = _parse_model_map("LLM_CONTEXT_WINDOWS", int)
+# Initial actual/estimated token ratios per model, refined at runtime
+LLM_TOKEN_CALIBRATION = _parse_model_map("LLM_TOKEN_CALIBRATION", float)
+CONTEXT_ANSWER_RESERVE_TOKENS = int(os.getenv("CONTEXT_ANSWER_RESERVE_TOKENS", "1024"))
+CONTEXT_PROMPT_RESERVE_TOKENS = int(os.getenv("CONTEXT_PROMPT_RESERVE_TOKENS", "512"))  # prompt template
 DEFAULT_MODEL = os.getenv("DEFAULT_MODEL", "gemma3:4b")
 DEFAULT_EMBEDDING_MODEL = os.getenv("DEFAULT_EMBEDDING_MODEL", "nomic-embed-text")
+# Model residency: how long the LLM server keeps each class of model loaded
+LLM_KEEP_ALIVE_CHAT = os.getenv("LLM_KEEP_ALIVE_CHAT", "30m")
+LLM_KEEP_ALIVE_EMBEDDING = os.getenv("LLM_KEEP_ALIVE_EMBEDDING", "30m")
+LLM_KEEP_ALIVE_JUDGE = os.getenv("LLM_KEEP_ALIVE_JUDGE", "10m")
+LLM_WARM_UP_ON_STARTUP = os.getenv("LLM_WARM_UP_ON_STARTUP", "True").lower() == "true"
+LLM_RESIDENCY_REFRESH_SECONDS = float(os.getenv("LLM_RESIDENCY_REFRESH_SECONDS", "10"))
+# Route judge calls to an already loaded model when the configured one is cold
+LLM_RESIDENCY_ROUTING = os.getenv("LLM_RESIDENCY_ROUTING", "False").lower() == "true"
+LLM_COLD_START_SECONDS = float(os.getenv("LLM_COLD_START_SECONDS", "5"))  # assumed until a load is observed
+# Request deadlines: total seconds a chat request may take before optional stages are skipped (0 disables)
+CHAT_LATENCY_BUDGET_SECONDS = float(os.getenv("CHAT_LATENCY_BUDGET_SECONDS", "30"))
+# Expected seconds per optional stage, e.g. "query_refinement=3,response_refinement=8"
+DEADLINE_STAGE_SECONDS = _parse_model_map("DEADLINE_STAGE_SECONDS", float)
+DEADLINE_SHORT_ANSWER_TOKENS = int(os.getenv("DEADLINE_SHORT_ANSWER_TOKENS", "256"))  # answer cap once over budget
+# Circuit breakers: shed requests to an Ollama endpoint and model that keeps failing
+LLM_BREAKER_ENABLED = os.getenv("LLM_BREAKER_ENABLED", "True").lower() == "true"
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))  # consecutive failures
+LLM_BREAKER_FAILURE_RATE = float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5"))  # over the last 20 calls
+LLM_BREAKER_RECOVERY_SECONDS = float(os.getenv("LLM_BREAKER_RECOVERY_SECONDS", "30"))
+# Hedged requests: resend slow embedding and judge calls after the endpoint's p95 latency
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "False").lower() == "true"
+LLM_HEDGE_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_DELAY_SECONDS", "2"))  # until enough latencies were observed
+# Query plan execution: concurrent calls per tool, e.g. "rag=2,database=1", and per-step timeout
+PLAN_TOOL_CONCURRENCY = _parse_model_map("PLAN_TOOL_CONCURRENCY", int)
+PLAN_DEFAULT_TOOL_CONCURRENCY = int(os.getenv("PLAN_DEFAULT_TOOL_CONCURRENCY", "4"))
+PLAN_STEP_TIMEOUT_SECONDS = float(os.getenv("PLAN_STEP_TIMEOUT_SECONDS", "30"))
 
 # LLM Judge settings
 CHUNKING_JUDGE_MODEL = os.getenv("CHUNKING_JUDGE_MODEL", "gemma3:4b")
 RETRIEVAL_JUDGE_MODEL = os.getenv("RETRIEVAL_JUDGE_MODEL", "gemma3:4b")
 USE_CHUNKING_JUDGE = os.getenv("USE_CHUNKING_JUDGE", "True").lower() == "true"
 USE_RETRIEVAL_JUDGE = os.getenv("USE_RETRIEVAL_JUDGE", "True").lower() == "true"
+RETRIEVAL_JUDGE_LATENCY_BUDGET = float(os.getenv("RETRIEVAL_JUDGE_LATENCY_BUDGET", "2"))  # seconds of model load tolerated
+# Queries whose heuristic analysis is at least this confident skip the judge's LLM call
+RETRIEVAL_JUDGE_FAST_PATH_CONFIDENCE = float(os.getenv("RETRIEVAL_JUDGE_FAST_PATH_CONFIDENCE", "0.7"))
+RETRIEVAL_JUDGE_ANALYSIS_CACHE_TTL = int(os.getenv("RETRIEVAL_JUDGE_ANALYSIS_CACHE_TTL", "86400"))  # 1 day
+CHUNKING_DECISION_CACHE_TTL = int(os.getenv("CHUNKING_DECISION_CACHE_TTL", "604800"))  # 7 days
+SEMANTIC_CHUNKER_MAX_CONCURRENCY = int(os.getenv("SEMANTIC_CHUNKER_MAX_CONCURRENCY", "4"))
+SEMANTIC_BOUNDARY_CACHE_TTL = int(os.getenv("SEMANTIC_BOUNDARY_CACHE_TTL", "2592000"))  # 30 days
+# Persistent caches write changed entries in the background after this many seconds (0 writes through)
+CACHE_FLUSH_INTERVAL_SECONDS = float(os.getenv("CACHE_FLUSH_INTERVAL_SECONDS", "2"))
+CACHE_FLUSH_BATCH_SIZE = int(os.getenv("CACHE_FLUSH_BATCH_SIZE", "100"))  # pending changes that flush early
 
 # LangGraph RAG Agent settings
 LANGGRAPH_RAG_MODEL = os.getenv("LANGGRAPH_RAG_MODEL", "gemma3:4b")
@@ -36,6 +103,11 @@ UPLOAD_DIR = os.getenv("UPLOAD_DIR", str(BASE_DIR / "uploads"))
 CHROMA_DB_DIR = os.getenv("CHROMA_DB_DIR", str(BASE_DIR / "chroma_db"))
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1500"))
 CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "150"))
+PDF_PAGE_BATCH_SIZE = int(os.getenv("PDF_PAGE_BATCH_SIZE", "8"))
+CHUNK_PERSIST_BATCH_SIZE = int(os.getenv("CHUNK_PERSIST_BATCH_SIZE", "1000"))
+EMBEDDING_CHUNKER_BREAKPOINT_PERCENTILE = float(os.getenv("EMBEDDING_CHUNKER_BREAKPOINT_PERCENTILE", "90"))
+EMBEDDING_CHUNKER_BATCH_SIZE = int(os.getenv("EMBEDDING_CHUNKER_BATCH_SIZE", "64"))
+EMBEDDING_CHUNKER_REUSE_EMBEDDINGS = os.getenv("EMBEDDING_CHUNKER_REUSE_EMBEDDINGS", "False").lower() == "true"
 
 # Database settings
 DATABASE_TYPE = os.getenv("DATABASE_TYPE", "postgresql")
@@ -118,14 +190,57 @@ SETTINGS = SimpleNamespace(
     
     # Ollama settings
     ollama_base_url=OLLAMA_BASE_URL,
+    ollama_max_connections=OLLAMA_MAX_CONNECTIONS,
+    ollama_max_keepalive_connections=OLLAMA_MAX_KEEPALIVE_CONNECTIONS,
+    ollama_keepalive_expiry=OLLAMA_KEEPALIVE_EXPIRY,
+    ollama_connect_timeout=OLLAMA_CONNECT_TIMEOUT,
+    ollama_request_timeout=OLLAMA_REQUEST_TIMEOUT,
+    ollama_stream_timeout=OLLAMA_STREAM_TIMEOUT,
+    llm_single_flight_enabled=LLM_SINGLE_FLIGHT_ENABLED,
+    stream_replay_words_per_chunk=STREAM_REPLAY_WORDS_PER_CHUNK,
+    stream_replay_delay=STREAM_REPLAY_DELAY,
+    llm_max_concurrency_per_model=LLM_MAX_CONCURRENCY_PER_MODEL,
+    llm_model_concurrency=LLM_MODEL_CONCURRENCY,
+    llm_context_window=LLM_CONTEXT_WINDOW,
+    llm_context_windows=LLM_CONTEXT_WINDOWS,
+    llm_token_calibration=LLM_TOKEN_CALIBRATION,
+    context_answer_reserve_tokens=CONTEXT_ANSWER_RESERVE_TOKENS,
+    context_prompt_reserve_tokens=CONTEXT_PROMPT_RESERVE_TOKENS,
     default_model=DEFAULT_MODEL,
     default_embedding_model=DEFAULT_EMBEDDING_MODEL,
+    llm_keep_alive_chat=LLM_KEEP_ALIVE_CHAT,
+    llm_keep_alive_embedding=LLM_KEEP_ALIVE_EMBEDDING,
+    llm_keep_alive_judge=LLM_KEEP_ALIVE_JUDGE,
+    llm_warm_up_on_startup=LLM_WARM_UP_ON_STARTUP,
+    llm_residency_refresh_seconds=LLM_RESIDENCY_REFRESH_SECONDS,
+    llm_residency_routing=LLM_RESIDENCY_ROUTING,
+    llm_cold_start_seconds=LLM_COLD_START_SECONDS,
+    chat_latency_budget_seconds=CHAT_LATENCY_BUDGET_SECONDS,
+    deadline_stage_seconds=DEADLINE_STAGE_SECONDS,
+    deadline_short_answer_tokens=DEADLINE_SHORT_ANSWER_TOKENS,
+    llm_breaker_enabled=LLM_BREAKER_ENABLED,
+    llm_breaker_failure_threshold=LLM_BREAKER_FAILURE_THRESHOLD,
+    llm_breaker_failure_rate=LLM_BREAKER_FAILURE_RATE,
+    llm_breaker_recovery_seconds=LLM_BREAKER_RECOVERY_SECONDS,
+    llm_hedge_enabled=LLM_HEDGE_ENABLED,
+    llm_hedge_delay_seconds=LLM_HEDGE_DELAY_SECONDS,
+    plan_tool_concurrency=PLAN_TOOL_CONCURRENCY,
+    plan_default_tool_concurrency=PLAN_DEFAULT_TOOL_CONCURRENCY,
+    plan_step_timeout_seconds=PLAN_STEP_TIMEOUT_SECONDS,
     
     # LLM Judge settings
     chunking_judge_model=CHUNKING_JUDGE_MODEL,
     retrieval_judge_model=RETRIEVAL_JUDGE_MODEL,
     use_chunking_judge=USE_CHUNKING_JUDGE,
     use_retrieval_judge=USE_RETRIEVAL_JUDGE,
+    retrieval_judge_latency_budget=RETRIEVAL_JUDGE_LATENCY_BUDGET,
+    retrieval_judge_fast_path_confidence=RETRIEVAL_JUDGE_FAST_PATH_CONFIDENCE,
+    retrieval_judge_analysis_cache_ttl=RETRIEVAL_JUDGE_ANALYSIS_CACHE_TTL,
+    chunking_decision_cache_ttl=CHUNKING_DECISION_CACHE_TTL,
+    semantic_chunker_max_concurrency=SEMANTIC_CHUNKER_MAX_CONCURRENCY,
+    semantic_boundary_cache_ttl=SEMANTIC_BOUNDARY_CACHE_TTL,
+    cache_flush_interval_seconds=CACHE_FLUSH_INTERVAL_SECONDS,
+    cache_flush_batch_size=CACHE_FLUSH_BATCH_SIZE,
     
     # LangGraph RAG Agent settings
     langgraph_rag_model=LANGGRAPH_RAG_MODEL,
@@ -137,6 +252,11 @@ SETTINGS = SimpleNamespace(
     chroma_db_dir=CHROMA_DB_DIR,
     chunk_size=CHUNK_SIZE,
     chunk_overlap=CHUNK_OVERLAP,
+    pdf_page_batch_size=PDF_PAGE_BATCH_SIZE,
+    chunk_persist_batch_size=CHUNK_PERSIST_BATCH_SIZE,
+    embedding_chunker_breakpoint_percentile=EMBEDDING_CHUNKER_BREAKPOINT_PERCENTILE,
+    embedding_chunker_batch_size=EMBEDDING_CHUNKER_BATCH_SIZE,
+    embedding_chunker_reuse_embeddings=EMBEDDING_CHUNKER_REUSE_EMBEDDINGS,
     
     # Database settings
     database_type=DATABASE_TYPE,
@@ -1,8 +1,10 @@
 from typing import List, Optional, Dict, Any, Union, Tuple
-from uuid import UUID
+from uuid import UUID, uuid4
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_, and_, select, exists, String
+from sqlalchemy import func, or_, and_, select, exists, String, insert, delete, update
+
+from app.core.config import CHUNK_PERSIST_BATCH_SIZE
 
 from app.db.models import Document, Chunk, Tag, Folder, document_tags, DocumentPermission, User
 from app.db.repositories.base import BaseRepository
@@ -516,19 +518,10 @@ class DocumentRepository(BaseRepository[Document]):
         # Delete existing chunks
         self.session.query(Chunk).filter(Chunk.document_id == document.id).delete()
         
-        # Create new chunks
-        for i, chunk_data in enumerate(chunks):
-            content = chunk_data.get('content', '')
-            metadata = chunk_data.get('metadata', {})
-            
-            chunk = Chunk(
-                document_id=document.id,
-                content=content,
-                chunk_metadata=metadata,  # Changed from metadata to chunk_metadata
-                index=i
-            )
-            
-            self.session.add(chunk)
+        # Create new chunks with one executemany instead of one ORM object per chunk
+        rows = self._build_chunk_rows(document.id, chunks)
+        if rows:
+            self.session.execute(insert(Chunk), rows)
         
         # Update document status
         document.processing_status = "completed"
@@ -539,6 +532,88 @@ class DocumentRepository(BaseRepository[Document]):
         
         return document
     
+    async def bulk_replace_chunks(
+        self,
+        chunks_by_document: Dict[Union[str, UUID], List[Dict[str, Any]]],
+        batch_size: int = CHUNK_PERSIST_BATCH_SIZE
+    ) -> int:
+        """
+        Replace the chunks of several documents in one transaction
+        
+        The existing chunks of all documents are deleted with a single statement
+        and the new chunks are written in batches: multi-row INSERTs on
+        PostgreSQL and executemany elsewhere (SQLite). The documents are marked
+        as completed in the same transaction, so a failure leaves every
+        document with its previous chunks.
+        
+        Requires an AsyncSession, as used by the ingest pipeline.
+        
+        Args:
+            chunks_by_document: Chunk data (content and metadata) keyed by document ID
+            batch_size: Maximum number of rows per INSERT statement
+            
+        Returns:
+            Number of chunks written
+        """
+        if not chunks_by_document:
+            return 0
+        
+        document_ids = [
+            UUID(document_id) if isinstance(document_id, str) else document_id
+            for document_id in chunks_by_document
+        ]
+        rows = []
+        for document_id, chunks in zip(document_ids, chunks_by_document.values()):
+            rows.extend(self._build_chunk_rows(document_id, chunks))
+        
+        multi_row_values = self.session.get_bind().dialect.name == "postgresql"
+        try:
+            await self.session.execute(delete(Chunk).where(Chunk.document_id.in_(document_ids)))
+            
+            for batch_start in range(0, len(rows), batch_size):
+                batch = rows[batch_start:batch_start + batch_size]
+                if multi_row_values:
+                    # Reason: one INSERT ... VALUES (...), (...) round trip per batch
+                    await self.session.execute(insert(Chunk).values(batch))
+                else:
+                    await self.session.execute(insert(Chunk), batch)
+            
+            await self.session.execute(
+                update(Document)
+                .where(Document.id.in_(document_ids))
+                .values(processing_status="completed", last_accessed=datetime.utcnow())
+            )
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        
+        return len(rows)
+    
+    def _build_chunk_rows(self, document_id: UUID, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Build chunk table rows for a document
+        
+        Args:
+            document_id: Document ID
+            chunks: List of chunk data
+            
+        Returns:
+            Column values for each chunk, indexed by position
+        """
+        now = datetime.utcnow()
+        return [
+            {
+                "id": uuid4(),
+                "document_id": document_id,
+                "content": chunk_data.get('content', ''),
+                "chunk_metadata": chunk_data.get('metadata', {}),
+                "index": i,
+                "created_at": now
+            }
+            for i, chunk_data in enumerate(chunks)
+        ]
+    
     def add_tags_to_document(self, document_id: Union[str, UUID], tags: List[str]) -> Optional[Document]:
         """
         Add tags to a document
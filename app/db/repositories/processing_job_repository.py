@@ -0,0 +1,67 @@
+from typing import List, Dict, Any, Optional, Union
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, asc
+
+from app.db.models import ProcessingJob as DBProcessingJob
+from app.db.repositories.base import BaseRepository
+
+# Job statuses that are resumed after a restart
+UNFINISHED_JOB_STATUSES = ("pending", "processing")
+
+
+class ProcessingJobRepository(BaseRepository[DBProcessingJob]):
+    """
+    Repository for ProcessingJob model
+    """
+
+    def __init__(self, session: AsyncSession):
+        super().__init__(session, DBProcessingJob)
+
+    async def save_job(self, record: Dict[str, Any]) -> None:
+        """
+        Insert or update a processing job
+
+        Args:
+            record: Column values for the job, including its ID
+        """
+        record = dict(record)
+        if isinstance(record.get("id"), str):
+            record["id"] = UUID(record["id"])
+
+        # Reason: merge makes the write idempotent, so repeated checkpoints of
+        # the same job simply overwrite the previous state
+        await self.session.merge(DBProcessingJob(**record))
+        await self.session.commit()
+
+    async def get_unfinished_jobs(self) -> List[DBProcessingJob]:
+        """
+        Get jobs that were pending or running, oldest first
+
+        Returns:
+            List of unfinished jobs
+        """
+        stmt = (
+            select(DBProcessingJob)
+            .where(DBProcessingJob.status.in_(UNFINISHED_JOB_STATUSES))
+            .order_by(asc(DBProcessingJob.created_at))
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def get_job(self, job_id: Union[str, UUID]) -> Optional[DBProcessingJob]:
+        """
+        Get a processing job by ID
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            Job if found, None otherwise
+        """
+        if isinstance(job_id, str):
+            try:
+                job_id = UUID(job_id)
+            except ValueError:
+                return None
+        return await self.get_by_id(job_id)
@@ -34,6 +34,8 @@ from app.api.text_formatting_dashboard import router as text_formatting_dashboar
 from app.api.health import router as health_router
 from app.db.session import init_db, get_session
 from app.rag.tool_initializer import initialize_tools
+from app.rag.ollama_client import close_ollama_http_client
+from app.rag.model_residency import get_model_residency
 
 # Setup logging
 setup_logging()
@@ -266,10 +268,22 @@ async def startup_event():
         logger.info("Tools initialized successfully")
     except Exception as e:
         logger.error(f"Error initializing tools: {str(e)}")
+    
+    # Load the configured models in the background so the first chat doesn't pay the cold start
+    if SETTINGS.llm_warm_up_on_startup:
+        logger.info("Warming up configured models")
+        get_model_residency().start_warm_up()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """
     Actions to run on application shutdown
     """
-    logger.info("Shutting down Metis RAG application")
\ No newline at end of file
+    logger.info("Shutting down Metis RAG application")
+    
+    # Close pooled connections to Ollama
+    try:
+        await close_ollama_http_client()
+        logger.info("Ollama connection pool closed")
+    except Exception as e:
+        logger.error(f"Error closing Ollama connection pool: {str(e)}")
@@ -67,6 +67,7 @@ class ChatResponse(BaseModel):
     execution_trace: Optional[List[Dict[str, Any]]] = None
     warnings: Optional[List[str]] = None
     raw_ollama_output: Optional[str] = None
+    degradations: Optional[List[Dict[str, Any]]] = None  # Stages skipped to meet the request deadline
 
     class Config:
         arbitrary_types_allowed = True
\ No newline at end of file
@@ -3,8 +3,29 @@ from app.rag.document_processor import DocumentProcessor
 from app.rag.vector_store import VectorStore
 from app.rag.engine.rag_engine import RAGEngine
 from app.rag.document_analysis_service import DocumentAnalysisService
-from app.rag.processing_job import ProcessingJob, WorkerPool, DocumentProcessingService
+from app.rag.processing_job import ProcessingJob, WorkerPool, DocumentProcessingService, DatabaseJobStore
 from app.rag.query_analyzer import QueryAnalyzer
 from app.rag.process_logger import ProcessLogger
 from app.rag.tools import Tool, ToolRegistry, RAGTool, DatabaseTool, PostgreSQLTool
-from app.rag.tool_initializer import initialize_tools, get_tool_registry
\ No newline at end of file
+from app.rag.tool_initializer import initialize_tools, get_tool_registry
+
+__all__ = [
+    "OllamaClient",
+    "DocumentProcessor",
+    "VectorStore",
+    "RAGEngine",
+    "DocumentAnalysisService",
+    "ProcessingJob",
+    "WorkerPool",
+    "DocumentProcessingService",
+    "DatabaseJobStore",
+    "QueryAnalyzer",
+    "ProcessLogger",
+    "Tool",
+    "ToolRegistry",
+    "RAGTool",
+    "DatabaseTool",
+    "PostgreSQLTool",
+    "initialize_tools",
+    "get_tool_registry",
+]
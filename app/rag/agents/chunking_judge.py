@@ -9,6 +9,7 @@ from typing import Dict, Any, List, Optional
 from app.models.document import Document
 from app.rag.ollama_client import OllamaClient
 from app.core.config import CHUNKING_JUDGE_MODEL
+from app.rag.llm_scheduler import with_llm_priority, PRIORITY_BACKGROUND
 
 logger = logging.getLogger("app.rag.agents.chunking_judge")
 
@@ -20,6 +21,7 @@ class ChunkingJudge:
         self.ollama_client = ollama_client or OllamaClient()
         self.model = model
     
+    @with_llm_priority(PRIORITY_BACKGROUND)
     async def analyze_document(self, document: Document) -> Dict[str, Any]:
         """
         Analyze a document and recommend the best chunking strategy and parameters
@@ -112,6 +114,7 @@ Available Strategies:
 - token: Splits text by tokens. Good for preserving semantic units in technical content.
 - markdown: Splits markdown documents by headers. Good for structured documents with clear sections.
 - semantic: Uses LLM to identify natural semantic boundaries in text. Best for preserving meaning and context in complex documents.
+- embedding: Splits where the similarity between neighbouring sentences drops, using embeddings. Preserves topic boundaries like semantic, and is much faster on long documents.
 
 Document Filename: {filename}
 
@@ -177,7 +180,7 @@ Recommendation:
 
 Output your recommendation in JSON format:
 {{
-    "strategy": "...",  // One of: recursive, token, markdown
+    "strategy": "...",  // One of: recursive, token, markdown, semantic, embedding
     "parameters": {{
         "chunk_size": ...,  // Recommended chunk size (characters or tokens)
         "chunk_overlap": ...  // Recommended overlap size
@@ -200,7 +203,7 @@ Output your recommendation in JSON format:
                     raise ValueError("Missing 'strategy' in recommendation")
                 
                 # Validate strategy is one of the allowed values
-                allowed_strategies = ["recursive", "token", "markdown", "semantic"]
+                allowed_strategies = ["recursive", "token", "markdown", "semantic", "embedding"]
                 if recommendation["strategy"] not in allowed_strategies:
                     logger.warning(f"Invalid strategy '{recommendation['strategy']}', falling back to recursive")
                     recommendation["strategy"] = "recursive"
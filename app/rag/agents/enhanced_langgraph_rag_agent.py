@@ -15,6 +15,7 @@ from app.rag.ollama_client import OllamaClient
 from app.rag.vector_store import VectorStore
 from app.rag.agents.chunking_judge import ChunkingJudge
 from app.rag.agents.retrieval_judge import RetrievalJudge
+from app.rag.deadline import Deadline, deadline_scope, check_deadline
 from app.rag.chunkers.semantic_chunker import SemanticChunker
 from app.rag.query_planner import QueryPlanner
 from app.rag.plan_executor import PlanExecutor
@@ -170,7 +171,8 @@ class EnhancedLangGraphRAGAgent:
         stream: bool = False,
         model_parameters: Optional[Dict[str, Any]] = None,
         conversation_context: Optional[str] = None,
-        metadata_filters: Optional[Dict[str, Any]] = None
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None
     ) -> Dict[str, Any]:
         """
         Query the RAG agent with the state machine
@@ -183,6 +185,7 @@ class EnhancedLangGraphRAGAgent:
             model_parameters: Optional parameters for the model
             conversation_context: Optional conversation context
             metadata_filters: Optional filters for retrieval
+            deadline: Optional latency budget; judge stages that don't fit are skipped
             
         Returns:
             Dict with keys:
@@ -230,7 +233,9 @@ class EnhancedLangGraphRAGAgent:
         
         # Run the state machine
         start_time = time.time()
-        result = await self.app.ainvoke(initial_state)
+        # Reason: nodes read the deadline from the context, so it isn't part of the graph state
+        with deadline_scope(deadline or Deadline()) as deadline:
+            result = await self.app.ainvoke(initial_state)
         elapsed_time = time.time() - start_time
         
         # Log the completion of the process
@@ -246,8 +251,10 @@ class EnhancedLangGraphRAGAgent:
         
         logger.info(f"Enhanced RAG query completed in {elapsed_time:.2f}s")
         
-        # Return the final response
-        return result["final_response"]
+        # Return the final response with the stages skipped to meet the deadline
+        final_response = result["final_response"]
+        final_response["degradations"] = list(deadline.degradations)
+        return final_response
     
     async def _analyze_query(self, state: RAGState) -> RAGState:
         """
@@ -334,7 +341,7 @@ class EnhancedLangGraphRAGAgent:
         complexity = query_analysis.get("complexity", "simple")
         requires_tools = query_analysis.get("requires_tools", [])
         
-        needs_planning = complexity == "complex" or len(requires_tools) > 0
+        needs_planning = (complexity == "complex" or len(requires_tools) > 0) and check_deadline("query_planning")
         logger.info(f"Query planning needed: {needs_planning}")
         
         return needs_planning
@@ -504,8 +511,10 @@ class EnhancedLangGraphRAGAgent:
         
         logger.info(f"Retrieved {len(search_results)} chunks from vector store")
         
-        # Evaluate chunks with the retrieval judge
-        evaluation = await self.retrieval_judge.evaluate_chunks(query, search_results)
+        # Evaluate chunks with the retrieval judge if the request has time for it
+        evaluation = {}
+        if check_deadline("chunk_evaluation"):
+            evaluation = await self.retrieval_judge.evaluate_chunks(query, search_results)
         
         # Extract relevance scores and refinement decision
         relevance_scores = evaluation.get("relevance_scores", {})
@@ -556,7 +565,7 @@ class EnhancedLangGraphRAGAgent:
             return False
         
         # Otherwise, use the needs_refinement flag from the retrieval judge
-        needs_refinement = retrieval["needs_refinement"] if retrieval else False
+        needs_refinement = bool(retrieval and retrieval["needs_refinement"]) and check_deadline("query_refinement")
         logger.info(f"Query refinement needed: {needs_refinement}")
         
         return needs_refinement
@@ -650,7 +659,7 @@ class EnhancedLangGraphRAGAgent:
         logger.info(f"Found {len(relevant_results)} relevant chunks after filtering")
         
         # Optimize context assembly if we have enough chunks
-        if len(relevant_results) > 3 and apply_reranking:
+        if len(relevant_results) > 3 and apply_reranking and check_deadline("context_optimization"):
             logger.info("Optimizing context assembly with Retrieval Judge")
             optimized_results = await self.retrieval_judge.optimize_context(query, relevant_results)
             if optimized_results:
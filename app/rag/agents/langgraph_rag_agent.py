@@ -16,6 +16,7 @@ from app.rag.ollama_client import OllamaClient
 from app.rag.vector_store import VectorStore
 from app.rag.agents.chunking_judge import ChunkingJudge
 from app.rag.agents.retrieval_judge import RetrievalJudge
+from app.rag.deadline import Deadline, deadline_scope, check_deadline
 from app.rag.chunkers.semantic_chunker import SemanticChunker
 from app.core.config import CHUNKING_JUDGE_MODEL, RETRIEVAL_JUDGE_MODEL, DEFAULT_MODEL
 
@@ -176,7 +177,8 @@ class LangGraphRAGAgent:
         stream: bool = False,
         model_parameters: Optional[Dict[str, Any]] = None,
         conversation_context: Optional[str] = None,
-        metadata_filters: Optional[Dict[str, Any]] = None
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None
     ) -> Dict[str, Any]:
         """
         Query the RAG agent with the state machine
@@ -189,6 +191,7 @@ class LangGraphRAGAgent:
             model_parameters: Optional parameters for the model
             conversation_context: Optional conversation context
             metadata_filters: Optional filters for retrieval
+            deadline: Optional latency budget; judge stages that don't fit are skipped
             
         Returns:
             Dict with keys:
@@ -215,10 +218,14 @@ class LangGraphRAGAgent:
         logger.info(f"Starting RAG query with LangGraph: {query[:50]}...")
         # Run the state machine
         # In langgraph 0.0.20, we need to use the compiled app with ainvoke
-        result = await self.app.ainvoke(initial_state)
-        
-        # Return the final response
-        return result["final_response"]
+        # Reason: nodes read the deadline from the context, so it isn't part of the graph state
+        with deadline_scope(deadline or Deadline()) as deadline:
+            result = await self.app.ainvoke(initial_state)
+        
+        # Return the final response with the stages skipped to meet the deadline
+        final_response = result["final_response"]
+        final_response["degradations"] = list(deadline.degradations)
+        return final_response
     
     async def _analyze_query(self, state: RAGState) -> RAGState:
         """
@@ -288,8 +295,10 @@ class LangGraphRAGAgent:
         
         logger.info(f"Retrieved {len(search_results)} chunks from vector store")
         
-        # Evaluate chunks with the retrieval judge
-        evaluation = await self.retrieval_judge.evaluate_chunks(query, search_results)
+        # Evaluate chunks with the retrieval judge if the request has time for it
+        evaluation = {}
+        if check_deadline("chunk_evaluation"):
+            evaluation = await self.retrieval_judge.evaluate_chunks(query, search_results)
         
         # Extract relevance scores and refinement decision
         relevance_scores = evaluation.get("relevance_scores", {})
@@ -328,7 +337,7 @@ class LangGraphRAGAgent:
             return False
         
         # Otherwise, use the needs_refinement flag from the retrieval judge
-        needs_refinement = retrieval["needs_refinement"] if retrieval else False
+        needs_refinement = bool(retrieval and retrieval["needs_refinement"]) and check_deadline("query_refinement")
         logger.info(f"Query refinement needed: {needs_refinement}")
         
         return needs_refinement
@@ -411,7 +420,7 @@ class LangGraphRAGAgent:
         logger.info(f"Found {len(relevant_results)} relevant chunks after filtering")
         
         # Optimize context assembly if we have enough chunks
-        if len(relevant_results) > 3 and apply_reranking:
+        if len(relevant_results) > 3 and apply_reranking and check_deadline("context_optimization"):
             logger.info("Optimizing context assembly with Retrieval Judge")
             optimized_results = await self.retrieval_judge.optimize_context(query, relevant_results)
             if optimized_results:
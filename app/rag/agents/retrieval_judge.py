@@ -1,6 +1,7 @@
 """
 Retrieval Judge - LLM-based agent that analyzes queries and retrieved chunks to improve retrieval quality
 """
+import copy
 import logging
 import json
 import re
@@ -8,45 +9,114 @@ from typing import Dict, Any, List, Optional
 
 from app.models.document import Chunk
 from app.rag.ollama_client import OllamaClient
-from app.core.config import RETRIEVAL_JUDGE_MODEL
+from app.core.config import (
+    RETRIEVAL_JUDGE_MODEL,
+    RETRIEVAL_JUDGE_LATENCY_BUDGET,
+    RETRIEVAL_JUDGE_FAST_PATH_CONFIDENCE
+)
+from app.cache.query_analysis_cache import QueryAnalysisCache, get_query_analysis_cache
+from app.rag.llm_scheduler import with_llm_priority, PRIORITY_INTERACTIVE_AUX
+from app.rag.model_residency import get_model_residency
+from app.rag.deadline import check_deadline
 
 logger = logging.getLogger("app.rag.agents.retrieval_judge")
 
+# Justification of the default analysis used when the LLM response can't be parsed
+QUERY_ANALYSIS_FALLBACK_JUSTIFICATION = "Failed to parse LLM recommendation, using default parameters."
+
+# Where query analyses were served from, across all judges
+_analysis_stats = {"fast_path": 0, "cache": 0, "llm": 0}
+
+def get_query_analysis_stats() -> Dict[str, Any]:
+    """
+    Get how query analyses were served
+    
+    Returns:
+        Dictionary with counts per tier and the fraction served by the heuristic fast path
+    """
+    total = sum(_analysis_stats.values())
+    return {
+        **_analysis_stats,
+        "total": total,
+        "fast_path_fraction": _analysis_stats["fast_path"] / total if total else 0.0,
+        "llm_fraction": _analysis_stats["llm"] / total if total else 0.0
+    }
+
 class RetrievalJudge:
     """
     LLM-based agent that analyzes queries and retrieved chunks to improve retrieval quality
     """
-    def __init__(self, ollama_client: Optional[OllamaClient] = None, model: str = RETRIEVAL_JUDGE_MODEL):
+    def __init__(self,
+                 ollama_client: Optional[OllamaClient] = None,
+                 model: str = RETRIEVAL_JUDGE_MODEL,
+                 analysis_cache: Optional[QueryAnalysisCache] = None,
+                 fast_path_confidence: Optional[float] = RETRIEVAL_JUDGE_FAST_PATH_CONFIDENCE):
+        """
+        Args:
+            ollama_client: Ollama client instance
+            model: Model used for judging
+            analysis_cache: Cache of query analyses (shared cache by default)
+            fast_path_confidence: Heuristic confidence at which query analysis
+                skips the LLM (None always asks the LLM)
+        """
         self.ollama_client = ollama_client or OllamaClient()
         self.model = model
+        self.analysis_cache = analysis_cache or get_query_analysis_cache()
+        self.fast_path_confidence = fast_path_confidence
     
+    @with_llm_priority(PRIORITY_INTERACTIVE_AUX)
     async def analyze_query(self, query: str) -> Dict[str, Any]:
         """
         Analyze a query and recommend retrieval parameters
         
+        Analysis is tiered: clearly simple queries get parameters from the
+        complexity heuristics, repeated queries reuse a cached LLM analysis,
+        and only the rest are sent to the LLM (unless the request's deadline
+        leaves no time for it, in which case the heuristics are used).
+        
         Returns:
             Dict with keys:
             - complexity: The assessed complexity of the query (simple, moderate, complex)
             - parameters: Dict of recommended retrieval parameters (k, threshold, etc.)
             - justification: Explanation of the recommendation
         """
+        # Reason: imported here because the RAG engine package imports this module
+        from app.rag.engine.utils.query_processor import estimate_retrieval_parameters
+        
+        estimate = estimate_retrieval_parameters(query)
+        if self.fast_path_confidence is not None and estimate["confidence"] >= self.fast_path_confidence:
+            _analysis_stats["fast_path"] += 1
+            logger.info(f"Retrieval Judge used heuristics for '{estimate['complexity']}' query (confidence {estimate['confidence']})")
+            return estimate
+        
+        cached_analysis = self.analysis_cache.get_analysis(query, self.model)
+        if cached_analysis is not None:
+            _analysis_stats["cache"] += 1
+            logger.info("Retrieval Judge reused cached query analysis")
+            return copy.deepcopy(cached_analysis)
+        
+        # Fall back to the heuristics when the request has no time for an LLM analysis
+        if not check_deadline("query_analysis", "heuristic"):
+            _analysis_stats["fast_path"] += 1
+            return estimate
+        
         # Create prompt for the LLM
         prompt = self._create_query_analysis_prompt(query)
         
         # Get recommendation from LLM
-        response = await self.ollama_client.generate(
-            prompt=prompt,
-            model=self.model,
-            stream=False
-        )
+        response = await self._generate(prompt)
+        _analysis_stats["llm"] += 1
         
         # Parse the response
         analysis = self._parse_query_analysis(response.get("response", ""))
+        if analysis.get("justification") != QUERY_ANALYSIS_FALLBACK_JUSTIFICATION:
+            self.analysis_cache.set_analysis(query, self.model, copy.deepcopy(analysis))
         
         logger.info(f"Retrieval Judge analyzed query complexity as '{analysis.get('complexity', 'unknown')}' with k={analysis.get('parameters', {}).get('k', 'default')}")
         
         return analysis
     
+    @with_llm_priority(PRIORITY_INTERACTIVE_AUX)
     async def evaluate_chunks(self, query: str, chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Evaluate retrieved chunks for relevance to the query
@@ -68,11 +138,7 @@ class RetrievalJudge:
         prompt = self._create_chunks_evaluation_prompt(query, chunks_sample)
         
         # Get evaluation from LLM
-        response = await self.ollama_client.generate(
-            prompt=prompt,
-            model=self.model,
-            stream=False
-        )
+        response = await self._generate(prompt)
         
         # Parse the response
         evaluation = self._parse_chunks_evaluation(response.get("response", ""), chunks)
@@ -80,7 +146,47 @@ class RetrievalJudge:
         logger.info(f"Retrieval Judge evaluated {len(chunks)} chunks, needs_refinement={evaluation.get('needs_refinement', False)}")
         
         return evaluation
-    
+
+    @with_llm_priority(PRIORITY_INTERACTIVE_AUX)
+    async def evaluate_and_refine(self, query: str, chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Evaluate retrieved chunks and propose a refined query in a single LLM call
+
+        Equivalent to evaluate_chunks followed by refine_query when refinement
+        is needed, but the refined query is written from the same prompt as
+        the scores, saving a round-trip on the low-relevance path.
+
+        Args:
+            query: The user query
+            chunks: List of chunks from the vector store search results
+
+        Returns:
+            Dict with keys:
+            - relevance_scores: Dict mapping chunk IDs to relevance scores (0-1)
+            - needs_refinement: Boolean indicating if query refinement is needed
+            - refined_query: Refined query (the original query if none was given)
+            - justification: Explanation of the evaluation
+        """
+        # Extract a sample of chunks to avoid exceeding context window
+        chunks_sample = self._extract_chunks_sample(chunks)
+
+        # Create prompt for the LLM
+        prompt = self._create_evaluate_and_refine_prompt(query, chunks_sample)
+
+        # Get evaluation and refinement from LLM
+        response = await self._generate(prompt)
+
+        # Parse the response
+        evaluation = self._parse_evaluate_and_refine(response.get("response", ""), chunks, query)
+
+        logger.info(
+            f"Retrieval Judge evaluated {len(chunks)} chunks, needs_refinement={evaluation['needs_refinement']}, "
+            f"refined_query='{evaluation['refined_query']}'"
+        )
+
+        return evaluation
+
+    @with_llm_priority(PRIORITY_INTERACTIVE_AUX)
     async def refine_query(self, query: str, chunks: List[Dict[str, Any]]) -> str:
         """
         Refine a query based on retrieved chunks to improve retrieval precision
@@ -99,11 +205,7 @@ class RetrievalJudge:
         prompt = self._create_query_refinement_prompt(query, chunks_sample)
         
         # Get refined query from LLM
-        response = await self.ollama_client.generate(
-            prompt=prompt,
-            model=self.model,
-            stream=False
-        )
+        response = await self._generate(prompt)
         
         # Parse the response
         refined_query = self._parse_refined_query(response.get("response", ""), query)
@@ -112,6 +214,7 @@ class RetrievalJudge:
         
         return refined_query
     
+    @with_llm_priority(PRIORITY_INTERACTIVE_AUX)
     async def optimize_context(self, query: str, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Optimize the assembly of chunks into a context for the LLM
@@ -135,11 +238,7 @@ class RetrievalJudge:
         prompt = self._create_context_optimization_prompt(query, chunks_sample)
         
         # Get optimization from LLM
-        response = await self.ollama_client.generate(
-            prompt=prompt,
-            model=self.model,
-            stream=False
-        )
+        response = await self._generate(prompt)
         
         # Parse the response
         optimized_chunks = self._parse_context_optimization(response.get("response", ""), chunks)
@@ -148,6 +247,23 @@ class RetrievalJudge:
         
         return optimized_chunks
     
+    async def _generate(self, prompt: str) -> Dict[str, Any]:
+        """
+        Send a judge prompt to the LLM
+        
+        The judge runs on the chat request path, so if its model is cold and
+        loading it would exceed the latency budget, an already loaded model
+        may be used instead (when residency routing is enabled). Judge prompts
+        are idempotent, so slow ones are hedged (when hedging is enabled).
+        """
+        model = get_model_residency().select_model(self.model, latency_budget=RETRIEVAL_JUDGE_LATENCY_BUDGET)
+        return await self.ollama_client.generate(
+            prompt=prompt,
+            model=model,
+            stream=False,
+            hedge=True
+        )
+    
     def _extract_chunks_sample(self, chunks: List[Dict[str, Any]], max_chunks: int = 5, max_length: int = 5000) -> List[Dict[str, Any]]:
         """
         Extract a representative sample of chunks to avoid exceeding context window
@@ -259,6 +375,53 @@ Output your evaluation in JSON format:
 }}
 """
     
+    def _create_evaluate_and_refine_prompt(self, query: str, chunks: List[Dict[str, Any]]) -> str:
+        """Create a prompt for the LLM to evaluate retrieved chunks and refine the query"""
+        chunks_text = ""
+        for i, chunk in enumerate(chunks):
+            content = chunk.get("content", "")
+            metadata = chunk.get("metadata", {})
+            filename = metadata.get("filename", "Unknown")
+            chunks_text += f"[{i+1}] Source: {filename}\n{content}\n\n"
+
+        return f"""You are a relevance evaluation and query refinement expert for a RAG (Retrieval Augmented Generation) system. Your task is to evaluate the relevance of retrieved chunks to the user's query and, if needed, refine the query to improve retrieval precision.
+
+User Query: {query}
+
+Retrieved Chunks:
+{chunks_text}
+
+Evaluate each chunk's relevance to the query on a scale of 0.0 to 1.0, where:
+- 1.0: Directly answers the query with high precision
+- 0.7-0.9: Contains information highly relevant to the query
+- 0.4-0.6: Contains information somewhat relevant to the query
+- 0.1-0.3: Contains information tangentially related to the query
+- 0.0: Contains no information relevant to the query
+
+Also determine if the query needs refinement based on the retrieved chunks:
+- If the chunks are all low relevance, the query might need refinement
+- If the chunks contain relevant information but are too broad, the query might need refinement
+- If the chunks contain contradictory information, the query might need refinement
+
+If the query needs refinement, write a refined query that:
+- Maintains the original intent of the user's question
+- Adds specificity based on the retrieved chunks
+- Incorporates relevant terminology from the documents
+- Is formulated to maximize the chance of retrieving more relevant chunks
+
+Output your evaluation in JSON format:
+{{
+    "relevance_scores": {{
+        "1": 0.8,  // Relevance score for chunk 1
+        "2": 0.5,  // Relevance score for chunk 2
+        ...
+    }},
+    "needs_refinement": true/false,  // Whether the query needs refinement
+    "refined_query": "...",  // The refined query text, or "" if no refinement is needed
+    "justification": "..." // Explanation of your evaluation
+}}
+"""
+
     def _create_query_refinement_prompt(self, query: str, chunks: List[Dict[str, Any]]) -> str:
         """Create a prompt for the LLM to refine the query"""
         chunks_text = ""
@@ -363,7 +526,7 @@ Output your optimization in JSON format:
                     "threshold": 0.4,
                     "reranking": True
                 },
-                "justification": "Failed to parse LLM recommendation, using default parameters."
+                "justification": QUERY_ANALYSIS_FALLBACK_JUSTIFICATION
             }
     
     def _parse_chunks_evaluation(self, response_text: str, chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -417,6 +580,19 @@ Output your optimization in JSON format:
                 "justification": "Failed to parse LLM evaluation, using default relevance scores."
             }
     
+    def _parse_evaluate_and_refine(self, response_text: str, chunks: List[Dict[str, Any]], original_query: str) -> Dict[str, Any]:
+        """Parse the LLM response to extract the chunks evaluation and refined query"""
+        evaluation = self._parse_chunks_evaluation(response_text, chunks)
+
+        refined_query = evaluation.get("refined_query")
+        if not isinstance(refined_query, str) or len(refined_query.strip()) < 5:
+            if evaluation["needs_refinement"]:
+                logger.warning("Refined query is missing or too short, using original query")
+            refined_query = original_query
+        evaluation["refined_query"] = refined_query.strip()
+
+        return evaluation
+
     def _parse_refined_query(self, response_text: str, original_query: str) -> str:
         """Parse the LLM response to extract the refined query"""
         try:
@@ -8,6 +8,8 @@ import re
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 
+from app.rag.llm_scheduler import with_llm_priority, PRIORITY_BACKGROUND
+
 class AuditReportGenerator:
     """
     Generates comprehensive audit reports for the RAG process
@@ -34,6 +36,7 @@ class AuditReportGenerator:
         self.llm_provider = llm_provider
         self.logger = logging.getLogger("app.rag.audit_report_generator")
     
+    @with_llm_priority(PRIORITY_BACKGROUND)
     async def generate_report(
         self,
         query_id: str,
@@ -0,0 +1,274 @@
+"""
+Embedding Semantic Chunker - splits text where the similarity between neighbouring sentences drops
+"""
+import asyncio
+import logging
+import re
+from typing import List, Optional, Tuple
+
+import numpy as np
+from langchain.text_splitter import TextSplitter
+
+from app.rag.ollama_client import OllamaClient
+from app.core.config import (
+    DEFAULT_EMBEDDING_MODEL,
+    EMBEDDING_CHUNKER_BREAKPOINT_PERCENTILE,
+    EMBEDDING_CHUNKER_BATCH_SIZE
+)
+from app.rag.llm_scheduler import with_llm_priority, PRIORITY_BACKGROUND
+
+logger = logging.getLogger("app.rag.chunkers.embedding_chunker")
+
+# A sentence ends after terminal punctuation followed by whitespace, or at a blank line
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n\s*\n')
+
+class EmbeddingSemanticChunker(TextSplitter):
+    """
+    Semantic chunker driven by sentence embeddings instead of LLM calls.
+
+    The text is split into sentences, each sentence (with a small window of
+    neighbours) is embedded in batches, and chunks are broken where the cosine
+    distance between consecutive sentences is above the configured percentile
+    of all distances in the text. Breakpoints are then adjusted so chunks stay
+    between min_chunk_size and chunk_size characters.
+
+    The sentence embeddings can also be pooled into one vector per chunk, so
+    the vector store doesn't have to embed the chunks a second time.
+    """
+
+    def __init__(
+        self,
+        ollama_client: Optional[OllamaClient] = None,
+        embedding_model: str = DEFAULT_EMBEDDING_MODEL,
+        chunk_size: int = 1500,
+        chunk_overlap: int = 200,
+        breakpoint_percentile: float = EMBEDDING_CHUNKER_BREAKPOINT_PERCENTILE,
+        min_chunk_size: Optional[int] = None,
+        buffer_size: int = 1,
+        batch_size: int = EMBEDDING_CHUNKER_BATCH_SIZE,
+        reuse_embeddings: bool = False
+    ):
+        """
+        Initialize the EmbeddingSemanticChunker.
+
+        Args:
+            ollama_client: Optional OllamaClient instance
+            embedding_model: Embedding model used for the sentences
+            chunk_size: Maximum size for chunks (in characters)
+            chunk_overlap: Maximum overlap between chunks (in characters, whole sentences)
+            breakpoint_percentile: Distance percentile above which a breakpoint is placed
+            min_chunk_size: Minimum size for chunks (default: a quarter of chunk_size)
+            buffer_size: Number of neighbouring sentences embedded with each sentence
+            batch_size: Number of sentences embedded per request
+            reuse_embeddings: Whether pooled chunk embeddings are returned for indexing
+        """
+        super().__init__(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+        self.ollama_client = ollama_client or OllamaClient()
+        self.embedding_model = embedding_model
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.breakpoint_percentile = breakpoint_percentile
+        self.min_chunk_size = min_chunk_size if min_chunk_size is not None else chunk_size // 4
+        self.buffer_size = buffer_size
+        self.batch_size = max(1, batch_size)
+        self.reuse_embeddings = reuse_embeddings
+
+    def split_text(self, text: str) -> List[str]:
+        """
+        Split text at semantic breakpoints.
+
+        TextSplitter.split_text is synchronous, so this only embeds when no
+        event loop is running; inside a loop use split_text_async instead.
+
+        Args:
+            text: The text to split
+
+        Returns:
+            List of text chunks
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.split_text_async(text))
+
+        logger.warning("split_text called inside a running event loop, splitting by size only")
+        sentences = self._split_sentences(text)
+        return [chunk for chunk, _ in self._build_chunks(sentences, set(), None)]
+
+    async def split_text_async(self, text: str) -> List[str]:
+        """
+        Asynchronous version of split_text.
+
+        Args:
+            text: The text to split
+
+        Returns:
+            List of text chunks
+        """
+        return [chunk for chunk, _ in await self.split_text_with_embeddings(text)]
+
+    @with_llm_priority(PRIORITY_BACKGROUND)
+    async def split_text_with_embeddings(self, text: str) -> List[Tuple[str, Optional[List[float]]]]:
+        """
+        Split text and return each chunk with its pooled embedding.
+
+        Args:
+            text: The text to split
+
+        Returns:
+            List of (chunk, embedding) tuples; the embedding is None when
+            reuse_embeddings is disabled or no embeddings were computed
+        """
+        if len(text) <= self.chunk_size:
+            return [(text, None)] if text.strip() else []
+
+        sentences = self._split_sentences(text)
+        if len(sentences) < 2:
+            return self._build_chunks(sentences, set(), None)
+
+        try:
+            vectors = await self._embed_sentences(sentences)
+        except Exception as e:
+            logger.error(f"Error embedding sentences, splitting by size only: {str(e)}")
+            return self._build_chunks(sentences, set(), None)
+
+        breakpoints = self._find_breakpoints(vectors)
+        chunks = self._build_chunks(sentences, breakpoints, vectors if self.reuse_embeddings else None)
+
+        logger.info(f"Created {len(chunks)} semantic chunks from {len(sentences)} sentences")
+        return chunks
+
+    def _split_sentences(self, text: str) -> List[str]:
+        """
+        Split text into sentences, keeping trailing whitespace so that
+        joining consecutive sentences reproduces the original text.
+        Sentences longer than chunk_size are cut at whitespace.
+        """
+        sentences = []
+        start = 0
+        for match in _SENTENCE_BOUNDARY.finditer(text):
+            sentences.extend(self._cut_long_sentence(text[start:match.end()]))
+            start = match.end()
+        if start < len(text):
+            sentences.extend(self._cut_long_sentence(text[start:]))
+        return [sentence for sentence in sentences if sentence.strip()]
+
+    def _cut_long_sentence(self, sentence: str) -> List[str]:
+        """Cut a sentence that on its own exceeds chunk_size"""
+        pieces = []
+        while len(sentence) > self.chunk_size:
+            cut = sentence.rfind(" ", 0, self.chunk_size)
+            if cut <= 0:
+                cut = self.chunk_size
+            pieces.append(sentence[:cut + 1])
+            sentence = sentence[cut + 1:]
+        pieces.append(sentence)
+        return pieces
+
+    async def _embed_sentences(self, sentences: List[str]) -> np.ndarray:
+        """
+        Embed every sentence together with its neighbours, in batches.
+
+        Returns:
+            Matrix of L2-normalized embeddings, one row per sentence
+        """
+        windows = [
+            "".join(sentences[max(0, i - self.buffer_size):i + self.buffer_size + 1]).strip()
+            for i in range(len(sentences))
+        ]
+
+        embeddings = []
+        for start in range(0, len(windows), self.batch_size):
+            embeddings.extend(await self.ollama_client.create_embeddings(
+                windows[start:start + self.batch_size],
+                model=self.embedding_model
+            ))
+
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        # Reason: an empty embedding would otherwise divide by zero
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+    def _find_breakpoints(self, vectors: np.ndarray) -> set:
+        """
+        Find sentence indices that start a new chunk.
+
+        Args:
+            vectors: Normalized sentence embeddings
+
+        Returns:
+            Set of sentence indices whose distance to the previous sentence
+            is above the breakpoint percentile
+        """
+        # Cosine distance between each sentence and the next, computed for all pairs at once
+        distances = 1.0 - np.einsum("ij,ij->i", vectors[:-1], vectors[1:])
+        threshold = np.percentile(distances, self.breakpoint_percentile)
+        return {int(i) + 1 for i in np.flatnonzero(distances > threshold)}
+
+    def _build_chunks(
+        self,
+        sentences: List[str],
+        breakpoints: set,
+        vectors: Optional[np.ndarray]
+    ) -> List[Tuple[str, Optional[List[float]]]]:
+        """
+        Group sentences into chunks at the breakpoints, within the size limits.
+
+        Args:
+            sentences: Sentences in document order
+            breakpoints: Sentence indices that should start a new chunk
+            vectors: Normalized sentence embeddings to pool, or None
+
+        Returns:
+            List of (chunk, embedding) tuples
+        """
+        if not sentences:
+            return []
+
+        # Prefix sums give the length of any sentence range in O(1)
+        offsets = np.concatenate(([0], np.cumsum([len(sentence) for sentence in sentences])))
+
+        ranges = []
+        start = 0
+        for i in range(1, len(sentences)):
+            current_length = offsets[i] - offsets[start]
+            if current_length + len(sentences[i]) > self.chunk_size or \
+                    (i in breakpoints and current_length >= self.min_chunk_size):
+                ranges.append((start, i))
+                start = i
+        ranges.append((start, len(sentences)))
+
+        # Fold a short trailing chunk into its predecessor when it fits
+        if len(ranges) > 1:
+            last_start, last_end = ranges[-1]
+            previous_start = ranges[-2][0]
+            if offsets[last_end] - offsets[last_start] < self.min_chunk_size and \
+                    offsets[last_end] - offsets[previous_start] <= self.chunk_size:
+                ranges[-2:] = [(previous_start, last_end)]
+
+        chunks = []
+        for index, (start, end) in enumerate(ranges):
+            if index > 0 and self.chunk_overlap > 0:
+                start = self._overlap_start(offsets, ranges[index - 1][0], start)
+
+            text = "".join(sentences[start:end]).strip()
+            if not text:
+                continue
+
+            embedding = None
+            if vectors is not None:
+                pooled = vectors[start:end].mean(axis=0)
+                norm = np.linalg.norm(pooled)
+                embedding = (pooled / norm if norm else pooled).tolist()
+            chunks.append((text, embedding))
+
+        return chunks
+
+    def _overlap_start(self, offsets: np.ndarray, previous_start: int, start: int) -> int:
+        """Move a chunk start back over whole sentences that fit in chunk_overlap"""
+        overlap_start = start
+        while overlap_start - 1 > previous_start and \
+                offsets[start] - offsets[overlap_start - 1] <= self.chunk_overlap:
+            overlap_start -= 1
+        return overlap_start
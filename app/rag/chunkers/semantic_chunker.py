@@ -1,6 +1,7 @@
 """
 Semantic Chunker - LLM-based chunker that splits text based on semantic boundaries
 """
+import asyncio
 import logging
 import json
 import re
@@ -10,7 +11,9 @@ from langchain.schema.document import Document as LangchainDocument
 from langchain.text_splitter import TextSplitter
 
 from app.rag.ollama_client import OllamaClient
-from app.core.config import CHUNKING_JUDGE_MODEL
+from app.cache.semantic_boundary_cache import SemanticBoundaryCache, get_semantic_boundary_cache
+from app.core.config import CHUNKING_JUDGE_MODEL, SEMANTIC_CHUNKER_MAX_CONCURRENCY
+from app.rag.llm_scheduler import with_llm_priority, PRIORITY_BACKGROUND
 
 logger = logging.getLogger("app.rag.chunkers.semantic_chunker")
 
@@ -30,7 +33,9 @@ class SemanticChunker(TextSplitter):
         chunk_size: int = 1500,
         chunk_overlap: int = 200,
         max_llm_context_length: int = 8000,
-        cache_enabled: bool = True
+        cache_enabled: bool = True,
+        max_concurrency: int = SEMANTIC_CHUNKER_MAX_CONCURRENCY,
+        boundary_cache: Optional[SemanticBoundaryCache] = None
     ):
         """
         Initialize the SemanticChunker.
@@ -42,6 +47,8 @@ class SemanticChunker(TextSplitter):
             chunk_overlap: Target overlap between chunks (in characters)
             max_llm_context_length: Maximum context length for LLM input
             cache_enabled: Whether to cache chunking results
+            max_concurrency: Maximum number of sections sent to the LLM at once
+            boundary_cache: Cache of boundaries per section (default: shared cache)
         """
         # Initialize with default separator to satisfy TextSplitter requirements
         super().__init__(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
@@ -53,6 +60,10 @@ class SemanticChunker(TextSplitter):
         self.max_llm_context_length = max_llm_context_length
         self.cache_enabled = cache_enabled
         self.cache = {}  # Simple in-memory cache
+        self.max_concurrency = max(1, max_concurrency)
+        self.boundary_cache = boundary_cache or get_semantic_boundary_cache()
+        self._section_semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
     
     def split_text(self, text: str) -> List[str]:
         """
@@ -85,6 +96,7 @@ class SemanticChunker(TextSplitter):
         
         return chunks
     
+    @with_llm_priority(PRIORITY_BACKGROUND)
     async def split_text_async(self, text: str) -> List[str]:
         """
         Asynchronous version of split_text.
@@ -127,7 +139,6 @@ class SemanticChunker(TextSplitter):
         Returns:
             List of text chunks split at semantic boundaries
         """
-        import asyncio
         try:
             # Try to get the current event loop
             loop = asyncio.get_event_loop()
@@ -187,12 +198,21 @@ class SemanticChunker(TextSplitter):
         
         logger.info(f"Processing long text in {len(sections)} sections")
         
-        # Process each section
+        # Dispatch sections concurrently; gather keeps results in section order
+        semaphore = self._get_section_semaphore()
+        
+        async def process_section(index: int, section: str) -> List[str]:
+            async with semaphore:
+                logger.info(f"Processing section {index+1}/{len(sections)}")
+                return await self._identify_semantic_boundaries(section)
+        
+        section_results = await asyncio.gather(
+            *(process_section(i, section) for i, section in enumerate(sections))
+        )
+        
+        # Stitch the sections together in order
         all_chunks = []
-        for i, section in enumerate(sections):
-            logger.info(f"Processing section {i+1}/{len(sections)}")
-            section_chunks = await self._identify_semantic_boundaries(section)
-            
+        for i, section_chunks in enumerate(section_results):
             # For all but the first section, check if the first chunk should be merged
             # with the last chunk of the previous section
             if i > 0 and all_chunks and section_chunks:
@@ -209,6 +229,20 @@ class SemanticChunker(TextSplitter):
         
         return all_chunks
     
+    def _get_section_semaphore(self) -> asyncio.Semaphore:
+        """
+        Get the semaphore bounding concurrent section requests.
+        
+        The chunker is shared between documents, so one semaphore caps the
+        LLM calls across all of them; it is recreated if the sync split_text
+        path runs under a different event loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._section_semaphore is None or self._semaphore_loop is not loop:
+            self._section_semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._section_semaphore
+    
     async def _identify_semantic_boundaries(self, text: str) -> List[str]:
         """
         Use LLM to identify semantic boundaries in text and split accordingly.
@@ -219,26 +253,34 @@ class SemanticChunker(TextSplitter):
         Returns:
             List of text chunks split at semantic boundaries
         """
-        prompt = self._create_chunking_prompt(text)
-        
         try:
-            # Get boundaries from LLM
-            response = await self.ollama_client.generate(
-                prompt=prompt,
-                model=self.model,
-                stream=False
-            )
-            
-            # Parse the response
-            boundaries = self._parse_boundaries(response.get("response", ""), text)
+            # Sections seen before (retries, re-ingests) skip the LLM call
+            boundaries = self.boundary_cache.get_boundaries(text, self.model, self.chunk_size)
             
-            # If parsing fails or no boundaries are found, fall back to simple chunking
-            if not boundaries:
-                logger.warning("Failed to identify semantic boundaries, falling back to simple chunking")
-                return self._fallback_chunking(text)
+            if boundaries is None:
+                prompt = self._create_chunking_prompt(text)
+                
+                # Get boundaries from LLM
+                response = await self.ollama_client.generate(
+                    prompt=prompt,
+                    model=self.model,
+                    stream=False
+                )
+                
+                # Parse the response
+                boundaries = self._parse_boundaries(response.get("response", ""), text)
+                
+                # If parsing fails or no boundaries are found, fall back to simple chunking
+                if not boundaries:
+                    logger.warning("Failed to identify semantic boundaries, falling back to simple chunking")
+                    return self._fallback_chunking(text)
+                
+                self.boundary_cache.set_boundaries(text, self.model, self.chunk_size, boundaries)
+            else:
+                logger.info("Using cached semantic boundaries for section")
             
-            # Create chunks based on identified boundaries
-            chunks = self._create_chunks_from_boundaries(text, boundaries)
+            # Create chunks based on identified boundaries (on a copy, the list is extended)
+            chunks = self._create_chunks_from_boundaries(text, list(boundaries))
             
             logger.info(f"Created {len(chunks)} semantic chunks")
             return chunks
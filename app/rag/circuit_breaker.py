@@ -0,0 +1,291 @@
+"""
+Circuit Breaker - sheds requests to LLM server endpoints that keep failing, until they recover
+"""
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+import httpx
+
+from app.rag.ingest_metrics import StageHistogram
+from app.rag.model_residency import normalize_model_name
+
+logger = logging.getLogger("app.rag.circuit_breaker")
+
+# Breaker states
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while its endpoint's breaker is open"""
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Circuit for {name} is open, retry in {retry_in:.1f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+def is_breaker_failure(error: BaseException) -> bool:
+    """
+    Check whether an error means the server is unhealthy
+
+    Args:
+        error: Error raised by a request
+
+    Returns:
+        True for timeouts, connection errors and 5xx responses; client
+        errors (4xx) show the server is responding and don't count
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError, OSError))
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one endpoint and model of the LLM server.
+
+    Closed, requests flow and their outcomes are tracked. After too many
+    consecutive failures, or a high failure rate over the recent calls, the
+    breaker opens and requests fail immediately with CircuitOpenError
+    instead of waiting for a stalled server to time out. Once the recovery
+    time has passed it is half-open: a limited number of probe requests go
+    through, and the breaker closes if they succeed or opens again if not.
+    """
+    def __init__(self,
+                 name: str,
+                 failure_threshold: int = 5,
+                 failure_rate: float = 0.5,
+                 window_size: int = 20,
+                 recovery_seconds: float = 30.0,
+                 half_open_probes: int = 1):
+        """
+        Args:
+            name: Endpoint and model the breaker protects
+            failure_threshold: Consecutive failures that open the breaker
+            failure_rate: Failure fraction over a full window that opens the breaker
+            window_size: Number of recent calls the failure rate is computed over
+            recovery_seconds: Seconds the breaker stays open before probing
+            half_open_probes: Concurrent probe requests allowed while half-open
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.failure_rate = failure_rate
+        self.recovery_seconds = recovery_seconds
+        self.half_open_probes = half_open_probes
+        self.outcomes = deque(maxlen=window_size)
+        self.latency = StageHistogram(window_size * 10)
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probes_in_flight = 0
+        self._state = STATE_CLOSED
+        self.stats = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    @property
+    def state(self) -> str:
+        """Current state, moving from open to half-open once the recovery time has passed"""
+        if self._state == STATE_OPEN and time.monotonic() - self.opened_at >= self.recovery_seconds:
+            self._state = STATE_HALF_OPEN
+            self.probes_in_flight = 0
+            logger.info(f"Circuit for {self.name} is half-open, probing")
+        return self._state
+
+    def is_open(self) -> bool:
+        """Check whether requests are currently being shed"""
+        return self.state == STATE_OPEN
+
+    def acquire(self) -> None:
+        """
+        Admit a request
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with all probes in flight
+        """
+        state = self.state
+        if state == STATE_CLOSED:
+            return
+        if state == STATE_HALF_OPEN and self.probes_in_flight < self.half_open_probes:
+            self.probes_in_flight += 1
+            return
+        self.stats["rejected"] += 1
+        retry_in = 0.0 if state == STATE_HALF_OPEN else self.recovery_seconds - (time.monotonic() - self.opened_at)
+        raise CircuitOpenError(self.name, retry_in)
+
+    def release(self) -> None:
+        """Give back an admitted request's probe slot without an outcome (e.g. on cancellation)"""
+        if self._state == STATE_HALF_OPEN and self.probes_in_flight > 0:
+            self.probes_in_flight -= 1
+
+    def record_success(self) -> None:
+        """Record a successful request"""
+        self.stats["successes"] += 1
+        self.outcomes.append(True)
+        self.consecutive_failures = 0
+        if self._state == STATE_HALF_OPEN:
+            self._state = STATE_CLOSED
+            self.outcomes.clear()
+            logger.info(f"Circuit for {self.name} closed after a successful probe")
+
+    def record_failure(self, error: Optional[BaseException] = None) -> None:
+        """
+        Record a failed request
+
+        Args:
+            error: Error the request failed with
+        """
+        self.stats["failures"] += 1
+        self.outcomes.append(False)
+        self.consecutive_failures += 1
+        if self._state == STATE_HALF_OPEN:
+            self._open(f"probe failed: {error}")
+            return
+        failures = self.outcomes.count(False)
+        if self.consecutive_failures >= self.failure_threshold:
+            self._open(f"{self.consecutive_failures} consecutive failures, last: {error}")
+        elif len(self.outcomes) == self.outcomes.maxlen and failures / len(self.outcomes) >= self.failure_rate:
+            self._open(f"{failures} of the last {len(self.outcomes)} calls failed, last: {error}")
+
+    def observe_latency(self, seconds: float) -> None:
+        """
+        Record the upstream latency of a request
+
+        Args:
+            seconds: Time from sending the request to its response
+        """
+        self.latency.observe(seconds)
+
+    @contextmanager
+    def call(self):
+        """
+        Run a request through the breaker, recording its outcome
+
+        Raises:
+            CircuitOpenError: If the request is shed
+        """
+        self.acquire()
+        try:
+            yield self
+        except Exception as e:
+            if is_breaker_failure(e):
+                self.record_failure(e)
+            else:
+                self.release()
+                self.record_success()
+            raise
+        except BaseException:
+            # Cancelled, or a stream closed early: no outcome to record
+            self.release()
+            raise
+        else:
+            self.release()
+            self.record_success()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the breaker's state, counters and latency
+
+        Returns:
+            Dictionary with state, recent failure rate, counters and latency histogram
+        """
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "recent_failure_rate": self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0,
+            "latency": self.latency.snapshot(),
+            **self.stats
+        }
+
+    def _open(self, reason: str) -> None:
+        """Start shedding requests"""
+        self._state = STATE_OPEN
+        self.opened_at = time.monotonic()
+        self.probes_in_flight = 0
+        self.stats["opened"] += 1
+        logger.warning(f"Circuit for {self.name} opened ({reason}), shedding requests for {self.recovery_seconds:.0f}s")
+
+
+class CircuitBreakerRegistry:
+    """
+    Circuit breakers per LLM server endpoint and model
+    """
+    def __init__(self, enabled: bool = True, **breaker_settings):
+        """
+        Args:
+            enabled: Whether requests go through breakers at all
+            **breaker_settings: Settings for each new CircuitBreaker
+        """
+        self.enabled = enabled
+        self.breaker_settings = breaker_settings
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, endpoint: str, model: str) -> Optional[CircuitBreaker]:
+        """
+        Get the breaker of an endpoint and model
+
+        Args:
+            endpoint: API path, e.g. "/api/generate"
+            model: Model name
+
+        Returns:
+            CircuitBreaker, or None if breakers are disabled
+        """
+        if not self.enabled:
+            return None
+        name = f"{endpoint}:{normalize_model_name(str(model))}"
+        if name not in self.breakers:
+            self.breakers[name] = CircuitBreaker(name, **self.breaker_settings)
+        return self.breakers[name]
+
+    def is_open(self, endpoint: str, model: str) -> bool:
+        """
+        Check whether requests to an endpoint and model are being shed
+
+        Args:
+            endpoint: API path
+            model: Model name
+
+        Returns:
+            True if the breaker exists and is open
+        """
+        if not self.enabled:
+            return False
+        breaker = self.breakers.get(f"{endpoint}:{normalize_model_name(str(model))}")
+        return breaker is not None and breaker.is_open()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the state of every breaker
+
+        Returns:
+            Dictionary mapping breaker names to their stats
+        """
+        return {name: breaker.get_stats() for name, breaker in self.breakers.items()}
+
+
+# Singleton instance shared by all Ollama clients
+_registry_instance: Optional[CircuitBreakerRegistry] = None
+
+def get_circuit_breakers() -> CircuitBreakerRegistry:
+    """
+    Get the shared circuit breaker registry
+
+    Returns:
+        CircuitBreakerRegistry instance
+    """
+    global _registry_instance
+    if _registry_instance is None:
+        from app.core.config import (
+            LLM_BREAKER_ENABLED,
+            LLM_BREAKER_FAILURE_THRESHOLD,
+            LLM_BREAKER_FAILURE_RATE,
+            LLM_BREAKER_RECOVERY_SECONDS
+        )
+        _registry_instance = CircuitBreakerRegistry(
+            enabled=LLM_BREAKER_ENABLED,
+            failure_threshold=LLM_BREAKER_FAILURE_THRESHOLD,
+            failure_rate=LLM_BREAKER_FAILURE_RATE,
+            recovery_seconds=LLM_BREAKER_RECOVERY_SECONDS
+        )
+    return _registry_instance
@@ -0,0 +1,231 @@
+"""
+Request Deadlines - per-request latency budgets that optional RAG stages check before running
+"""
+import time
+import logging
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger("app.rag.deadline")
+
+# Expected duration of each optional stage in seconds, overridable with DEADLINE_STAGE_SECONDS
+DEFAULT_STAGE_SECONDS = {
+    "query_analysis": 2.0,
+    "chunk_evaluation": 3.0,
+    "retrieval_judge": 5.0,
+    "query_refinement": 3.0,
+    "context_optimization": 3.0,
+    "query_planning": 3.0,
+    "generation": 10.0,
+    "response_evaluation": 4.0,
+    "response_refinement": 8.0,
+    "audit_report": 4.0
+}
+
+# Degradations across all requests, by stage and action
+_degradation_stats: Counter = Counter()
+
+class Deadline:
+    """
+    Latency budget of one request.
+
+    Created when the request arrives and shared by every stage working on
+    it. Optional stages ask allows() before running; when the remaining
+    budget is too small they skip or downgrade themselves and record what
+    they did with degrade(), so the response can report it. Stages before
+    the answer keep a reserve for generating it.
+    """
+    def __init__(self,
+                 budget_seconds: Optional[float] = None,
+                 stage_seconds: Optional[Dict[str, float]] = None,
+                 reserve_stage: Optional[str] = "generation"):
+        """
+        Args:
+            budget_seconds: Seconds the request may take (None for no deadline)
+            stage_seconds: Expected duration of optional stages, merged over the defaults
+            reserve_stage: Stage whose expected duration is kept in reserve by allows()
+        """
+        self.budget_seconds = budget_seconds
+        self.started_at = time.monotonic()
+        self.stage_seconds = {**DEFAULT_STAGE_SECONDS, **(stage_seconds or {})}
+        self.reserve_seconds = self.stage_seconds.get(reserve_stage, 0.0) if reserve_stage else 0.0
+        self.degradations: List[Dict[str, Any]] = []
+
+    def elapsed(self) -> float:
+        """Seconds since the request arrived"""
+        return time.monotonic() - self.started_at
+
+    def remaining(self) -> Optional[float]:
+        """
+        Get the remaining budget
+
+        Returns:
+            Seconds left (negative once expired), or None without a deadline
+        """
+        if self.budget_seconds is None:
+            return None
+        return self.budget_seconds - self.elapsed()
+
+    def expired(self) -> bool:
+        """Check whether the budget is used up"""
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def allows(self, stage: str, seconds: Optional[float] = None, reserve: Optional[float] = None) -> bool:
+        """
+        Check whether there is time for a stage
+
+        Args:
+            stage: Stage name
+            seconds: Expected duration (the stage's configured estimate by default)
+            reserve: Seconds that must be left afterwards (the answer reserve by default)
+
+        Returns:
+            True if the stage fits in the remaining budget
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return True
+        needed = self.stage_seconds.get(stage, 0.0) if seconds is None else seconds
+        return remaining - (self.reserve_seconds if reserve is None else reserve) >= needed
+
+    def degrade(self, stage: str, action: str) -> None:
+        """
+        Record that a stage was skipped or downgraded for lack of time
+
+        Args:
+            stage: Stage name
+            action: What was done instead, e.g. "skipped"
+        """
+        remaining = self.remaining()
+        self.degradations.append({
+            "stage": stage,
+            "action": action,
+            "remaining_seconds": None if remaining is None else round(remaining, 3)
+        })
+        _degradation_stats[f"{stage}:{action}"] += 1
+        logger.info(f"Deadline: {stage} {action} with {self.degradations[-1]['remaining_seconds']}s of {self.budget_seconds}s left")
+
+    def check(self, stage: str, action: str = "skipped", seconds: Optional[float] = None, reserve: Optional[float] = None) -> bool:
+        """
+        Check whether there is time for a stage, recording the degradation if not
+
+        Args:
+            stage: Stage name
+            action: What the caller does instead if there is no time
+            seconds: Expected duration (the stage's configured estimate by default)
+            reserve: Seconds that must be left afterwards (the answer reserve by default)
+
+        Returns:
+            True if the stage should run
+        """
+        if self.allows(stage, seconds=seconds, reserve=reserve):
+            return True
+        self.degrade(stage, action)
+        return False
+
+    def get_summary(self) -> Dict[str, Any]:
+        """
+        Get the deadline state for response metadata
+
+        Returns:
+            Dictionary with the budget, elapsed and remaining seconds and degradations
+        """
+        remaining = self.remaining()
+        return {
+            "budget_seconds": self.budget_seconds,
+            "elapsed_seconds": round(self.elapsed(), 3),
+            "remaining_seconds": None if remaining is None else round(remaining, 3),
+            "degradations": list(self.degradations)
+        }
+
+
+# Deadline of the request the current task works on, set at the pipeline entry points
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+def get_current_deadline() -> Optional[Deadline]:
+    """
+    Get the deadline of the request the current task works on
+
+    Returns:
+        Deadline, or None outside a request
+    """
+    return _current_deadline.get()
+
+def set_current_deadline(deadline: Optional[Deadline]) -> contextvars.Token:
+    """
+    Make a deadline current for the running task and tasks it starts
+
+    Args:
+        deadline: Deadline of the request
+
+    Returns:
+        Token for reset_current_deadline
+    """
+    return _current_deadline.set(deadline)
+
+def reset_current_deadline(token: contextvars.Token) -> None:
+    """
+    Restore the deadline that was current before set_current_deadline
+
+    Args:
+        token: Token returned by set_current_deadline
+    """
+    _current_deadline.reset(token)
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]):
+    """
+    Make a deadline current for the code inside the block (and tasks it starts)
+
+    Args:
+        deadline: Deadline of the request
+    """
+    token = set_current_deadline(deadline)
+    try:
+        yield deadline
+    finally:
+        reset_current_deadline(token)
+
+def check_deadline(stage: str, action: str = "skipped", seconds: Optional[float] = None, reserve: Optional[float] = None) -> bool:
+    """
+    Check the current request's deadline before an optional stage
+
+    Args:
+        stage: Stage name
+        action: What the caller does instead if there is no time
+        seconds: Expected duration (the stage's configured estimate by default)
+        reserve: Seconds that must be left afterwards (the answer reserve by default)
+
+    Returns:
+        True if the stage should run (always outside a request with a deadline)
+    """
+    deadline = get_current_deadline()
+    return deadline is None or deadline.check(stage, action, seconds=seconds, reserve=reserve)
+
+def create_request_deadline(budget_seconds: Optional[float] = None) -> Deadline:
+    """
+    Create the deadline of a new chat request from the configured budget
+
+    Args:
+        budget_seconds: Budget overriding CHAT_LATENCY_BUDGET_SECONDS
+
+    Returns:
+        Deadline starting now (without a limit if the budget is 0)
+    """
+    from app.core.config import CHAT_LATENCY_BUDGET_SECONDS, DEADLINE_STAGE_SECONDS
+    budget = CHAT_LATENCY_BUDGET_SECONDS if budget_seconds is None else budget_seconds
+    return Deadline(budget_seconds=budget if budget > 0 else None, stage_seconds=DEADLINE_STAGE_SECONDS)
+
+def get_deadline_stats() -> Dict[str, int]:
+    """
+    Get how often stages were degraded to meet deadlines
+
+    Returns:
+        Dictionary mapping "stage:action" to a count
+    """
+    return dict(_degradation_stats)
@@ -7,6 +7,7 @@ from uuid import UUID
 
 from app.models.document import Document
 from app.core.config import UPLOAD_DIR, OLLAMA_BASE_URL, DEFAULT_MODEL
+from app.rag.llm_scheduler import with_llm_priority, PRIORITY_BACKGROUND
 
 class DocumentAnalysisService:
     """
@@ -17,6 +18,7 @@ class DocumentAnalysisService:
         self.sample_size = sample_size
         self.logger = logging.getLogger("app.rag.document_analysis_service")
         
+    @with_llm_priority(PRIORITY_BACKGROUND)
     async def analyze_document(self, document: Document) -> Dict[str, Any]:
         """
         Analyze a document and recommend a processing strategy
@@ -41,6 +43,7 @@ class DocumentAnalysisService:
         
         return strategy
     
+    @with_llm_priority(PRIORITY_BACKGROUND)
     async def analyze_document_batch(self, documents: List[Document]) -> Dict[str, Any]:
         """
         Analyze a batch of documents and recommend a processing strategy
@@ -309,6 +312,7 @@ Available chunking strategies:
 2. token - Uses TokenTextSplitter (better for code or technical content)
 3. markdown - Uses MarkdownHeaderTextSplitter (best for markdown with headers)
 4. semantic - Uses SemanticChunker (best for complex documents with varying content)
+5. embedding - Uses EmbeddingSemanticChunker (topic-based splitting like semantic, faster for long documents)
 
 Your analysis should consider:
 - Document structure (headers, paragraphs, lists, tables)
@@ -357,6 +361,7 @@ Available chunking strategies:
 2. token - Uses TokenTextSplitter (better for code or technical content)
 3. markdown - Uses MarkdownHeaderTextSplitter (best for markdown with headers)
 4. semantic - Uses SemanticChunker (best for complex documents with varying content)
+5. embedding - Uses EmbeddingSemanticChunker (topic-based splitting like semantic, faster for long documents)
 
 Your analysis should consider:
 - Common document structures across the batch
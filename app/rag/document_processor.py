@@ -1,24 +1,66 @@
 import os
+import copy
+import time
+import asyncio
 import logging
 import json
-from typing import List, Dict, Any, Optional, Literal
+from bisect import bisect_left
+from typing import List, Dict, Any, Optional, Literal, Tuple, Iterator
 from uuid import UUID
 from langchain.text_splitter import (
     RecursiveCharacterTextSplitter,
     MarkdownHeaderTextSplitter,
     TokenTextSplitter
 )
-from langchain_community.document_loaders import TextLoader, PyPDFLoader, CSVLoader, UnstructuredMarkdownLoader
+from langchain_community.document_loaders import TextLoader, CSVLoader, UnstructuredMarkdownLoader
 from langchain.schema.document import Document as LangchainDocument
+from pydantic import BaseModel
 
-from app.core.config import UPLOAD_DIR, CHUNK_SIZE, CHUNK_OVERLAP, USE_CHUNKING_JUDGE
+from app.core.config import (
+    UPLOAD_DIR,
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    USE_CHUNKING_JUDGE,
+    EMBEDDING_CHUNKER_REUSE_EMBEDDINGS,
+    PDF_PAGE_BATCH_SIZE
+)
 from app.models.document import Document, Chunk
 from app.rag.agents.chunking_judge import ChunkingJudge
 from app.rag.chunkers.semantic_chunker import SemanticChunker
+from app.rag.chunkers.embedding_chunker import EmbeddingSemanticChunker
 from app.rag.document_analysis_service import DocumentAnalysisService
+from app.rag.pdf_loader import StreamingPDFLoader
+from app.rag.ingest_metrics import get_ingest_monitor
+from app.rag.engine.utils.timing import TimingStats, async_timing_context
+from app.cache.chunking_decision_cache import ChunkingDecisionCache, get_chunking_decision_cache
+from app.rag.llm_scheduler import with_llm_priority, PRIORITY_BACKGROUND
 
 logger = logging.getLogger("app.rag.document_processor")
 
+# Chunk metadata key carrying an embedding computed during splitting
+CHUNK_EMBEDDING_KEY = "_chunk_embedding"
+
+# Maximum number of chunks kept for one document
+MAX_CHUNKS = 30
+
+# Binary formats whose raw bytes say nothing about structure; they are fingerprinted by file type only
+BINARY_SAMPLE_EXTENSIONS = {".doc", ".docx"}
+
+class ChunkingPlan(BaseModel):
+    """
+    Immutable chunking parameters for a single document.
+    
+    Passed through a processing call instead of being stored on the
+    processor, and hashable so it can key the splitter cache.
+    """
+    strategy: str = "recursive"
+    chunk_size: int = CHUNK_SIZE
+    chunk_overlap: int = CHUNK_OVERLAP
+    file_ext: Optional[str] = None
+    
+    class Config:
+        frozen = True
+
 class DocumentProcessor:
     """
     Process documents for RAG with support for multiple chunking strategies
@@ -30,7 +72,8 @@ class DocumentProcessor:
         chunk_overlap: int = CHUNK_OVERLAP,
         chunking_strategy: str = "recursive",
         llm_provider = None,
-        user_id: Optional[UUID] = None
+        user_id: Optional[UUID] = None,
+        decision_cache: Optional[ChunkingDecisionCache] = None
     ):
         self.upload_dir = upload_dir
         self.chunk_size = chunk_size
@@ -38,45 +81,73 @@ class DocumentProcessor:
         self.chunking_strategy = chunking_strategy
         self.loader_map = {
             '.txt': TextLoader,
-            '.pdf': PyPDFLoader,
+            '.pdf': StreamingPDFLoader,
             '.csv': CSVLoader,
             '.md': UnstructuredMarkdownLoader,
         }
         self.llm_provider = llm_provider
         self.document_analysis_service = DocumentAnalysisService(llm_provider=self.llm_provider)
+        self._splitter_cache: Dict[ChunkingPlan, Any] = {}
         self.text_splitter = self._get_text_splitter()
         self.user_id = user_id  # Store the user ID for permission metadata
+        self.decision_cache = decision_cache or get_chunking_decision_cache()
+        self._chunking_judge = None
+        self.analysis_stats = {
+            "documents_analyzed": 0,
+            "llm_analyses": 0,
+            "batch_analyses": 0,
+            "cache_hits": 0
+        }
     
-    def _get_text_splitter(self, file_ext=None):
-        """Get the appropriate text splitter based on chunking strategy and file type"""
-        logger.info(f"Using chunking strategy: {self.chunking_strategy} for file type: {file_ext}")
+    def _get_text_splitter(self, file_ext=None, plan: Optional[ChunkingPlan] = None):
+        """
+        Get the text splitter for a chunking plan, reusing cached instances.
+        
+        Splitters are stateless between calls, so one instance per
+        (strategy, size, overlap, file type) is shared by all documents and
+        concurrent jobs instead of being rebuilt for every document.
+        """
+        if plan is None:
+            plan = ChunkingPlan(
+                strategy=self.chunking_strategy,
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap,
+                file_ext=file_ext
+            )
         
-        # If we have a chunking analysis in document metadata, log it
-        if hasattr(self, 'document') and self.document and hasattr(self.document, 'doc_metadata') and 'chunking_analysis' in self.document.doc_metadata:
-            logger.info(f"Chunking analysis: {self.document.doc_metadata['chunking_analysis']['justification']}")
+        splitter = self._splitter_cache.get(plan)
+        if splitter is None:
+            splitter = self._build_text_splitter(plan)
+            self._splitter_cache[plan] = splitter
+        return splitter
+    
+    def _build_text_splitter(self, plan: ChunkingPlan):
+        """Build the appropriate text splitter based on chunking strategy and file type"""
+        file_ext = plan.file_ext
+        logger.info(f"Using chunking strategy: {plan.strategy} for file type: {file_ext}")
         
         # Text file handling - use paragraph-based splitting for more natural chunks
         if file_ext == ".txt":
             # Use a larger chunk size for text files to preserve more context
-            larger_chunk_size = self.chunk_size * 3  # Increase from 500 to 1500
+            larger_chunk_size = plan.chunk_size * 3  # Increase from 500 to 1500
             logger.info(f"Using paragraph-based splitting for text file with increased chunk size {larger_chunk_size}")
             return RecursiveCharacterTextSplitter(
                 chunk_size=larger_chunk_size,
-                chunk_overlap=self.chunk_overlap * 2,  # Increase overlap as well
+                chunk_overlap=plan.chunk_overlap * 2,  # Increase overlap as well
                 separators=["\n\n", "\n", ".", " ", ""]
             )
         
         # PDF-specific handling
         if file_ext == ".pdf":
-            logger.info(f"Using PDF-specific splitting with chunk size {self.chunk_size}")
+            logger.info(f"Using PDF-specific splitting with chunk size {plan.chunk_size}")
             return RecursiveCharacterTextSplitter(
-                chunk_size=self.chunk_size,
-                chunk_overlap=self.chunk_overlap,
+                chunk_size=plan.chunk_size,
+                chunk_overlap=plan.chunk_overlap,
                 separators=["\n\n", "\n", ".", " ", ""]
             )
         
         # Markdown-specific handling
-        if file_ext == ".md" and self.chunking_strategy == "markdown":
+        if file_ext == ".md" and plan.strategy == "markdown":
             logger.info("Using header-based splitting for markdown")
             # First split by headers
             header_splitter = MarkdownHeaderTextSplitter(
@@ -89,31 +160,31 @@ class DocumentProcessor:
             )
             # Then apply recursive splitting to each section
             return RecursiveCharacterTextSplitter(
-                chunk_size=self.chunk_size,
-                chunk_overlap=self.chunk_overlap
+                chunk_size=plan.chunk_size,
+                chunk_overlap=plan.chunk_overlap
             )
         
         # CSV-specific handling
         if file_ext == ".csv":
-            logger.info(f"Using larger chunks for CSV with chunk size {self.chunk_size}")
+            logger.info(f"Using larger chunks for CSV with chunk size {plan.chunk_size}")
             return RecursiveCharacterTextSplitter(
-                chunk_size=self.chunk_size * 2,  # Double chunk size for CSVs
-                chunk_overlap=self.chunk_overlap
+                chunk_size=plan.chunk_size * 2,  # Double chunk size for CSVs
+                chunk_overlap=plan.chunk_overlap
             )
         
         # Standard strategies
-        if self.chunking_strategy == "recursive":
+        if plan.strategy == "recursive":
             return RecursiveCharacterTextSplitter(
-                chunk_size=self.chunk_size,
-                chunk_overlap=self.chunk_overlap,
+                chunk_size=plan.chunk_size,
+                chunk_overlap=plan.chunk_overlap,
                 separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""]
             )
-        elif self.chunking_strategy == "token":
+        elif plan.strategy == "token":
             return TokenTextSplitter(
-                chunk_size=self.chunk_size // 4,  # Adjust for tokens vs characters
-                chunk_overlap=self.chunk_overlap // 4
+                chunk_size=plan.chunk_size // 4,  # Adjust for tokens vs characters
+                chunk_overlap=plan.chunk_overlap // 4
             )
-        elif self.chunking_strategy == "markdown":
+        elif plan.strategy == "markdown":
             return MarkdownHeaderTextSplitter(
                 headers_to_split_on=[
                     ("#", "header1"),
@@ -122,26 +193,38 @@ class DocumentProcessor:
                     ("####", "header4"),
                 ]
             )
-        elif self.chunking_strategy == "semantic":
-            logger.info(f"Using semantic chunking with chunk size {self.chunk_size}")
+        elif plan.strategy == "semantic":
+            logger.info(f"Using semantic chunking with chunk size {plan.chunk_size}")
+            # The instance is shared across documents, so its whole-text cache is disabled
             return SemanticChunker(
-                chunk_size=self.chunk_size,
-                chunk_overlap=self.chunk_overlap
+                chunk_size=plan.chunk_size,
+                chunk_overlap=plan.chunk_overlap,
+                cache_enabled=False
+            )
+        elif plan.strategy == "embedding":
+            logger.info(f"Using embedding-based semantic chunking with chunk size {plan.chunk_size}")
+            return EmbeddingSemanticChunker(
+                chunk_size=plan.chunk_size,
+                chunk_overlap=plan.chunk_overlap,
+                reuse_embeddings=EMBEDDING_CHUNKER_REUSE_EMBEDDINGS
             )
         else:
-            logger.warning(f"Unknown chunking strategy: {self.chunking_strategy}, falling back to recursive")
+            logger.warning(f"Unknown chunking strategy: {plan.strategy}, falling back to recursive")
             return RecursiveCharacterTextSplitter(
-                chunk_size=self.chunk_size,
-                chunk_overlap=self.chunk_overlap,
+                chunk_size=plan.chunk_size,
+                chunk_overlap=plan.chunk_overlap,
                 separators=["\n\n", "\n", ".", " ", ""]
             )
     
-    async def process_document(self, document) -> Document:
+    @with_llm_priority(PRIORITY_BACKGROUND)
+    async def process_document(self, document, analysis_result: Optional[Dict[str, Any]] = None) -> Document:
             """
             Process a document by splitting it into chunks
             
             Args:
                 document: Document to process (Pydantic or SQLAlchemy model)
+                analysis_result: Precomputed chunking decision (e.g. from analyze_documents);
+                    the document is analyzed when omitted
                 
             Returns:
                 Processed document (Pydantic model)
@@ -172,50 +255,40 @@ class DocumentProcessor:
                 # Get file extension for specialized handling
                 _, ext = os.path.splitext(file_path.lower())
                 
-                # Use Chunking Judge if enabled
-                if USE_CHUNKING_JUDGE:
-                    logger.info(f"Using Chunking Judge to analyze document: {pydantic_document.filename}")
-                    chunking_judge = ChunkingJudge()
-                    analysis_result = await chunking_judge.analyze_document(pydantic_document)
-                    
-                    # Update chunking strategy and parameters
-                    self.chunking_strategy = analysis_result["strategy"]
-                    if "parameters" in analysis_result and "chunk_size" in analysis_result["parameters"]:
-                        self.chunk_size = analysis_result["parameters"]["chunk_size"]
-                    if "parameters" in analysis_result and "chunk_overlap" in analysis_result["parameters"]:
-                        self.chunk_overlap = analysis_result["parameters"]["chunk_overlap"]
-                    
-                    # Store the chunking analysis in document metadata
-                    pydantic_document.metadata["chunking_analysis"] = analysis_result
-                    
-                    logger.info(f"Chunking Judge recommendation: strategy={self.chunking_strategy}, " +
-                               f"chunk_size={self.chunk_size}, chunk_overlap={self.chunk_overlap}")
-                else:
-                    # Use DocumentAnalysisService if Chunking Judge is disabled
-                    logger.info(f"Chunking Judge disabled, using DocumentAnalysisService for document: {pydantic_document.filename}")
-                    analysis_result = await self.document_analysis_service.analyze_document(pydantic_document)
-                    
-                    # Update chunking strategy and parameters
-                    self.chunking_strategy = analysis_result["strategy"]
-                    if "parameters" in analysis_result and "chunk_size" in analysis_result["parameters"]:
-                        self.chunk_size = analysis_result["parameters"]["chunk_size"]
-                    if "parameters" in analysis_result and "chunk_overlap" in analysis_result["parameters"]:
-                        self.chunk_overlap = analysis_result["parameters"]["chunk_overlap"]
-                    
-                    # Store the document analysis in document metadata
-                    pydantic_document.metadata["document_analysis"] = analysis_result
-                    
-                    logger.info(f"Document analysis recommendation: strategy={self.chunking_strategy}, " +
-                               f"chunk_size={self.chunk_size}, chunk_overlap={self.chunk_overlap}")
+                # Per-call stage timings, aggregated by the ingest monitor
+                timing_stats = TimingStats()
                 
-                # Get appropriate text splitter for this file type
-                self.text_splitter = self._get_text_splitter(ext)
+                # Determine chunking strategy, reusing cached decisions for similar documents
+                if analysis_result is None:
+                    async with async_timing_context("analyze", timing_stats):
+                        analysis_result = await self._analyze_document(pydantic_document, file_path)
+                
+                # Reason: the strategy lives in per-call state rather than on self,
+                # so one processor can serve concurrent jobs safely
+                plan = self._build_chunking_plan(analysis_result, ext)
                 
-                # Extract text from the document based on file type
-                docs = await self._load_document(file_path)
+                # Store the analysis in document metadata
+                analysis_key = "chunking_analysis" if USE_CHUNKING_JUDGE else "document_analysis"
+                pydantic_document.metadata[analysis_key] = analysis_result
                 
-                # Split the document into chunks
-                chunks = self._split_document(docs)
+                logger.info(f"Chunking recommendation: strategy={plan.strategy}, " +
+                           f"chunk_size={plan.chunk_size}, chunk_overlap={plan.chunk_overlap}")
+                
+                # Get appropriate text splitter for this file type
+                text_splitter = self._get_text_splitter(plan=plan)
+                
+                if ext == ".pdf":
+                    # Stream PDF pages into the splitter instead of loading every page first
+                    page_batches = StreamingPDFLoader(file_path).lazy_load_batches(PDF_PAGE_BATCH_SIZE)
+                    chunks = await self._split_stream_async(page_batches, text_splitter, timing_stats)
+                else:
+                    # Extract text from the document based on file type
+                    async with async_timing_context("load", timing_stats):
+                        docs = await self._load_document(file_path)
+                    
+                    # Split the document off the event loop so concurrent documents don't block each other
+                    async with async_timing_context("split", timing_stats):
+                        chunks = await self._split_document_async(docs, text_splitter)
                 
                 # Update the document with chunks
                 pydantic_document.chunks = []
@@ -261,21 +334,205 @@ class DocumentProcessor:
                         metadata["tags"] = ""
                         metadata["tags_list"] = []
                     
-                    # Create the chunk with processed metadata
+                    # Create the chunk with processed metadata, keeping any embedding from splitting
                     pydantic_document.chunks.append(
                         Chunk(
                             content=chunk.page_content,
-                            metadata=metadata
+                            metadata=metadata,
+                            embedding=metadata.pop(CHUNK_EMBEDDING_KEY, None)
                         )
                     )
                 
                 logger.info(f"Document processed into {len(pydantic_document.chunks)} chunks")
                 
+                file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+                pydantic_document.metadata.setdefault("file_size", file_size)
+                monitor = get_ingest_monitor()
+                monitor.record_timings(timing_stats)
+                monitor.record_document(len(pydantic_document.chunks), file_size)
+                
                 return pydantic_document
             except Exception as e:
                 logger.error(f"Error processing document {pydantic_document.filename}: {str(e)}")
                 raise
     
+    def _build_chunking_plan(self, analysis_result: Dict[str, Any], file_ext: Optional[str]) -> ChunkingPlan:
+        """
+        Build the immutable chunking plan for one document from its analysis
+        """
+        parameters = analysis_result.get("parameters") or {}
+        return ChunkingPlan(
+            strategy=analysis_result.get("strategy") or self.chunking_strategy,
+            chunk_size=parameters.get("chunk_size", self.chunk_size),
+            chunk_overlap=parameters.get("chunk_overlap", self.chunk_overlap),
+            file_ext=file_ext
+        )
+    
+    @with_llm_priority(PRIORITY_BACKGROUND)
+    async def analyze_documents(self, documents: List[Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Determine chunking decisions for a batch of documents.
+        
+        Documents are grouped into clusters by file type and structural
+        fingerprint. Each cluster is served from the decision cache when
+        possible, and otherwise analyzed once (through analyze_document_batch
+        for clusters with several members when USE_CHUNKING_JUDGE is on).
+        
+        Args:
+            documents: Documents to analyze (Pydantic or SQLAlchemy models)
+            
+        Returns:
+            Dict mapping document ID strings to chunking decisions
+        """
+        from app.db.adapters import is_sqlalchemy_model, sqlalchemy_document_to_pydantic
+        
+        started = time.time()
+        clusters: Dict[Tuple[str, str], List[Document]] = {}
+        for document in documents:
+            if is_sqlalchemy_model(document):
+                document = sqlalchemy_document_to_pydantic(document)
+            file_path = os.path.join(self.upload_dir, str(document.id), document.filename)
+            file_type = self._get_file_type(document.filename)
+            fingerprint = self.decision_cache.compute_fingerprint(self._read_content_sample(document, file_path))
+            clusters.setdefault((file_type, fingerprint), []).append(document)
+        
+        decisions: Dict[str, Dict[str, Any]] = {}
+        for (file_type, fingerprint), members in clusters.items():
+            self.analysis_stats["documents_analyzed"] += len(members)
+            decision = self.decision_cache.get_decision(file_type, fingerprint)
+            if decision is not None:
+                self.analysis_stats["cache_hits"] += len(members)
+            elif len(members) == 1 or not USE_CHUNKING_JUDGE:
+                # Reason: with the judge disabled, clusters fall back to the same
+                # DocumentAnalysisService path as single documents
+                decision = await self._run_analysis(members[0])
+                self.decision_cache.set_decision(file_type, fingerprint, decision)
+            else:
+                logger.info(f"Analyzing cluster of {len(members)} similar {file_type} documents once")
+                decision = await self.document_analysis_service.analyze_document_batch(members)
+                self.analysis_stats["batch_analyses"] += 1
+                self.decision_cache.set_decision(file_type, fingerprint, decision)
+            
+            for member in members:
+                decisions[str(member.id)] = copy.deepcopy(decision)
+        
+        # Reason: the "analyze" histogram holds per-document samples, so the
+        # batch time is spread evenly over its documents
+        if documents:
+            per_document = (time.time() - started) / len(documents)
+            monitor = get_ingest_monitor()
+            for _ in documents:
+                monitor.observe("analyze", per_document)
+        return decisions
+    
+    def get_ingest_metrics(self) -> Dict[str, Any]:
+        """
+        Get chunking analysis metrics, including decision cache hit rates
+        
+        Returns:
+            Dict with analysis counters and decision cache statistics
+        """
+        analyzed = self.analysis_stats["documents_analyzed"]
+        return {
+            "analysis": dict(self.analysis_stats),
+            "decision_hit_rate": self.analysis_stats["cache_hits"] / analyzed if analyzed else 0,
+            "chunking_decision_cache": self.decision_cache.get_stats()
+        }
+    
+    async def _analyze_document(self, document: Document, file_path: str) -> Dict[str, Any]:
+        """
+        Get the chunking decision for a single document, consulting the decision cache first
+        """
+        file_type = self._get_file_type(document.filename)
+        fingerprint = self.decision_cache.compute_fingerprint(self._read_content_sample(document, file_path))
+        self.analysis_stats["documents_analyzed"] += 1
+        
+        cached = self.decision_cache.get_decision(file_type, fingerprint)
+        if cached is not None:
+            self.analysis_stats["cache_hits"] += 1
+            logger.info(f"Using cached chunking decision for {document.filename} ({file_type}, {fingerprint})")
+            return copy.deepcopy(cached)
+        
+        analysis_result = await self._run_analysis(document)
+        self.decision_cache.set_decision(file_type, fingerprint, analysis_result)
+        return copy.deepcopy(analysis_result)
+    
+    async def _run_analysis(self, document: Document) -> Dict[str, Any]:
+        """
+        Run the Chunking Judge or DocumentAnalysisService for a single document
+        """
+        self.analysis_stats["llm_analyses"] += 1
+        if USE_CHUNKING_JUDGE:
+            logger.info(f"Using Chunking Judge to analyze document: {document.filename}")
+            # Reason: one judge (and its Ollama client) is reused for every document
+            if self._chunking_judge is None:
+                self._chunking_judge = ChunkingJudge()
+            return await self._chunking_judge.analyze_document(document)
+        
+        logger.info(f"Chunking Judge disabled, using DocumentAnalysisService for document: {document.filename}")
+        return await self.document_analysis_service.analyze_document(document)
+    
+    def _read_content_sample(self, document: Document, file_path: str, sample_size: int = 1000) -> str:
+        """
+        Read the beginning, middle and end of a document for fingerprinting
+        
+        PDFs are sampled from the extracted text of their first page rather
+        than their raw bytes; other binary formats give an empty sample, so
+        they share one fingerprint per file type.
+        """
+        content = getattr(document, "content", None)
+        if content:
+            if len(content) <= sample_size * 3:
+                return content
+            middle = len(content) // 2
+            return "\n".join([
+                content[:sample_size],
+                content[middle - sample_size // 2:middle + sample_size // 2],
+                content[-sample_size:]
+            ])
+        
+        _, ext = os.path.splitext(file_path.lower())
+        if ext in BINARY_SAMPLE_EXTENSIONS:
+            return ""
+        if ext == ".pdf":
+            return self._read_pdf_sample(file_path, sample_size)
+        
+        try:
+            file_size = os.path.getsize(file_path)
+            samples = []
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                samples.append(f.read(sample_size))
+                if file_size > sample_size * 3:
+                    f.seek(file_size // 2)
+                    samples.append(f.read(sample_size))
+                    f.seek(file_size - sample_size)
+                    samples.append(f.read(sample_size))
+            return "\n".join(samples)
+        except OSError as e:
+            logger.warning(f"Could not read content sample from {file_path}: {str(e)}")
+            return ""
+    
+    def _read_pdf_sample(self, file_path: str, sample_size: int) -> str:
+        """
+        Read the extracted text of a PDF's first page for fingerprinting
+        """
+        try:
+            first_page = next(StreamingPDFLoader(file_path).lazy_load(), None)
+        except OSError as e:
+            logger.warning(f"Could not read content sample from {file_path}: {str(e)}")
+            return ""
+        # Reason: a file that only opened through the text fallback has no pages,
+        # and its decoded bytes would give a meaningless fingerprint
+        if first_page is None or "page" not in first_page.metadata:
+            return ""
+        return first_page.page_content[:sample_size * 3]
+    
+    @staticmethod
+    def _get_file_type(filename: str) -> str:
+        """Get the file extension without the dot"""
+        _, ext = os.path.splitext(filename.lower())
+        return ext[1:] if ext else "unknown"
+    
     async def _load_document(self, file_path: str) -> List[LangchainDocument]:
         """
         Load a document based on its file type with improved error handling
@@ -284,20 +541,8 @@ class DocumentProcessor:
         
         try:
             if ext == ".pdf":
-                try:
-                    loader = PyPDFLoader(file_path)
-                    return loader.load()
-                except Exception as pdf_error:
-                    logger.warning(f"Error using PyPDFLoader for {file_path}: {str(pdf_error)}. Falling back to manual loading.")
-                    # Try loading as text, but ignore decoding errors
-                    try:
-                        with open(file_path, 'rb') as f:
-                            content = f.read().decode('utf-8', errors='ignore')
-                        logger.info(f"Successfully loaded {file_path} using text fallback.")
-                        return [LangchainDocument(page_content=content, metadata={"source": file_path})]
-                    except Exception as fallback_error:
-                        logger.error(f"Failed to load {file_path} even with fallback: {str(fallback_error)}")
-                        raise  # Re-raise after logging
+                # Falls back to block-wise text decoding on its own if the PDF can't be parsed
+                return StreamingPDFLoader(file_path).load()
             elif ext == ".csv":
                 loader = CSVLoader(file_path)
                 return loader.load()
@@ -332,76 +577,246 @@ class DocumentProcessor:
                 logger.error(f"Failed to load {file_path} even with fallback: {str(fallback_error)}")
                 raise  # Re-raise after logging
     
-    def _split_document(self, docs: List[LangchainDocument]) -> List[LangchainDocument]:
+    def _split_document(self, docs: List[LangchainDocument], text_splitter=None) -> List[LangchainDocument]:
         """
         Split a document into chunks with a limit on total chunks
         Ensures security metadata is preserved during chunking
         """
         try:
-            # Split the document using the configured text splitter
-            chunks = self.text_splitter.split_documents(docs)
-            
-            # Log the original number of chunks
-            logger.info(f"Document initially split into {len(chunks)} chunks")
+            # Split the document using the plan's text splitter (or the default one)
+            splitter = text_splitter or self.text_splitter
+            chunks = splitter.split_documents(docs)
             
-            # Preserve security metadata across all chunks
-            # This ensures that all chunks inherit the security properties of the parent document
-            for chunk in chunks:
-                # Make sure each chunk has the security metadata from the original document
+            return self._finalize_chunks(docs, chunks)
+        except Exception as e:
+            logger.error(f"Error splitting document: {str(e)}")
+            raise
+    
+    async def _split_document_async(self, docs: List[LangchainDocument], text_splitter) -> List[LangchainDocument]:
+        """
+        Split a document without blocking the event loop
+        """
+        if isinstance(text_splitter, (SemanticChunker, EmbeddingSemanticChunker)):
+            chunks = await self._split_pages_async(docs, text_splitter)
+            return self._finalize_chunks(docs, chunks)
+        
+        # CPU-bound splitters run in a worker thread so concurrent documents overlap
+        return await asyncio.to_thread(self._split_document, docs, text_splitter)
+    
+    async def _split_stream_async(
+        self,
+        page_batches: Iterator[List[LangchainDocument]],
+        text_splitter,
+        timing_stats: Optional[TimingStats] = None
+    ) -> List[LangchainDocument]:
+        """
+        Split a stream of page batches as it is loaded.
+        
+        Only the current batch of pages is held in memory; each page keeps
+        its provenance metadata (page number, offsets) on its chunks.
+        Chunks are thinned to an evenly spaced sample as they arrive, so at
+        most 2 * MAX_CHUNKS are kept however long the document is.
+        Loading and splitting interleave, so their times are summed per stage.
+        """
+        chunks = []
+        stride = 1
+        total_chunks = 0
+        load_time = 0.0
+        split_time = 0.0
+        while True:
+            # Reason: page extraction is blocking, so each batch is pulled in a worker thread
+            started = time.time()
+            batch = await asyncio.to_thread(next, page_batches, None)
+            load_time += time.time() - started
+            if batch is None:
+                break
+            started = time.time()
+            batch_chunks = await self._split_pages_async(batch, text_splitter)
+            split_time += time.time() - started
+            self._apply_security_metadata(batch, batch_chunks)
+            for chunk in batch_chunks:
+                if total_chunks % stride == 0:
+                    chunks.append(chunk)
+                total_chunks += 1
+                # Reason: halving the sample and doubling the stride keeps every
+                # stride-th chunk, the same even spacing _limit_chunks applies
+                if len(chunks) >= 2 * MAX_CHUNKS:
+                    chunks = chunks[::2]
+                    stride *= 2
+        
+        if timing_stats:
+            timing_stats.record_timing("load", load_time)
+            timing_stats.record_timing("split", split_time)
+        
+        logger.info(f"Document initially split into {total_chunks} chunks")
+        return self._limit_chunks(chunks)
+    
+    async def _split_pages_async(self, docs: List[LangchainDocument], text_splitter) -> List[LangchainDocument]:
+        """
+        Split loaded pages into chunks carrying each page's metadata
+        """
+        if isinstance(text_splitter, SemanticChunker):
+            # Reason: the semantic chunker awaits the LLM, so it runs on this loop
+            # instead of spinning up a private event loop in a worker thread
+            chunks = []
+            for doc in docs:
+                for text in await text_splitter.split_text_async(doc.page_content):
+                    chunks.append(LangchainDocument(page_content=text, metadata=copy.deepcopy(doc.metadata)))
+            return chunks
+        
+        if isinstance(text_splitter, EmbeddingSemanticChunker):
+            chunks = []
+            for doc in docs:
+                for text, embedding in await text_splitter.split_text_with_embeddings(doc.page_content):
+                    metadata = copy.deepcopy(doc.metadata)
+                    if embedding is not None:
+                        # Reason: the vector store skips chunks that already have an embedding
+                        metadata[CHUNK_EMBEDDING_KEY] = embedding
+                    chunks.append(LangchainDocument(page_content=text, metadata=metadata))
+            return chunks
+        
+        return await asyncio.to_thread(text_splitter.split_documents, docs)
+    
+    def _finalize_chunks(self, docs: List[LangchainDocument], chunks: List[LangchainDocument]) -> List[LangchainDocument]:
+        """
+        Apply security metadata and the chunk limit to freshly split chunks
+        """
+        # Log the original number of chunks
+        logger.info(f"Document initially split into {len(chunks)} chunks")
+
+        self._apply_security_metadata(docs, chunks)
+        return self._limit_chunks(chunks)
+    
+    def _apply_security_metadata(self, docs: List[LangchainDocument], chunks: List[LangchainDocument]) -> None:
+        """
+        Copy security metadata from the source documents onto their chunks
+        
+        Each chunk inherits the security properties of the document it was cut
+        from. Section-specific permissions are matched by offsets: a chunk gets
+        the permissions of the first section whose span lies inside the chunk.
+        """
+        security_keys = ('user_id', 'is_public', 'shared_with', 'shared_user_ids')
+        source_indexes = self._assign_chunk_offsets(docs, chunks)
+        
+        # Per-document security fields and sorted section spans, computed once
+        doc_security = [
+            {key: doc.metadata[key] for key in security_keys if key in doc.metadata}
+            for doc in docs
+        ]
+        doc_sections = [self._section_spans(doc) for doc in docs]
+        
+        for chunk, doc_index in zip(chunks, source_indexes):
+            if doc_index is None:
+                # Reason: a chunk that could not be located (e.g. rewritten by the
+                # splitter) falls back to the last document's fields and a text match
+                for security in doc_security:
+                    chunk.metadata.update(security)
                 for doc in docs:
-                    # Copy security-related metadata from the original document
-                    if 'user_id' in doc.metadata:
-                        chunk.metadata['user_id'] = doc.metadata['user_id']
-                    
-                    if 'is_public' in doc.metadata:
-                        chunk.metadata['is_public'] = doc.metadata['is_public']
-                    
-                    # Handle shared permissions
-                    if 'shared_with' in doc.metadata:
-                        chunk.metadata['shared_with'] = doc.metadata['shared_with']
-                    
-                    if 'shared_user_ids' in doc.metadata:
-                        chunk.metadata['shared_user_ids'] = doc.metadata['shared_user_ids']
-                    
-                    # Handle section-specific permissions if they exist
-                    # This allows for different permissions within the same document
-                    if 'section_permissions' in doc.metadata:
-                        # Check if this chunk belongs to a section with specific permissions
-                        section_permissions = doc.metadata['section_permissions']
-                        
-                        # Determine which section this chunk belongs to based on content
-                        # This is a simplified approach - in a real implementation, you might
-                        # use more sophisticated methods to match chunks to sections
-                        for section, permissions in section_permissions.items():
-                            if section in chunk.page_content:
-                                # Override the document-level permissions with section-specific ones
-                                if 'is_public' in permissions:
-                                    chunk.metadata['is_public'] = permissions['is_public']
-                                
-                                if 'shared_with' in permissions:
-                                    chunk.metadata['shared_with'] = permissions['shared_with']
-                                
-                                # Log that we're applying section-specific permissions
-                                logger.info(f"Applied section-specific permissions for section '{section}'")
-                                break
+                    for section, permissions in doc.metadata.get('section_permissions', {}).items():
+                        if section in chunk.page_content:
+                            self._apply_section_permissions(chunk, section, permissions)
+                            break
+                continue
             
-            # Limit the maximum number of chunks per document to prevent excessive chunking
-            MAX_CHUNKS = 30  # Reduced from 50 to 30 to prevent excessive chunking
+            chunk.metadata.update(doc_security[doc_index])
             
-            if len(chunks) > MAX_CHUNKS:
-                logger.warning(f"Document produced {len(chunks)} chunks, limiting to {MAX_CHUNKS}")
-                
-                # Option 2: Take evenly distributed chunks to maintain coverage of the document
-                step = len(chunks) // MAX_CHUNKS
-                limited_chunks = [chunks[i] for i in range(0, len(chunks), step)][:MAX_CHUNKS]
-                
-                # Ensure we have exactly MAX_CHUNKS or fewer
-                return limited_chunks[:MAX_CHUNKS]
+            starts, spans = doc_sections[doc_index]
+            if not spans:
+                continue
             
-            return chunks
-        except Exception as e:
-            logger.error(f"Error splitting document: {str(e)}")
-            raise
+            chunk_start = chunk.metadata['start_index'] - docs[doc_index].metadata.get('char_start', 0)
+            chunk_end = chunk_start + len(chunk.page_content)
+            i = bisect_left(starts, chunk_start)
+            while i < len(spans) and spans[i][0] < chunk_end:
+                _, section_end, section, permissions = spans[i]
+                if section_end <= chunk_end:
+                    self._apply_section_permissions(chunk, section, permissions)
+                    break
+                i += 1
+    
+    def _assign_chunk_offsets(self, docs: List[LangchainDocument], chunks: List[LangchainDocument]) -> List[Optional[int]]:
+        """
+        Record where each chunk starts and ends in the document text
+        
+        Splitters emit chunks in source order, so one forward pass locates every
+        chunk: each search resumes just after the previous chunk's start in the
+        same source document. Offsets are stored as 'start_index' and 'end_index'
+        and are absolute within the whole document (a page's 'char_start' is added).
+        
+        Returns:
+            Index of the source document of each chunk, or None if it was not found
+        """
+        source_indexes = []
+        doc_index = 0
+        cursor = 0
+        for chunk in chunks:
+            text = chunk.page_content
+            found = None
+            for candidate in range(doc_index, len(docs)):
+                position = docs[candidate].page_content.find(text, cursor if candidate == doc_index else 0)
+                if position >= 0:
+                    found = (candidate, position)
+                    break
+            
+            if found is None:
+                source_indexes.append(None)
+                continue
+            
+            doc_index, position = found
+            cursor = position + 1
+            base = docs[doc_index].metadata.get('char_start', 0)
+            chunk.metadata['start_index'] = base + position
+            chunk.metadata['end_index'] = base + position + len(text)
+            source_indexes.append(doc_index)
+        
+        return source_indexes
+    
+    def _section_spans(self, doc: LangchainDocument) -> Tuple[List[int], List[Tuple[int, int, str, Dict[str, Any]]]]:
+        """
+        Locate every occurrence of the document's permission sections
+        
+        Returns:
+            Sorted span start offsets, and (start, end, section, permissions) spans in the same order
+        """
+        spans = []
+        for section, permissions in doc.metadata.get('section_permissions', {}).items():
+            if not section:
+                continue
+            position = doc.page_content.find(section)
+            while position >= 0:
+                spans.append((position, position + len(section), section, permissions))
+                position = doc.page_content.find(section, position + 1)
+        spans.sort(key=lambda span: span[:2])
+        return [span[0] for span in spans], spans
+    
+    def _apply_section_permissions(self, chunk: LangchainDocument, section: str, permissions: Dict[str, Any]) -> None:
+        """
+        Override the document-level permissions of a chunk with section-specific ones
+        """
+        if 'is_public' in permissions:
+            chunk.metadata['is_public'] = permissions['is_public']
+        
+        if 'shared_with' in permissions:
+            chunk.metadata['shared_with'] = permissions['shared_with']
+        
+        logger.debug(f"Applied section-specific permissions for section '{section}'")
+    
+    def _limit_chunks(self, chunks: List[LangchainDocument]) -> List[LangchainDocument]:
+        """
+        Limit the number of chunks kept for one document
+        """
+        # Limit the maximum number of chunks per document to prevent excessive chunking
+        if len(chunks) > MAX_CHUNKS:
+            logger.warning(f"Document produced {len(chunks)} chunks, limiting to {MAX_CHUNKS}")
+
+            # Option 2: Take evenly distributed chunks to maintain coverage of the document
+            step = len(chunks) // MAX_CHUNKS
+            limited_chunks = [chunks[i] for i in range(0, len(chunks), step)][:MAX_CHUNKS]
+
+            # Ensure we have exactly MAX_CHUNKS or fewer
+            return limited_chunks[:MAX_CHUNKS]
+
+        return chunks
     
     def extract_metadata(self, file_path: str) -> Dict[str, Any]:
         """
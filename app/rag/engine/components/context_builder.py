@@ -8,11 +8,16 @@ import logging
 from typing import Dict, Any, Optional, List, Tuple, Union
 import re
 
+from app.core.config import DEFAULT_MODEL, CONTEXT_ANSWER_RESERVE_TOKENS, CONTEXT_PROMPT_RESERVE_TOKENS
 from app.rag.engine.utils.error_handler import safe_execute_async
 from app.rag.engine.utils.timing import async_timing_context, TimingStats
+from app.rag.engine.utils.token_budget import get_token_estimator, get_context_window
 
 logger = logging.getLogger("app.rag.engine.components.context_builder")
 
+# Tokens for the blank line separating two context pieces
+PIECE_SEPARATOR_TOKENS = 2
+
 class ContextBuilder:
     """
     Component for assembling context from retrieved documents
@@ -24,18 +29,32 @@ class ContextBuilder:
     def __init__(self):
         """Initialize the context builder"""
         self.timing_stats = TimingStats()
+        self.token_estimator = get_token_estimator()
     
     async def build_context(self,
                            documents: List[Dict[str, Any]],
                            query: str,
-                           max_context_length: int = 8000) -> Tuple[str, List[Dict[str, Any]]]:
+                           max_context_length: Optional[int] = None,
+                           model: str = DEFAULT_MODEL,
+                           system_prompt: Optional[str] = None,
+                           conversation_context: str = "",
+                           model_parameters: Optional[Dict[str, Any]] = None) -> Tuple[str, List[Dict[str, Any]]]:
         """
         Build context from retrieved documents
         
+        By default the documents are packed into the model's token budget,
+        the context window minus room for the prompt template, system prompt,
+        conversation history, query and answer. Passing max_context_length
+        uses the older character limit instead.
+        
         Args:
             documents: Retrieved documents
             query: User query
-            max_context_length: Maximum context length
+            max_context_length: Maximum context length in characters
+            model: Model the context is sent to
+            system_prompt: System prompt sent with the context
+            conversation_context: Conversation history sent with the context
+            model_parameters: Model parameters (num_ctx, max_tokens/num_predict)
             
         Returns:
             Tuple of (context, sources)
@@ -48,13 +67,28 @@ class ContextBuilder:
                 logger.info("No documents provided for context building")
                 return "", []
             
+            if max_context_length is None:
+                # Select the documents that fit the token budget
+                async with async_timing_context("pack_documents", self.timing_stats):
+                    budget = self.get_context_budget(
+                        query=query,
+                        model=model,
+                        system_prompt=system_prompt,
+                        conversation_context=conversation_context,
+                        model_parameters=model_parameters
+                    )
+                    documents = self._pack_documents(documents, budget, model)
+            
             # Format documents into context pieces
             async with async_timing_context("format_documents", self.timing_stats):
                 context_pieces, sources = self._format_documents(documents)
             
             # Assemble context
             async with async_timing_context("assemble_context", self.timing_stats):
-                context = self._assemble_context(context_pieces, max_context_length)
+                if max_context_length is None:
+                    context = "\n\n".join(context_pieces)
+                else:
+                    context = self._assemble_context(context_pieces, max_context_length)
             
             # Log context stats
             self.timing_stats.stop("total")
@@ -68,6 +102,133 @@ class ContextBuilder:
             logger.error(f"Error building context: {str(e)}")
             return "", []
     
+    def get_context_budget(self,
+                           query: str,
+                           model: str = DEFAULT_MODEL,
+                           system_prompt: Optional[str] = None,
+                           conversation_context: str = "",
+                           model_parameters: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Get the number of tokens available for retrieved context
+        
+        Args:
+            query: User query
+            model: Model the context is sent to
+            system_prompt: System prompt sent with the context
+            conversation_context: Conversation history sent with the context
+            model_parameters: Model parameters (num_ctx, max_tokens/num_predict)
+            
+        Returns:
+            Token budget for the context (0 if nothing fits)
+        """
+        model_parameters = model_parameters or {}
+        answer_tokens = model_parameters.get("max_tokens") or model_parameters.get("num_predict") or 0
+        # Reason: num_predict is -1 for "unlimited", which still needs room for an answer
+        if answer_tokens <= 0:
+            answer_tokens = CONTEXT_ANSWER_RESERVE_TOKENS
+        
+        reserved = (
+            answer_tokens
+            + CONTEXT_PROMPT_RESERVE_TOKENS
+            + self.token_estimator.count(system_prompt or "", model)
+            + self.token_estimator.count(conversation_context or "", model)
+            + self.token_estimator.count(query, model)
+        )
+        return max(0, get_context_window(model, model_parameters) - reserved)
+    
+    def _pack_documents(self, documents: List[Dict[str, Any]], budget: int, model: str) -> List[Dict[str, Any]]:
+        """
+        Select the documents that fit a token budget
+        
+        Documents are taken greedily by relevance per token, so one long,
+        marginally relevant chunk doesn't crowd out several short relevant
+        ones. The selection keeps the retrieval order. If not even one
+        document fits whole, the most relevant one is truncated to fit.
+        
+        Args:
+            documents: Retrieved documents in retrieval order
+            budget: Token budget for the context
+            model: Model the context is sent to
+            
+        Returns:
+            Documents to include in the context
+        """
+        if budget <= 0:
+            logger.warning("No token budget left for retrieved context")
+            return []
+        
+        costs = [self._document_tokens(doc, model) for doc in documents]
+        scores = [max(float(doc.get("relevance_score") or 0.0), 0.0) for doc in documents]
+        
+        order = sorted(range(len(documents)), key=lambda i: (-scores[i] / max(costs[i], 1), i))
+        selected = []
+        used = 0
+        for i in order:
+            if used + costs[i] <= budget:
+                selected.append(i)
+                used += costs[i]
+        
+        if not selected:
+            best = min(range(len(documents)), key=lambda i: (-scores[i], i))
+            logger.warning(f"No document fits the context budget of {budget} tokens, truncating the most relevant one")
+            return [self._truncate_document(documents[best], budget, model)]
+        
+        if len(selected) < len(documents):
+            logger.info(f"Packed {len(selected)} of {len(documents)} documents into {used}/{budget} context tokens")
+        return [documents[i] for i in sorted(selected)]
+    
+    def _document_tokens(self, doc: Dict[str, Any], model: str) -> int:
+        """
+        Estimate the tokens a document takes up as a context piece
+        
+        Args:
+            doc: Retrieved document
+            model: Model the context is sent to
+            
+        Returns:
+            Estimated token count of the header and content
+        """
+        content_tokens = self.token_estimator.count(doc.get("content", ""), model, doc.get("chunk_id"))
+        header_tokens = self.token_estimator.count(self._format_header(0, doc), model)
+        return header_tokens + content_tokens + PIECE_SEPARATOR_TOKENS
+    
+    def _truncate_document(self, doc: Dict[str, Any], budget: int, model: str) -> Dict[str, Any]:
+        """
+        Shorten a document's content to fit a token budget
+        
+        Args:
+            doc: Retrieved document
+            budget: Token budget for the whole context piece
+            model: Model the context is sent to
+            
+        Returns:
+            Copy of the document with truncated content
+        """
+        content = doc.get("content", "")
+        content_tokens = self.token_estimator.count(content, model, doc.get("chunk_id"))
+        # Reason: one token of slack absorbs rounding of the shortened content's estimate
+        available = budget - (self._document_tokens(doc, model) - content_tokens) - 1
+        if content_tokens <= 0 or available <= 0:
+            return {**doc, "content": ""}
+        return {**doc, "content": content[:int(len(content) * available / content_tokens)]}
+    
+    def _format_header(self, index: int, doc: Dict[str, Any]) -> str:
+        """
+        Format the citation header of a context piece
+        
+        Args:
+            index: Zero-based position of the piece in the context
+            doc: Retrieved document
+            
+        Returns:
+            Header line followed by a blank line
+        """
+        metadata = doc.get("metadata", {})
+        filename = metadata.get("filename", "Unknown")
+        tags = metadata.get("tags", [])
+        folder = metadata.get("folder", "/")
+        return f"[{index+1}] Source: {filename}, Tags: {tags}, Folder: {folder}\n\n"
+    
     def _format_documents(self, documents: List[Dict[str, Any]]) -> Tuple[List[str], List[Dict[str, Any]]]:
         """
         Format documents into context pieces
@@ -82,14 +243,10 @@ class ContextBuilder:
         sources = []
         
         for i, doc in enumerate(documents):
-            # Extract metadata
             metadata = doc.get("metadata", {})
-            filename = metadata.get("filename", "Unknown")
-            tags = metadata.get("tags", [])
-            folder = metadata.get("folder", "/")
             
             # Format the context piece with metadata
-            context_piece = f"[{i+1}] Source: {filename}, Tags: {tags}, Folder: {folder}\n\n{doc.get('content', '')}"
+            context_piece = self._format_header(i, doc) + doc.get("content", "")
             context_pieces.append(context_piece)
             
             # Create source info for citation
@@ -7,12 +7,21 @@ response generation in the RAG Engine.
 import logging
 import time
 import json
+import re
 from typing import Dict, Any, Optional, List, Tuple, Union, AsyncGenerator
 import asyncio
 
-from app.core.config import DEFAULT_MODEL
+from app.core.config import (
+    DEFAULT_MODEL,
+    STREAM_REPLAY_WORDS_PER_CHUNK,
+    STREAM_REPLAY_DELAY,
+    DEADLINE_SHORT_ANSWER_TOKENS
+)
+from app.rag.ollama_client import StreamErrorMessage
 from app.rag.engine.utils.error_handler import GenerationError, safe_execute_async
 from app.rag.engine.utils.timing import async_timing_context, TimingStats
+from app.rag.engine.utils.token_budget import get_token_estimator
+from app.rag.deadline import check_deadline
 from app.rag.prompt_manager import PromptManager
 from app.rag.system_prompts import (
     CODE_GENERATION_SYSTEM_PROMPT,
@@ -87,6 +96,12 @@ class GenerationComponent:
             logger.debug(f"System prompt: {system_prompt[:200]}...")
             logger.debug(f"User prompt: {user_prompt[:200]}...")
             
+            # Shorten the answer if the request is out of time for a full one
+            requested_parameters = model_parameters or {}
+            model_parameters = self._apply_deadline(requested_parameters)
+            # Reason: the cache key doesn't include the cap, so a shortened answer must not be cached
+            cache_response = model_parameters is requested_parameters
+            
             # Generate response
             if stream:
                 # For streaming, return the generator
@@ -94,7 +109,8 @@ class GenerationComponent:
                     prompt=user_prompt,
                     model=model,
                     system_prompt=system_prompt,
-                    model_parameters=model_parameters or {}
+                    model_parameters=model_parameters or {},
+                    cache_response=cache_response
                 )
             else:
                 # For non-streaming, generate the complete response
@@ -103,7 +119,8 @@ class GenerationComponent:
                         prompt=user_prompt,
                         model=model,
                         system_prompt=system_prompt,
-                        model_parameters=model_parameters or {}
+                        model_parameters=model_parameters or {},
+                        cache_response=cache_response
                     )
                 
                 # Process the response
@@ -196,6 +213,25 @@ class GenerationComponent:
             
             return system_prompt, user_prompt
     
+    def _apply_deadline(self, model_parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Cap the answer length when the request's deadline leaves no time for a full answer
+        
+        Args:
+            model_parameters: Model parameters
+            
+        Returns:
+            The same model parameters, or a copy with options.num_predict
+            capped if the answer was downgraded
+        """
+        options = model_parameters.get("options") or {}
+        if options.get("num_predict") or model_parameters.get("num_predict") or model_parameters.get("max_tokens"):
+            return model_parameters
+        if check_deadline("generation", "short_answer", reserve=0):
+            return model_parameters
+        # Reason: Ollama only reads num_predict from the request's options
+        return {**model_parameters, "options": {**options, "num_predict": DEADLINE_SHORT_ANSWER_TOKENS}}
+    
     def _parse_conversation_context(self, conversation_context: str) -> Optional[List[Dict[str, str]]]:
         """
         Parse conversation context string into a list of messages
@@ -249,7 +285,8 @@ class GenerationComponent:
                                  prompt: str,
                                  model: str,
                                  system_prompt: str,
-                                 model_parameters: Dict[str, Any]) -> AsyncGenerator[Dict[str, Any], None]:
+                                 model_parameters: Dict[str, Any],
+                                 cache_response: bool = True) -> AsyncGenerator[Dict[str, Any], None]:
         """
         Generate a streaming response
         
@@ -258,6 +295,7 @@ class GenerationComponent:
             model: Model to use
             system_prompt: System prompt
             model_parameters: Model parameters
+            cache_response: Whether a completed response may be cached
             
         Yields:
             Response chunks
@@ -286,6 +324,25 @@ class GenerationComponent:
             yield {"content": processed_text}
             return
         
+        # Replay a cached response instead of calling the LLM
+        cache = self.cache_manager.llm_response_cache if self.cache_manager else None
+        temperature = model_parameters.get("temperature", 0.0)
+        max_tokens = model_parameters.get("max_tokens")
+        additional_params = {"system_prompt": system_prompt} if system_prompt else None
+        if cache:
+            cached_response = cache.get_response(
+                prompt=prompt,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                additional_params=additional_params
+            )
+            if cached_response:
+                logger.info("Replaying cached response as a stream")
+                async for chunk in self._replay_cached_response(cached_response.get("response", "")):
+                    yield chunk
+                return
+        
         # For non-structured outputs, use the normal streaming approach
         # Get the raw stream from the LLM
         stream = await self.ollama_client.generate(
@@ -296,22 +353,71 @@ class GenerationComponent:
             parameters=model_parameters
         )
         
+        # Tee the tokens into a buffer so a completed stream can be cached
+        buffer = []
+        failed = False
+        
         # Stream tokens directly with minimal processing
-        async for chunk in stream:
-            # Handle string chunks
-            if isinstance(chunk, str):
-                yield {"content": chunk}
-            # Handle dictionary chunks (for backward compatibility)
-            elif isinstance(chunk, dict) and "response" in chunk:
-                yield {"content": chunk["response"]}
-            else:
-                yield {"content": str(chunk)}
+        try:
+            async for chunk in stream:
+                # Handle string chunks
+                if isinstance(chunk, str):
+                    failed = failed or isinstance(chunk, StreamErrorMessage)
+                    content = chunk
+                # Handle dictionary chunks (for backward compatibility)
+                elif isinstance(chunk, dict) and "response" in chunk:
+                    content = chunk["response"]
+                else:
+                    content = str(chunk)
+                buffer.append(content)
+                yield {"content": content}
+        finally:
+            # Reason: closing this generator must reach the LLM stream right away
+            # (not when it is garbage collected) so generation stops and its slot is freed
+            if hasattr(stream, "aclose"):
+                await stream.aclose()
+        
+        # Reason: only reached when the stream ran to the end, so responses cut
+        # short by a disconnected client are never cached
+        response = {"response": "".join(buffer), "model": model}
+        if cache and cache_response and not failed and cache.should_cache_response(
+            prompt=prompt,
+            model=model,
+            temperature=temperature,
+            response=response
+        ):
+            cache.set_response(
+                prompt=prompt,
+                model=model,
+                response=response,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                additional_params=additional_params
+            )
+            logger.info("Streamed response cached for future use")
+    
+    async def _replay_cached_response(self, text: str) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Replay a cached response as a paced token stream
+        
+        Args:
+            text: Cached response text
+            
+        Yields:
+            Response chunks of a few words each
+        """
+        words = re.findall(r"\s*\S+\s*", text) or [text]
+        for start in range(0, len(words), STREAM_REPLAY_WORDS_PER_CHUNK):
+            yield {"content": "".join(words[start:start + STREAM_REPLAY_WORDS_PER_CHUNK])}
+            if STREAM_REPLAY_DELAY > 0:
+                await asyncio.sleep(STREAM_REPLAY_DELAY)
     
     async def _generate_complete(self,
                                 prompt: str,
                                 model: str,
                                 system_prompt: str,
-                                model_parameters: Dict[str, Any]) -> Dict[str, Any]:
+                                model_parameters: Dict[str, Any],
+                                cache_response: bool = True) -> Dict[str, Any]:
         """
         Generate a complete response
         
@@ -320,6 +426,7 @@ class GenerationComponent:
             model: Model to use
             system_prompt: System prompt
             model_parameters: Model parameters
+            cache_response: Whether a new response may be cached
             
         Returns:
             Response dictionary
@@ -329,7 +436,8 @@ class GenerationComponent:
             prompt=prompt,
             model=model,
             system_prompt=system_prompt,
-            model_parameters=model_parameters
+            model_parameters=model_parameters,
+            cache_response=cache_response
         )
         
         return response
@@ -338,7 +446,8 @@ class GenerationComponent:
                                               prompt: str,
                                               model: str,
                                               system_prompt: str,
-                                              model_parameters: Dict[str, Any]) -> Dict[str, Any]:
+                                              model_parameters: Dict[str, Any],
+                                              cache_response: bool = True) -> Dict[str, Any]:
         """
         Get a cached response or generate a new one
         
@@ -347,6 +456,7 @@ class GenerationComponent:
             model: Model to use
             system_prompt: System prompt
             model_parameters: Model parameters
+            cache_response: Whether a new response may be cached
             
         Returns:
             Response dictionary
@@ -354,13 +464,15 @@ class GenerationComponent:
         # Check if cache manager is available
         if not self.cache_manager:
             # Generate new response without caching
-            return await self.ollama_client.generate(
+            response = await self.ollama_client.generate(
                 prompt=prompt,
                 model=model,
                 system_prompt=system_prompt,
                 stream=False,
                 parameters=model_parameters
             )
+            self._calibrate_token_estimate(model, prompt, system_prompt, response)
+            return response
         
         # Create cache parameters
         temperature = model_parameters.get("temperature", 0.0)
@@ -388,9 +500,10 @@ class GenerationComponent:
                 stream=False,
                 parameters=model_parameters
             )
+            self._calibrate_token_estimate(model, prompt, system_prompt, response)
             
             # Cache the response if appropriate
-            if "error" not in response and self.cache_manager.llm_response_cache.should_cache_response(
+            if cache_response and "error" not in response and self.cache_manager.llm_response_cache.should_cache_response(
                 prompt=prompt,
                 model=model,
                 temperature=temperature,
@@ -464,6 +577,24 @@ class GenerationComponent:
         
         return response_text
     
+    def _calibrate_token_estimate(self,
+                                  model: str,
+                                  prompt: str,
+                                  system_prompt: Optional[str],
+                                  response: Dict[str, Any]) -> None:
+        """
+        Feed the prompt token count reported by the LLM server into the token estimator
+        
+        Args:
+            model: Model used
+            prompt: User prompt
+            system_prompt: System prompt
+            response: Response dictionary
+        """
+        prompt_tokens = response.get("prompt_eval_count") if isinstance(response, dict) else None
+        if prompt_tokens:
+            get_token_estimator().observe(model, f"{system_prompt or ''}\n{prompt}", prompt_tokens)
+    
     async def _process_response(self, response: Dict[str, Any]) -> Dict[str, Any]:
         """
         Process the complete response
@@ -11,6 +11,8 @@ from uuid import UUID
 from app.rag.engine.utils.relevance import rank_documents, calculate_relevance_score
 from app.rag.engine.utils.error_handler import RetrievalError, safe_execute_async
 from app.rag.engine.utils.timing import async_timing_context, TimingStats
+from app.rag.deadline import check_deadline
+from app.rag.circuit_breaker import get_circuit_breakers
 
 logger = logging.getLogger("app.rag.engine.components.retrieval")
 
@@ -74,8 +76,8 @@ class RetrievalComponent:
             documents = []
             retrieval_state = "success"
             
-            # Use enhanced retrieval if retrieval judge is available
-            if self.retrieval_judge:
+            # Use enhanced retrieval if retrieval judge is available and the request has time for it
+            if self._judge_available() and check_deadline("retrieval_judge", "standard_retrieval"):
                 documents, retrieval_state = await self._enhanced_retrieval(
                     query=query,
                     top_k=top_k,
@@ -104,6 +106,20 @@ class RetrievalComponent:
             logger.error(f"Error retrieving documents: {str(e)}")
             raise RetrievalError(f"Error retrieving documents: {str(e)}")
     
+    def _judge_available(self) -> bool:
+        """
+        Check whether the retrieval judge can be used
+        
+        Returns:
+            True if there is a judge and its model's circuit breaker isn't shedding requests
+        """
+        if not self.retrieval_judge:
+            return False
+        if get_circuit_breakers().is_open("/api/generate", getattr(self.retrieval_judge, "model", "")):
+            logger.warning("Retrieval judge model is not responding, using standard retrieval")
+            return False
+        return True
+    
     async def _standard_retrieval(self,
                                  query: str,
                                  top_k: int = 5,
@@ -206,21 +222,17 @@ class RetrievalComponent:
             logger.warning("No documents found for query")
             return [], "no_documents"
         
-        # Evaluate chunks with retrieval judge
+        # Evaluate chunks with retrieval judge, getting a refined query from the same call
         async with async_timing_context("evaluate_chunks", self.timing_stats):
-            evaluation = await self.retrieval_judge.evaluate_chunks(query, search_results)
+            evaluation = await self.retrieval_judge.evaluate_and_refine(query, search_results)
         
         # Extract relevance scores and refinement decision
-        relevance_scores = evaluation.get("relevance_scores", {})
+        relevance_scores = dict(evaluation.get("relevance_scores", {}))
         needs_refinement = evaluation.get("needs_refinement", False)
+        refined_query = evaluation.get("refined_query", query)
         
-        # Refine query if needed
-        if needs_refinement:
-            logger.info("Refining query based on initial retrieval")
-            
-            async with async_timing_context("refine_query", self.timing_stats):
-                refined_query = await self.retrieval_judge.refine_query(query, search_results)
-            
+        # Search again with the refined query if needed and the request has time for it
+        if needs_refinement and refined_query != query and check_deadline("query_refinement"):
             logger.info(f"Refined query: {refined_query}")
             
             # Perform additional retrieval with refined query
@@ -232,21 +244,21 @@ class RetrievalComponent:
                     user_id=user_id
                 )
             
-            if additional_results:
-                logger.info(f"Retrieved {len(additional_results)} additional chunks with refined query")
-                
-                # Combine results, avoiding duplicates
-                existing_chunk_ids = {result["chunk_id"] for result in search_results}
-                for result in additional_results:
-                    if result["chunk_id"] not in existing_chunk_ids:
-                        search_results.append(result)
+            # Combine results, avoiding duplicates
+            existing_chunk_ids = {result["chunk_id"] for result in search_results}
+            new_results = [result for result in additional_results or [] if result["chunk_id"] not in existing_chunk_ids]
+            search_results.extend(new_results)
+            
+            if new_results:
+                logger.info(f"Retrieved {len(new_results)} new chunks with refined query, evaluating them")
                 
-                # Re-evaluate all chunks
-                logger.info("Re-evaluating all chunks after query refinement")
+                # Only the new chunks are judged; scores of chunks judged above are carried forward.
+                # Reason: they are scored against the original query so all scores are comparable
                 async with async_timing_context("reevaluate_chunks", self.timing_stats):
-                    evaluation = await self.retrieval_judge.evaluate_chunks(refined_query, search_results)
+                    new_evaluation = await self.retrieval_judge.evaluate_chunks(query, new_results)
                 
-                relevance_scores = evaluation.get("relevance_scores", {})
+                for chunk_id, score in new_evaluation.get("relevance_scores", {}).items():
+                    relevance_scores.setdefault(chunk_id, score)
         
         # Filter and re-rank chunks based on relevance scores
         async with async_timing_context("filter_and_rank", self.timing_stats):
@@ -320,6 +332,8 @@ class RetrievalComponent:
                 "author": metadata.get("author", ""),
                 "date": metadata.get("date", ""),
                 "page": metadata.get("page", ""),
+                "start_index": metadata.get("start_index"),
+                "end_index": metadata.get("end_index"),
                 "tags": metadata.get("tags", []),
                 "folder": metadata.get("folder", "/")
             }
@@ -4,6 +4,7 @@ RAG Engine
 This module provides the RAGEngine class that combines all components
 to provide a complete RAG solution.
 """
+import asyncio
 import logging
 import time
 import uuid
@@ -21,7 +22,9 @@ from app.rag.engine.components.retrieval import RetrievalComponent
 from app.rag.engine.components.generation import GenerationComponent
 from app.rag.engine.components.memory import MemoryComponent
 from app.rag.engine.components.context_builder import ContextBuilder
-from app.rag.engine.utils.timing import TimingStats, async_timing_context
+from app.rag.engine.utils.timing import TimingStats, StageTimeline
+from app.rag.query_metrics import get_query_monitor
+from app.rag.deadline import Deadline, set_current_deadline, reset_current_deadline
 from app.rag.engine.utils.error_handler import RAGError, handle_rag_error
 
 logger = logging.getLogger("app.rag.engine.rag_engine")
@@ -105,6 +108,7 @@ class RAGEngine(BaseEngine, VectorStoreMixin, OllamaMixin, CacheMixin, SecurityM
                    db = None,
                    capture_raw_output: bool = False,
                    return_raw_ollama: bool = False,
+                   deadline: Optional[Deadline] = None,
                    **kwargs) -> Dict[str, Any]:
         """
         Query the RAG engine
@@ -124,57 +128,92 @@ class RAGEngine(BaseEngine, VectorStoreMixin, OllamaMixin, CacheMixin, SecurityM
             db: Database session for memory operations
             capture_raw_output: Whether to capture raw output
             return_raw_ollama: Whether to return raw Ollama output
+            deadline: Latency budget of the request (none by default); optional
+                stages that don't fit are skipped and listed in "degradations"
             
         Returns:
             Response dictionary
         """
         self.timing_stats.start("total")
+        timeline = StageTimeline(self.timing_stats)
+        pending: List[asyncio.Future] = []
+        
+        # Reason: components read the deadline from the context, like the LLM priority,
+        # so the stage tasks started below inherit it without threading it through every call
+        deadline = deadline or Deadline()
+        deadline_token = set_current_deadline(deadline)
         
         try:
             # Start timing the entire query process
             logger.info(f"RAG query: {query[:50]}...")
             
-            # Process user ID
-            effective_user_id = await self._process_user_id(user_id)
-            
-            # Process conversation ID
-            effective_conversation_id = await self._process_conversation_id(conversation_id, conversation_history)
-            self.conversation_id = effective_conversation_id
+            # Process user and conversation IDs (no I/O, everything else depends on them)
+            async with timeline.stage("id_processing"):
+                effective_user_id = await self._process_user_id(user_id)
+                effective_conversation_id = await self._process_conversation_id(conversation_id, conversation_history)
+                self.conversation_id = effective_conversation_id
             
-            # Record timing for ID processing
-            self.timing_stats.record_timing("id_processing", self.timing_stats.stop("id_processing") if "id_processing" in self.timing_stats.timings else 0.1)
-            
-            # Process memory operations
-            async with async_timing_context("memory_processing", self.timing_stats):
-                processed_query, memory_response, memory_operation = await self.memory_component.process_memory_operations(
+            # Reason: memory operations, history formatting and retrieval are independent,
+            # so they run concurrently. Retrieval starts speculatively with the original
+            # query and is only redone if the memory step rewrites the query.
+            memory_task = asyncio.ensure_future(timeline.run(
+                "memory_processing",
+                self.memory_component.process_memory_operations(
                     query=query,
                     user_id=effective_user_id,
                     conversation_id=effective_conversation_id
+                ),
+                after=("id_processing",)
+            ))
+            history_task = asyncio.ensure_future(timeline.run(
+                "conversation_history",
+                self._format_conversation_history(conversation_history)
+            ))
+            pending = [memory_task, history_task]
+            
+            retrieval_task = None
+            if use_rag:
+                retrieval_task = self._start_retrieval(
+                    timeline, query, top_k, metadata_filters, effective_user_id, after=("id_processing",)
                 )
-                
-                # If it's a recall operation with a response, evaluate whether to return immediately
-                if memory_operation == "recall" and memory_response:
-                    # Check if this is a pure memory recall or if it should be augmented with LLM
-                    if "Here's what I remember:" in memory_response and len(memory_response.split('\n')) <= 2:
-                        # This is likely just returning minimal information, augment with LLM
-                        logger.info(f"Memory recall contains minimal information, augmenting with LLM")
-                        # Continue with normal processing but include memory in context
-                        context = f"User previously mentioned: {memory_response}"
-                    else:
-                        # This is a substantial memory recall, return directly
-                        logger.info(f"Substantial memory recall detected, returning directly")
-                        return {
-                            "query": query,
-                            "answer": memory_response,
-                            "sources": []
-                        }
+                pending.append(retrieval_task)
+            
+            processed_query, memory_response, memory_operation = await memory_task
+            
+            # If it's a recall operation with a response, evaluate whether to return immediately
+            if memory_operation == "recall" and memory_response:
+                # Check if this is a pure memory recall or if it should be augmented with LLM
+                if "Here's what I remember:" in memory_response and len(memory_response.split('\n')) <= 2:
+                    # This is likely just returning minimal information, augment with LLM
+                    logger.info(f"Memory recall contains minimal information, augmenting with LLM")
+                    # Continue with normal processing but include memory in context
+                    context = f"User previously mentioned: {memory_response}"
+                else:
+                    # This is a substantial memory recall, return directly
+                    logger.info(f"Substantial memory recall detected, returning directly")
+                    await self._cancel_stages(pending)
+                    get_query_monitor().record_timeline(timeline)
+                    return {
+                        "query": query,
+                        "answer": memory_response,
+                        "sources": []
+                    }
+            
+            # Retrieval has to see the query the memory step produced
+            if retrieval_task is not None and processed_query != query:
+                logger.info("Memory processing rewrote the query, restarting retrieval")
+                await self._cancel_stages([retrieval_task])
+                retrieval_task = self._start_retrieval(
+                    timeline, processed_query, top_k, metadata_filters, effective_user_id,
+                    after=("memory_processing",)
+                )
+                pending.append(retrieval_task)
             
             # Use the processed query for RAG
             query = processed_query
             
             # Format conversation history
-            async with async_timing_context("conversation_history", self.timing_stats):
-                conversation_context = await self._format_conversation_history(conversation_history)
+            conversation_context = await history_task
             
             # Get context from vector store if RAG is enabled
             context = ""
@@ -182,28 +221,29 @@ class RAGEngine(BaseEngine, VectorStoreMixin, OllamaMixin, CacheMixin, SecurityM
             document_ids = []
             retrieval_state = "no_documents"
             
-            if use_rag:
-                async with async_timing_context("retrieval", self.timing_stats):
-                    # Retrieve documents
-                    documents, retrieval_state = await self.retrieval_component.retrieve(
-                        query=query,
-                        top_k=top_k,
-                        metadata_filters=metadata_filters,
-                        user_id=UUID(effective_user_id) if effective_user_id else None
-                    )
-                    
-                    # Build context
-                    if documents:
+            if retrieval_task is not None:
+                documents, retrieval_state = await retrieval_task
+                
+                # Build context
+                if documents:
+                    async with timeline.stage("context_building", after=("retrieval", "conversation_history", "memory_processing")):
                         context, sources = await self.context_builder.build_context(
                             documents=documents,
-                            query=query
+                            query=query,
+                            model=model,
+                            system_prompt=system_prompt,
+                            conversation_context=conversation_context,
+                            model_parameters=model_parameters
                         )
-                        
-                        # Extract document IDs
-                        document_ids = [source.get("document_id") for source in sources]
+                    
+                    # Extract document IDs
+                    document_ids = [source.get("document_id") for source in sources]
+            
+            # Stages the prompt waits for
+            prompt_inputs = [name for name in ("memory_processing", "conversation_history", "retrieval", "context_building") if name in timeline.stages]
             
             # Generate response
-            async with async_timing_context("response_generation", self.timing_stats):
+            async with timeline.stage("response_generation", after=prompt_inputs):
                 # Handle memory operations in the prompt
                 if memory_operation == "store" and memory_response:
                     # For store operations, we need to modify the prompt to include the memory confirmation
@@ -246,8 +286,9 @@ class RAGEngine(BaseEngine, VectorStoreMixin, OllamaMixin, CacheMixin, SecurityM
                     
                     return {
                         "query": query,
-                        "stream": stream_response,
-                        "sources": [Citation(**source) for source in sources] if sources else []
+                        "stream": self._track_stream(stream_response, timeline),
+                        "sources": [Citation(**source) for source in sources] if sources else [],
+                        "degradations": list(deadline.degradations)
                     }
                 else:
                     # For non-streaming, generate the complete response
@@ -262,6 +303,9 @@ class RAGEngine(BaseEngine, VectorStoreMixin, OllamaMixin, CacheMixin, SecurityM
                         stream=False
                     )
                     
+                    # Without streaming, the first token reaches the client with the whole answer
+                    timeline.mark("first_token")
+                    
                     # Get response text
                     response_text = response.get("content", "")
                     
@@ -306,20 +350,104 @@ class RAGEngine(BaseEngine, VectorStoreMixin, OllamaMixin, CacheMixin, SecurityM
                     # Log timing summary
                     self.timing_stats.stop("total")
                     logger.info(f"Total processing time: {self.timing_stats.get_timing('total'):.2f}s")
+                    logger.info(f"Critical path: {' > '.join(timeline.critical_path())}")
                     self.timing_stats.log_summary()
+                    get_query_monitor().record_timeline(timeline)
                     
                     return {
                         "query": query,
                         "answer": response_text,
                         "sources": [Citation(**source) for source in sources] if sources else [],
                         "raw_ollama_output": raw_ollama_output if capture_raw_output else None,
-                        "raw_output": raw_ollama_output if return_raw_ollama else None
+                        "raw_output": raw_ollama_output if return_raw_ollama else None,
+                        "degradations": list(deadline.degradations)
                     }
         
         except Exception as e:
             self.timing_stats.stop("total")
             logger.error(f"Error querying RAG engine: {str(e)}")
             return handle_rag_error(e, "Error processing your query")
+        
+        finally:
+            # Reason: if the client disconnected (or a stage failed), stages still
+            # running must not keep using the LLM and vector store
+            await self._cancel_stages(pending)
+            reset_current_deadline(deadline_token)
+    
+    def _start_retrieval(self,
+                         timeline: StageTimeline,
+                         query: str,
+                         top_k: int,
+                         metadata_filters: Optional[Dict[str, Any]],
+                         user_id: Optional[str],
+                         after: Tuple[str, ...]) -> asyncio.Future:
+        """
+        Start retrieval as a concurrent stage
+        
+        Args:
+            timeline: Stage timeline of the query
+            query: Query to retrieve documents for
+            top_k: Number of results to return
+            metadata_filters: Metadata filters
+            user_id: User ID for permission filtering
+            after: Stages the retrieval waited for
+            
+        Returns:
+            Task resolving to (documents, retrieval_state)
+        """
+        return asyncio.ensure_future(timeline.run(
+            "retrieval",
+            self.retrieval_component.retrieve(
+                query=query,
+                top_k=top_k,
+                metadata_filters=metadata_filters,
+                user_id=UUID(user_id) if user_id else None
+            ),
+            after=after
+        ))
+    
+    async def _cancel_stages(self, tasks: List[asyncio.Future]) -> None:
+        """
+        Cancel stages that are still running and wait for them to finish
+        
+        Args:
+            tasks: Stage tasks
+        """
+        running = [task for task in tasks if not task.done()]
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+    
+    async def _track_stream(self, stream: AsyncGenerator, timeline: StageTimeline) -> AsyncGenerator:
+        """
+        Pass a response stream through, recording time-to-first-token
+        
+        The query's timeline is recorded when the stream ends. Closing this
+        generator (e.g. when the client disconnects) closes the generation
+        stream, which leaves the upstream LLM stream; the LLM stream itself is
+        closed once no other coalesced request is reading it.
+        
+        Args:
+            stream: Response stream from the generation component
+            timeline: Stage timeline of the query
+            
+        Yields:
+            Chunks of the response stream
+        """
+        first = True
+        try:
+            async with timeline.stage("streaming", after=("response_generation",)):
+                async for chunk in stream:
+                    if first:
+                        first = False
+                        logger.info(f"Time to first token: {timeline.mark('first_token'):.2f}s")
+                    yield chunk
+        finally:
+            if hasattr(stream, "aclose"):
+                await stream.aclose()
+            logger.info(f"Critical path: {' > '.join(timeline.critical_path())}")
+            get_query_monitor().record_timeline(timeline)
     
     async def _process_user_id(self, user_id: Optional[str] = None) -> Optional[str]:
         """
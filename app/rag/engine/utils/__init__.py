@@ -8,6 +8,7 @@ This package contains utility functions for the RAG Engine.
 from app.rag.engine.utils.query_processor import (
     process_query,
     analyze_query_complexity,
+    estimate_retrieval_parameters,
     extract_keywords
 )
 
@@ -17,7 +18,15 @@ from app.rag.engine.utils.timing import (
     timing_context,
     async_timing_context,
     get_performance_stats,
-    TimingStats
+    TimingStats,
+    StageTimeline
+)
+
+from app.rag.engine.utils.token_budget import (
+    estimate_tokens,
+    get_context_window,
+    get_token_estimator,
+    TokenEstimator
 )
 
 from app.rag.engine.utils.relevance import (
@@ -47,6 +56,7 @@ __all__ = [
     # Query processor
     'process_query',
     'analyze_query_complexity',
+    'estimate_retrieval_parameters',
     'extract_keywords',
     
     # Timing
@@ -56,6 +66,13 @@ __all__ = [
     'async_timing_context',
     'get_performance_stats',
     'TimingStats',
+    'StageTimeline',
+    
+    # Token budget
+    'estimate_tokens',
+    'get_context_window',
+    'get_token_estimator',
+    'TokenEstimator',
     
     # Relevance
     'calculate_relevance_score',
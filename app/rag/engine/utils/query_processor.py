@@ -342,8 +342,57 @@ def analyze_query_complexity(query: str) -> Dict[str, Any]:
     else:
         analysis["complexity"] = "complex"
     
+    analysis["complexity_score"] = complexity_score
+    
     return analysis
 
+# Retrieval parameters per complexity level, within the ranges the Retrieval Judge recommends
+RETRIEVAL_PARAMETERS_BY_COMPLEXITY = {
+    "simple": {"k": 5, "threshold": 0.5, "reranking": False},
+    "moderate": {"k": 10, "threshold": 0.4, "reranking": True},
+    "complex": {"k": 15, "threshold": 0.3, "reranking": True}
+}
+
+# Words that refer back to earlier conversation, which the heuristics can't resolve
+_ANAPHORA_PATTERN = re.compile(r"^\s*(it|its|this|that|these|those|they|them|he|she|his|her)\b", re.IGNORECASE)
+
+def estimate_retrieval_parameters(query: str) -> Dict[str, Any]:
+    """
+    Recommend retrieval parameters from the query complexity heuristics
+    
+    Produces the same shape as the Retrieval Judge's query analysis, plus a
+    confidence. Confidence is high for clearly simple, self-contained
+    queries and drops for higher complexity, multiple questions, or queries
+    that start by referring back to the conversation.
+    
+    Args:
+        query: The user query
+        
+    Returns:
+        Dictionary with complexity, parameters, justification and confidence (0-1)
+    """
+    complexity = analyze_query_complexity(query)
+    level = complexity["complexity"]
+    
+    if level == "simple":
+        confidence = 0.9 - 0.1 * complexity["complexity_score"]
+    elif level == "moderate":
+        confidence = 0.5
+    else:
+        confidence = 0.3
+    
+    if complexity["has_multiple_questions"]:
+        confidence -= 0.2
+    if _ANAPHORA_PATTERN.match(query):
+        confidence -= 0.3
+    
+    return {
+        "complexity": level,
+        "parameters": dict(RETRIEVAL_PARAMETERS_BY_COMPLEXITY[level]),
+        "justification": f"Heuristic estimate from query complexity score {complexity['complexity_score']}.",
+        "confidence": round(max(confidence, 0.0), 2)
+    }
+
 def extract_keywords(query: str) -> List[str]:
     """
     Extract keywords from a query
@@ -6,7 +6,7 @@ in the RAG Engine.
 """
 import logging
 import time
-from typing import Dict, Any, Optional, List, Callable, TypeVar, Union
+from typing import Dict, Any, Optional, List, Tuple, Callable, TypeVar, Union
 from functools import wraps
 import asyncio
 import contextlib
@@ -142,6 +142,124 @@ class TimingStats:
         # Log the summary
         logger.log(level, "\n".join(log_lines))
 
+class StageTimeline:
+    """
+    Start and end offsets of the stages of one request
+    
+    Stages may run concurrently. Each stage names the stages it waited for,
+    so the chain that determined the end of the request (the critical path)
+    can be recovered afterwards.
+    """
+    def __init__(self, stats: Optional[TimingStats] = None):
+        """
+        Args:
+            stats: Optional TimingStats that also receives each stage's duration
+        """
+        self.origin = time.monotonic()
+        self.stats = stats
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.marks: Dict[str, float] = {}
+    
+    def elapsed(self) -> float:
+        """Seconds since the timeline started"""
+        return time.monotonic() - self.origin
+    
+    @contextlib.asynccontextmanager
+    async def stage(self, name: str, after: Union[List[str], Tuple[str, ...]] = ()):
+        """
+        Time a stage
+        
+        Args:
+            name: Name of the stage
+            after: Stages whose results this stage waited for
+        """
+        start = self.elapsed()
+        cancelled = False
+        try:
+            yield
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            end = self.elapsed()
+            self.stages[name] = {"start": start, "end": end, "after": tuple(after), "cancelled": cancelled}
+            if self.stats and not cancelled:
+                self.stats.record_timing(name, end - start)
+    
+    async def run(self, name: str, awaitable, after: Union[List[str], Tuple[str, ...]] = ()):
+        """
+        Await something as a timed stage
+        
+        Args:
+            name: Name of the stage
+            awaitable: Work of the stage
+            after: Stages whose results this stage waited for
+            
+        Returns:
+            Result of the awaitable
+        """
+        async with self.stage(name, after):
+            return await awaitable
+    
+    def mark(self, name: str) -> float:
+        """
+        Record a point in time, e.g. the first streamed token
+        
+        Args:
+            name: Name of the event
+            
+        Returns:
+            Seconds since the timeline started
+        """
+        self.marks[name] = self.elapsed()
+        return self.marks[name]
+    
+    def critical_path(self) -> List[str]:
+        """
+        Get the chain of stages that determined when the request finished
+        
+        Starting from the stage that ended last, repeatedly follow the
+        dependency that ended last.
+        
+        Returns:
+            Stage names, first to last
+        """
+        finished = {name: stage for name, stage in self.stages.items() if not stage["cancelled"]}
+        if not finished:
+            return []
+        
+        name = max(finished, key=lambda stage: finished[stage]["end"])
+        path = [name]
+        while True:
+            dependencies = [dependency for dependency in finished[name]["after"] if dependency in finished]
+            if not dependencies:
+                break
+            name = max(dependencies, key=lambda stage: finished[stage]["end"])
+            path.append(name)
+        return list(reversed(path))
+    
+    def get_summary(self) -> Dict[str, Any]:
+        """
+        Get the stage offsets, events and critical path
+        
+        Returns:
+            Dictionary with per-stage start/end/duration, marks and critical path
+        """
+        return {
+            "stages": {
+                name: {
+                    "start": stage["start"],
+                    "end": stage["end"],
+                    "duration": stage["end"] - stage["start"],
+                    "cancelled": stage["cancelled"]
+                }
+                for name, stage in self.stages.items()
+            },
+            "marks": dict(self.marks),
+            "critical_path": self.critical_path(),
+            "elapsed": self.elapsed()
+        }
+
 def time_operation(func: Callable[..., T]) -> Callable[..., T]:
     """
     Decorator for timing function execution
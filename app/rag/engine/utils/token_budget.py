@@ -0,0 +1,222 @@
+"""
+Token Budget Utility for RAG Engine
+
+This module estimates token counts per model and provides the token
+budget available for retrieved context in a model's context window.
+"""
+import math
+import re
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Hashable
+
+from app.core.config import LLM_CONTEXT_WINDOW, LLM_CONTEXT_WINDOWS, LLM_TOKEN_CALIBRATION
+
+logger = logging.getLogger("app.rag.engine.utils.token_budget")
+
+# Words and individual punctuation marks, as counted by scripts/estimate_tokens.py
+TOKEN_PIECE_PATTERN = re.compile(r"\b\w+\b|[^\w\s]")
+
+# Estimates below this size are too noisy to calibrate from
+MIN_CALIBRATION_TOKENS = 64
+
+# Plausible range of actual/estimated token ratios
+MIN_CALIBRATION_FACTOR = 0.5
+MAX_CALIBRATION_FACTOR = 2.0
+
+def estimate_tokens_by_chars(text: str) -> float:
+    """
+    Estimate tokens from the character count (about 4 characters per token)
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count
+    """
+    return len(text) / 4
+
+def estimate_tokens_by_words(text: str) -> float:
+    """
+    Estimate tokens from the number of words and punctuation marks
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count
+    """
+    return len(TOKEN_PIECE_PATTERN.findall(text)) * 0.6
+
+def estimate_tokens(text: str) -> float:
+    """
+    Model-independent token estimate, the mean of the character and word heuristics
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count
+    """
+    if not text:
+        return 0.0
+    return (estimate_tokens_by_chars(text) + estimate_tokens_by_words(text)) / 2
+
+
+class TokenEstimator:
+    """
+    Per-model token counter for prompt budgeting.
+
+    Counts start from the model-independent heuristic estimate and are
+    scaled by a per-model calibration factor. The factor starts at the
+    configured value (1.0 by default) and is refined from the prompt token
+    counts the LLM server reports for generated responses, so each model
+    converges on its own tokenizer's ratio.
+
+    Base estimates of retrieved chunks are cached by chunk ID, so packing
+    the same chunks again only costs a lookup per chunk.
+    """
+    def __init__(self,
+                 calibration: Optional[Dict[str, float]] = None,
+                 max_cached_chunks: int = 10000,
+                 smoothing: float = 0.2):
+        """
+        Args:
+            calibration: Initial calibration factors for specific models
+            max_cached_chunks: Number of chunk estimates kept in the cache
+            smoothing: Weight of a new observation in the calibration average
+        """
+        self.factors: Dict[str, float] = dict(calibration or {})
+        self.max_cached_chunks = max_cached_chunks
+        self.smoothing = smoothing
+        self.chunk_counts: "OrderedDict[Hashable, float]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "observations": 0}
+        self.lock = threading.Lock()
+
+    def base_count(self, text: str, chunk_id: Optional[str] = None) -> float:
+        """
+        Get the model-independent estimate of a text, cached by chunk ID
+
+        Args:
+            text: Text to measure
+            chunk_id: ID of the chunk the text belongs to, if any
+
+        Returns:
+            Estimated token count before calibration
+        """
+        if not chunk_id:
+            return estimate_tokens(text)
+
+        # Reason: the length guards against a chunk ID reused for new content after reprocessing
+        key = (chunk_id, len(text))
+        with self.lock:
+            count = self.chunk_counts.get(key)
+            if count is not None:
+                self.chunk_counts.move_to_end(key)
+                self.stats["hits"] += 1
+                return count
+            self.stats["misses"] += 1
+
+        count = estimate_tokens(text)
+        with self.lock:
+            self.chunk_counts[key] = count
+            while len(self.chunk_counts) > self.max_cached_chunks:
+                self.chunk_counts.popitem(last=False)
+        return count
+
+    def count(self, text: str, model: str, chunk_id: Optional[str] = None) -> int:
+        """
+        Estimate the number of tokens a text takes up for a model
+
+        Args:
+            text: Text to measure
+            model: Model the text is sent to
+            chunk_id: ID of the chunk the text belongs to, if any
+
+        Returns:
+            Estimated token count
+        """
+        return int(math.ceil(self.base_count(text, chunk_id) * self.factor(model)))
+
+    def factor(self, model: str) -> float:
+        """
+        Get the calibration factor of a model
+
+        Args:
+            model: Model name
+
+        Returns:
+            Ratio of actual to estimated tokens
+        """
+        return self.factors.get(model, 1.0)
+
+    def observe(self, model: str, text: str, actual_tokens: int) -> None:
+        """
+        Refine a model's calibration from a reported token count
+
+        Args:
+            model: Model the text was sent to
+            text: Text the model evaluated
+            actual_tokens: Token count reported by the LLM server
+        """
+        estimated = estimate_tokens(text)
+        if estimated < MIN_CALIBRATION_TOKENS or actual_tokens <= 0:
+            return
+
+        ratio = actual_tokens / estimated
+        # Reason: the server reports fewer tokens when it reuses a cached prompt
+        # prefix, so implausible ratios are skipped rather than averaged in
+        if not MIN_CALIBRATION_FACTOR <= ratio <= MAX_CALIBRATION_FACTOR:
+            return
+
+        with self.lock:
+            current = self.factors.get(model)
+            self.factors[model] = ratio if current is None else current + self.smoothing * (ratio - current)
+            self.stats["observations"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get calibration factors and chunk cache statistics
+
+        Returns:
+            Dictionary with per-model factors and cache counters
+        """
+        with self.lock:
+            return {
+                "factors": dict(self.factors),
+                "cached_chunks": len(self.chunk_counts),
+                **self.stats
+            }
+
+
+def get_context_window(model: str, model_parameters: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Get the context window size of a model in tokens
+
+    Args:
+        model: Model name
+        model_parameters: Request parameters, which may set num_ctx
+
+    Returns:
+        Context window size
+    """
+    if model_parameters and model_parameters.get("num_ctx"):
+        return int(model_parameters["num_ctx"])
+    return LLM_CONTEXT_WINDOWS.get(model, LLM_CONTEXT_WINDOW)
+
+
+# Singleton instance shared by the context builder and generation component
+_estimator_instance: Optional[TokenEstimator] = None
+
+def get_token_estimator() -> TokenEstimator:
+    """
+    Get the shared token estimator
+
+    Returns:
+        TokenEstimator instance
+    """
+    global _estimator_instance
+    if _estimator_instance is None:
+        _estimator_instance = TokenEstimator(calibration=LLM_TOKEN_CALIBRATION)
+    return _estimator_instance
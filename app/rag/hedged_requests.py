@@ -0,0 +1,119 @@
+"""
+Hedged Requests - sends a backup copy of a slow idempotent request and keeps whichever answers first
+"""
+import asyncio
+import logging
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+from app.rag.ingest_metrics import StageHistogram
+
+logger = logging.getLogger("app.rag.hedged_requests")
+
+# Latency samples needed before the observed p95 replaces the configured hedge delay
+MIN_LATENCY_SAMPLES = 20
+
+class RequestHedger:
+    """
+    Hedges short idempotent requests (embeddings, judge calls).
+
+    If a request hasn't answered after the hedge delay, usually the p95
+    latency of its endpoint, a second copy is sent. The first successful
+    answer wins and the other copy is cancelled, so one stuck request no
+    longer holds up the caller for the full timeout.
+    """
+    def __init__(self, enabled: bool = False, default_delay: float = 2.0, min_delay: float = 0.25):
+        """
+        Args:
+            enabled: Whether requests are hedged at all
+            default_delay: Hedge delay in seconds until enough latencies were observed
+            min_delay: Shortest hedge delay in seconds
+        """
+        self.enabled = enabled
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.stats = {"calls": 0, "hedged": 0, "hedge_wins": 0}
+
+    def delay_for(self, latency: Optional[StageHistogram]) -> float:
+        """
+        Get the hedge delay for an endpoint
+
+        Args:
+            latency: Observed latencies of the endpoint
+
+        Returns:
+            p95 latency once there are enough samples, the default delay before
+        """
+        if latency is None:
+            return self.default_delay
+        snapshot = latency.snapshot()
+        if snapshot["count"] < MIN_LATENCY_SAMPLES:
+            return self.default_delay
+        return max(self.min_delay, snapshot["p95"])
+
+    async def run(self, factory: Callable[[], Awaitable[Any]], delay: float) -> Any:
+        """
+        Run a request, sending a backup copy if it is slow
+
+        Args:
+            factory: Function starting one copy of the request
+            delay: Seconds to wait before sending the backup copy
+
+        Returns:
+            Result of the first copy to succeed
+
+        Raises:
+            Exception: Error of the last copy to fail if none succeeds
+        """
+        if not self.enabled:
+            return await factory()
+
+        self.stats["calls"] += 1
+        primary = asyncio.ensure_future(factory())
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if primary in done:
+                return primary.result()
+
+            self.stats["hedged"] += 1
+            logger.debug(f"Request still running after {delay:.2f}s, sending a hedge")
+            pending.add(asyncio.ensure_future(factory()))
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get hedging statistics
+
+        Returns:
+            Dictionary with hedged call counts and how often the hedge answered first
+        """
+        return {"enabled": self.enabled, **self.stats}
+
+
+# Singleton instance shared by all Ollama clients
+_hedger_instance: Optional[RequestHedger] = None
+
+def get_request_hedger() -> RequestHedger:
+    """
+    Get the shared request hedger
+
+    Returns:
+        RequestHedger instance
+    """
+    global _hedger_instance
+    if _hedger_instance is None:
+        from app.core.config import LLM_HEDGE_ENABLED, LLM_HEDGE_DELAY_SECONDS
+        _hedger_instance = RequestHedger(enabled=LLM_HEDGE_ENABLED, default_delay=LLM_HEDGE_DELAY_SECONDS)
+    return _hedger_instance
@@ -0,0 +1,196 @@
+"""
+Ingest Metrics - rolling per-stage timings and throughput for document ingestion
+"""
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, Any, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # Reason: app.rag.engine imports the vector store, which imports this module
+    from app.rag.engine.utils.timing import TimingStats
+
+logger = logging.getLogger("app.rag.ingest_metrics")
+
+# Stages of the ingest pipeline, in order
+INGEST_STAGES = ("load", "analyze", "split", "embed", "upsert", "persist")
+
+# Upper bounds (seconds) of the histogram buckets
+HISTOGRAM_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class StageHistogram:
+    """
+    Rolling histogram of durations for one ingest stage
+    """
+    def __init__(self, window_size: int = 1000):
+        """
+        Args:
+            window_size: Number of most recent samples kept for the histogram
+        """
+        self.samples = deque(maxlen=window_size)
+        self.count = 0
+        self.total_seconds = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """
+        Record one duration
+
+        Args:
+            seconds: Duration in seconds
+        """
+        self.samples.append(seconds)
+        self.count += 1
+        self.total_seconds += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Summarize the recent samples
+
+        Returns:
+            Dictionary with count, totals, percentiles and bucket counts
+        """
+        samples = sorted(self.samples)
+        buckets = {f"le_{bound}": 0 for bound in HISTOGRAM_BUCKETS}
+        buckets["le_inf"] = 0
+        for sample in samples:
+            for bound in HISTOGRAM_BUCKETS:
+                if sample <= bound:
+                    buckets[f"le_{bound}"] += 1
+                    break
+            else:
+                buckets["le_inf"] += 1
+
+        return {
+            "count": self.count,
+            "total_seconds": self.total_seconds,
+            "window_count": len(samples),
+            "mean": sum(samples) / len(samples) if samples else 0.0,
+            "p50": self._percentile(samples, 0.5),
+            "p95": self._percentile(samples, 0.95),
+            "max": samples[-1] if samples else 0.0,
+            "buckets": buckets
+        }
+
+    @staticmethod
+    def _percentile(sorted_samples, fraction: float) -> float:
+        """Nearest-rank percentile of already sorted samples"""
+        if not sorted_samples:
+            return 0.0
+        index = min(len(sorted_samples) - 1, int(fraction * len(sorted_samples)))
+        return sorted_samples[index]
+
+
+class IngestMonitor:
+    """
+    Aggregates ingest stage timings and volume counters across documents.
+
+    Each processing call times its stages with its own TimingStats and hands
+    it to record_timings, so concurrent documents don't share timers.
+    Throughput is reported over a sliding time window.
+    """
+    def __init__(self, window_size: int = 1000, throughput_window_seconds: float = 60.0):
+        """
+        Args:
+            window_size: Samples kept per stage histogram
+            throughput_window_seconds: Time window for chunks/sec and bytes/sec
+        """
+        self.window_size = window_size
+        self.throughput_window_seconds = throughput_window_seconds
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset all histograms and counters"""
+        with self.lock:
+            self.stages = {stage: StageHistogram(self.window_size) for stage in INGEST_STAGES}
+            self.counters = {"documents": 0, "chunks": 0, "bytes": 0}
+            self.recent_documents = deque()
+            self.started_at = time.time()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """
+        Record a duration for a stage
+
+        Args:
+            stage: Stage name (one of INGEST_STAGES)
+            seconds: Duration in seconds
+        """
+        with self.lock:
+            if stage not in self.stages:
+                self.stages[stage] = StageHistogram(self.window_size)
+            self.stages[stage].observe(seconds)
+
+    def record_timings(self, stats: "TimingStats") -> None:
+        """
+        Record every stage timed in a TimingStats
+
+        Args:
+            stats: Timing stats of one processing call
+        """
+        for stage, seconds in stats.get_all_timings().items():
+            if stage in INGEST_STAGES:
+                self.observe(stage, seconds)
+
+    def record_document(self, chunks: int, size_bytes: int) -> None:
+        """
+        Record a processed document for the volume counters
+
+        Args:
+            chunks: Number of chunks produced
+            size_bytes: Size of the source file in bytes
+        """
+        now = time.time()
+        with self.lock:
+            self.counters["documents"] += 1
+            self.counters["chunks"] += chunks
+            self.counters["bytes"] += size_bytes
+            self.recent_documents.append((now, chunks, size_bytes))
+            self._prune(now)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the current ingest statistics
+
+        Returns:
+            Dictionary with per-stage histograms, counters and throughput
+        """
+        now = time.time()
+        with self.lock:
+            self._prune(now)
+            # Reason: before a full window has passed, divide by the time actually covered
+            window = min(self.throughput_window_seconds, max(now - self.started_at, 1e-6))
+            recent_chunks = sum(chunks for _, chunks, _ in self.recent_documents)
+            recent_bytes = sum(size for _, _, size in self.recent_documents)
+            return {
+                "stages": {stage: histogram.snapshot() for stage, histogram in self.stages.items()},
+                "counters": dict(self.counters),
+                "throughput": {
+                    "window_seconds": window,
+                    "documents_per_second": len(self.recent_documents) / window,
+                    "chunks_per_second": recent_chunks / window,
+                    "bytes_per_second": recent_bytes / window
+                },
+                "uptime_seconds": now - self.started_at
+            }
+
+    def _prune(self, now: float) -> None:
+        """Drop documents that fell out of the throughput window"""
+        while self.recent_documents and now - self.recent_documents[0][0] > self.throughput_window_seconds:
+            self.recent_documents.popleft()
+
+
+# Singleton instance shared by the processors, vector store and API
+_monitor_instance: Optional[IngestMonitor] = None
+
+def get_ingest_monitor() -> IngestMonitor:
+    """
+    Get the shared ingest monitor
+
+    Returns:
+        IngestMonitor instance
+    """
+    global _monitor_instance
+    if _monitor_instance is None:
+        _monitor_instance = IngestMonitor()
+    return _monitor_instance
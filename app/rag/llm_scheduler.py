@@ -0,0 +1,279 @@
+"""
+LLM Scheduler - priority-aware dispatch queue for requests to the LLM server
+"""
+import time
+import asyncio
+import logging
+import functools
+import contextvars
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict, Any, Optional, Deque
+
+from app.rag.ingest_metrics import StageHistogram
+
+logger = logging.getLogger("app.rag.llm_scheduler")
+
+# Priority classes, most urgent first
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_INTERACTIVE_AUX = "interactive_aux"
+PRIORITY_BACKGROUND = "background"
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_INTERACTIVE_AUX, PRIORITY_BACKGROUND)
+
+# Share of contended slots each class receives relative to the others
+DEFAULT_PRIORITY_WEIGHTS = {
+    PRIORITY_INTERACTIVE: 8,
+    PRIORITY_INTERACTIVE_AUX: 4,
+    PRIORITY_BACKGROUND: 1
+}
+
+# Priority of LLM calls made by the current task, set by the calling component
+_current_priority: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "llm_priority", default=PRIORITY_INTERACTIVE
+)
+
+def get_current_priority() -> str:
+    """
+    Get the priority class of LLM calls made by the current task
+
+    Returns:
+        Priority class name
+    """
+    return _current_priority.get()
+
+@contextmanager
+def llm_priority(priority: str):
+    """
+    Run LLM calls made inside the block with the given priority class
+
+    Args:
+        priority: Priority class name
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+def with_llm_priority(priority: str):
+    """
+    Decorator that runs an async function's LLM calls with the given priority class
+
+    Args:
+        priority: Priority class name
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with llm_priority(priority):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class _ModelQueue:
+    """
+    Waiters and running requests for one model
+    """
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self.waiters: Dict[str, Deque[asyncio.Future]] = {priority: deque() for priority in PRIORITIES}
+        # Stride scheduling: each grant advances the class's pass by 1 / weight
+        self.passes: Dict[str, float] = {priority: 0.0 for priority in PRIORITIES}
+        # Pass of the most recent grant, used to align classes that start waiting
+        self.virtual_time = 0.0
+
+    def queued(self) -> int:
+        """Number of waiting requests"""
+        return sum(len(waiters) for waiters in self.waiters.values())
+
+
+class LLMScheduler:
+    """
+    Central dispatch queue for LLM requests.
+
+    Each model gets a concurrency cap. When a model is saturated, freed slots
+    go to the waiting priority classes by weighted fair sharing (stride
+    scheduling): interactive chat is served first most of the time, but
+    background work such as ingest analysis keeps a small guaranteed share
+    instead of starving. Within a class requests are served in arrival order.
+    """
+    def __init__(
+        self,
+        max_concurrency_per_model: int = 2,
+        model_concurrency: Optional[Dict[str, int]] = None,
+        weights: Optional[Dict[str, int]] = None,
+        window_size: int = 1000
+    ):
+        """
+        Args:
+            max_concurrency_per_model: Concurrent requests allowed per model
+            model_concurrency: Caps for specific models, overriding the default
+            weights: Relative share of contended slots per priority class
+            window_size: Samples kept per queue wait histogram
+        """
+        self.max_concurrency_per_model = max_concurrency_per_model
+        self.model_concurrency = dict(model_concurrency or {})
+        self.weights = dict(weights or DEFAULT_PRIORITY_WEIGHTS)
+        self.window_size = window_size
+        self.models: Dict[str, _ModelQueue] = {}
+        self.wait_times = {priority: StageHistogram(window_size) for priority in PRIORITIES}
+        self.counters = {priority: 0 for priority in PRIORITIES}
+
+    @asynccontextmanager
+    async def slot(self, model: str, priority: Optional[str] = None):
+        """
+        Hold one of the model's request slots for the duration of the block
+
+        Args:
+            model: Model the request is sent to
+            priority: Priority class (defaults to the current task's priority)
+        """
+        priority = await self.acquire(model, priority)
+        try:
+            yield priority
+        finally:
+            self.release(model)
+
+    async def acquire(self, model: str, priority: Optional[str] = None) -> str:
+        """
+        Wait for a request slot for a model
+
+        Args:
+            model: Model the request is sent to
+            priority: Priority class (defaults to the current task's priority)
+
+        Returns:
+            Priority class the slot was granted under
+        """
+        priority = priority or get_current_priority()
+        if priority not in PRIORITIES:
+            logger.warning(f"Unknown LLM priority '{priority}', using '{PRIORITY_BACKGROUND}'")
+            priority = PRIORITY_BACKGROUND
+
+        queue = self._get_queue(model)
+        started = time.monotonic()
+
+        if queue.active < queue.max_concurrency and not queue.queued():
+            self._grant(queue, priority)
+        else:
+            self._activate_class(queue, priority)
+            future = asyncio.get_running_loop().create_future()
+            queue.waiters[priority].append(future)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # Reason: the slot was granted just before the waiter was cancelled
+                    self.release(model)
+                elif future in queue.waiters[priority]:
+                    queue.waiters[priority].remove(future)
+                raise
+
+        self.wait_times[priority].observe(time.monotonic() - started)
+        self.counters[priority] += 1
+        return priority
+
+    def release(self, model: str) -> None:
+        """
+        Release a model's request slot and hand it to the next waiter
+
+        Args:
+            model: Model the request was sent to
+        """
+        queue = self._get_queue(model)
+        queue.active = max(0, queue.active - 1)
+
+        while queue.active < queue.max_concurrency:
+            priority = self._next_class(queue)
+            if priority is None:
+                break
+            future = queue.waiters[priority].popleft()
+            if future.cancelled():
+                continue
+            self._grant(queue, priority)
+            future.set_result(None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get queue wait times and per-model load
+
+        Returns:
+            Dictionary with wait time histograms and request counts per
+            priority class, and running/queued requests per model
+        """
+        return {
+            "wait_times": {priority: histogram.snapshot() for priority, histogram in self.wait_times.items()},
+            "requests": dict(self.counters),
+            "models": {
+                model: {
+                    "max_concurrency": queue.max_concurrency,
+                    "active": queue.active,
+                    "queued": {priority: len(waiters) for priority, waiters in queue.waiters.items()}
+                }
+                for model, queue in self.models.items()
+            }
+        }
+
+    def _get_queue(self, model: str) -> _ModelQueue:
+        """Get or create the queue of a model"""
+        queue = self.models.get(model)
+        if queue is None:
+            queue = _ModelQueue(self.model_concurrency.get(model, self.max_concurrency_per_model))
+            self.models[model] = queue
+        return queue
+
+    def _grant(self, queue: _ModelQueue, priority: str) -> None:
+        """Take a slot for a priority class and advance its pass"""
+        queue.active += 1
+        queue.virtual_time = queue.passes[priority]
+        queue.passes[priority] += 1.0 / self.weights.get(priority, 1)
+
+    def _activate_class(self, queue: _ModelQueue, priority: str) -> None:
+        """
+        Align the pass of a class that starts waiting with the current virtual time
+
+        Without this, a class idle for a long time would bank credit and
+        then monopolize the model.
+        """
+        if not queue.waiters[priority]:
+            queue.passes[priority] = max(queue.passes[priority], queue.virtual_time)
+
+    def _next_class(self, queue: _ModelQueue) -> Optional[str]:
+        """
+        Pick the waiting class whose next grant finishes first in virtual time
+
+        Comparing finish (pass + stride) rather than start tags lets a newly
+        waiting interactive request go ahead of a background backlog.
+        """
+        waiting = [priority for priority in PRIORITIES if queue.waiters[priority]]
+        if not waiting:
+            return None
+        return min(
+            waiting,
+            key=lambda priority: (
+                queue.passes[priority] + 1.0 / self.weights.get(priority, 1),
+                PRIORITIES.index(priority)
+            )
+        )
+
+
+# Singleton instance shared by all Ollama clients
+_scheduler_instance: Optional[LLMScheduler] = None
+
+def get_llm_scheduler() -> LLMScheduler:
+    """
+    Get the shared LLM scheduler
+
+    Returns:
+        LLMScheduler instance
+    """
+    global _scheduler_instance
+    if _scheduler_instance is None:
+        from app.core.config import LLM_MAX_CONCURRENCY_PER_MODEL, LLM_MODEL_CONCURRENCY
+        _scheduler_instance = LLMScheduler(
+            max_concurrency_per_model=LLM_MAX_CONCURRENCY_PER_MODEL,
+            model_concurrency=LLM_MODEL_CONCURRENCY
+        )
+    return _scheduler_instance
@@ -0,0 +1,353 @@
+"""
+Model Residency - keeps configured models loaded on the LLM server and routes around cold ones
+"""
+import time
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Union
+
+logger = logging.getLogger("app.rag.model_residency")
+
+# Model classes, in warm-up order
+MODEL_CLASS_CHAT = "chat"
+MODEL_CLASS_EMBEDDING = "embedding"
+MODEL_CLASS_JUDGE = "judge"
+MODEL_CLASSES = (MODEL_CLASS_CHAT, MODEL_CLASS_EMBEDDING, MODEL_CLASS_JUDGE)
+
+# Loads faster than this are treated as warm hits rather than cold starts
+COLD_START_THRESHOLD_SECONDS = 0.5
+
+def normalize_model_name(model: str) -> str:
+    """
+    Normalize a model name the way the LLM server reports it
+
+    Args:
+        model: Model name, with or without a tag
+
+    Returns:
+        Model name with an explicit tag
+    """
+    return model if ":" in model else f"{model}:latest"
+
+def parse_keep_alive(value: Optional[str]) -> Optional[Union[str, int]]:
+    """
+    Parse a keep-alive setting for the LLM server
+
+    Args:
+        value: Duration such as "30m", a number of seconds, or empty
+
+    Returns:
+        Duration string, seconds as an int, or None to use the server default
+    """
+    if value is None or not str(value).strip():
+        return None
+    value = str(value).strip()
+    # Reason: the server parses strings as durations, so bare numbers ("-1") must be sent as numbers
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+class ModelResidencyManager:
+    """
+    Tracks which models are loaded on the LLM server and keeps the configured ones resident.
+
+    Every request for a configured model carries the keep_alive of its model
+    class, so chat models can stay loaded longer than judge models. Loaded
+    models are read from the server's /api/ps (refreshed in the background,
+    never on the request path) and updated from each response. When routing
+    is enabled, a latency-sensitive auxiliary call whose preferred model is
+    cold can be sent to a model that is already loaded instead.
+    """
+    def __init__(self,
+                 model_classes: Optional[Dict[str, str]] = None,
+                 keep_alive: Optional[Dict[str, Any]] = None,
+                 refresh_interval: float = 10.0,
+                 routing_enabled: bool = False,
+                 cold_start_seconds: float = 5.0,
+                 smoothing: float = 0.3):
+        """
+        Args:
+            model_classes: Model class of each configured model
+            keep_alive: Keep-alive per model class
+            refresh_interval: Seconds before the loaded model list is considered stale
+            routing_enabled: Whether cold models may be routed around
+            cold_start_seconds: Assumed load time of a model never seen loading
+            smoothing: Weight of a new observation in the load time average
+        """
+        self.model_classes = {normalize_model_name(model): cls for model, cls in (model_classes or {}).items()}
+        self.keep_alive = dict(keep_alive or {})
+        self.refresh_interval = refresh_interval
+        self.routing_enabled = routing_enabled
+        self.default_cold_start = cold_start_seconds
+        self.smoothing = smoothing
+        self.loaded: Dict[str, Dict[str, Any]] = {}
+        self.refreshed_at: Optional[float] = None
+        self.cold_starts: Dict[str, float] = {}
+        self.stats = {"refreshes": 0, "refresh_errors": 0, "warmed": 0, "cold_loads": 0, "rerouted": 0}
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._warm_up_task: Optional[asyncio.Task] = None
+
+    def keep_alive_for(self, model: str) -> Optional[Union[str, int]]:
+        """
+        Get the keep-alive to send with requests for a model
+
+        Args:
+            model: Model name
+
+        Returns:
+            Keep-alive of the model's class, or None for unconfigured models
+        """
+        model_class = self.model_classes.get(normalize_model_name(model))
+        return self.keep_alive.get(model_class) if model_class else None
+
+    def apply_keep_alive(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Add the model's keep-alive to a request payload unless the caller set one
+
+        Args:
+            payload: Request payload with a model
+
+        Returns:
+            The same payload
+        """
+        if "keep_alive" not in payload:
+            keep_alive = self.keep_alive_for(payload.get("model", ""))
+            if keep_alive is not None:
+                payload["keep_alive"] = keep_alive
+        return payload
+
+    async def refresh(self, ollama_client=None) -> Dict[str, Dict[str, Any]]:
+        """
+        Read the loaded models from the LLM server
+
+        Args:
+            ollama_client: Client to query (a new one by default)
+
+        Returns:
+            Loaded models by name
+        """
+        if ollama_client is None:
+            # Reason: imported here because the Ollama client imports this module
+            from app.rag.ollama_client import OllamaClient
+            ollama_client = OllamaClient()
+
+        try:
+            running = await ollama_client.list_running_models()
+        except Exception as e:
+            self.stats["refresh_errors"] += 1
+            logger.warning(f"Could not read loaded models: {str(e)}")
+            return self.loaded
+
+        self.loaded = {
+            normalize_model_name(entry.get("name") or entry.get("model", "")): {
+                "expires_at": entry.get("expires_at"),
+                "size_vram": entry.get("size_vram")
+            }
+            for entry in running
+        }
+        self.refreshed_at = time.monotonic()
+        self.stats["refreshes"] += 1
+        return self.loaded
+
+    def is_loaded(self, model: str) -> Optional[bool]:
+        """
+        Check whether a model is loaded
+
+        Args:
+            model: Model name
+
+        Returns:
+            True or False, or None if the server was never queried
+        """
+        if normalize_model_name(model) in self.loaded:
+            return True
+        return None if self.refreshed_at is None else False
+
+    def observe_response(self, model: str, response: Dict[str, Any]) -> None:
+        """
+        Update residency from a completed generation
+
+        Args:
+            model: Model that produced the response
+            response: Final response object, with load_duration in nanoseconds
+        """
+        name = normalize_model_name(model)
+        self.loaded.setdefault(name, {})
+        load_seconds = (response.get("load_duration") or 0) / 1e9
+        if load_seconds >= COLD_START_THRESHOLD_SECONDS:
+            self.stats["cold_loads"] += 1
+            current = self.cold_starts.get(name)
+            self.cold_starts[name] = load_seconds if current is None else current + self.smoothing * (load_seconds - current)
+            logger.info(f"Model {model} was cold, loading took {load_seconds:.1f}s")
+
+    def cold_start_estimate(self, model: str) -> float:
+        """
+        Get the expected load time of a model
+
+        Args:
+            model: Model name
+
+        Returns:
+            Observed average load time, or the configured default
+        """
+        return self.cold_starts.get(normalize_model_name(model), self.default_cold_start)
+
+    def select_model(self, preferred: str, latency_budget: Optional[float] = None) -> str:
+        """
+        Choose the model for an auxiliary call
+
+        The preferred model is used unless routing is enabled, the model is
+        known to be cold, and loading it would not fit the latency budget.
+        In that case the call goes to a loaded model of the same class, or
+        failing that to any loaded configured generation model.
+
+        Args:
+            preferred: Model the caller is configured to use
+            latency_budget: Seconds the caller can afford to wait for a load
+
+        Returns:
+            Model to send the call to
+        """
+        if not self.routing_enabled or latency_budget is None:
+            return preferred
+        self._schedule_refresh()
+        if self.is_loaded(preferred) is not False or self.cold_start_estimate(preferred) <= latency_budget:
+            return preferred
+
+        preferred_class = self.model_classes.get(normalize_model_name(preferred))
+        candidates = sorted(
+            (model for model, cls in self.model_classes.items() if cls != MODEL_CLASS_EMBEDDING and model in self.loaded),
+            key=lambda model: self.model_classes[model] != preferred_class
+        )
+        if not candidates:
+            return preferred
+
+        self.stats["rerouted"] += 1
+        logger.info(f"Model {preferred} is cold, routing call to loaded model {candidates[0]}")
+        return candidates[0]
+
+    async def warm_up(self, ollama_client=None) -> List[str]:
+        """
+        Load the configured models with their keep-alive
+
+        Chat models are loaded first, then embedding and judge models.
+
+        Args:
+            ollama_client: Client to use (a new one by default)
+
+        Returns:
+            Models that were loaded
+        """
+        if ollama_client is None:
+            from app.rag.ollama_client import OllamaClient
+            ollama_client = OllamaClient()
+
+        warmed = []
+        for model, model_class in sorted(self.model_classes.items(), key=lambda item: MODEL_CLASSES.index(item[1])):
+            started = time.monotonic()
+            try:
+                await ollama_client.load_model(
+                    model,
+                    keep_alive=self.keep_alive.get(model_class),
+                    embedding=model_class == MODEL_CLASS_EMBEDDING
+                )
+            except Exception as e:
+                logger.warning(f"Could not warm up model {model}: {str(e)}")
+                continue
+            warmed.append(model)
+            self.stats["warmed"] += 1
+            logger.info(f"Warmed up {model_class} model {model} in {time.monotonic() - started:.1f}s")
+
+        await self.refresh(ollama_client)
+        return warmed
+
+    def start_warm_up(self) -> asyncio.Task:
+        """
+        Warm up the configured models in the background
+
+        Returns:
+            Warm-up task
+        """
+        if self._warm_up_task is None or self._warm_up_task.done():
+            self._warm_up_task = asyncio.ensure_future(self.warm_up())
+        return self._warm_up_task
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get residency state and counters
+
+        Returns:
+            Dictionary with configured and loaded models, load times and counters
+        """
+        return {
+            "configured": {
+                model: {"class": cls, "keep_alive": self.keep_alive.get(cls)}
+                for model, cls in self.model_classes.items()
+            },
+            "loaded": dict(self.loaded),
+            "cold_start_seconds": dict(self.cold_starts),
+            "routing_enabled": self.routing_enabled,
+            "seconds_since_refresh": None if self.refreshed_at is None else time.monotonic() - self.refreshed_at,
+            **self.stats
+        }
+
+    def _schedule_refresh(self) -> None:
+        """Refresh the loaded models in the background if the list is stale"""
+        if self.refreshed_at is not None and time.monotonic() - self.refreshed_at < self.refresh_interval:
+            return
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        try:
+            self._refresh_task = asyncio.ensure_future(self.refresh())
+        except RuntimeError:
+            # No running event loop
+            pass
+
+
+# Singleton instance shared by the Ollama clients and judges
+_residency_instance: Optional[ModelResidencyManager] = None
+
+def get_model_residency() -> ModelResidencyManager:
+    """
+    Get the shared model residency manager
+
+    Returns:
+        ModelResidencyManager instance
+    """
+    global _residency_instance
+    if _residency_instance is None:
+        from app.core.config import (
+            DEFAULT_MODEL,
+            LANGGRAPH_RAG_MODEL,
+            DEFAULT_EMBEDDING_MODEL,
+            CHUNKING_JUDGE_MODEL,
+            RETRIEVAL_JUDGE_MODEL,
+            LLM_KEEP_ALIVE_CHAT,
+            LLM_KEEP_ALIVE_EMBEDDING,
+            LLM_KEEP_ALIVE_JUDGE,
+            LLM_RESIDENCY_REFRESH_SECONDS,
+            LLM_RESIDENCY_ROUTING,
+            LLM_COLD_START_SECONDS
+        )
+        # Reason: a model shared by several roles gets the class of its most latency-sensitive role
+        model_classes = {
+            CHUNKING_JUDGE_MODEL: MODEL_CLASS_JUDGE,
+            RETRIEVAL_JUDGE_MODEL: MODEL_CLASS_JUDGE,
+            DEFAULT_EMBEDDING_MODEL: MODEL_CLASS_EMBEDDING,
+            LANGGRAPH_RAG_MODEL: MODEL_CLASS_CHAT,
+            DEFAULT_MODEL: MODEL_CLASS_CHAT
+        }
+        _residency_instance = ModelResidencyManager(
+            model_classes=model_classes,
+            keep_alive={
+                MODEL_CLASS_CHAT: parse_keep_alive(LLM_KEEP_ALIVE_CHAT),
+                MODEL_CLASS_EMBEDDING: parse_keep_alive(LLM_KEEP_ALIVE_EMBEDDING),
+                MODEL_CLASS_JUDGE: parse_keep_alive(LLM_KEEP_ALIVE_JUDGE)
+            },
+            refresh_interval=LLM_RESIDENCY_REFRESH_SECONDS,
+            routing_enabled=LLM_RESIDENCY_ROUTING,
+            cold_start_seconds=LLM_COLD_START_SECONDS
+        )
+    return _residency_instance
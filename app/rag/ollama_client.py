@@ -1,29 +1,114 @@
 import httpx
 import json
+import hashlib
 import logging
 import time
 import asyncio
+import weakref
+from contextlib import nullcontext
 from typing import Dict, List, Any, Optional, Generator, Tuple, Union
 from sse_starlette.sse import EventSourceResponse
 
-from app.core.config import OLLAMA_BASE_URL, DEFAULT_MODEL
+from app.core.config import (
+    OLLAMA_BASE_URL,
+    DEFAULT_MODEL,
+    OLLAMA_MAX_CONNECTIONS,
+    OLLAMA_MAX_KEEPALIVE_CONNECTIONS,
+    OLLAMA_KEEPALIVE_EXPIRY,
+    OLLAMA_CONNECT_TIMEOUT,
+    OLLAMA_REQUEST_TIMEOUT,
+    OLLAMA_STREAM_TIMEOUT,
+    LLM_SINGLE_FLIGHT_ENABLED
+)
+from app.cache.llm_response_cache import create_response_key
+
+from app.rag.llm_scheduler import get_llm_scheduler, get_current_priority, PRIORITY_BACKGROUND
+from app.rag.model_residency import get_model_residency
+from app.rag.deadline import check_deadline
+from app.rag.single_flight import get_single_flight
+from app.rag.circuit_breaker import get_circuit_breakers, CircuitOpenError
+from app.rag.hedged_requests import get_request_hedger
 
 logger = logging.getLogger("app.rag.ollama_client")
 
+# Timeout profile for streamed generations: long reads, short connects
+STREAM_TIMEOUT = httpx.Timeout(
+    connect=OLLAMA_CONNECT_TIMEOUT,
+    read=OLLAMA_STREAM_TIMEOUT,
+    write=OLLAMA_CONNECT_TIMEOUT,
+    pool=OLLAMA_CONNECT_TIMEOUT
+)
+
+# Connection pool shared by every OllamaClient, one per event loop
+_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+def get_ollama_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared HTTP client used for all Ollama requests
+    
+    Connections are kept alive and reused across requests and components.
+    A client is tied to the event loop that created it, so each loop gets
+    its own (e.g. between test runs); a client is never replaced while its
+    loop may still be using it, and is dropped once its loop is gone.
+    
+    Returns:
+        Shared httpx.AsyncClient of the running event loop
+    """
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(OLLAMA_REQUEST_TIMEOUT, connect=OLLAMA_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=OLLAMA_MAX_CONNECTIONS,
+                max_keepalive_connections=OLLAMA_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=OLLAMA_KEEPALIVE_EXPIRY
+            )
+        )
+        _http_clients[loop] = client
+    return client
+
+async def close_ollama_http_client() -> None:
+    """
+    Close the running event loop's shared HTTP client and its pooled connections
+    
+    Called on application shutdown.
+    """
+    client = _http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+class StreamErrorMessage(str):
+    """
+    Error text yielded by a stream in place of model output
+    
+    Behaves as a plain token for display, but lets consumers tell a failed
+    stream from a successful one (e.g. to avoid caching it).
+    """
+
+
 class OllamaClient:
     """
     Client for interacting with Ollama API
+    
+    Instances are lightweight: they all send requests through the shared
+    connection pool, so components can create their own client freely.
     """
-    def __init__(self, base_url: str = OLLAMA_BASE_URL, timeout: int = 30):
+    def __init__(self, base_url: str = OLLAMA_BASE_URL, timeout: float = OLLAMA_REQUEST_TIMEOUT):
         self.base_url = base_url
-        self.timeout = timeout
-        self.client = httpx.AsyncClient(timeout=timeout)
+        self.timeout = httpx.Timeout(timeout, connect=OLLAMA_CONNECT_TIMEOUT)
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared pooled HTTP client"""
+        return get_ollama_http_client()
     
     async def __aenter__(self):
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.client.aclose()
+        # Reason: the pool is shared by the whole process and closed on shutdown
+        pass
     
     async def list_models(self) -> List[Dict[str, Any]]:
         """
@@ -34,7 +119,7 @@ class OllamaClient:
         
         for attempt in range(max_retries):
             try:
-                response = await self.client.get(f"{self.base_url}/api/tags")
+                response = await self.client.get(f"{self.base_url}/api/tags", timeout=self.timeout)
                 response.raise_for_status()
                 return response.json().get("models", [])
             except Exception as e:
@@ -45,17 +130,56 @@ class OllamaClient:
                 else:
                     raise
     
+    async def list_running_models(self) -> List[Dict[str, Any]]:
+        """
+        List the models currently loaded by the server
+        """
+        response = await self.client.get(f"{self.base_url}/api/ps", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json().get("models", [])
+    
+    async def load_model(
+        self,
+        model: str,
+        keep_alive: Optional[Union[str, int]] = None,
+        embedding: bool = False
+    ) -> None:
+        """
+        Load a model without generating anything
+        
+        Loading can take much longer than a normal request, so the streaming
+        timeout profile is used. The request waits for a background slot.
+        """
+        if embedding:
+            endpoint, payload = "/api/embed", {"model": model, "input": ""}
+        else:
+            endpoint, payload = "/api/generate", {"model": model, "prompt": "", "stream": False}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        
+        async with get_llm_scheduler().slot(model, PRIORITY_BACKGROUND):
+            response = await self.client.post(f"{self.base_url}{endpoint}", json=payload, timeout=STREAM_TIMEOUT)
+        response.raise_for_status()
+    
     async def generate(
         self,
         prompt: str,
         model: str = DEFAULT_MODEL,
         system_prompt: Optional[str] = None,
         stream: bool = True,
-        parameters: Dict[str, Any] = None
+        parameters: Dict[str, Any] = None,
+        priority: Optional[str] = None,
+        hedge: bool = False
     ) -> Union[Dict[str, Any], Generator[str, None, None]]:
         """
         Generate a response from the model
+        
+        Requests wait for a slot in the LLM scheduler; priority defaults to
+        the priority class set by the calling component (interactive if none).
+        Short non-streamed calls such as judge prompts may set hedge to send a
+        backup request when the first one is slow (if hedging is enabled).
         """
+        priority = priority or get_current_priority()
         if parameters is None:
             parameters = {}
         
@@ -68,20 +192,100 @@ class OllamaClient:
         
         if system_prompt:
             payload["system"] = system_prompt
+        
+        # Keep the model loaded for as long as its model class is configured to stay resident
+        get_model_residency().apply_keep_alive(payload)
+        
+        if not LLM_SINGLE_FLIGHT_ENABLED:
+            return await self._generate_payload(payload, priority, hedge)
+        
+        # Identical concurrent requests share one upstream call, keyed like the response cache.
+        # Reason: the priority class is part of the key so an interactive request never
+        # joins a flight queued at background priority
+        other_params = {k: v for k, v in parameters.items() if k not in ("temperature", "max_tokens")}
+        if system_prompt:
+            other_params["system_prompt"] = system_prompt
+        key = f"{priority}:" + create_response_key(
+            prompt,
+            model,
+            parameters.get("temperature", 0.0),
+            parameters.get("max_tokens"),
+            other_params or None
+        )
+        if stream:
+            return await get_single_flight().stream(key, lambda: self._generate_payload(payload, priority))
+        return await get_single_flight().do(key, lambda: self._generate_payload(payload, priority, hedge))
+    
+    async def _send(
+        self,
+        endpoint: str,
+        payload: Dict[str, Any],
+        priority: Optional[str] = None,
+        hedge: bool = False
+    ) -> httpx.Response:
+        """
+        Post a request through the model's scheduler slot and the endpoint's circuit breaker
+        
+        Args:
+            endpoint: API path, e.g. "/api/generate"
+            payload: Request body
+            priority: Scheduler priority class (defaults to the current task's priority)
+            hedge: Whether the request is idempotent and may be hedged
+            
+        Returns:
+            Successful response
             
+        Raises:
+            CircuitOpenError: If the endpoint is shedding requests
+            httpx.HTTPError: If the request fails
+        """
+        model = payload["model"]
+        breaker = get_circuit_breakers().get(endpoint, model)
+        
+        async def attempt() -> httpx.Response:
+            # Reason: the breaker admits the request before it queues for a slot, so
+            # requests to a stalled server fail fast instead of piling up behind it
+            with breaker.call() if breaker else nullcontext():
+                async with get_llm_scheduler().slot(model, priority):
+                    started = time.monotonic()
+                    response = await self.client.post(
+                        f"{self.base_url}{endpoint}",
+                        json=payload,
+                        timeout=self.timeout
+                    )
+                    if breaker:
+                        breaker.observe_latency(time.monotonic() - started)
+                response.raise_for_status()
+                return response
+        
+        if not hedge:
+            return await attempt()
+        hedger = get_request_hedger()
+        return await hedger.run(attempt, hedger.delay_for(breaker.latency if breaker else None))
+    
+    async def _generate_payload(
+        self,
+        payload: Dict[str, Any],
+        priority: str,
+        hedge: bool = False
+    ) -> Union[Dict[str, Any], Generator[str, None, None]]:
+        """
+        Send a generate request, retrying failed attempts
+
+        Retries stop early once the request's deadline leaves no time for the
+        backoff, and are not attempted while the model's circuit breaker is open.
+        """
+        model = payload["model"]
+        stream = payload["stream"]
         max_retries = 3
         retry_delay = 1
         
         for attempt in range(max_retries):
             try:
                 if stream:
-                    return await self._stream_response(payload)
+                    return await self._stream_response(payload, priority)
                 else:
-                    response = await self.client.post(
-                        f"{self.base_url}/api/generate",
-                        json=payload
-                    )
-                    response.raise_for_status()
+                    response = await self._send("/api/generate", payload, priority, hedge=hedge)
                     response_data = response.json()
                     
                     # Check if the response contains an error message from the model
@@ -93,10 +297,17 @@ class OllamaClient:
                             "error": response_data['error']
                         }
                     
+                    get_model_residency().observe_response(model, response_data)
                     return response_data
+            except CircuitOpenError as e:
+                logger.warning(f"Not sending generate request: {str(e)}")
+                return {
+                    "response": "I'm unable to answer that question right now. The language model is not responding, please try again shortly.",
+                    "error": str(e)
+                }
             except httpx.HTTPStatusError as e:
                 logger.error(f"HTTP error generating response (attempt {attempt+1}/{max_retries}): {str(e)}")
-                if attempt < max_retries - 1:
+                if attempt < max_retries - 1 and check_deadline("llm_retry", "gave_up", seconds=retry_delay, reserve=0):
                     await asyncio.sleep(retry_delay)
                     retry_delay *= 2
                 else:
@@ -107,7 +318,7 @@ class OllamaClient:
                     }
             except Exception as e:
                 logger.error(f"Error generating response (attempt {attempt+1}/{max_retries}): {str(e)}")
-                if attempt < max_retries - 1:
+                if attempt < max_retries - 1 and check_deadline("llm_retry", "gave_up", seconds=retry_delay, reserve=0):
                     await asyncio.sleep(retry_delay)
                     retry_delay *= 2
                 else:
@@ -117,63 +328,66 @@ class OllamaClient:
                         "error": str(e)
                     }
     
-    async def _stream_response(self, payload: Dict[str, Any]):
+    async def _stream_response(self, payload: Dict[str, Any], priority: Optional[str] = None):
         """
         Stream response from the model with improved error handling and longer timeouts
-        """
-        # Increase timeout for streaming responses
-        STREAM_TIMEOUT = 300  # 5 minutes
         
+        The scheduler slot is held until the stream ends.
+        """
         async def event_generator():
+            breaker = get_circuit_breakers().get("/api/generate", payload["model"])
             try:
-                # Use a longer timeout for streaming responses
-                async with httpx.AsyncClient(timeout=STREAM_TIMEOUT) as client:
-                    try:
-                        # Set longer read timeout and connection timeout
-                        async with client.stream(
+                try:
+                    with breaker.call() if breaker else nullcontext():
+                        # Reuse a pooled connection, with the streaming timeout profile
+                        async with get_llm_scheduler().slot(payload["model"], priority), self.client.stream(
                             "POST",
                             f"{self.base_url}/api/generate",
                             json=payload,
-                            timeout=httpx.Timeout(connect=30, read=STREAM_TIMEOUT, write=30, pool=30)
+                            timeout=STREAM_TIMEOUT
                         ) as response:
                             response.raise_for_status()
-                            
+                        
                             # Process the stream with better error handling
                             async for line in response.aiter_lines():
                                 if line:
                                     try:
                                         data = json.loads(line)
-                                        
+                                    
                                         # Check if the response contains an error message
                                         if 'error' in data:
                                             error_msg = data['error']
                                             logger.warning(f"Model returned an error in stream: {error_msg}")
-                                            yield f"I'm unable to answer that question. {error_msg}"
+                                            yield StreamErrorMessage(f"I'm unable to answer that question. {error_msg}")
                                             break
-                                        
+                                    
                                         # Extract and yield the response token directly
                                         token = data.get("response", "")
                                         if token:
                                             yield token
-                                            
+                                        
                                         # Check if we're done
                                         if data.get("done", False):
+                                            get_model_residency().observe_response(payload["model"], data)
                                             logger.info("Stream completed successfully")
                                             break
                                     except json.JSONDecodeError:
                                         logger.error(f"Error decoding JSON: {line}")
-                    except httpx.ReadTimeout:
-                        logger.error("Read timeout while streaming response")
-                        yield "\n\nThe response was taking too long to generate. Please try again with a simpler query or disable streaming."
-                    except httpx.ConnectTimeout:
-                        logger.error("Connection timeout while streaming response")
-                        yield "\n\nCouldn't connect to the language model server. Please check if Ollama is running."
+                except httpx.ReadTimeout:
+                    logger.error("Read timeout while streaming response")
+                    yield StreamErrorMessage("\n\nThe response was taking too long to generate. Please try again with a simpler query or disable streaming.")
+                except httpx.ConnectTimeout:
+                    logger.error("Connection timeout while streaming response")
+                    yield StreamErrorMessage("\n\nCouldn't connect to the language model server. Please check if Ollama is running.")
+            except CircuitOpenError as e:
+                logger.warning(f"Not sending streaming request: {str(e)}")
+                yield StreamErrorMessage("\n\nThe language model is not responding right now. Please try again shortly.")
             except httpx.HTTPStatusError as e:
                 logger.error(f"HTTP error in streaming response: {str(e)}")
-                yield "\n\nI'm unable to answer that question right now. There was an issue connecting to the language model."
+                yield StreamErrorMessage("\n\nI'm unable to answer that question right now. There was an issue connecting to the language model.")
             except Exception as e:
                 logger.error(f"Error in streaming response: {str(e)}", exc_info=True)
-                yield "\n\nI'm unable to process your request right now. There might be an issue with the language model or your question."
+                yield StreamErrorMessage("\n\nI'm unable to process your request right now. There might be an issue with the language model or your question.")
         
         return event_generator()  # Return the generator directly
     
@@ -184,27 +398,82 @@ class OllamaClient:
     ) -> List[float]:
         """
         Create an embedding for the given text
+        
+        Concurrent requests for the same text, model and priority class share
+        one upstream call.
         """
-        payload = {
+        if LLM_SINGLE_FLIGHT_ENABLED:
+            key = f"embedding:{get_current_priority()}:{model}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+            return await get_single_flight().do(key, lambda: self._create_embedding(text, model))
+        return await self._create_embedding(text, model)
+    
+    async def _create_embedding(self, text: str, model: str) -> List[float]:
+        """
+        Request an embedding, retrying failed attempts
+        
+        Embeddings are idempotent, so slow requests are hedged (if enabled).
+        """
+        payload = get_model_residency().apply_keep_alive({
             "model": model,
             "prompt": text
-        }
+        })
         
         max_retries = 3
         retry_delay = 1
         
         for attempt in range(max_retries):
             try:
-                response = await self.client.post(
-                    f"{self.base_url}/api/embeddings",
-                    json=payload
-                )
-                response.raise_for_status()
+                response = await self._send("/api/embeddings", payload, hedge=True)
                 return response.json().get("embedding", [])
+            except CircuitOpenError:
+                raise
             except Exception as e:
                 logger.error(f"Error creating embedding (attempt {attempt+1}/{max_retries}): {str(e)}")
                 if attempt < max_retries - 1:
                     await asyncio.sleep(retry_delay)
                     retry_delay *= 2
                 else:
-                    raise
\ No newline at end of file
+                    raise
+
+    async def create_embeddings(
+        self,
+        texts: List[str],
+        model: str = DEFAULT_MODEL
+    ) -> List[List[float]]:
+        """
+        Create embeddings for a batch of texts in a single request
+
+        Uses the batch /api/embed endpoint and falls back to one
+        /api/embeddings call per text on servers that don't provide it.
+        Concurrent requests for the same batch share one upstream call.
+        """
+        if not texts:
+            return []
+        
+        if LLM_SINGLE_FLIGHT_ENABLED:
+            batch_hash = hashlib.sha256()
+            for text in texts:
+                batch_hash.update(hashlib.sha256(text.encode('utf-8')).digest())
+            key = f"embeddings:{get_current_priority()}:{model}:{batch_hash.hexdigest()}"
+            return await get_single_flight().do(key, lambda: self._create_embeddings(texts, model))
+        return await self._create_embeddings(texts, model)
+    
+    async def _create_embeddings(self, texts: List[str], model: str) -> List[List[float]]:
+        """
+        Request a batch of embeddings, falling back to single requests
+        """
+
+        try:
+            response = await self._send(
+                "/api/embed",
+                get_model_residency().apply_keep_alive({"model": model, "input": texts}),
+                hedge=True
+            )
+            embeddings = response.json().get("embeddings", [])
+            if len(embeddings) == len(texts):
+                return embeddings
+            logger.warning(f"Batch embedding returned {len(embeddings)} vectors for {len(texts)} texts")
+        except Exception as e:
+            logger.warning(f"Batch embedding failed: {str(e)}. Falling back to single embeddings.")
+
+        return [await self.create_embedding(text=text, model=model) for text in texts]
\ No newline at end of file
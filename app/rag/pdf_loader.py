@@ -0,0 +1,180 @@
+"""
+Streaming PDF loader that yields pages on demand with their location in the document
+"""
+import codecs
+import logging
+from typing import Iterator, List, Dict, Any
+
+from langchain.schema.document import Document as LangchainDocument
+
+logger = logging.getLogger("app.rag.pdf_loader")
+
+class StreamingPDFLoader:
+    """
+    PDF loader that extracts one page at a time instead of the whole file.
+
+    Each page document carries provenance metadata:
+    - page: zero-based page index (same as PyPDFLoader)
+    - page_number: one-based page number for citations
+    - char_start / char_end: offsets of the page in the extracted text
+    - byte_start / byte_end: UTF-8 byte offsets of the page in the extracted text
+
+    The file is read from disk on demand rather than loaded whole, and the
+    objects parsed for a page are dropped once its text is extracted, so
+    peak memory is bounded by the largest page rather than the page count.
+    If the file can't be parsed as a PDF, it is decoded as text in
+    fixed-size blocks instead of all at once.
+    """
+
+    def __init__(self, file_path: str, fallback_block_size: int = 1024 * 1024):
+        """
+        Initialize the loader.
+
+        Args:
+            file_path: Path to the PDF file
+            fallback_block_size: Bytes read per block when falling back to text decoding
+        """
+        self.file_path = file_path
+        self.fallback_block_size = fallback_block_size
+
+    def lazy_load(self) -> Iterator[LangchainDocument]:
+        """
+        Yield the pages of the PDF one by one.
+
+        Yields:
+            One document per page (or per text block in fallback mode)
+        """
+        # Reason: PdfReader copies the whole file into memory when given a path,
+        # but reads objects on demand from an open file
+        with open(self.file_path, "rb") as stream:
+            try:
+                from pypdf import PdfReader
+                reader = PdfReader(stream)
+                page_count = len(reader.pages)
+            except Exception as e:
+                logger.warning(f"Error opening {self.file_path} as PDF: {str(e)}. Falling back to text decoding.")
+                reader = None
+
+            if reader is not None:
+                yield from self._iter_pages(reader, page_count)
+                return
+
+        yield from self._lazy_load_text_fallback()
+
+    def _iter_pages(self, reader, page_count: int) -> Iterator[LangchainDocument]:
+        """
+        Extract the pages of an open reader, releasing each page's parsed objects.
+        """
+        char_offset = 0
+        byte_offset = 0
+        for page_index in range(page_count):
+            try:
+                text = reader.pages[page_index].extract_text() or ""
+            except Exception as e:
+                logger.warning(f"Error extracting page {page_index + 1} of {self.file_path}: {str(e)}")
+                text = ""
+            # Reason: the reader caches every object it resolves (content streams,
+            # fonts, images); dropping the cache keeps consumed pages from piling up
+            reader.resolved_objects.clear()
+
+            byte_length = len(text.encode("utf-8"))
+            yield LangchainDocument(
+                page_content=text,
+                metadata=self._page_metadata(page_index, page_count, char_offset, len(text), byte_offset, byte_length)
+            )
+            char_offset += len(text)
+            byte_offset += byte_length
+
+    def lazy_load_batches(self, batch_size: int = 8) -> Iterator[List[LangchainDocument]]:
+        """
+        Yield the pages in batches.
+
+        Args:
+            batch_size: Number of pages per batch
+
+        Yields:
+            Lists of at most batch_size page documents
+        """
+        batch = []
+        for page in self.lazy_load():
+            batch.append(page)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def load(self) -> List[LangchainDocument]:
+        """
+        Load all pages at once.
+
+        Returns:
+            List of page documents
+        """
+        return list(self.lazy_load())
+
+    def _lazy_load_text_fallback(self) -> Iterator[LangchainDocument]:
+        """
+        Decode the file as UTF-8 in blocks, ignoring undecodable bytes.
+
+        Blocks end at the last newline so lines are not cut in half.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        char_offset = 0
+        byte_offset = 0
+        pending = ""
+        block_index = 0
+
+        with open(self.file_path, "rb") as f:
+            while True:
+                data = f.read(self.fallback_block_size)
+                pending += decoder.decode(data, final=not data)
+
+                if not data:
+                    cut = len(pending)
+                else:
+                    cut = pending.rfind("\n") + 1
+                    # Without any newline, cut anyway once a full block is pending
+                    if cut == 0 and len(pending) >= self.fallback_block_size:
+                        cut = len(pending)
+
+                if cut:
+                    text, pending = pending[:cut], pending[cut:]
+                    byte_length = len(text.encode("utf-8"))
+                    metadata = {
+                        "source": self.file_path,
+                        "block": block_index,
+                        "char_start": char_offset,
+                        "char_end": char_offset + len(text),
+                        "byte_start": byte_offset,
+                        "byte_end": byte_offset + byte_length
+                    }
+                    yield LangchainDocument(page_content=text, metadata=metadata)
+
+                    block_index += 1
+                    char_offset += len(text)
+                    byte_offset += byte_length
+
+                if not data:
+                    break
+
+    def _page_metadata(
+        self,
+        page_index: int,
+        page_count: int,
+        char_start: int,
+        char_length: int,
+        byte_start: int,
+        byte_length: int
+    ) -> Dict[str, Any]:
+        """Build the provenance metadata for a page"""
+        return {
+            "source": self.file_path,
+            "page": page_index,
+            "page_number": page_index + 1,
+            "total_pages": page_count,
+            "char_start": char_start,
+            "char_end": char_start + char_length,
+            "byte_start": byte_start,
+            "byte_end": byte_start + byte_length
+        }
@@ -4,8 +4,10 @@ PlanExecutor - Executes query plans
 import logging
 import time
 import json
+import asyncio
 from typing import Dict, List, Any, Optional, Tuple
 
+from app.core.config import PLAN_TOOL_CONCURRENCY, PLAN_DEFAULT_TOOL_CONCURRENCY, PLAN_STEP_TIMEOUT_SECONDS
 from app.rag.query_planner import QueryPlan
 from app.rag.tools import ToolRegistry
 from app.rag.process_logger import ProcessLogger
@@ -17,13 +19,20 @@ class PlanExecutor:
     The PlanExecutor is responsible for executing the plans created by the QueryPlanner.
     It executes each step in the plan, records the results, and handles any errors that
     may occur during execution.
+    
+    Steps run as soon as the steps they depend on have completed, so
+    independent steps (e.g. a RAG search and a database query) run
+    concurrently, within per-tool concurrency limits and a per-step timeout.
+    Results are recorded in step order regardless of completion order.
     """
     
     def __init__(
         self, 
         tool_registry: ToolRegistry,
         process_logger: Optional[ProcessLogger] = None,
-        llm_provider = None
+        llm_provider = None,
+        tool_concurrency: Optional[Dict[str, int]] = None,
+        step_timeout: Optional[float] = None
     ):
         """
         Initialize the plan executor
@@ -32,10 +41,15 @@ class PlanExecutor:
             tool_registry: ToolRegistry instance
             process_logger: ProcessLogger instance (optional)
             llm_provider: LLM provider for generating responses (optional)
+            tool_concurrency: Concurrent calls allowed per tool (defaults to PLAN_TOOL_CONCURRENCY)
+            step_timeout: Default step timeout in seconds (defaults to PLAN_STEP_TIMEOUT_SECONDS)
         """
         self.tool_registry = tool_registry
         self.process_logger = process_logger
         self.llm_provider = llm_provider
+        self.tool_concurrency = PLAN_TOOL_CONCURRENCY if tool_concurrency is None else tool_concurrency
+        self.step_timeout = PLAN_STEP_TIMEOUT_SECONDS if step_timeout is None else step_timeout
+        self.tool_semaphores: Dict[str, asyncio.Semaphore] = {}
         self.logger = logging.getLogger("app.rag.plan_executor")
     
     async def execute_plan(self, plan: QueryPlan) -> Dict[str, Any]:
@@ -63,14 +77,8 @@ class PlanExecutor:
                 step_data=plan.to_dict()
             )
         
-        # Execute each step in the plan
-        while not plan.is_completed():
-            step = plan.get_next_step()
-            if not step:
-                break
-            
-            step_result = await self._execute_step(plan.query_id, step)
-            plan = self._update_plan(plan, step_result)
+        # Execute the steps, running independent ones concurrently
+        plan = await self._execute_steps(plan)
         
         # Generate the final response
         response = await self._generate_response(plan)
@@ -106,6 +114,70 @@ class PlanExecutor:
             "execution_time": elapsed_time
         }
     
+    async def _execute_steps(self, plan: QueryPlan) -> QueryPlan:
+        """
+        Execute the remaining steps of a plan in dependency order
+        
+        Every step whose dependencies have completed is started right away.
+        Finished results are recorded in step order, so plan.results is the
+        same whatever order the steps complete in.
+        
+        Args:
+            plan: QueryPlan instance
+            
+        Returns:
+            Updated QueryPlan
+        """
+        done = set(range(plan.current_step))
+        pending = set(range(plan.current_step, len(plan.steps)))
+        finished: Dict[int, Dict[str, Any]] = {}
+        running: Dict[asyncio.Task, int] = {}
+        
+        try:
+            while pending or running:
+                # Start every step whose dependencies have completed
+                for index in sorted(pending):
+                    if all(dependency in done for dependency in plan.get_dependencies(index)):
+                        pending.discard(index)
+                        running[asyncio.ensure_future(self._execute_step(plan.query_id, plan.steps[index]))] = index
+                
+                if not running:
+                    # The remaining steps depend on missing steps or on each other
+                    for index in sorted(pending):
+                        self.logger.error(f"Step {index} has unresolvable dependencies: {plan.get_dependencies(index)}")
+                        finished[index] = {"error": f"Unresolvable step dependencies: {plan.get_dependencies(index)}"}
+                    pending.clear()
+                else:
+                    completed, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                    for task in completed:
+                        index = running.pop(task)
+                        finished[index] = task.result()
+                        done.add(index)
+                
+                # Record the results that are next in step order
+                while plan.current_step in finished:
+                    plan = self._update_plan(plan, finished.pop(plan.current_step))
+        finally:
+            for task in running:
+                task.cancel()
+        
+        return plan
+    
+    def _tool_semaphore(self, tool_name: str) -> asyncio.Semaphore:
+        """
+        Get the semaphore limiting concurrent calls of a tool
+        
+        Args:
+            tool_name: Tool name
+            
+        Returns:
+            Semaphore of the tool
+        """
+        if tool_name not in self.tool_semaphores:
+            limit = self.tool_concurrency.get(tool_name, PLAN_DEFAULT_TOOL_CONCURRENCY)
+            self.tool_semaphores[tool_name] = asyncio.Semaphore(max(1, limit))
+        return self.tool_semaphores[tool_name]
+    
     async def _execute_step(self, query_id: str, step: Dict[str, Any]) -> Dict[str, Any]:
         """
         Execute a single step in the plan
@@ -138,8 +210,11 @@ class PlanExecutor:
                 # Execute a tool
                 tool_name = step.get("tool")
                 tool_input = step.get("input", {})
+                timeout = step.get("timeout", self.step_timeout)
                 
-                result = await self._execute_tool(tool_name, tool_input)
+                # The timeout covers the tool call, not the wait for a free slot
+                async with self._tool_semaphore(tool_name):
+                    result = await asyncio.wait_for(self._execute_tool(tool_name, tool_input), timeout=timeout or None)
             elif step_type == "synthesize":
                 # Synthesize results from previous steps
                 result = await self._synthesize_results(query_id)
@@ -148,6 +223,11 @@ class PlanExecutor:
                 result = {
                     "error": f"Unknown step type: {step_type}"
                 }
+        except asyncio.TimeoutError:
+            self.logger.error(f"Step timed out after {timeout}s: {step_description}")
+            result = {
+                "error": f"Step timed out after {timeout}s"
+            }
         except Exception as e:
             self.logger.error(f"Error executing step: {str(e)}")
             result = {
@@ -9,9 +9,13 @@ from datetime import datetime
 from typing import List, Dict, Any, Optional, Callable, Awaitable
 
 from app.models.document import Document
+from app.rag.ingest_metrics import get_ingest_monitor
 
 logger = logging.getLogger("app.rag.processing_job")
 
+# Number of documents fetched and analyzed together within a job
+ANALYSIS_WINDOW_SIZE = 20
+
 class ProcessingJob:
     """
     Model for document processing jobs
@@ -28,12 +32,27 @@ class ProcessingJob:
         self.strategy = strategy
         self.status = status
         self.created_at = datetime.now()
+        self.started_at = None
         self.completed_at = None
         self.document_count = len(document_ids)
         self.processed_count = 0
         self.metadata = {}
         self.progress_percentage = 0
         self.error_message = None
+        # Per-document outcome ("completed" or "failed"), persisted as the job's checkpoint
+        self.document_status: Dict[str, str] = {}
+    
+    def remaining_document_ids(self) -> List[str]:
+        """
+        Get the documents that still have to be processed
+        
+        Returns:
+            Document IDs not yet completed, in job order
+        """
+        return [
+            document_id for document_id in self.document_ids
+            if self.document_status.get(document_id) != "completed"
+        ]
         
     def update_progress(self, processed_count: int) -> None:
         """
@@ -85,6 +104,91 @@ class ProcessingJob:
             "progress_percentage": self.progress_percentage,
             "error_message": self.error_message
         }
+    
+    def to_record(self) -> Dict[str, Any]:
+        """
+        Convert job to column values for the processing_jobs table
+        
+        Returns:
+            Dictionary of column values
+        """
+        return {
+            "id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "completed_at": self.completed_at,
+            "document_count": self.document_count,
+            "processed_count": self.processed_count,
+            "strategy": self.strategy,
+            "job_metadata": {
+                "document_ids": self.document_ids,
+                "document_status": dict(self.document_status),
+                "metadata": self.metadata
+            },
+            "progress_percentage": self.progress_percentage,
+            "error_message": self.error_message
+        }
+    
+    @classmethod
+    def from_record(cls, record) -> "ProcessingJob":
+        """
+        Restore a job from a processing_jobs row
+        
+        Args:
+            record: ProcessingJob database model
+            
+        Returns:
+            Restored job
+        """
+        job_metadata = record.job_metadata or {}
+        job = cls(
+            document_ids=job_metadata.get("document_ids", []),
+            strategy=record.strategy,
+            status=record.status,
+            job_id=str(record.id)
+        )
+        job.created_at = record.created_at or job.created_at
+        job.completed_at = record.completed_at
+        job.metadata = job_metadata.get("metadata", {})
+        job.document_status = dict(job_metadata.get("document_status", {}))
+        job.error_message = record.error_message
+        job.update_progress(sum(1 for status in job.document_status.values() if status == "completed"))
+        return job
+
+
+class DatabaseJobStore:
+    """
+    Persists processing jobs through ProcessingJobRepository, one session per write
+    """
+    def __init__(self, session_factory):
+        """
+        Args:
+            session_factory: Callable returning an AsyncSession (e.g. AsyncSessionLocal)
+        """
+        self.session_factory = session_factory
+    
+    async def save_job(self, job: ProcessingJob) -> None:
+        """
+        Write the job and its per-document checkpoint
+        
+        Args:
+            job: Job to save
+        """
+        from app.db.repositories.processing_job_repository import ProcessingJobRepository
+        async with self.session_factory() as session:
+            await ProcessingJobRepository(session).save_job(job.to_record())
+    
+    async def load_unfinished_jobs(self) -> List[ProcessingJob]:
+        """
+        Load jobs that were pending or running when the service stopped
+        
+        Returns:
+            List of restored jobs
+        """
+        from app.db.repositories.processing_job_repository import ProcessingJobRepository
+        async with self.session_factory() as session:
+            records = await ProcessingJobRepository(session).get_unfinished_jobs()
+        return [ProcessingJob.from_record(record) for record in records]
 
 
 class WorkerPool:
@@ -166,19 +270,73 @@ class DocumentProcessingService:
     """
     Service for processing documents in batches
     """
-    def __init__(self, document_processor, max_workers: int = 4, document_repository=None):
+    def __init__(
+        self,
+        document_processor,
+        max_workers: int = 4,
+        document_repository=None,
+        max_concurrent_documents: int = 4,
+        job_store=None,
+        session_factory=None
+    ):
+        # One re-entrant processor is shared by every worker and job
         self.document_processor = document_processor
         self.worker_pool = WorkerPool(max_workers=max_workers)
+        # Bounds the documents being processed at once across all jobs
+        self.document_semaphore = asyncio.Semaphore(max_concurrent_documents)
         self.jobs: Dict[str, ProcessingJob] = {}
         self.logger = logging.getLogger("app.rag.document_processing_service")
         self.document_repository = document_repository
+        # Optional durable store (e.g. DatabaseJobStore); jobs are in-memory only without it
+        self.job_store = job_store
+        # Reason: jobs run concurrently and an AsyncSession must not be shared between
+        # them, so bulk writes open their own session when a factory is set
+        self.session_factory = session_factory
         
     async def start(self) -> None:
         """
-        Start the processing service
+        Start the processing service and resume jobs left unfinished by a restart
         """
         await self.worker_pool.start()
         self.logger.info("Document processing service started")
+        await self.resume_jobs()
+    
+    def set_job_store(self, job_store) -> None:
+        """
+        Set the durable job store
+        
+        Args:
+            job_store: Job store with save_job and load_unfinished_jobs
+        """
+        self.job_store = job_store
+    
+    async def resume_jobs(self) -> List[ProcessingJob]:
+        """
+        Re-queue persisted jobs that were pending or running
+        
+        Only their unfinished documents are processed again.
+        
+        Returns:
+            Resumed jobs
+        """
+        if not self.job_store:
+            return []
+        
+        try:
+            jobs = await self.job_store.load_unfinished_jobs()
+        except Exception as e:
+            self.logger.error(f"Error loading unfinished processing jobs: {str(e)}")
+            return []
+        
+        resumed = []
+        for job in jobs:
+            if job.id in self.jobs:
+                continue
+            self.jobs[job.id] = job
+            await self.worker_pool.add_job(self._process_job, job)
+            resumed.append(job)
+            self.logger.info(f"Resuming job {job.id}: {len(job.remaining_document_ids())} of {job.document_count} documents left")
+        return resumed
         
     async def stop(self) -> None:
         """
@@ -187,6 +345,15 @@ class DocumentProcessingService:
         await self.worker_pool.stop()
         self.logger.info("Document processing service stopped")
         
+    def set_session_factory(self, session_factory) -> None:
+        """
+        Set the factory for the sessions chunk writes use
+        
+        Args:
+            session_factory: Callable returning an AsyncSession (e.g. AsyncSessionLocal)
+        """
+        self.session_factory = session_factory
+    
     def set_document_repository(self, document_repository) -> None:
         """
         Set the document repository
@@ -209,6 +376,7 @@ class DocumentProcessingService:
         """
         job = ProcessingJob(document_ids=document_ids, strategy=strategy)
         self.jobs[job.id] = job
+        await self._checkpoint(job)
         self.logger.info(f"Created processing job {job.id} for {len(document_ids)} documents")
         
         # Add job to worker pool
@@ -256,6 +424,7 @@ class DocumentProcessingService:
         if job and job.status == "pending":
             job.status = "cancelled"
             job.completed_at = datetime.now()
+            await self._checkpoint(job)
             self.logger.info(f"Cancelled job {job_id}")
             return True
         return False
@@ -271,46 +440,189 @@ class DocumentProcessingService:
         self.logger.info(f"Processing job {job.id} with {job.document_count} documents")
         
         try:
+            if job.status == "cancelled":
+                return
             job.status = "processing"
+            job.started_at = time.time()
+            await self._checkpoint(job)
+            
+            # Documents completed before a restart are skipped
+            remaining_ids = job.remaining_document_ids()
             
-            # Process each document
-            for i, document_id in enumerate(job.document_ids):
+            # Process documents in windows so similar files share one chunking analysis
+            for window_start in range(0, len(remaining_ids), ANALYSIS_WINDOW_SIZE):
                 if job.status == "cancelled":
                     self.logger.info(f"Job {job.id} was cancelled, stopping processing")
                     break
                 
-                try:
-                    # Get document
-                    document = await self._get_document(document_id)
-                    
-                    if document:
-                        # Set strategy if specified
-                        if job.strategy:
-                            self.document_processor.chunking_strategy = job.strategy
-                        
-                        # Process document
-                        processed_document = await self.document_processor.process_document(document)
-                        
-                        # Save document
-                        await self._save_document(processed_document)
-                    
-                    # Update progress
-                    job.update_progress(i + 1)
-                    
-                    self.logger.info(f"Processed document {document_id} ({i+1}/{job.document_count})")
-                except Exception as e:
-                    self.logger.error(f"Error processing document {document_id}: {str(e)}")
-                    # Continue with next document
+                window_ids = remaining_ids[window_start:window_start + ANALYSIS_WINDOW_SIZE]
+                documents = {}
+                for document_id in window_ids:
+                    try:
+                        documents[document_id] = await self._get_document(document_id)
+                    except Exception as e:
+                        self.logger.error(f"Error retrieving document {document_id}: {str(e)}")
+                        # Reason: an unreadable document is failed, not skipped, so it is
+                        # neither counted as processed nor dropped from a resumed job
+                        self._mark_document_failed(job, document_id, f"Error retrieving document: {str(e)}")
+                
+                if job.strategy:
+                    # Reason: an explicit job strategy is passed as per-call state rather than
+                    # set on the shared processor, which other jobs may be using concurrently
+                    decisions = {
+                        str(doc.id): {
+                            "strategy": job.strategy,
+                            "parameters": {},
+                            "justification": "Strategy specified by processing job"
+                        }
+                        for doc in documents.values() if doc
+                    }
+                else:
+                    decisions = await self._analyze_window(job, documents)
+                
+                # Documents in a window run concurrently on the shared processor
+                processed = await asyncio.gather(*[
+                    self._process_document(job, document_id, document, decisions)
+                    for document_id, document in documents.items()
+                ])
+                
+                # The chunks of the whole window are written in one bulk transaction
+                await self._save_documents(job, [document for document in processed if document])
+                
+                # One checkpoint write per window rather than per document
+                await self._checkpoint(job)
+            
+            # Report chunking decision cache hit rates with the job
+            if hasattr(self.document_processor, "get_ingest_metrics"):
+                job.metadata["ingest_metrics"] = self.document_processor.get_ingest_metrics()
             
             # Complete job
             if job.status != "cancelled":
                 job.complete()
+                # Reason: failed documents stay out of the processed count
+                job.update_progress(sum(1 for status in job.document_status.values() if status == "completed"))
+            await self._checkpoint(job)
                 
             elapsed_time = time.time() - start_time
             self.logger.info(f"Job {job.id} completed in {elapsed_time:.2f}s")
         except Exception as e:
             self.logger.error(f"Error processing job {job.id}: {str(e)}")
             job.fail(str(e))
+            await self._checkpoint(job)
+    
+    async def _checkpoint(self, job: ProcessingJob) -> None:
+        """
+        Persist the job and its per-document status
+        
+        Failures are logged and processing continues; the next checkpoint
+        writes the full state again.
+        
+        Args:
+            job: Job to persist
+        """
+        if not self.job_store:
+            return
+        try:
+            await self.job_store.save_job(job)
+        except Exception as e:
+            self.logger.error(f"Error saving checkpoint for job {job.id}: {str(e)}")
+    
+    async def _analyze_window(self, job: ProcessingJob, documents: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Analyze a window of documents together so similar files share one chunking decision
+        
+        Args:
+            job: Job being processed
+            documents: Documents in the window keyed by document ID
+            
+        Returns:
+            Dict mapping document IDs to chunking decisions
+        """
+        if not hasattr(self.document_processor, "analyze_documents"):
+            return {}
+        try:
+            return await self.document_processor.analyze_documents(
+                [doc for doc in documents.values() if doc]
+            )
+        except Exception as e:
+            self.logger.error(f"Error analyzing document batch for job {job.id}: {str(e)}")
+            return {}
+    
+    async def _process_document(
+        self,
+        job: ProcessingJob,
+        document_id: str,
+        document: Optional[Document],
+        decisions: Dict[str, Dict[str, Any]]
+    ) -> Optional[Document]:
+        """
+        Process a single document of a job
+        
+        Args:
+            job: Job the document belongs to
+            document_id: Document ID
+            document: Document to process (None if it could not be retrieved)
+            decisions: Chunking decisions keyed by document ID
+            
+        Returns:
+            Processed document to save, or None
+        """
+        async with self.document_semaphore:
+            if job.status == "cancelled":
+                return None
+            
+            processed_document = None
+            try:
+                if not document:
+                    raise ValueError("Document could not be retrieved")
+                
+                # Process document
+                processed_document = await self.document_processor.process_document(
+                    document, analysis_result=decisions.get(str(document.id))
+                )
+                self._record_throughput(job, processed_document)
+                
+                # Update progress
+                job.document_status[document_id] = "completed"
+                job.metadata.get("document_errors", {}).pop(document_id, None)
+                job.update_progress(job.processed_count + 1)
+                
+                self.logger.info(f"Processed document {document_id} ({job.processed_count}/{job.document_count})")
+            except Exception as e:
+                self.logger.error(f"Error processing document {document_id}: {str(e)}")
+                self._mark_document_failed(job, document_id, str(e))
+                # Continue with next document
+            
+            return processed_document
+    
+    def _mark_document_failed(self, job: ProcessingJob, document_id: str, error_message: str) -> None:
+        """
+        Mark a document of a job as failed and keep the reason with the job
+        
+        Args:
+            job: Job the document belongs to
+            document_id: Document ID
+            error_message: Why the document failed
+        """
+        job.document_status[document_id] = "failed"
+        job.metadata.setdefault("document_errors", {})[document_id] = error_message
+    
+    def _record_throughput(self, job: ProcessingJob, processed_document: Document) -> None:
+        """
+        Update the job's chunk and byte counts and its chunks/sec and bytes/sec
+        
+        Args:
+            job: Job the document belongs to
+            processed_document: Processed document
+        """
+        throughput = job.metadata.setdefault("throughput", {"chunks": 0, "bytes": 0})
+        throughput["chunks"] += len(processed_document.chunks or [])
+        throughput["bytes"] += (processed_document.metadata or {}).get("file_size", 0)
+        
+        elapsed = max(time.time() - (job.started_at or time.time()), 1e-6)
+        throughput["elapsed_seconds"] = elapsed
+        throughput["chunks_per_second"] = throughput["chunks"] / elapsed
+        throughput["bytes_per_second"] = throughput["bytes"] / elapsed
     
     async def _get_document(self, document_id: str) -> Optional[Document]:
         """
@@ -342,19 +654,46 @@ class DocumentProcessingService:
             content="This is a dummy document content for testing purposes."
         )
     
-    async def _save_document(self, document: Document) -> None:
+    async def _save_documents(self, job: ProcessingJob, documents: List[Document]) -> None:
         """
-        Save a document
+        Save the chunks of processed documents in one bulk write
+        
+        Saving replaces each document's chunks, so a document re-run after a
+        restart is not duplicated. If the write fails, the documents are marked
+        as failed so they are not reported as completed without their chunks.
+        The write uses a session of its own when a session factory is set.
         
         Args:
-            document: Document to save (Pydantic model)
-        """
-        if self.document_repository:
-            try:
-                # Save document to repository
-                self.document_repository.save_document_with_chunks(document)
-                self.logger.info(f"Saved document {document.id} to repository")
-            except Exception as e:
-                self.logger.error(f"Error saving document {document.id} to repository: {str(e)}")
-        else:
-            self.logger.warning(f"Document repository not available, document {document.id} not saved")
\ No newline at end of file
+            job: Job the documents belong to
+            documents: Processed documents (Pydantic models)
+        """
+        if not documents:
+            return
+        if not self.session_factory and not self.document_repository:
+            self.logger.warning(f"Document repository not available, {len(documents)} documents not saved")
+            return
+        
+        chunks_by_document = {
+            str(document.id): [
+                {"content": chunk.content, "metadata": chunk.metadata}
+                for chunk in document.chunks or []
+            ]
+            for document in documents
+        }
+        
+        persist_started = time.time()
+        try:
+            if self.session_factory:
+                from app.db.repositories.document_repository import DocumentRepository
+                async with self.session_factory() as session:
+                    chunk_count = await DocumentRepository(session).bulk_replace_chunks(chunks_by_document)
+            else:
+                chunk_count = await self.document_repository.bulk_replace_chunks(chunks_by_document)
+            self.logger.info(f"Saved {chunk_count} chunks of {len(documents)} documents to repository")
+        except Exception as e:
+            self.logger.error(f"Error saving {len(documents)} documents to repository: {str(e)}")
+            for document_id in chunks_by_document:
+                self._mark_document_failed(job, document_id, f"Error saving chunks: {str(e)}")
+            # Documents without their chunks no longer count as processed
+            job.update_progress(sum(1 for status in job.document_status.values() if status == "completed"))
+        get_ingest_monitor().observe("persist", time.time() - persist_started)
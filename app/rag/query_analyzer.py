@@ -7,6 +7,8 @@ import re
 import json
 from typing import Dict, List, Any, Optional, Tuple
 
+from app.rag.llm_scheduler import with_llm_priority, PRIORITY_INTERACTIVE_AUX
+
 class QueryAnalyzer:
     """
     Analyzes queries to determine their complexity and requirements
@@ -28,6 +30,7 @@ class QueryAnalyzer:
         self.llm_provider = llm_provider
         self.logger = logging.getLogger("app.rag.query_analyzer")
     
+    @with_llm_priority(PRIORITY_INTERACTIVE_AUX)
     async def analyze(self, query: str,
                      chat_history: Optional[List[Tuple[str, str]]] = None) -> Dict[str, Any]:
         """
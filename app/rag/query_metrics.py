@@ -0,0 +1,94 @@
+"""
+Query Metrics - rolling per-stage timings, critical paths and time-to-first-token for RAG queries
+"""
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Any, Optional, TYPE_CHECKING
+
+from app.rag.ingest_metrics import StageHistogram
+
+if TYPE_CHECKING:
+    from app.rag.engine.utils.timing import StageTimeline
+
+logger = logging.getLogger("app.rag.query_metrics")
+
+class QueryMonitor:
+    """
+    Aggregates the stage timelines of RAG queries.
+
+    Each query times its stages with its own StageTimeline and hands it to
+    record_timeline once its answer is complete (for streamed answers, when
+    the stream ends).
+    """
+    def __init__(self, window_size: int = 1000):
+        """
+        Args:
+            window_size: Samples kept per histogram
+        """
+        self.window_size = window_size
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset all histograms and counters"""
+        with self.lock:
+            self.stages: Dict[str, StageHistogram] = {}
+            self.time_to_first_token = StageHistogram(self.window_size)
+            self.total = StageHistogram(self.window_size)
+            self.critical_paths: Counter = Counter()
+            self.queries = 0
+
+    def record_timeline(self, timeline: "StageTimeline") -> None:
+        """
+        Record the stages of one query
+
+        Args:
+            timeline: Timeline of the query
+        """
+        summary = timeline.get_summary()
+        with self.lock:
+            self.queries += 1
+            for name, stage in summary["stages"].items():
+                if stage["cancelled"]:
+                    continue
+                if name not in self.stages:
+                    self.stages[name] = StageHistogram(self.window_size)
+                self.stages[name].observe(stage["duration"])
+            if "first_token" in summary["marks"]:
+                self.time_to_first_token.observe(summary["marks"]["first_token"])
+            self.total.observe(summary["elapsed"])
+            self.critical_paths[" > ".join(summary["critical_path"])] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the current query statistics
+
+        Returns:
+            Dictionary with per-stage histograms, time-to-first-token, total
+            latency and how often each critical path occurred
+        """
+        with self.lock:
+            return {
+                "queries": self.queries,
+                "stages": {name: histogram.snapshot() for name, histogram in self.stages.items()},
+                "time_to_first_token": self.time_to_first_token.snapshot(),
+                "total": self.total.snapshot(),
+                "critical_paths": dict(self.critical_paths.most_common(10))
+            }
+
+
+# Singleton instance shared by the RAG engine and API
+_monitor_instance: Optional[QueryMonitor] = None
+
+def get_query_monitor() -> QueryMonitor:
+    """
+    Get the shared query monitor
+
+    Returns:
+        QueryMonitor instance
+    """
+    global _monitor_instance
+    if _monitor_instance is None:
+        _monitor_instance = QueryMonitor()
+    return _monitor_instance
@@ -11,7 +11,9 @@ class QueryPlan:
     
     A QueryPlan consists of a sequence of steps, each of which may involve
     executing a tool, retrieving information, or performing some other action.
-    The plan can also store conversation history to provide context for the execution.
+    Steps may list the indices of the steps they need in "depends_on"; steps
+    whose dependencies are met can run concurrently. The plan can also store
+    conversation history to provide context for the execution.
     """
     
     def __init__(self, query_id: str, query: str, steps: List[Dict[str, Any]],
@@ -47,6 +49,24 @@ class QueryPlan:
         
         return self.steps[self.current_step]
     
+    def get_dependencies(self, index: int) -> List[int]:
+        """
+        Get the steps a step depends on
+        
+        A step without "depends_on" depends on the step before it, so plans
+        without dependency information still run in order.
+        
+        Args:
+            index: Step index
+            
+        Returns:
+            Indices of the steps that must complete first
+        """
+        step = self.steps[index]
+        if "depends_on" in step:
+            return list(step["depends_on"])
+        return [index - 1] if index > 0 else []
+    
     def record_step_result(self, result: Dict[str, Any]) -> None:
         """
         Record the result of a step
@@ -162,7 +182,8 @@ class QueryPlanner:
                     "query": query,
                     "top_k": 5
                 },
-                "description": "Retrieve information using RAG"
+                "description": "Retrieve information using RAG",
+                "depends_on": []
             })
         else:
             # Complex query - may require multiple steps
@@ -180,7 +201,8 @@ class QueryPlanner:
                     "type": "tool",
                     "tool": tool_name,
                     "input": tool_input,
-                    "description": f"Execute {tool_name} tool"
+                    "description": f"Execute {tool_name} tool",
+                    "depends_on": []
                 })
             
             # If there are sub-queries, add steps for them
@@ -192,14 +214,17 @@ class QueryPlanner:
                         "query": sub_query,
                         "top_k": 3
                     },
-                    "description": f"Retrieve information for sub-query: {sub_query}"
+                    "description": f"Retrieve information for sub-query: {sub_query}",
+                    "depends_on": []
                 })
             
             # Add a final step to synthesize the results with chat history
+            # Reason: the tool steps are independent, only the synthesis needs all of them
             steps.append({
                 "type": "synthesize",
                 "description": "Synthesize results from previous steps with conversation history",
-                "with_history": True  # Flag to indicate this step should use history
+                "with_history": True,  # Flag to indicate this step should use history
+                "depends_on": list(range(len(steps)))
             })
         
         # Create the plan with chat history
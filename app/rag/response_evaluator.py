@@ -8,6 +8,8 @@ import re
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 
+from app.rag.llm_scheduler import with_llm_priority, PRIORITY_BACKGROUND
+
 class ResponseEvaluator:
     """
     Evaluates the quality of synthesized responses
@@ -33,6 +35,7 @@ class ResponseEvaluator:
         self.process_logger = process_logger
         self.logger = logging.getLogger("app.rag.response_evaluator")
     
+    @with_llm_priority(PRIORITY_BACKGROUND)
     async def evaluate(
         self,
         query: str,
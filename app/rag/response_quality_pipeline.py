@@ -4,7 +4,8 @@ ResponseQualityPipeline - Integrates response quality components into a pipeline
 import logging
 import time
 import uuid
-from typing import Dict, List, Any, Optional, Tuple
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple, AsyncIterator, Awaitable, Callable
 from datetime import datetime
 
 from app.rag.response_synthesizer import ResponseSynthesizer
@@ -12,6 +13,16 @@ from app.rag.response_evaluator import ResponseEvaluator
 from app.rag.response_refiner import ResponseRefiner
 from app.rag.audit_report_generator import AuditReportGenerator
 from app.rag.process_logger import ProcessLogger
+from app.rag.deadline import Deadline, get_current_deadline
+from app.rag.llm_scheduler import llm_priority, PRIORITY_BACKGROUND
+from app.rag.ollama_client import StreamErrorMessage
+from app.tasks.task_models import Task, TaskPriority
+
+# Task type of the background quality checks submitted by process_deferred
+RESPONSE_QUALITY_TASK = "response_quality"
+
+# Number of recent queries whose quality task can be looked up with get_revision
+MAX_TRACKED_QUALITY_TASKS = 1000
 
 class ResponseQualityPipeline:
     """
@@ -20,6 +31,10 @@ class ResponseQualityPipeline:
     The ResponseQualityPipeline combines the ResponseSynthesizer, ResponseEvaluator,
     ResponseRefiner, and AuditReportGenerator into a cohesive pipeline for generating
     high-quality responses with proper evaluation, refinement, and auditing.
+    
+    process() runs every stage before returning. process_deferred() returns
+    the synthesized response right away and runs the quality stages in the
+    background through the task manager.
     """
     
     def __init__(
@@ -28,7 +43,8 @@ class ResponseQualityPipeline:
         process_logger: Optional[ProcessLogger] = None,
         max_refinement_iterations: int = 2,
         quality_threshold: float = 8.0,
-        enable_audit_reports: bool = True
+        enable_audit_reports: bool = True,
+        task_manager = None
     ):
         """
         Initialize the response quality pipeline
@@ -39,6 +55,8 @@ class ResponseQualityPipeline:
             max_refinement_iterations: Maximum number of refinement iterations
             quality_threshold: Minimum quality score to accept a response (0-10)
             enable_audit_reports: Whether to generate audit reports
+            task_manager: TaskManager running deferred quality checks (optional,
+                required for process_deferred)
         """
         self.llm_provider = llm_provider
         self.process_logger = process_logger
@@ -72,6 +90,13 @@ class ResponseQualityPipeline:
             self.audit_report_generator = None
         
         self.logger = logging.getLogger("app.rag.response_quality_pipeline")
+        
+        # Deferred quality checks
+        self.task_manager = task_manager
+        self.quality_tasks: "OrderedDict[str, str]" = OrderedDict()
+        self.revision_callbacks: Dict[str, Callable[[Dict[str, Any]], Awaitable[None]]] = {}
+        if task_manager:
+            task_manager.register_task_handler(RESPONSE_QUALITY_TASK, self._run_quality_task)
     
     async def process(
         self,
@@ -82,7 +107,8 @@ class ResponseQualityPipeline:
         conversation_context: Optional[str] = None,
         system_prompt: Optional[str] = None,
         model_parameters: Optional[Dict[str, Any]] = None,
-        query_id: Optional[str] = None
+        query_id: Optional[str] = None,
+        deadline: Optional[Deadline] = None
     ) -> Dict[str, Any]:
         """
         Process a query through the response quality pipeline
@@ -96,6 +122,9 @@ class ResponseQualityPipeline:
             system_prompt: Custom system prompt (optional)
             model_parameters: Custom model parameters (optional)
             query_id: Unique query ID (optional, will be generated if not provided)
+            deadline: Latency budget of the request (optional, defaults to the
+                current request's); evaluation, refinement and the audit report
+                are skipped when it runs out
             
         Returns:
             Dictionary containing:
@@ -104,8 +133,10 @@ class ResponseQualityPipeline:
                 - evaluation: Evaluation results
                 - audit_report: Audit report (if enabled)
                 - execution_time: Total execution time
+                - degradations: Stages skipped to meet the deadline
         """
         start_time = time.time()
+        deadline = deadline or get_current_deadline() or Deadline()
         
         # Generate a query ID if not provided
         if not query_id:
@@ -145,32 +176,252 @@ class ResponseQualityPipeline:
         
         self.logger.info(f"Initial response synthesized, length: {len(response)}")
         
-        # Step 2: Evaluate the response
-        evaluation_result = await self.evaluator.evaluate(
+        # Steps 2-4: Evaluate, refine and audit the response
+        quality = await self._check_quality(
             query=query,
             query_id=query_id,
             response=response,
             context=context,
             sources=sources,
+            execution_result=execution_result,
+            deadline=deadline
+        )
+        current_response = quality["response"]
+        current_evaluation = quality["evaluation"]
+        refinement_iterations = quality["refinement_iterations"]
+        audit_report = quality["audit_report"]
+        
+        # Log the final response
+        if self.process_logger:
+            self.process_logger.log_final_response(
+                query_id=query_id,
+                response=current_response,
+                metadata={
+                    "evaluation_score": current_evaluation.get("overall_score", 0),
+                    "refinement_iterations": refinement_iterations,
+                    "sources_count": len(used_sources)
+                }
+            )
+        
+        elapsed_time = time.time() - start_time
+        self.logger.info(f"Response quality pipeline completed in {elapsed_time:.2f}s")
+        
+        # Log the completion of the pipeline
+        if self.process_logger:
+            self.process_logger.log_step(
+                query_id=query_id,
+                step_name="response_quality_pipeline_complete",
+                step_data={
+                    "response_length": len(current_response),
+                    "final_score": current_evaluation.get("overall_score", 0),
+                    "refinement_iterations": refinement_iterations,
+                    "execution_time": elapsed_time
+                }
+            )
+        
+        # Return the final result
+        return {
+            "query_id": query_id,
+            "response": current_response,
+            "sources": used_sources,
+            "evaluation": current_evaluation,
+            "refinement_iterations": refinement_iterations,
+            "audit_report": audit_report,
+            "execution_time": elapsed_time,
+            "degradations": list(deadline.degradations)
+        }
+    
+    async def process_deferred(
+        self,
+        query: str,
+        context: str,
+        sources: List[Dict[str, Any]],
+        execution_result: Optional[Dict[str, Any]] = None,
+        conversation_context: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        model_parameters: Optional[Dict[str, Any]] = None,
+        query_id: Optional[str] = None,
+        stream: bool = False,
+        on_revision: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Synthesize a response and return it right away, checking its quality in the background
+        
+        Only the synthesis is on the user's path. Evaluation, refinement and the
+        audit report run afterwards as a task manager task. If the evaluation
+        finds hallucinations, the refined response is pushed through on_revision;
+        either way the outcome can be fetched with get_revision.
+        
+        Args:
+            query: User query
+            context: Retrieved context from documents
+            sources: List of source information for citation
+            execution_result: Result of plan execution (optional)
+            conversation_context: Conversation history (optional)
+            system_prompt: Custom system prompt (optional)
+            model_parameters: Custom model parameters (optional)
+            query_id: Unique query ID (optional, will be generated if not provided)
+            stream: Whether to return the response as a token stream
+            on_revision: Coroutine function called with the revision when a
+                response with hallucinations was refined (optional)
+            
+        Returns:
+            Dictionary containing:
+                - query_id: Query ID to fetch the revision with
+                - response: Response text, or an async iterator over its tokens when streaming
+                - sources: Sources used in the response (all sources when streaming)
+                - quality_task_id: ID of the background quality task (None when
+                  streaming, as the task is submitted once the stream ends)
+                
+        Raises:
+            ValueError: If the pipeline has no task manager
+        """
+        if not self.task_manager:
+            raise ValueError("Deferred quality checks require a task manager")
+        
+        if not query_id:
+            query_id = str(uuid.uuid4())
+        
+        if self.process_logger:
+            self.process_logger.start_process(query_id=query_id, query=query)
+            self.process_logger.log_step(
+                query_id=query_id,
+                step_name="response_quality_pipeline_start",
+                step_data={
+                    "query": query,
+                    "context_length": len(context),
+                    "sources_count": len(sources),
+                    "deferred": True,
+                    "stream": stream
+                }
+            )
+        
+        if on_revision:
+            self.revision_callbacks[query_id] = on_revision
+        
+        synthesis_args = {
+            "query": query,
+            "query_id": query_id,
+            "context": context,
+            "sources": sources,
+            "execution_result": execution_result,
+            "conversation_context": conversation_context,
+            "system_prompt": system_prompt,
+            "model_parameters": model_parameters
+        }
+        
+        if stream:
+            return {
+                "query_id": query_id,
+                "response": self._stream_then_check(synthesis_args),
+                "sources": sources,
+                "quality_task_id": None
+            }
+        
+        synthesis_result = await self.synthesizer.synthesize(**synthesis_args)
+        task_id = await self._submit_quality_task(
+            query_id=query_id,
+            query=query,
+            response=synthesis_result["response"],
+            context=context,
+            sources=sources,
             execution_result=execution_result
         )
         
-        overall_score = evaluation_result.get("overall_score", 0)
-        hallucination_detected = evaluation_result.get("hallucination_detected", False)
+        return {
+            "query_id": query_id,
+            "response": synthesis_result["response"],
+            "sources": synthesis_result["sources"],
+            "quality_task_id": task_id
+        }
+    
+    def get_revision(self, query_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the outcome of a deferred quality check
         
-        self.logger.info(f"Response evaluated, overall score: {overall_score}, hallucinations: {hallucination_detected}")
+        Args:
+            query_id: Query ID returned by process_deferred
+            
+        Returns:
+            Dictionary with the task status and, once completed, the revision
+            (see _run_quality_task), or None if the query is unknown
+        """
+        task_id = self.quality_tasks.get(query_id)
+        task = self.task_manager.get_task(task_id) if task_id and self.task_manager else None
+        if not task:
+            return None
         
-        # Step 3: Refine the response if needed
+        return {
+            "query_id": query_id,
+            "quality_task_id": task_id,
+            "status": task.status.value,
+            **(task.result or {})
+        }
+    
+    async def _check_quality(
+        self,
+        query: str,
+        query_id: str,
+        response: str,
+        context: str,
+        sources: List[Dict[str, Any]],
+        execution_result: Optional[Dict[str, Any]],
+        deadline: Deadline
+    ) -> Dict[str, Any]:
+        """
+        Evaluate a synthesized response, refine it if needed and generate the audit report
+        
+        Args:
+            query: User query
+            query_id: Unique query ID
+            response: Synthesized response
+            context: Retrieved context from documents
+            sources: List of source information for citation
+            execution_result: Result of plan execution (optional)
+            deadline: Latency budget the stages must fit in
+            
+        Returns:
+            Dictionary containing the final response, its evaluation, the
+            evaluation of the synthesized response, the number of refinement
+            iterations and the audit report
+        """
+        # Step 2: Evaluate the response (the answer is already complete, so no time is reserved)
         current_response = response
-        current_evaluation = evaluation_result
+        current_evaluation: Dict[str, Any] = {}
         refinement_iterations = 0
         
+        if deadline.check("response_evaluation", reserve=0):
+            current_evaluation = await self.evaluator.evaluate(
+                query=query,
+                query_id=query_id,
+                response=response,
+                context=context,
+                sources=sources,
+                execution_result=execution_result
+            )
+            
+            overall_score = current_evaluation.get("overall_score", 0)
+            hallucination_detected = current_evaluation.get("hallucination_detected", False)
+            
+            self.logger.info(f"Response evaluated, overall score: {overall_score}, hallucinations: {hallucination_detected}")
+        else:
+            # Without an evaluation there is nothing to refine against
+            overall_score = self.quality_threshold
+            hallucination_detected = False
+        
+        initial_evaluation = current_evaluation
+        
+        # Step 3: Refine the response if needed
         # Refine if the quality is below threshold or hallucinations are detected
         if overall_score < self.quality_threshold or hallucination_detected:
             self.logger.info(f"Response quality below threshold ({overall_score} < {self.quality_threshold}) or hallucinations detected, refining...")
             
-            # Iterative refinement
+            # Iterative refinement, while each refine and re-evaluate round still fits the deadline
             for iteration in range(1, self.max_refinement_iterations + 1):
+                round_seconds = deadline.stage_seconds["response_refinement"] + deadline.stage_seconds["response_evaluation"]
+                if not deadline.check("response_refinement", "skipped" if iteration == 1 else "stopped", seconds=round_seconds, reserve=0):
+                    break
+                
                 refinement_result = await self.refiner.refine(
                     query=query,
                     query_id=query_id,
@@ -208,7 +459,7 @@ class ResponseQualityPipeline:
         
         # Step 4: Generate audit report if enabled
         audit_report = None
-        if self.enable_audit_reports and self.audit_report_generator and self.process_logger:
+        if self.enable_audit_reports and self.audit_report_generator and self.process_logger and deadline.check("audit_report", reserve=0):
             try:
                 self.logger.info(f"Generating audit report for query {query_id}")
                 audit_report = await self.audit_report_generator.generate_report(
@@ -218,41 +469,153 @@ class ResponseQualityPipeline:
             except Exception as e:
                 self.logger.error(f"Error generating audit report: {str(e)}")
         
-        # Log the final response
-        if self.process_logger:
-            self.process_logger.log_final_response(
+        return {
+            "response": current_response,
+            "evaluation": current_evaluation,
+            "initial_evaluation": initial_evaluation,
+            "refinement_iterations": refinement_iterations,
+            "audit_report": audit_report
+        }
+    
+    async def _stream_then_check(self, synthesis_args: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Stream the synthesized response, then submit its quality check
+        
+        The check only runs on a complete answer: if the consumer stops
+        reading early or the stream yields an error message instead of an
+        answer, no check is submitted and the revision callback is dropped.
+        
+        Args:
+            synthesis_args: Arguments for the synthesizer
+            
+        Yields:
+            Response tokens
+        """
+        query_id = synthesis_args["query_id"]
+        tokens = []
+        failed = False
+        completed = False
+        try:
+            async for token in self.synthesizer.synthesize_stream(**synthesis_args):
+                failed = failed or isinstance(token, StreamErrorMessage)
+                tokens.append(token)
+                yield token
+            completed = True
+        finally:
+            if not completed or failed:
+                self.revision_callbacks.pop(query_id, None)
+                self.logger.info(f"Skipping quality check for query {query_id}: {'generation failed' if failed else 'stream closed early'}")
+        
+        if failed:
+            return
+        await self._submit_quality_task(
+            query_id=query_id,
+            query=synthesis_args["query"],
+            response="".join(tokens),
+            context=synthesis_args["context"],
+            sources=synthesis_args["sources"],
+            execution_result=synthesis_args["execution_result"]
+        )
+    
+    async def _submit_quality_task(
+        self,
+        query_id: str,
+        query: str,
+        response: str,
+        context: str,
+        sources: List[Dict[str, Any]],
+        execution_result: Optional[Dict[str, Any]]
+    ) -> str:
+        """
+        Submit the background quality check of a response
+        
+        Returns:
+            Task ID
+        """
+        task_id = await self.task_manager.submit(
+            name=f"Response quality check for query {query_id}",
+            task_type=RESPONSE_QUALITY_TASK,
+            params={
+                "query_id": query_id,
+                "query": query,
+                "response": response,
+                "context": context,
+                "sources": sources,
+                "execution_result": execution_result
+            },
+            priority=TaskPriority.NORMAL,
+            metadata={"query_id": query_id}
+        )
+        
+        self.quality_tasks[query_id] = task_id
+        while len(self.quality_tasks) > MAX_TRACKED_QUALITY_TASKS:
+            self.quality_tasks.popitem(last=False)
+        
+        self.logger.info(f"Submitted quality check task {task_id} for query {query_id}")
+        return task_id
+    
+    async def _run_quality_task(self, task: Task) -> Dict[str, Any]:
+        """
+        Task handler evaluating, refining and auditing a response that was already returned
+        
+        Args:
+            task: Quality check task submitted by process_deferred
+            
+        Returns:
+            Revision dictionary containing:
+                - query_id: Query ID
+                - revised_response: Refined response (None if it wasn't refined)
+                - hallucination_detected: Whether the returned response had hallucinations
+                - evaluation: Evaluation of the final response
+                - refinement_iterations: Number of refinement iterations
+                - audit_report: Audit report (if enabled)
+                - pushed: Whether the revision was pushed through on_revision
+        """
+        params = task.params
+        query_id = params["query_id"]
+        on_revision = self.revision_callbacks.pop(query_id, None)
+        
+        # Reason: the user already has an answer, so these calls yield to interactive requests
+        with llm_priority(PRIORITY_BACKGROUND):
+            quality = await self._check_quality(
+                query=params["query"],
                 query_id=query_id,
-                response=current_response,
-                metadata={
-                    "evaluation_score": current_evaluation.get("overall_score", 0),
-                    "refinement_iterations": refinement_iterations,
-                    "sources_count": len(used_sources)
-                }
+                response=params["response"],
+                context=params["context"],
+                sources=params["sources"],
+                execution_result=params.get("execution_result"),
+                deadline=Deadline()
             )
         
-        elapsed_time = time.time() - start_time
-        self.logger.info(f"Response quality pipeline completed in {elapsed_time:.2f}s")
+        revision = {
+            "query_id": query_id,
+            "revised_response": quality["response"] if quality["refinement_iterations"] else None,
+            "hallucination_detected": quality["initial_evaluation"].get("hallucination_detected", False),
+            "evaluation": quality["evaluation"],
+            "refinement_iterations": quality["refinement_iterations"],
+            "audit_report": quality["audit_report"],
+            "pushed": False
+        }
+        
+        # Only corrections of hallucinations are worth interrupting the user for
+        if on_revision and revision["hallucination_detected"] and revision["revised_response"]:
+            try:
+                revision["pushed"] = True
+                await on_revision(revision)
+            except Exception as e:
+                revision["pushed"] = False
+                self.logger.error(f"Error pushing revision for query {query_id}: {str(e)}")
         
-        # Log the completion of the pipeline
         if self.process_logger:
-            self.process_logger.log_step(
+            self.process_logger.log_final_response(
                 query_id=query_id,
-                step_name="response_quality_pipeline_complete",
-                step_data={
-                    "response_length": len(current_response),
-                    "final_score": current_evaluation.get("overall_score", 0),
-                    "refinement_iterations": refinement_iterations,
-                    "execution_time": elapsed_time
+                response=quality["response"],
+                metadata={
+                    "evaluation_score": quality["evaluation"].get("overall_score", 0),
+                    "refinement_iterations": quality["refinement_iterations"],
+                    "deferred": True
                 }
             )
         
-        # Return the final result
-        return {
-            "query_id": query_id,
-            "response": current_response,
-            "sources": used_sources,
-            "evaluation": current_evaluation,
-            "refinement_iterations": refinement_iterations,
-            "audit_report": audit_report,
-            "execution_time": elapsed_time
-        }
\ No newline at end of file
+        self.logger.info(f"Quality check for query {query_id} completed, refinement iterations: {quality['refinement_iterations']}")
+        return revision
@@ -7,6 +7,8 @@ import json
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 
+from app.rag.llm_scheduler import with_llm_priority, PRIORITY_INTERACTIVE_AUX
+
 class ResponseRefiner:
     """
     Refines responses based on evaluation results
@@ -35,6 +37,7 @@ class ResponseRefiner:
         self.max_refinement_iterations = max_refinement_iterations
         self.logger = logging.getLogger("app.rag.response_refiner")
     
+    @with_llm_priority(PRIORITY_INTERACTIVE_AUX)
     async def refine(
         self,
         query: str,
@@ -4,9 +4,11 @@ ResponseSynthesizer - Synthesizes responses from retrieval results and tool outp
 import logging
 import time
 import json
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, AsyncIterator
 from datetime import datetime
 
+from app.rag.ollama_client import StreamErrorMessage
+
 class ResponseSynthesizer:
     """
     Synthesizes responses from retrieval results and tool outputs
@@ -145,6 +147,94 @@ class ResponseSynthesizer:
                 "execution_time": time.time() - start_time
             }
     
+    async def synthesize_stream(
+        self,
+        query: str,
+        query_id: str,
+        context: str,
+        sources: List[Dict[str, Any]],
+        execution_result: Optional[Dict[str, Any]] = None,
+        conversation_context: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        model_parameters: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Synthesize a response, yielding its tokens as they are generated
+        
+        Args:
+            query: Original user query
+            query_id: Unique query ID
+            context: Retrieved context from documents
+            sources: List of source information for citation
+            execution_result: Result of plan execution (optional)
+            conversation_context: Conversation history (optional)
+            system_prompt: Custom system prompt (optional)
+            model_parameters: Custom model parameters (optional)
+            
+        Yields:
+            Response tokens (a StreamErrorMessage instead if generation failed)
+        """
+        start_time = time.time()
+        self.logger.info(f"Streaming synthesized response for query: {query}")
+        
+        if self.process_logger:
+            self.process_logger.log_step(
+                query_id=query_id,
+                step_name="response_synthesis_start",
+                step_data={
+                    "query": query,
+                    "context_length": len(context),
+                    "sources_count": len(sources),
+                    "has_execution_result": execution_result is not None,
+                    "stream": True
+                }
+            )
+        
+        prompt = self._create_synthesis_prompt(
+            query=query,
+            context=context,
+            sources=sources,
+            execution_result=execution_result,
+            conversation_context=conversation_context
+        )
+        
+        response_length = 0
+        try:
+            stream = await self.llm_provider.generate(
+                prompt=prompt,
+                system_prompt=system_prompt or self._create_system_prompt(),
+                stream=True,
+                parameters=model_parameters or {}
+            )
+            async for token in stream:
+                response_length += len(token)
+                yield token
+        except Exception as e:
+            self.logger.error(f"Error streaming synthesized response: {str(e)}")
+            if self.process_logger:
+                self.process_logger.log_step(
+                    query_id=query_id,
+                    step_name="response_synthesis_error",
+                    step_data={
+                        "error": str(e)
+                    }
+                )
+            yield StreamErrorMessage(f"I encountered an error while generating a response: {str(e)}")
+            return
+        
+        elapsed_time = time.time() - start_time
+        self.logger.info(f"Response synthesis stream completed in {elapsed_time:.2f}s")
+        
+        if self.process_logger:
+            self.process_logger.log_step(
+                query_id=query_id,
+                step_name="response_synthesis_complete",
+                step_data={
+                    "response_length": response_length,
+                    "execution_time": elapsed_time
+                }
+            )
+    
     def _create_synthesis_prompt(
         self,
         query: str,
@@ -0,0 +1,192 @@
+"""
+Single Flight - coalesces identical in-flight LLM and embedding requests
+"""
+import copy
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Callable, Awaitable, AsyncIterator
+
+logger = logging.getLogger("app.rag.single_flight")
+
+class _Broadcast:
+    """
+    Fans the tokens of one upstream stream out to any number of subscribers
+
+    Tokens are buffered for the lifetime of the stream, so a subscriber that
+    joins late first replays what was already produced. Once every
+    subscriber has left, the upstream stream is closed, releasing its
+    scheduler slot and stopping generation.
+    """
+    def __init__(self, factory: Callable[[], Awaitable[AsyncIterator[str]]]):
+        self.tokens: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._pump(factory))
+
+    async def _pump(self, factory: Callable[[], Awaitable[AsyncIterator[str]]]) -> None:
+        """Consume the upstream stream and publish its tokens"""
+        source = None
+        try:
+            source = await factory()
+            async for token in source:
+                self.tokens.append(token)
+                self._notify()
+        except asyncio.CancelledError:
+            self.error = asyncio.CancelledError("Stream abandoned by all subscribers")
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+            # Reason: closing the generator leaves its HTTP stream and scheduler slot
+            if source is not None and hasattr(source, "aclose"):
+                await source.aclose()
+
+    def _notify(self) -> None:
+        """Wake the current subscribers"""
+        # Reason: replacing the event (instead of clear()) cannot lose a wake-up,
+        # since subscribers hold on to the event they are waiting for
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def subscribe(self) -> AsyncIterator[str]:
+        """
+        Subscribe to the stream's tokens from the beginning
+
+        The subscriber is counted right away, so the stream is not abandoned
+        between joining and the first read.
+
+        Returns:
+            Async iterator over the stream's tokens
+        """
+        self.subscribers += 1
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[str]:
+        """
+        Iterate the stream's tokens, leaving the stream when closed
+
+        Yields:
+            Tokens as they are produced
+        """
+        position = 0
+        try:
+            while True:
+                while position < len(self.tokens):
+                    yield self.tokens[position]
+                    position += 1
+                if self.done:
+                    if self.error:
+                        raise self.error
+                    return
+                await self.changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                logger.debug("All subscribers left, closing the upstream stream")
+                # Mark done first so no new caller joins a stream being cancelled
+                self.done = True
+                self.task.cancel()
+                # Wait for the upstream stream to close, so its slot is free once we return
+                await asyncio.wait([self.task])
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent identical requests.
+
+    The first caller for a key starts the upstream call; callers arriving
+    while it is in flight await the same call instead of sending their own.
+    The upstream call runs as its own task, so a caller that disconnects
+    does not cancel it for the others. Entries are dropped as soon as the
+    call finishes; completed results are the response cache's job.
+    """
+    def __init__(self):
+        self.calls: Dict[str, asyncio.Future] = {}
+        self.streams: Dict[str, _Broadcast] = {}
+        self.stats = {"calls": 0, "coalesced": 0, "streams": 0, "coalesced_streams": 0}
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run a call once for all concurrent callers with the same key
+
+        Args:
+            key: Request key
+            factory: Function starting the upstream call
+
+        Returns:
+            Result of the call (followers receive their own copy)
+        """
+        task = self.calls.get(key)
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            self.stats["coalesced"] += 1
+            logger.debug(f"Joining in-flight request {key}")
+            # Reason: followers get a copy so callers can't mutate each other's result
+            return copy.deepcopy(await asyncio.shield(task))
+
+        task = asyncio.ensure_future(factory())
+        self.calls[key] = task
+        self.stats["calls"] += 1
+        task.add_done_callback(lambda done: self._forget(self.calls, key, done))
+        return await asyncio.shield(task)
+
+    async def stream(self, key: str, factory: Callable[[], Awaitable[AsyncIterator[str]]]) -> AsyncIterator[str]:
+        """
+        Share one upstream token stream between all concurrent callers with the same key
+
+        Args:
+            key: Request key
+            factory: Function starting the upstream stream
+
+        Returns:
+            Async iterator over the stream's tokens
+        """
+        broadcast = self.streams.get(key)
+        if broadcast is not None and not broadcast.done and broadcast.task.get_loop() is asyncio.get_running_loop():
+            self.stats["coalesced_streams"] += 1
+            logger.debug(f"Joining in-flight stream {key}")
+            return broadcast.subscribe()
+
+        broadcast = _Broadcast(factory)
+        self.streams[key] = broadcast
+        self.stats["streams"] += 1
+        broadcast.task.add_done_callback(lambda done: self._forget(self.streams, key, broadcast))
+        return broadcast.subscribe()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get coalescing statistics
+
+        Returns:
+            Dictionary with upstream and coalesced request counts and in-flight counts
+        """
+        return {
+            **self.stats,
+            "in_flight_calls": len(self.calls),
+            "in_flight_streams": len(self.streams)
+        }
+
+    @staticmethod
+    def _forget(table: Dict[str, Any], key: str, entry: Any) -> None:
+        """Drop a finished entry unless it was already replaced"""
+        if table.get(key) is entry:
+            del table[key]
+
+
+# Singleton instance shared by all Ollama clients
+_single_flight_instance: Optional[SingleFlight] = None
+
+def get_single_flight() -> SingleFlight:
+    """
+    Get the shared single-flight group
+
+    Returns:
+        SingleFlight instance
+    """
+    global _single_flight_instance
+    if _single_flight_instance is None:
+        _single_flight_instance = SingleFlight()
+    return _single_flight_instance
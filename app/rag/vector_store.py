@@ -11,6 +11,8 @@ from app.core.config import CHROMA_DB_DIR, DEFAULT_EMBEDDING_MODEL
 from app.models.document import Document, Chunk
 from app.rag.ollama_client import OllamaClient
 from app.cache.vector_search_cache import VectorSearchCache
+from app.rag.ingest_metrics import get_ingest_monitor
+from app.rag.llm_scheduler import with_llm_priority, PRIORITY_BACKGROUND
 
 logger = logging.getLogger("app.rag.vector_store")
 
@@ -65,6 +67,7 @@ class VectorStore:
         
         logger.info(f"Vector store initialized with collection 'documents', caching {'enabled' if enable_cache else 'disabled'}")
     
+    @with_llm_priority(PRIORITY_BACKGROUND)
     async def add_document(self, document: Document) -> None:
         """
         Add a document to the vector store with batch embedding
@@ -80,7 +83,10 @@ class VectorStore:
             chunks_to_embed = [chunk for chunk in document.chunks if not chunk.embedding]
             chunk_contents = [chunk.content for chunk in chunks_to_embed]
             
+            monitor = get_ingest_monitor()
+            
             # Create embeddings in batch if possible
+            embed_started = time.time()
             if chunk_contents:
                 try:
                     # Batch embedding
@@ -98,7 +104,10 @@ class VectorStore:
                             model=self.embedding_model
                         )
             
+            monitor.observe("embed", time.time() - embed_started)
+            
             # Add chunks to the collection
+            upsert_started = time.time()
             for chunk in document.chunks:
                 if not chunk.embedding:
                     logger.warning(f"Chunk {chunk.id} has no embedding, skipping")
@@ -145,6 +154,8 @@ class VectorStore:
                     metadatas=[metadata]
                 )
             
+            monitor.observe("upsert", time.time() - upsert_started)
+            
             # Clear the cache to ensure we're using the latest embeddings
             self.clear_cache()
             
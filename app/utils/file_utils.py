@@ -1,8 +1,13 @@
 import os
+import uuid
+import asyncio
+import zipfile
+import hashlib
 import logging
 import shutil
 from pathlib import Path
-from typing import List, Optional, Set
+from typing import List, Optional, Set, Dict, Any, AsyncIterator
+import aiofiles
 from fastapi import UploadFile
 
 from app.core.config import UPLOAD_DIR
@@ -26,6 +31,29 @@ ALLOWED_EXTENSIONS = {
 # Default max file size in bytes (10MB)
 DEFAULT_MAX_FILE_SIZE = 10 * 1024 * 1024
 
+# Size of each read/write when streaming uploads to disk (1MB)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Maximum size of a zip archive accepted by the batch upload endpoint (200MB)
+MAX_ARCHIVE_SIZE = 200 * 1024 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """
+    Raised when an upload exceeds its size limit while being streamed to disk
+    """
+    pass
+
+
+def get_max_file_size(filename: str) -> int:
+    """
+    Get the maximum allowed size in bytes for a file based on its extension
+    """
+    _, ext = os.path.splitext(filename.lower())
+    if ext in ALLOWED_EXTENSIONS:
+        return ALLOWED_EXTENSIONS[ext] * 1024 * 1024
+    return DEFAULT_MAX_FILE_SIZE
+
 async def validate_file(file: UploadFile) -> tuple[bool, str]:
     """
     Enhanced file validation with detailed error messages
@@ -45,15 +73,14 @@ async def validate_file(file: UploadFile) -> tuple[bool, str]:
     
     # Check file size
     try:
-        # Save current position
-        current_position = await file.tell()
-        
-        # Move to end to get size
-        await file.seek(0, 2)  # Seek to end
-        file_size = await file.tell()
-        
-        # Reset position
-        await file.seek(current_position)
+        # Reason: Starlette's UploadFile has no tell(), so the size comes from
+        # file.size or from seeking the underlying spooled file
+        file_size = file.size
+        if file_size is None:
+            current_position = file.file.tell()
+            file.file.seek(0, 2)  # Seek to end
+            file_size = file.file.tell()
+            file.file.seek(current_position)
         
         if file_size > max_file_size:
             error_msg = f"File exceeds maximum size of {max_file_size/(1024*1024):.1f}MB"
@@ -63,7 +90,7 @@ async def validate_file(file: UploadFile) -> tuple[bool, str]:
         # Basic content validation for specific file types
         if ext == ".pdf":
             # Save current position
-            current_position = await file.tell()
+            current_position = file.file.tell()
             
             # Check PDF header
             await file.seek(0)
@@ -84,24 +111,119 @@ async def validate_file(file: UploadFile) -> tuple[bool, str]:
     
     return True, ""
 
-async def save_upload_file(file: UploadFile, document_id: str) -> str:
+async def iter_upload_chunks(file: UploadFile, chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
     """
-    Save an uploaded file to the upload directory
+    Read an uploaded file in bounded chunks without loading it into memory
+    """
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+async def iter_zip_member_chunks(
+    archive: zipfile.ZipFile,
+    member: zipfile.ZipInfo,
+    chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """
+    Decompress a zip archive member in bounded chunks off the event loop
+    """
+    src = await asyncio.to_thread(archive.open, member)
+    try:
+        while True:
+            chunk = await asyncio.to_thread(src.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        src.close()
+
+async def write_stream_atomic(
+    chunks: AsyncIterator[bytes],
+    file_path: str,
+    max_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Stream chunks to disk through a temporary file and rename it into place.
+    
+    The SHA-256 hash and byte count are computed while writing, and the size
+    limit is enforced as soon as it is crossed so oversized uploads are
+    rejected without being fully read.
+    
+    Args:
+        chunks: Async iterator of byte chunks
+        file_path: Final destination path
+        max_size: Maximum allowed size in bytes (None for no limit)
+        
+    Returns:
+        Dictionary with file_path, size and sha256
+    """
+    directory = os.path.dirname(file_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    
+    # Reason: the temp file lives in the destination directory so the final
+    # os.replace is an atomic rename on the same filesystem
+    temp_path = os.path.join(directory, f".{os.path.basename(file_path)}.{uuid.uuid4().hex}.part")
+    hasher = hashlib.sha256()
+    size = 0
+    
+    try:
+        async with aiofiles.open(temp_path, "wb") as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise UploadTooLargeError(
+                        f"File exceeds maximum size of {max_size/(1024*1024):.1f}MB"
+                    )
+                hasher.update(chunk)
+                await f.write(chunk)
+            await f.flush()
+        os.replace(temp_path, file_path)
+    except BaseException:
+        # Never leave partial files behind
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    
+    return {
+        "file_path": file_path,
+        "size": size,
+        "sha256": hasher.hexdigest()
+    }
+
+async def save_upload_file_streaming(
+    file: UploadFile,
+    document_id: str,
+    max_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Stream an uploaded file to the upload directory without blocking the event loop
+    
+    Args:
+        file: Uploaded file
+        document_id: Document ID used as the storage directory
+        max_size: Maximum allowed size in bytes (defaults to the limit for the file type)
+        
+    Returns:
+        Dictionary with file_path, size and sha256
     """
     try:
-        # Create directory for the document
         document_dir = os.path.join(UPLOAD_DIR, document_id)
-        os.makedirs(document_dir, exist_ok=True)
+        file_path = os.path.join(document_dir, os.path.basename(file.filename))
         
-        # Define file path
-        file_path = os.path.join(document_dir, file.filename)
+        if max_size is None:
+            max_size = get_max_file_size(file.filename)
         
-        # Save file
-        with open(file_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
+        result = await write_stream_atomic(iter_upload_chunks(file), file_path, max_size)
         
-        logger.info(f"File saved to {file_path}")
-        return file_path
+        logger.info(f"File saved to {file_path} ({result['size']} bytes, sha256={result['sha256'][:12]})")
+        return result
+    except UploadTooLargeError as e:
+        logger.warning(f"Rejected upload {file.filename}: {str(e)}")
+        # Remove the empty document directory left by the rejected upload
+        shutil.rmtree(os.path.join(UPLOAD_DIR, document_id), ignore_errors=True)
+        raise
     except Exception as e:
         logger.error(f"Error saving uploaded file: {str(e)}")
         raise
@@ -109,6 +231,13 @@ async def save_upload_file(file: UploadFile, document_id: str) -> str:
         # Make sure to close the file
         await file.close()
 
+async def save_upload_file(file: UploadFile, document_id: str) -> str:
+    """
+    Save an uploaded file to the upload directory
+    """
+    result = await save_upload_file_streaming(file, document_id)
+    return result["file_path"]
+
 def delete_document_files(document_id: str) -> None:
     """
     Delete document files
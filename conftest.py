@@ -6,12 +6,16 @@ import pytest
 import asyncio
 import os
 import sys
+import tempfile
 from pathlib import Path
 
 # Add the project root to the Python path
 project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(project_root)
 
+# Keep the vector store written by test runs out of the working tree
+os.environ.setdefault("CHROMA_DB_DIR", tempfile.mkdtemp(prefix="chroma_db_test_"))
+
 # Configure pytest-asyncio settings through fixtures
 # Don't try to set asyncio_mode directly as it's part of pytest.ini configuration
 
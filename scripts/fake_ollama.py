@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Fake Ollama Server for Metis RAG
+
+A deterministic stand-in for Ollama, for load tests and latency work without
+a GPU. It serves the endpoints Metis RAG uses:
+1. /api/generate (streaming and non-streaming)
+2. /api/embeddings and /api/embed
+3. /api/tags and /api/ps
+
+Responses are produced at a configurable token rate after a configurable
+first-token latency, and embeddings are derived from a hash of the text, so
+the same input always gets the same vector and every run costs the same.
+
+Usage:
+    python scripts/fake_ollama.py [--port 11434] [--tokens-per-second 50] [--first-token-ms 200]
+
+Then point Metis RAG at it with OLLAMA_BASE_URL=http://localhost:11434.
+"""
+import json
+import math
+import time
+import asyncio
+import hashlib
+import argparse
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+# Words the fake responses are made of
+VOCABULARY = (
+    "the document describes how retrieval augmented generation combines search "
+    "with a language model to answer questions using relevant context from sources"
+).split()
+
+@dataclass
+class FakeOllamaSettings:
+    """Behaviour of the fake server"""
+    tokens_per_second: float = 50.0
+    first_token_seconds: float = 0.2
+    response_tokens: int = 64
+    embedding_dimensions: int = 768
+    embedding_seconds: float = 0.005
+    models: List[str] = field(default_factory=lambda: ["gemma3:4b", "gemma3:12b", "nomic-embed-text"])
+
+def fake_embedding(text: str, dimensions: int) -> List[float]:
+    """
+    Create a deterministic unit-length embedding for a text
+
+    Args:
+        text: Text to embed
+        dimensions: Vector length
+
+    Returns:
+        Embedding vector
+    """
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    generator = random.Random(seed)
+    vector = [generator.gauss(0.0, 1.0) for _ in range(dimensions)]
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+def fake_tokens(prompt: str, count: int) -> List[str]:
+    """
+    Create the deterministic response tokens for a prompt
+
+    Args:
+        prompt: Prompt text
+        count: Number of tokens
+
+    Returns:
+        List of tokens (words with their leading space)
+    """
+    generator = random.Random(hashlib.sha256(prompt.encode("utf-8")).hexdigest())
+    return [("" if i == 0 else " ") + generator.choice(VOCABULARY) for i in range(count)]
+
+def create_app(settings: Optional[FakeOllamaSettings] = None) -> FastAPI:
+    """
+    Create the fake Ollama application
+
+    Args:
+        settings: Server behaviour (defaults to FakeOllamaSettings())
+
+    Returns:
+        FastAPI application
+    """
+    settings = settings or FakeOllamaSettings()
+    app = FastAPI(title="Fake Ollama")
+    app.state.settings = settings
+    app.state.stats = {"generate": 0, "embeddings": 0, "embed": 0}
+
+    def token_count(body: Dict[str, Any]) -> int:
+        """Response length, capped by the request's options.num_predict (like Ollama, a top-level num_predict is ignored)"""
+        limit = (body.get("options") or {}).get("num_predict")
+        return min(settings.response_tokens, limit) if limit else settings.response_tokens
+
+    def final_message(body: Dict[str, Any], count: int, started: float) -> Dict[str, Any]:
+        """Closing generate message with Ollama's timing fields (in nanoseconds)"""
+        return {
+            "model": body.get("model"),
+            "done": True,
+            "prompt_eval_count": len(body.get("prompt", "").split()),
+            "eval_count": count,
+            "load_duration": 0,
+            "total_duration": int((time.monotonic() - started) * 1e9)
+        }
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": name, "model": name} for name in settings.models]}
+
+    @app.get("/api/ps")
+    async def running_models():
+        return {"models": [{"name": name, "model": name, "size_vram": 0} for name in settings.models]}
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        app.state.stats["generate"] += 1
+        started = time.monotonic()
+        count = token_count(body)
+
+        # A request without a prompt only loads the model
+        if not body.get("prompt"):
+            return {"model": body.get("model"), "response": "", "done": True, "load_duration": 0}
+
+        # JSON mode gets an empty object so callers' parsers take their default paths
+        tokens = ["{}"] if body.get("format") == "json" else fake_tokens(body["prompt"], count)
+        interval = 1.0 / settings.tokens_per_second if settings.tokens_per_second > 0 else 0.0
+
+        if not body.get("stream", True):
+            await asyncio.sleep(settings.first_token_seconds + interval * (len(tokens) - 1))
+            return {"response": "".join(tokens), **final_message(body, len(tokens), started)}
+
+        async def stream():
+            await asyncio.sleep(settings.first_token_seconds)
+            for i, token in enumerate(tokens):
+                if i:
+                    await asyncio.sleep(interval)
+                yield json.dumps({"model": body.get("model"), "response": token, "done": False}) + "\n"
+            yield json.dumps({"response": "", **final_message(body, len(tokens), started)}) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    @app.post("/api/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        app.state.stats["embeddings"] += 1
+        await asyncio.sleep(settings.embedding_seconds)
+        return {"embedding": fake_embedding(body.get("prompt", ""), settings.embedding_dimensions)}
+
+    @app.post("/api/embed")
+    async def embed(request: Request):
+        body = await request.json()
+        app.state.stats["embed"] += 1
+        texts = body.get("input", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        await asyncio.sleep(settings.embedding_seconds * max(1, len(texts)))
+        return {
+            "model": body.get("model"),
+            "embeddings": [fake_embedding(text, settings.embedding_dimensions) for text in texts]
+        }
+
+    return app
+
+def main():
+    """Run the fake server"""
+    parser = argparse.ArgumentParser(description="Deterministic fake Ollama server")
+    parser.add_argument("--host", default="127.0.0.1", help="Host to bind")
+    parser.add_argument("--port", type=int, default=11434, help="Port to bind")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Generation speed (0 for instant)")
+    parser.add_argument("--first-token-ms", type=float, default=200.0, help="Latency before the first token")
+    parser.add_argument("--response-tokens", type=int, default=64, help="Tokens per response")
+    parser.add_argument("--embedding-dimensions", type=int, default=768, help="Embedding vector length")
+    parser.add_argument("--embedding-ms", type=float, default=5.0, help="Latency per embedded text")
+    parser.add_argument("--models", default="gemma3:4b,gemma3:12b,nomic-embed-text", help="Comma-separated model names")
+    args = parser.parse_args()
+
+    import uvicorn
+    settings = FakeOllamaSettings(
+        tokens_per_second=args.tokens_per_second,
+        first_token_seconds=args.first_token_ms / 1000,
+        response_tokens=args.response_tokens,
+        embedding_dimensions=args.embedding_dimensions,
+        embedding_seconds=args.embedding_ms / 1000,
+        models=[name.strip() for name in args.models.split(",") if name.strip()]
+    )
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+End-to-End Load Test for Metis RAG
+
+Simulates N concurrent users who each log in, then repeatedly:
+1. Upload a document
+2. Process it
+3. Ask chat questions about it
+
+It reports throughput and p50/p95/p99 latency per endpoint. Run it against
+an instance that uses the fake Ollama server (scripts/fake_ollama.py), so
+the numbers measure Metis RAG itself rather than model speed.
+
+Usage:
+    python scripts/fake_ollama.py --port 11434 &
+    OLLAMA_BASE_URL=http://localhost:11434 python scripts/run_app.py &
+    python scripts/load_test.py --users 10 --iterations 5 --username loadtest --password secret [--stream] [--output results.json]
+"""
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import asyncio
+import argparse
+from collections import defaultdict
+from typing import Dict, List, Any, Optional
+
+import httpx
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    Get a percentile of sorted values (nearest rank)
+
+    Args:
+        sorted_values: Values in ascending order
+        fraction: Percentile as a fraction, e.g. 0.95
+
+    Returns:
+        Percentile value (0.0 without values)
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class LatencyRecorder:
+    """
+    Collects request latencies and errors per endpoint
+    """
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.started_at = time.monotonic()
+
+    def record(self, endpoint: str, seconds: float, ok: bool = True) -> None:
+        """
+        Record one request
+
+        Args:
+            endpoint: Endpoint label
+            seconds: Request latency
+            ok: Whether the request succeeded
+        """
+        self.latencies[endpoint].append(seconds)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Summarize the recorded requests
+
+        Returns:
+            Dictionary mapping endpoints to count, errors, throughput and latency percentiles in ms
+        """
+        wall_time = max(time.monotonic() - self.started_at, 1e-9)
+        summary = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            ordered = sorted(values)
+            summary[endpoint] = {
+                "count": len(ordered),
+                "errors": self.errors[endpoint],
+                "throughput_per_second": round(len(ordered) / wall_time, 3),
+                "p50_ms": round(percentile(ordered, 0.50) * 1000, 1),
+                "p95_ms": round(percentile(ordered, 0.95) * 1000, 1),
+                "p99_ms": round(percentile(ordered, 0.99) * 1000, 1),
+                "max_ms": round(ordered[-1] * 1000, 1)
+            }
+        return summary
+
+
+class LoadTestUser:
+    """
+    One simulated user running the upload, process, chat flow
+    """
+    def __init__(self, client: httpx.AsyncClient, recorder: LatencyRecorder, args: argparse.Namespace, user_index: int):
+        self.client = client
+        self.recorder = recorder
+        self.args = args
+        self.user_index = user_index
+        self.headers: Dict[str, str] = {}
+
+    async def timed(self, endpoint: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        """
+        Send a request and record its latency
+
+        Returns:
+            Response, or None if the request failed
+        """
+        started = time.monotonic()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+            self.recorder.record(endpoint, time.monotonic() - started, ok=response.status_code < 400)
+            return response if response.status_code < 400 else None
+        except httpx.HTTPError as e:
+            self.recorder.record(endpoint, time.monotonic() - started, ok=False)
+            if self.args.verbose:
+                print(f"user {self.user_index}: {endpoint} failed: {e}", file=sys.stderr)
+            return None
+
+    async def login(self) -> bool:
+        """Get an access token"""
+        response = await self.timed(
+            "auth/token", "POST", "/api/auth/token",
+            data={"username": self.args.username, "password": self.args.password}
+        )
+        if response is None:
+            return False
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return True
+
+    async def upload(self) -> Optional[str]:
+        """Upload a document, returning its ID"""
+        name = f"load_test_{self.user_index}_{uuid.uuid4().hex[:8]}.txt"
+        response = await self.timed(
+            "documents/upload", "POST", "/api/documents/upload",
+            files={"file": (name, self.args.document_text.encode("utf-8"), "text/plain")},
+            data={"tags": "load-test", "folder": "/load-test"}
+        )
+        return response.json().get("document_id") if response is not None else None
+
+    async def process(self, document_id: str) -> None:
+        """Process a document, optionally waiting until processing finished"""
+        response = await self.timed(
+            "documents/process", "POST", "/api/documents/process",
+            json={"document_ids": [document_id]}
+        )
+        if response is None or not self.args.wait_for_processing:
+            return
+
+        started = time.monotonic()
+        while time.monotonic() - started < self.args.wait_for_processing:
+            response = await self.timed("documents/{id}", "GET", f"/api/documents/{document_id}")
+            status = response.json().get("processing_status") if response is not None else None
+            if status in (None, "completed", "failed"):
+                break
+            await asyncio.sleep(0.5)
+        self.recorder.record("processing (end to end)", time.monotonic() - started, ok=status != "failed")
+
+    async def chat(self, question: str) -> None:
+        """Ask a question, measuring time to first token when streaming"""
+        payload = {"message": question, "use_rag": True, "stream": self.args.stream}
+        if not self.args.stream:
+            await self.timed("chat/query", "POST", "/api/chat/query", json=payload)
+            return
+
+        started = time.monotonic()
+        first_token = None
+        try:
+            async with self.client.stream("POST", "/api/chat/query", json=payload, headers=self.headers) as response:
+                async for chunk in response.aiter_text():
+                    if first_token is None and chunk.strip():
+                        first_token = time.monotonic() - started
+                ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        self.recorder.record("chat/query (stream)", time.monotonic() - started, ok=ok)
+        if first_token is not None:
+            self.recorder.record("chat/query (first token)", first_token)
+
+    async def run(self) -> None:
+        """Run the user's iterations"""
+        if not await self.login():
+            print(f"user {self.user_index}: login failed, skipping", file=sys.stderr)
+            return
+        for iteration in range(self.args.iterations):
+            document_id = await self.upload()
+            if document_id:
+                await self.process(document_id)
+            for question in self.args.questions[:self.args.chats_per_iteration]:
+                await self.chat(question)
+
+
+async def run_load_test(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Run the load test
+
+    Args:
+        args: Command line arguments
+
+    Returns:
+        Dictionary with the test settings, wall time and per-endpoint summary
+    """
+    recorder = LatencyRecorder()
+    limits = httpx.Limits(max_connections=args.users * 2, max_keepalive_connections=args.users * 2)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        users = [LoadTestUser(client, recorder, args, index) for index in range(args.users)]
+        await asyncio.gather(*(user.run() for user in users))
+
+    return {
+        "base_url": args.base_url,
+        "users": args.users,
+        "iterations": args.iterations,
+        "stream": args.stream,
+        "wall_time_seconds": round(time.monotonic() - recorder.started_at, 3),
+        "endpoints": recorder.report()
+    }
+
+def print_report(result: Dict[str, Any]) -> None:
+    """Print the per-endpoint summary as a table"""
+    print(f"\n{result['users']} users x {result['iterations']} iterations in {result['wall_time_seconds']}s\n")
+    print(f"{'endpoint':<28}{'count':>7}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for endpoint, stats in result["endpoints"].items():
+        print(
+            f"{endpoint:<28}{stats['count']:>7}{stats['errors']:>8}{stats['throughput_per_second']:>9}"
+            f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}"
+        )
+
+def main():
+    """Parse arguments and run the load test"""
+    parser = argparse.ArgumentParser(description="End-to-end load test for Metis RAG")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="Metis RAG base URL")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent users")
+    parser.add_argument("--iterations", type=int, default=3, help="Upload, process and chat rounds per user")
+    parser.add_argument("--chats-per-iteration", type=int, default=2, help="Chat questions per round")
+    parser.add_argument("--username", default=os.getenv("LOAD_TEST_USERNAME", "loadtest"), help="Login user name")
+    parser.add_argument("--password", default=os.getenv("LOAD_TEST_PASSWORD", ""), help="Login password")
+    parser.add_argument("--document", help="Text file to upload (a built-in sample by default)")
+    parser.add_argument("--stream", action="store_true", help="Use streaming chat and measure time to first token")
+    parser.add_argument("--wait-for-processing", type=float, default=0.0, help="Seconds to wait for processing to finish (0 to not wait)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Request timeout in seconds")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--verbose", action="store_true", help="Print failed requests")
+    args = parser.parse_args()
+
+    if args.document:
+        with open(args.document, "r", encoding="utf-8") as f:
+            args.document_text = f.read()
+    else:
+        args.document_text = "\n\n".join(
+            f"Section {i}. Metis RAG answers questions from uploaded documents. "
+            f"It splits documents into chunks, embeds them and retrieves the most relevant ones for each question."
+            for i in range(1, 21)
+        )
+    args.questions = [
+        "What does Metis RAG do with uploaded documents?",
+        "How are the most relevant chunks found?",
+        "Summarize section 3."
+    ]
+
+    result = asyncio.run(run_load_test(args))
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
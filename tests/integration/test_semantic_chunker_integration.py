@@ -118,8 +118,12 @@ async def test_document_processor_with_semantic_chunking(mock_ollama_client, sam
                     assert len(processed_doc.chunks) > 0
                     
                     # Verify the chunking parameters
-                    assert processor.chunk_size == 1000
-                    assert processor.chunk_overlap == 150
+                    parameters = processed_doc.metadata["chunking_analysis"]["parameters"]
+                    assert parameters["chunk_size"] == 1000
+                    assert parameters["chunk_overlap"] == 150
+                    
+                    # The shared processor keeps its own defaults
+                    assert processor.chunking_strategy == "recursive"
 
 @pytest.mark.asyncio
 async def test_semantic_chunker_with_document_processor(mock_ollama_client, mock_semantic_chunker, sample_document, temp_upload_dir):
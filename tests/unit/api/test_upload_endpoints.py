@@ -0,0 +1,60 @@
+"""
+Endpoint tests for single and batch document uploads
+"""
+import uuid
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import documents as documents_api
+from app.core.security import get_current_active_user
+
+@pytest.fixture
+def upload_client(tmp_path, monkeypatch):
+    """TestClient for the documents router with auth and the database stubbed out"""
+    monkeypatch.setattr("app.utils.file_utils.UPLOAD_DIR", str(tmp_path))
+    create_record = AsyncMock()
+    monkeypatch.setattr(documents_api, "_create_document_record", create_record)
+
+    app = FastAPI()
+    app.include_router(documents_api.router, prefix="/api/documents")
+    app.dependency_overrides[get_current_active_user] = lambda: type("User", (), {"id": uuid.uuid4()})()
+
+    client = TestClient(app)
+    client.create_record = create_record
+    return client
+
+def test_upload_accepts_small_valid_file(upload_client, tmp_path):
+    """Test that a small text file uploads successfully"""
+    response = upload_client.post(
+        "/api/documents/upload",
+        files={"file": ("notes.txt", b"A small test document.", "text/plain")},
+        data={"tags": "test", "folder": "/test"}
+    )
+
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["success"] is True
+    assert result["file_size"] == len(b"A small test document.")
+    assert (tmp_path / result["document_id"] / "notes.txt").exists()
+    upload_client.create_record.assert_awaited_once()
+
+def test_upload_batch_accepts_small_valid_files(upload_client, tmp_path):
+    """Test that a batch of small valid files uploads successfully"""
+    response = upload_client.post(
+        "/api/documents/upload-batch",
+        files=[
+            ("files", ("a.txt", b"First document.", "text/plain")),
+            ("files", ("b.md", b"# Second document", "text/markdown"))
+        ],
+        data={"process": "false"}
+    )
+
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["success"] is True
+    assert [doc["success"] for doc in result["documents"]] == [True, True]
+    for doc in result["documents"]:
+        assert (tmp_path / doc["document_id"] / doc["filename"]).exists()
@@ -182,4 +182,54 @@ class TestDocumentRepository:
                 assert result is True
             except AttributeError:
                 # If neither method exists, skip the test
-                pytest.skip("Repository does not implement delete_document or delete")
\ No newline at end of file
+                pytest.skip("Repository does not implement delete_document or delete")
+
+@pytest.mark.asyncio
+async def test_bulk_replace_chunks_spans_documents():
+    """Test that chunks of several documents are replaced in one bulk write"""
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+    
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        # Only the columns the bulk path touches
+        await conn.execute(text(
+            "CREATE TABLE documents (id CHAR(32) PRIMARY KEY, processing_status VARCHAR, last_accessed DATETIME)"
+        ))
+        await conn.execute(text(
+            "CREATE TABLE chunks (id CHAR(32) PRIMARY KEY, document_id CHAR(32), content TEXT, "
+            "chunk_metadata JSON, \"index\" INTEGER, embedding_quality FLOAT, created_at DATETIME)"
+        ))
+    
+    first_id, second_id = uuid.uuid4(), uuid.uuid4()
+    try:
+        async with AsyncSession(engine) as session:
+            for document_id in (first_id, second_id):
+                await session.execute(
+                    text("INSERT INTO documents (id, processing_status) VALUES (:id, 'processing')"),
+                    {"id": document_id.hex}
+                )
+            await session.commit()
+            
+            repo = DocumentRepository(session)
+            await repo.bulk_replace_chunks({str(first_id): [{"content": "stale"}]})
+            written = await repo.bulk_replace_chunks(
+                {
+                    str(first_id): [{"content": "a", "metadata": {"page": 1}}, {"content": "b"}],
+                    second_id: [{"content": "c"}]
+                },
+                batch_size=2
+            )
+            
+            rows = (await session.execute(text(
+                "SELECT document_id, content, \"index\" FROM chunks ORDER BY content"
+            ))).fetchall()
+            statuses = (await session.execute(text("SELECT processing_status FROM documents"))).scalars().all()
+    finally:
+        await engine.dispose()
+    
+    assert written == 3
+    assert [(row.document_id, row.content, row.index) for row in rows] == [
+        (first_id.hex, "a", 0), (first_id.hex, "b", 1), (second_id.hex, "c", 0)
+    ]
+    assert statuses == ["completed", "completed"]
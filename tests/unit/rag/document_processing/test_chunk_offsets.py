@@ -0,0 +1,70 @@
+"""
+Unit tests for chunk offsets and offset-based security metadata in DocumentProcessor
+"""
+import pytest
+from langchain.schema.document import Document as LangchainDocument
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from app.cache.chunking_decision_cache import ChunkingDecisionCache
+from app.rag.document_processor import DocumentProcessor
+
+@pytest.fixture
+def processor(tmp_path):
+    """Document processor writing to a temporary upload directory"""
+    return DocumentProcessor(
+        upload_dir=str(tmp_path),
+        decision_cache=ChunkingDecisionCache(persist=False)
+    )
+
+def test_chunks_carry_document_offsets(processor):
+    """Test that each chunk records where it starts and ends, across pages"""
+    pages = [
+        LangchainDocument(page_content="alpha beta gamma. " * 20, metadata={"char_start": 0}),
+        LangchainDocument(page_content="delta epsilon zeta. " * 20, metadata={"char_start": 360})
+    ]
+    splitter = RecursiveCharacterTextSplitter(chunk_size=100, chunk_overlap=20)
+
+    chunks = processor._split_document(pages, splitter)
+
+    for chunk in chunks:
+        page = pages[0] if chunk.metadata["start_index"] < 360 else pages[1]
+        local_start = chunk.metadata["start_index"] - page.metadata["char_start"]
+        assert page.page_content[local_start:local_start + len(chunk.page_content)] == chunk.page_content
+        assert chunk.metadata["end_index"] - chunk.metadata["start_index"] == len(chunk.page_content)
+    starts = [chunk.metadata["start_index"] for chunk in chunks]
+    assert starts == sorted(starts)
+
+def test_section_permissions_follow_offsets(processor):
+    """Test that only chunks containing a restricted section get its permissions"""
+    text = "Public introduction text. " * 8 + "CONFIDENTIAL payroll figures. " + "Closing remarks here. " * 8
+    doc = LangchainDocument(
+        page_content=text,
+        metadata={
+            "user_id": "owner",
+            "is_public": True,
+            "section_permissions": {"CONFIDENTIAL payroll": {"is_public": False, "shared_with": ["hr"]}}
+        }
+    )
+    splitter = RecursiveCharacterTextSplitter(chunk_size=80, chunk_overlap=0)
+
+    chunks = processor._split_document([doc], splitter)
+
+    restricted = [chunk for chunk in chunks if chunk.metadata["is_public"] is False]
+    assert restricted
+    assert all("CONFIDENTIAL payroll" in chunk.page_content for chunk in restricted)
+    assert all(chunk.metadata["shared_with"] == ["hr"] for chunk in restricted)
+    assert all(chunk.metadata["user_id"] == "owner" for chunk in chunks)
+    assert any(chunk.metadata["is_public"] is True for chunk in chunks)
+
+def test_chunk_not_found_in_source_falls_back_to_text_match(processor):
+    """Test that a chunk without offsets still gets section permissions"""
+    doc = LangchainDocument(
+        page_content="original text",
+        metadata={"is_public": True, "section_permissions": {"secret": {"is_public": False}}}
+    )
+    chunk = LangchainDocument(page_content="rewritten secret text", metadata={})
+
+    processor._apply_security_metadata([doc], [chunk])
+
+    assert "start_index" not in chunk.metadata
+    assert chunk.metadata["is_public"] is False
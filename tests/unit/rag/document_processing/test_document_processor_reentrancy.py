@@ -0,0 +1,66 @@
+"""
+Unit tests for per-call chunking plans and the splitter cache in DocumentProcessor
+"""
+import os
+import asyncio
+import pytest
+
+from app.cache.chunking_decision_cache import ChunkingDecisionCache
+from app.models.document import Document
+from app.rag.document_processor import DocumentProcessor, ChunkingPlan
+
+@pytest.fixture
+def processor(tmp_path):
+    """Document processor writing to a temporary upload directory"""
+    return DocumentProcessor(
+        upload_dir=str(tmp_path),
+        chunk_size=200,
+        chunk_overlap=20,
+        decision_cache=ChunkingDecisionCache(persist=False)
+    )
+
+def _write_document(upload_dir, document):
+    """Write a document's content to where the processor expects it"""
+    path = os.path.join(upload_dir, document.id, document.filename)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(document.content)
+
+def test_splitter_cache_reuses_instances(processor):
+    """Test that equal plans share one splitter and different plans do not"""
+    plan = ChunkingPlan(strategy="recursive", chunk_size=300, chunk_overlap=30, file_ext=".md")
+
+    first = processor._get_text_splitter(plan=plan)
+    again = processor._get_text_splitter(plan=ChunkingPlan(**plan.model_dump()))
+    other = processor._get_text_splitter(plan=plan.model_copy(update={"chunk_size": 400}))
+
+    assert first is again
+    assert first is not other
+
+def test_chunking_plan_is_immutable():
+    """Test that a plan cannot be modified after creation"""
+    plan = ChunkingPlan(strategy="token")
+    with pytest.raises(Exception):
+        plan.strategy = "recursive"
+
+@pytest.mark.asyncio
+async def test_concurrent_documents_use_their_own_plans(processor, tmp_path):
+    """Test that concurrent calls neither see nor change each other's strategy"""
+    small = Document(id="doc-small", filename="small.md", content="word " * 400)
+    large = Document(id="doc-large", filename="large.md", content="word " * 400)
+    for document in (small, large):
+        _write_document(str(tmp_path), document)
+
+    small_decision = {"strategy": "recursive", "parameters": {"chunk_size": 100, "chunk_overlap": 0}}
+    large_decision = {"strategy": "recursive", "parameters": {"chunk_size": 1000, "chunk_overlap": 0}}
+
+    small_result, large_result = await asyncio.gather(
+        processor.process_document(small, analysis_result=small_decision),
+        processor.process_document(large, analysis_result=large_decision)
+    )
+
+    assert len(small_result.chunks) > len(large_result.chunks)
+    # The processor's own defaults are untouched
+    assert processor.chunking_strategy == "recursive"
+    assert processor.chunk_size == 200
+    assert processor.chunk_overlap == 20
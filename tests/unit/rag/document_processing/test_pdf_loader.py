@@ -0,0 +1,94 @@
+"""
+Unit tests for the streaming PDF loader and the streaming split path
+"""
+import os
+import shutil
+import pytest
+
+from app.cache.chunking_decision_cache import ChunkingDecisionCache
+from app.models.document import Document
+from app.rag.document_processor import DocumentProcessor
+from app.rag.pdf_loader import StreamingPDFLoader
+
+SAMPLE_PDF = os.path.join(os.path.dirname(__file__), "..", "..", "..", "data", "sample_report.pdf")
+
+def test_pages_carry_provenance_metadata():
+    """Test that each page has its page number and contiguous offsets"""
+    pages = list(StreamingPDFLoader(SAMPLE_PDF).lazy_load())
+
+    assert [page.metadata["page_number"] for page in pages] == [1, 2]
+    assert [page.metadata["page"] for page in pages] == [0, 1]
+    assert pages[0].metadata["char_start"] == 0
+    assert pages[1].metadata["char_start"] == pages[0].metadata["char_end"]
+    assert pages[1].metadata["byte_start"] == pages[0].metadata["byte_end"]
+    for page in pages:
+        assert page.metadata["char_end"] - page.metadata["char_start"] == len(page.page_content)
+        assert page.metadata["total_pages"] == 2
+
+def test_pages_are_yielded_lazily():
+    """Test that pages are produced on demand and batched"""
+    loader = StreamingPDFLoader(SAMPLE_PDF)
+
+    first = next(loader.lazy_load())
+    assert first.metadata["page_number"] == 1
+
+    batches = list(loader.lazy_load_batches(batch_size=1))
+    assert [len(batch) for batch in batches] == [1, 1]
+
+def test_unparseable_file_falls_back_to_text_blocks(tmp_path):
+    """Test that a broken PDF is decoded as text in blocks with offsets"""
+    path = tmp_path / "broken.pdf"
+    path.write_bytes(b"not a pdf\n" * 50 + b"\xff\xfe trailing line")
+
+    blocks = list(StreamingPDFLoader(str(path), fallback_block_size=64).lazy_load())
+
+    assert len(blocks) > 1
+    assert "".join(block.page_content for block in blocks) == "not a pdf\n" * 50 + " trailing line"
+    assert blocks[-1].metadata["char_end"] == len("not a pdf\n" * 50 + " trailing line")
+
+@pytest.mark.asyncio
+async def test_pdf_chunks_keep_page_numbers(tmp_path):
+    """Test that chunks of a streamed PDF know which page they came from"""
+    document = Document(id="pdf-doc", filename="report.pdf", content="")
+    os.makedirs(tmp_path / document.id)
+    shutil.copy(SAMPLE_PDF, tmp_path / document.id / document.filename)
+
+    processor = DocumentProcessor(
+        upload_dir=str(tmp_path),
+        decision_cache=ChunkingDecisionCache(persist=False)
+    )
+    decision = {"strategy": "recursive", "parameters": {"chunk_size": 300, "chunk_overlap": 0}}
+
+    processed = await processor.process_document(document, analysis_result=decision)
+
+    pages = {chunk.metadata["page_number"] for chunk in processed.chunks}
+    assert pages == {1, 2}
+
+@pytest.mark.asyncio
+async def test_streamed_chunks_are_limited_as_they_arrive(tmp_path):
+    """Test that a long stream keeps a bounded, evenly spaced sample of chunks"""
+    from langchain.schema.document import Document as LangchainDocument
+    from app.rag.document_processor import MAX_CHUNKS
+
+    class PageSplitter:
+        """Splitter that cuts every page into five chunks"""
+        def split_documents(self, docs):
+            return [
+                LangchainDocument(page_content=f"{doc.page_content}-{i}", metadata=dict(doc.metadata))
+                for doc in docs for i in range(5)
+            ]
+
+    processor = DocumentProcessor(upload_dir=str(tmp_path), decision_cache=ChunkingDecisionCache(persist=False))
+    batches = iter([
+        [LangchainDocument(page_content=f"p{page}", metadata={"page": page})]
+        for page in range(200)
+    ])
+
+    chunks = await processor._split_stream_async(batches, PageSplitter())
+
+    assert len(chunks) == MAX_CHUNKS
+    assert chunks[0].page_content == "p0-0"
+    # The sample reaches the end of the document, not just its first pages
+    assert chunks[-1].metadata["page"] >= 150
+    pages = [chunk.metadata["page"] for chunk in chunks]
+    assert pages == sorted(pages)
@@ -0,0 +1,114 @@
+"""
+Unit tests for token-budgeted context packing in ContextBuilder
+"""
+import pytest
+
+from app.rag.engine.components.context_builder import ContextBuilder
+from app.rag.engine.utils.token_budget import TokenEstimator, estimate_tokens
+
+def _doc(chunk_id, words, score):
+    """Retrieved document with the given number of words"""
+    return {
+        "document_id": f"doc-{chunk_id}",
+        "chunk_id": chunk_id,
+        "content": " ".join(["token"] * words),
+        "relevance_score": score,
+        "metadata": {"filename": f"{chunk_id}.txt"}
+    }
+
+def _builder():
+    """Context builder with its own estimator"""
+    builder = ContextBuilder()
+    builder.token_estimator = TokenEstimator()
+    return builder
+
+def test_packs_by_relevance_per_token():
+    """Test that short relevant chunks win over one long, slightly more relevant chunk"""
+    builder = _builder()
+    documents = [_doc("long", 400, 0.9), _doc("short-a", 50, 0.8), _doc("short-b", 50, 0.7)]
+
+    packed = builder._pack_documents(documents, budget=200, model="llama3")
+
+    assert [doc["chunk_id"] for doc in packed] == ["short-a", "short-b"]
+
+def test_packing_keeps_retrieval_order_and_budget():
+    """Test that packed documents stay in retrieval order and fit the budget"""
+    builder = _builder()
+    documents = [_doc(f"c{i}", 40 + 10 * i, 1.0 - i * 0.1) for i in range(6)]
+    budget = 150
+
+    packed = builder._pack_documents(documents, budget=budget, model="llama3")
+
+    ids = [doc["chunk_id"] for doc in packed]
+    assert ids == sorted(ids)
+    assert sum(builder._document_tokens(doc, "llama3") for doc in packed) <= budget
+
+def test_oversized_top_document_is_truncated():
+    """Test that the most relevant document is cut down when nothing fits whole"""
+    builder = _builder()
+    documents = [_doc("a", 500, 0.5), _doc("b", 600, 0.9)]
+
+    packed = builder._pack_documents(documents, budget=100, model="llama3")
+
+    assert len(packed) == 1
+    assert packed[0]["chunk_id"] == "b"
+    assert builder._document_tokens(packed[0], "llama3") <= 100
+    assert documents[1]["content"].startswith(packed[0]["content"])
+
+def test_token_counts_are_cached_per_chunk():
+    """Test that packing the same chunks again only hits the cache"""
+    builder = _builder()
+    documents = [_doc(f"c{i}", 30, 0.5) for i in range(5)]
+
+    builder._pack_documents(documents, budget=1000, model="llama3")
+    misses = builder.token_estimator.stats["misses"]
+    builder._pack_documents(documents, budget=1000, model="llama3")
+
+    assert misses == 5
+    assert builder.token_estimator.stats["misses"] == misses
+    assert builder.token_estimator.stats["hits"] == 5
+
+def test_calibration_scales_counts_per_model():
+    """Test that reported token counts calibrate one model without affecting others"""
+    estimator = TokenEstimator()
+    text = " ".join(["word"] * 200)
+    estimated = estimate_tokens(text)
+
+    estimator.observe("llama3", text, int(estimated * 1.5))
+    # Reason: a prompt served from the server's prefix cache under-reports and is ignored
+    estimator.observe("llama3", text, 3)
+
+    assert estimator.factor("llama3") == pytest.approx(1.5, rel=0.01)
+    assert estimator.factor("mistral") == 1.0
+    assert estimator.count(text, "llama3") > estimator.count(text, "mistral")
+
+def test_budget_reserves_prompt_history_and_answer():
+    """Test that the context budget shrinks with history and the answer length"""
+    builder = _builder()
+
+    base = builder.get_context_budget(query="q", model="llama3", model_parameters={"num_ctx": 4096})
+    with_history = builder.get_context_budget(
+        query="q",
+        model="llama3",
+        conversation_context="User: hello there\nAssistant: hi" * 20,
+        model_parameters={"num_ctx": 4096}
+    )
+    longer_answer = builder.get_context_budget(
+        query="q", model="llama3", model_parameters={"num_ctx": 4096, "num_predict": 2048}
+    )
+
+    assert 0 < with_history < base < 4096
+    assert longer_answer < base
+
+@pytest.mark.asyncio
+async def test_build_context_numbers_packed_sources():
+    """Test that citations are numbered by position among the packed documents"""
+    builder = _builder()
+    documents = [_doc("long", 3000, 0.9), _doc("short", 20, 0.8)]
+
+    context, sources = await builder.build_context(
+        documents=documents, query="q", model="llama3", model_parameters={"num_ctx": 2048}
+    )
+
+    assert [source["chunk_id"] for source in sources] == ["short"]
+    assert context.startswith("[1] Source: short.txt")
@@ -0,0 +1,67 @@
+"""
+Tests for judge-enhanced retrieval in the RetrievalComponent
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.rag.engine.components.retrieval import RetrievalComponent
+
+def _chunk(chunk_id, distance):
+    return {"chunk_id": chunk_id, "content": f"Content of {chunk_id}", "metadata": {}, "distance": distance}
+
+def _component(evaluation, additional_results):
+    """Retrieval component whose first search finds chunk1 and chunk2"""
+    vector_store = MagicMock()
+    vector_store.search = AsyncMock(side_effect=[
+        [_chunk("chunk1", 0.6), _chunk("chunk2", 0.7)],
+        additional_results
+    ])
+    judge = MagicMock()
+    judge.analyze_query = AsyncMock(return_value={
+        "complexity": "moderate",
+        "parameters": {"k": 5, "threshold": 0.4, "reranking": True}
+    })
+    judge.evaluate_and_refine = AsyncMock(return_value=evaluation)
+    judge.evaluate_chunks = AsyncMock(return_value={"relevance_scores": {"chunk3": 0.9}, "needs_refinement": False})
+    judge.refine_query = AsyncMock()
+    return RetrievalComponent(vector_store=vector_store, retrieval_judge=judge), judge
+
+@pytest.mark.asyncio
+async def test_refinement_judges_only_new_chunks():
+    """Test that the refined query comes from the evaluation and only new chunks are re-scored"""
+    component, judge = _component(
+        evaluation={
+            "relevance_scores": {"chunk1": 0.5, "chunk2": 0.1},
+            "needs_refinement": True,
+            "refined_query": "refined query"
+        },
+        additional_results=[_chunk("chunk2", 0.2), _chunk("chunk3", 0.3)]
+    )
+
+    documents, state = await component.retrieve("query", top_k=5)
+
+    judge.refine_query.assert_not_called()
+    judge.evaluate_and_refine.assert_awaited_once()
+    assert component.vector_store.search.call_args.kwargs["query"] == "refined query"
+    judge.evaluate_chunks.assert_awaited_once()
+    assert [chunk["chunk_id"] for chunk in judge.evaluate_chunks.call_args.args[1]] == ["chunk3"]
+    # chunk2 keeps its first score and is filtered out; chunk3 gets its new score
+    assert [(doc["chunk_id"], doc["relevance_score"]) for doc in documents] == [("chunk3", 0.9), ("chunk1", 0.5)]
+
+@pytest.mark.asyncio
+async def test_no_refinement_makes_one_judge_call():
+    """Test that relevant results skip the refined search and re-evaluation"""
+    component, judge = _component(
+        evaluation={
+            "relevance_scores": {"chunk1": 0.8, "chunk2": 0.7},
+            "needs_refinement": False,
+            "refined_query": "query"
+        },
+        additional_results=[]
+    )
+
+    documents, state = await component.retrieve("query", top_k=5)
+
+    assert component.vector_store.search.await_count == 1
+    judge.evaluate_chunks.assert_not_called()
+    assert [doc["chunk_id"] for doc in documents] == ["chunk1", "chunk2"]
@@ -0,0 +1,61 @@
+"""
+Unit tests for caching and replaying streamed responses in GenerationComponent
+"""
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from app.cache.llm_response_cache import LLMResponseCache
+from app.rag.engine.components.generation import GenerationComponent
+from app.rag.ollama_client import StreamErrorMessage
+
+def _component(tokens):
+    """Generation component whose LLM streams the given tokens"""
+    async def stream():
+        for token in tokens:
+            yield token
+
+    client = MagicMock()
+    client.generate = AsyncMock(side_effect=lambda **kwargs: stream())
+    cache_manager = SimpleNamespace(llm_response_cache=LLMResponseCache(persist=False))
+    return GenerationComponent(ollama_client=client, cache_manager=cache_manager)
+
+async def _collect(component, prompt="What is RAG?"):
+    """Run a streaming generation and join its content"""
+    chunks = [chunk async for chunk in component._generate_streaming(prompt, "llama3", "system", {"temperature": 0.0})]
+    return "".join(chunk["content"] for chunk in chunks), len(chunks)
+
+@pytest.mark.asyncio
+async def test_completed_stream_is_cached_and_replayed():
+    """Test that a second identical request is replayed from the cache"""
+    component = _component(["Retrieval ", "augmented ", "generation ", "combines search and LLMs."])
+
+    first, _ = await _collect(component)
+    second, chunk_count = await _collect(component)
+
+    assert first == second == "Retrieval augmented generation combines search and LLMs."
+    assert component.ollama_client.generate.await_count == 1
+    # The replay is paced in several chunks rather than one blob
+    assert chunk_count > 1
+
+@pytest.mark.asyncio
+async def test_failed_stream_is_not_cached():
+    """Test that a stream ending in an error message is not stored"""
+    component = _component(["Partial answer ", StreamErrorMessage("\n\nCouldn't connect to the language model server.")])
+
+    await _collect(component)
+    await _collect(component)
+
+    assert component.ollama_client.generate.await_count == 2
+
+@pytest.mark.asyncio
+async def test_abandoned_stream_is_not_cached():
+    """Test that a stream the client stopped reading is not stored"""
+    component = _component(["A long answer ", "that the client ", "never finished reading."])
+
+    stream = component._generate_streaming("What is RAG?", "llama3", "system", {})
+    await stream.__anext__()
+    await stream.aclose()
+    await _collect(component)
+
+    assert component.ollama_client.generate.await_count == 2
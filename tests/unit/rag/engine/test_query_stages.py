@@ -0,0 +1,170 @@
+"""
+Tests for concurrent stage execution in RAGEngine.query
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.rag.engine.rag_engine import RAGEngine
+from app.rag.engine.utils.timing import StageTimeline
+from app.rag.query_metrics import get_query_monitor
+
+DELAY = 0.2
+
+def _engine(processed_query="test query", retrieve_delay=DELAY):
+    """RAG engine whose memory and retrieval steps each take DELAY seconds"""
+    engine = RAGEngine(vector_store=AsyncMock(), ollama_client=AsyncMock())
+    retrieved = []
+
+    async def process_memory_operations(query, user_id=None, conversation_id=None):
+        await asyncio.sleep(DELAY)
+        return processed_query, None, None
+
+    async def retrieve(query, top_k=10, metadata_filters=None, user_id=None):
+        retrieved.append(query)
+        await asyncio.sleep(retrieve_delay)
+        return [], "no_documents"
+
+    engine.memory_component = MagicMock()
+    engine.memory_component.process_memory_operations = process_memory_operations
+    engine.memory_component.cleanup_memory = AsyncMock()
+    engine.memory_component.store_message = AsyncMock()
+    engine.retrieval_component = MagicMock()
+    engine.retrieval_component.retrieve = retrieve
+    engine.generation_component = MagicMock()
+    engine.generation_component.generate = AsyncMock(return_value={"content": "answer"})
+    engine._record_analytics = AsyncMock()
+    return engine, retrieved
+
+def test_critical_path_follows_latest_dependency():
+    """Test that the critical path walks back through the dependency that ended last"""
+    timeline = StageTimeline()
+    timeline.stages = {
+        "ids": {"start": 0.0, "end": 0.1, "after": (), "cancelled": False},
+        "memory": {"start": 0.1, "end": 0.3, "after": ("ids",), "cancelled": False},
+        "retrieval": {"start": 0.1, "end": 0.9, "after": ("ids",), "cancelled": False},
+        "history": {"start": 0.0, "end": 0.2, "after": (), "cancelled": False},
+        "generation": {"start": 0.9, "end": 2.0, "after": ("memory", "retrieval", "history"), "cancelled": False}
+    }
+
+    assert timeline.critical_path() == ["ids", "retrieval", "generation"]
+
+@pytest.mark.asyncio
+async def test_memory_and_retrieval_run_concurrently():
+    """Test that retrieval overlaps memory processing instead of following it"""
+    engine, retrieved = _engine()
+    loop = asyncio.get_running_loop()
+
+    started = loop.time()
+    result = await engine.query(query="test query", use_rag=True, stream=False)
+    elapsed = loop.time() - started
+
+    assert result["answer"] == "answer"
+    assert retrieved == ["test query"]
+    assert elapsed < 2 * DELAY
+
+@pytest.mark.asyncio
+async def test_rewritten_query_restarts_retrieval():
+    """Test that speculative retrieval is redone when memory processing changes the query"""
+    engine, retrieved = _engine(processed_query="rewritten query")
+
+    await engine.query(query="remember this: test query", use_rag=True, stream=False)
+
+    assert retrieved == ["remember this: test query", "rewritten query"]
+    assert engine.generation_component.generate.call_args.kwargs["query"] == "rewritten query"
+
+@pytest.mark.asyncio
+async def test_cancelling_the_query_cancels_running_stages():
+    """Test that a disconnected client stops stages still in flight"""
+    engine, retrieved = _engine(retrieve_delay=10)
+    cancelled = asyncio.Event()
+    retrieve = engine.retrieval_component.retrieve
+
+    async def tracked_retrieve(**kwargs):
+        try:
+            return await retrieve(**kwargs)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    engine.retrieval_component.retrieve = tracked_retrieve
+    task = asyncio.ensure_future(engine.query(query="test query", use_rag=True, stream=False))
+    await asyncio.sleep(DELAY * 1.5)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert cancelled.is_set()
+
+@pytest.mark.asyncio
+async def test_streaming_reports_time_to_first_token():
+    """Test that the stream wrapper records time-to-first-token when the stream ends"""
+    engine, _ = _engine()
+
+    async def stream():
+        yield {"content": "Hel"}
+        yield {"content": "lo"}
+
+    engine.generation_component.generate = AsyncMock(return_value=stream())
+    monitor = get_query_monitor()
+    monitor.reset()
+
+    result = await engine.query(query="test query", use_rag=True, stream=True)
+    chunks = [chunk async for chunk in result["stream"]]
+
+    assert "".join(chunk["content"] for chunk in chunks) == "Hello"
+    stats = monitor.get_stats()
+    assert stats["queries"] == 1
+    assert stats["time_to_first_token"]["count"] == 1
+    assert stats["time_to_first_token"]["max"] >= DELAY
+    assert "retrieval" in stats["stages"] and "streaming" in stats["stages"]
+    assert list(stats["critical_paths"])[0].endswith("response_generation > streaming")
+
+@pytest.mark.asyncio
+async def test_closing_the_stream_releases_the_llm_stream(monkeypatch):
+    """Test that closing the tracked stream closes the upstream HTTP stream and frees its slot"""
+    import httpx
+    from app.rag import ollama_client as ollama_module
+    from app.rag import llm_scheduler as scheduler_module
+    from app.rag.llm_scheduler import LLMScheduler
+    from app.rag.ollama_client import OllamaClient, close_ollama_http_client
+    from app.rag.engine.components.generation import GenerationComponent
+
+    closed = asyncio.Event()
+
+    class SlowStream(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            for i in range(1000):
+                yield f'{{"response": "token{i} "}}\n'.encode()
+                await asyncio.sleep(0.01)
+
+        async def aclose(self):
+            closed.set()
+
+    async def handler(request):
+        return httpx.Response(200, stream=SlowStream())
+
+    scheduler = LLMScheduler()
+    monkeypatch.setattr(scheduler_module, "_scheduler_instance", scheduler)
+    monkeypatch.setattr(ollama_module, "LLM_SINGLE_FLIGHT_ENABLED", True)
+    await close_ollama_http_client()
+    ollama_module._http_clients[asyncio.get_running_loop()] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    try:
+        engine, _ = _engine()
+        generation = GenerationComponent(ollama_client=OllamaClient())
+        generation._create_prompts = AsyncMock(return_value=("system", "a streamed question"))
+        engine.generation_component = generation
+
+        result = await engine.query(query="test query", use_rag=True, stream=True, model="llama3")
+        stream = result["stream"]
+        first = await stream.__anext__()
+        assert first["content"] == "token0 "
+        assert scheduler.get_stats()["models"]["llama3"]["active"] == 1
+
+        await stream.aclose()
+
+        assert closed.is_set()
+        assert scheduler.get_stats()["models"]["llama3"]["active"] == 0
+    finally:
+        await close_ollama_http_client()
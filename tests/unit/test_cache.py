@@ -2,9 +2,11 @@ import os
 import time
 import unittest
 import shutil
+import pickle
+import sqlite3
 from typing import Dict, Any, List
 
-from app.cache.base import Cache
+from app.cache.base import Cache, flush_all_caches
 from app.cache.vector_search_cache import VectorSearchCache
 from app.cache.document_cache import DocumentCache
 from app.cache.llm_response_cache import LLMResponseCache
@@ -27,6 +29,8 @@ class TestCache(unittest.TestCase):
     
     def tearDown(self):
         """Clean up test environment"""
+        # Finish pending writes so the background flusher doesn't race the removal
+        flush_all_caches()
         if os.path.exists(self.test_cache_dir):
             shutil.rmtree(self.test_cache_dir)
     
@@ -144,6 +148,96 @@ class TestCache(unittest.TestCase):
         # Check that the value was loaded
         self.assertEqual(new_cache.get("key1"), "value1")
 
+    def _disk_rows(self) -> Dict[str, Any]:
+        """Read the entries currently on disk"""
+        db_file = os.path.join(self.test_cache_dir, "test_cache", "cache.sqlite3")
+        with sqlite3.connect(db_file) as db:
+            return {key: pickle.loads(value) for key, value in db.execute("SELECT key, value FROM entries")}
+    
+    def test_writes_are_deferred_until_flush(self):
+        """Test that set and delete only queue the changed entries"""
+        self.cache.set("key1", "value1")
+        self.cache.set("key2", "value2")
+        self.cache.flush()
+        self.cache.delete("key1")
+        self.cache.set("key3", "value3")
+        
+        self.assertEqual(self.cache.get_stats()["pending_writes"], 2)
+        self.assertEqual(self._disk_rows(), {"key1": "value1", "key2": "value2"})
+        
+        self.cache.flush()
+        self.assertEqual(self.cache.get_stats()["pending_writes"], 0)
+        self.assertEqual(self._disk_rows(), {"key2": "value2", "key3": "value3"})
+    
+    def test_failed_flush_is_retried(self):
+        """Test that changes of a failed flush are kept, without overwriting newer ones"""
+        self.cache.set("key1", "value1")
+        self.cache.flush()
+        self.cache.set("key2", "value2")
+        self.cache.delete("key1")
+        
+        # Break the database connection for one flush
+        self.cache._db.close()
+        self.cache.flush()
+        self.assertEqual(self.cache.get_stats()["pending_writes"], 2)
+        
+        self.cache.set("key2", "newer")
+        self.cache._db = sqlite3.connect(self.cache.db_file, check_same_thread=False)
+        self.cache.flush()
+        
+        self.assertEqual(self._disk_rows(), {"key2": "newer"})
+    
+    def test_prune_and_clear_are_persisted(self):
+        """Test that pruned and cleared entries are removed from disk"""
+        for i in range(6):
+            self.cache.set(f"key{i}", f"value{i}")
+        self.cache.flush()
+        self.assertEqual(set(self._disk_rows()), set(self.cache.get_keys()))
+        
+        self.cache.clear()
+        self.cache.set("key9", "value9")
+        self.cache.flush()
+        self.assertEqual(self._disk_rows(), {"key9": "value9"})
+    
+    def test_values_load_lazily(self):
+        """Test that startup reads only keys and unpickles values on access"""
+        self.cache.set("key1", {"answer": 42})
+        self.cache.flush()
+        
+        new_cache = Cache[dict](name="test_cache", ttl=60, persist=True, persist_dir=self.test_cache_dir)
+        
+        self.assertEqual(new_cache.get_keys(), ["key1"])
+        self.assertNotIn("value", dict(new_cache.cache["key1"]))
+        self.assertEqual(new_cache.get("key1"), {"answer": 42})
+    
+    def test_entries_missing_on_disk_are_skipped(self):
+        """Test that subclasses iterating the cache skip entries whose row is gone"""
+        cache = LLMResponseCache(ttl=60, persist=True, persist_dir=self.test_cache_dir)
+        cache.set("a", {"model": "llama3", "prompt": "hello"})
+        cache.set("b", {"model": "llama3", "prompt": "hi"})
+        cache.flush()
+        
+        reloaded = LLMResponseCache(ttl=60, persist=True, persist_dir=self.test_cache_dir)
+        with sqlite3.connect(reloaded.db_file) as db:
+            db.execute("DELETE FROM entries WHERE key = 'b'")
+        self.assertEqual(set(reloaded.get_keys()), {"a", "b"})
+        
+        self.assertEqual(reloaded.get_response_by_prompt_prefix("h"), [{"model": "llama3", "prompt": "hello"}])
+        self.assertEqual(reloaded.invalidate_by_model("llama3"), 1)
+        self.assertEqual(reloaded.get_keys(), [])
+    
+    def test_legacy_pickle_is_migrated(self):
+        """Test that a cache.pickle from older versions is moved into the store"""
+        legacy_dir = os.path.join(self.test_cache_dir, "legacy_cache")
+        os.makedirs(legacy_dir, exist_ok=True)
+        with open(os.path.join(legacy_dir, "cache.pickle"), "wb") as f:
+            pickle.dump({"old": {"value": "kept", "timestamp": time.time()}}, f)
+        
+        legacy_cache = Cache[str](name="legacy_cache", ttl=60, persist=True, persist_dir=self.test_cache_dir)
+        
+        self.assertEqual(legacy_cache.get("old"), "kept")
+        self.assertFalse(os.path.exists(os.path.join(legacy_dir, "cache.pickle")))
+
 
 class TestVectorSearchCache(unittest.TestCase):
     """Test the VectorSearchCache class"""
@@ -161,6 +255,8 @@ class TestVectorSearchCache(unittest.TestCase):
     
     def tearDown(self):
         """Clean up test environment"""
+        # Finish pending writes so the background flusher doesn't race the removal
+        flush_all_caches()
         if os.path.exists(self.test_cache_dir):
             shutil.rmtree(self.test_cache_dir)
     
@@ -255,6 +351,8 @@ class TestDocumentCache(unittest.TestCase):
     
     def tearDown(self):
         """Clean up test environment"""
+        # Finish pending writes so the background flusher doesn't race the removal
+        flush_all_caches()
         if os.path.exists(self.test_cache_dir):
             shutil.rmtree(self.test_cache_dir)
     
@@ -397,6 +495,8 @@ class TestLLMResponseCache(unittest.TestCase):
     
     def tearDown(self):
         """Clean up test environment"""
+        # Finish pending writes so the background flusher doesn't race the removal
+        flush_all_caches()
         if os.path.exists(self.test_cache_dir):
             shutil.rmtree(self.test_cache_dir)
     
@@ -523,6 +623,8 @@ class TestCacheManager(unittest.TestCase):
     
     def tearDown(self):
         """Clean up test environment"""
+        # Finish pending writes so the background flusher doesn't race the removal
+        flush_all_caches()
         if os.path.exists(self.test_cache_dir):
             shutil.rmtree(self.test_cache_dir)
     
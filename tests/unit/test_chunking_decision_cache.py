@@ -0,0 +1,132 @@
+"""
+Unit tests for the chunking decision cache
+"""
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.cache.chunking_decision_cache import ChunkingDecisionCache
+from app.models.document import Document
+from app.rag.document_processor import DocumentProcessor
+
+MARKDOWN_SAMPLE = """# Title
+
+Intro paragraph describing the document in a sentence or two.
+
+## Section
+
+- first item
+- second item
+"""
+
+PROSE_SAMPLE = """This is a long paragraph of plain prose that goes on for a while without any structure.
+It keeps going with another sentence that is similar in length to the previous one here.
+
+A second paragraph follows with more of the same narrative text and no special formatting.
+"""
+
+@pytest.fixture
+def decision_cache():
+    """Non-persistent chunking decision cache"""
+    return ChunkingDecisionCache(ttl=60, persist=False)
+
+@pytest.fixture
+def decision():
+    """Sample chunking decision"""
+    return {
+        "strategy": "markdown",
+        "parameters": {"chunk_size": 1000, "chunk_overlap": 100},
+        "justification": "Structured markdown"
+    }
+
+def test_fingerprint_is_stable_for_similar_structure():
+    """Test that small textual changes keep the same fingerprint"""
+    variant = MARKDOWN_SAMPLE.replace("Intro paragraph", "Opening paragraph")
+    assert ChunkingDecisionCache.compute_fingerprint(MARKDOWN_SAMPLE) == \
+        ChunkingDecisionCache.compute_fingerprint(variant)
+
+def test_fingerprint_differs_for_different_structure():
+    """Test that markdown and plain prose get different fingerprints"""
+    assert ChunkingDecisionCache.compute_fingerprint(MARKDOWN_SAMPLE) != \
+        ChunkingDecisionCache.compute_fingerprint(PROSE_SAMPLE)
+
+def test_fingerprint_of_empty_sample():
+    """Test that an empty sample still produces a fingerprint"""
+    assert ChunkingDecisionCache.compute_fingerprint("") == "h0-l0-t0-c0-ll0-pl0"
+
+def test_decision_round_trip_and_stats(decision_cache, decision):
+    """Test storing a decision and reading it back by file type and fingerprint"""
+    fingerprint = ChunkingDecisionCache.compute_fingerprint(MARKDOWN_SAMPLE)
+
+    assert decision_cache.get_decision("md", fingerprint) is None
+    decision_cache.set_decision("md", fingerprint, decision)
+
+    assert decision_cache.get_decision("md", fingerprint) == decision
+    # Same fingerprint under another file type is a separate entry
+    assert decision_cache.get_decision("txt", fingerprint) is None
+
+    stats = decision_cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+
+def test_expired_decision_is_not_returned(decision, monkeypatch):
+    """Test that decisions older than the TTL are ignored"""
+    cache = ChunkingDecisionCache(ttl=10, persist=False)
+    fingerprint = ChunkingDecisionCache.compute_fingerprint(PROSE_SAMPLE)
+
+    monkeypatch.setattr("app.cache.base.time.time", lambda: 1000.0)
+    cache.set_decision("txt", fingerprint, decision)
+
+    monkeypatch.setattr("app.cache.base.time.time", lambda: 1011.0)
+    assert cache.get_decision("txt", fingerprint) is None
+
+@pytest.mark.asyncio
+async def test_batch_analysis_respects_disabled_chunking_judge(decision_cache, decision, monkeypatch, tmp_path):
+    """Test that clusters skip the batch LLM analysis when the Chunking Judge is disabled"""
+    monkeypatch.setattr("app.rag.document_processor.USE_CHUNKING_JUDGE", False)
+    processor = DocumentProcessor(upload_dir=str(tmp_path), decision_cache=decision_cache)
+    processor.document_analysis_service.analyze_document = AsyncMock(return_value=decision)
+    processor.document_analysis_service.analyze_document_batch = AsyncMock()
+
+    documents = [
+        Document(filename="a.md", content=MARKDOWN_SAMPLE),
+        Document(filename="b.md", content=MARKDOWN_SAMPLE.replace("Title", "Other"))
+    ]
+    decisions = await processor.analyze_documents(documents)
+
+    processor.document_analysis_service.analyze_document_batch.assert_not_called()
+    processor.document_analysis_service.analyze_document.assert_awaited_once()
+    assert decisions == {str(doc.id): decision for doc in documents}
+
+@pytest.mark.asyncio
+async def test_batch_analysis_is_timed_per_document(decision_cache, decision, monkeypatch, tmp_path):
+    """Test that a clustered batch records one "analyze" sample per document"""
+    from app.rag.ingest_metrics import IngestMonitor
+
+    monitor = IngestMonitor()
+    monkeypatch.setattr("app.rag.document_processor.get_ingest_monitor", lambda: monitor)
+    processor = DocumentProcessor(upload_dir=str(tmp_path), decision_cache=decision_cache)
+    processor.document_analysis_service.analyze_document_batch = AsyncMock(return_value=decision)
+    monkeypatch.setattr("app.rag.document_processor.USE_CHUNKING_JUDGE", True)
+
+    documents = [Document(filename=f"{name}.md", content=MARKDOWN_SAMPLE) for name in "abc"]
+    await processor.analyze_documents(documents)
+
+    assert monitor.get_stats()["stages"]["analyze"]["count"] == 3
+
+def test_binary_files_are_not_fingerprinted_from_raw_bytes(tmp_path):
+    """Test that PDFs are sampled from extracted text and other binary files give no sample"""
+    import os
+    from app.rag.pdf_loader import StreamingPDFLoader
+
+    sample_pdf = os.path.join(os.path.dirname(__file__), "..", "data", "sample_report.pdf")
+    docx_path = tmp_path / "report.docx"
+    docx_path.write_bytes(b"PK\x03\x04" + bytes(range(256)) * 8)
+    processor = DocumentProcessor(upload_dir=str(tmp_path), decision_cache=ChunkingDecisionCache(persist=False))
+
+    pdf_sample = processor._read_content_sample(Document(filename="report.pdf", content=""), sample_pdf)
+    first_page = next(StreamingPDFLoader(sample_pdf).lazy_load())
+
+    assert pdf_sample == first_page.page_content[:3000]
+    assert "%PDF" not in pdf_sample
+    assert processor._read_content_sample(Document(filename="report.docx", content=""), str(docx_path)) == ""
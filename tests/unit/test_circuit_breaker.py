@@ -0,0 +1,163 @@
+"""
+Unit tests for circuit breakers and hedged requests
+"""
+import asyncio
+import httpx
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from app.rag import ollama_client as ollama_module
+from app.rag import circuit_breaker as breaker_module
+from app.rag import hedged_requests as hedging_module
+from app.rag.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+    CircuitOpenError,
+    STATE_CLOSED,
+    STATE_OPEN,
+    STATE_HALF_OPEN
+)
+from app.rag.hedged_requests import RequestHedger
+from app.rag.ollama_client import OllamaClient, close_ollama_http_client
+from app.rag.engine.components.retrieval import RetrievalComponent
+
+def _server_error() -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://ollama/api/generate")
+    return httpx.HTTPStatusError("Server error", request=request, response=httpx.Response(503, request=request))
+
+def _fail(breaker: CircuitBreaker, error: Exception) -> None:
+    """Run one failing call through the breaker"""
+    with pytest.raises(type(error)):
+        with breaker.call():
+            raise error
+
+def test_breaker_opens_after_consecutive_failures_and_recovers():
+    """Test that the breaker sheds requests once open and closes after a good probe"""
+    breaker = CircuitBreaker("test", failure_threshold=3, recovery_seconds=30)
+
+    for _ in range(3):
+        _fail(breaker, httpx.ConnectError("refused"))
+    assert breaker.state == STATE_OPEN
+    with pytest.raises(CircuitOpenError):
+        with breaker.call():
+            pass
+
+    # Once the recovery time has passed, a single probe is let through
+    breaker.opened_at -= 30
+    assert breaker.state == STATE_HALF_OPEN
+    breaker.acquire()
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    breaker.release()
+    with breaker.call():
+        pass
+    assert breaker.state == STATE_CLOSED
+    assert breaker.get_stats()["rejected"] == 2
+
+def test_failed_probe_reopens_the_breaker():
+    """Test that a failing half-open probe opens the breaker again"""
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_seconds=30)
+    _fail(breaker, _server_error())
+    breaker.opened_at -= 30
+
+    _fail(breaker, httpx.ReadTimeout("timed out"))
+
+    assert breaker.state == STATE_OPEN
+    assert breaker.get_stats()["opened"] == 2
+
+def test_client_errors_and_failure_rate():
+    """Test that 4xx responses don't count and a high failure rate opens the breaker"""
+    breaker = CircuitBreaker("test", failure_threshold=100, failure_rate=0.5, window_size=4)
+    request = httpx.Request("POST", "http://ollama/api/embed")
+    not_found = httpx.HTTPStatusError("Not found", request=request, response=httpx.Response(404, request=request))
+
+    _fail(breaker, not_found)
+    _fail(breaker, _server_error())
+    with breaker.call():
+        pass
+    assert breaker.state == STATE_CLOSED
+    _fail(breaker, _server_error())
+
+    assert breaker.state == STATE_OPEN
+
+@pytest.mark.asyncio
+async def test_hedge_answers_when_the_first_request_stalls():
+    """Test that a backup request is sent after the delay and the first success wins"""
+    hedger = RequestHedger(enabled=True)
+    calls = []
+
+    async def request():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            await asyncio.sleep(10)
+        return len(calls)
+
+    assert await asyncio.wait_for(hedger.run(request, delay=0.01), timeout=1) == 2
+    assert hedger.get_stats()["hedged"] == 1
+    assert hedger.get_stats()["hedge_wins"] == 1
+
+@pytest.mark.asyncio
+async def test_fast_requests_are_not_hedged():
+    """Test that no backup request is sent when the first answers in time"""
+    hedger = RequestHedger(enabled=True)
+    request = AsyncMock(return_value="ok")
+
+    assert await hedger.run(request, delay=1.0) == "ok"
+    assert request.await_count == 1
+    assert hedger.get_stats()["hedged"] == 0
+
+@pytest_asyncio.fixture
+async def failing_server(monkeypatch):
+    """Install a mock Ollama server that always fails and a fresh breaker registry"""
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        return httpx.Response(503, json={"error": "overloaded"})
+
+    monkeypatch.setattr(breaker_module, "_registry_instance", CircuitBreakerRegistry(failure_threshold=2, recovery_seconds=60))
+    monkeypatch.setattr(hedging_module, "_hedger_instance", RequestHedger(enabled=False))
+    monkeypatch.setattr(ollama_module, "LLM_SINGLE_FLIGHT_ENABLED", False)
+    monkeypatch.setattr(ollama_module.asyncio, "sleep", AsyncMock())
+    await close_ollama_http_client()
+    ollama_module._http_clients[asyncio.get_running_loop()] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    yield requests
+    await close_ollama_http_client()
+
+@pytest.mark.asyncio
+async def test_open_breaker_sheds_requests_without_calling_the_server(failing_server):
+    """Test that retries stop and later requests fail fast once the breaker opens"""
+    async with OllamaClient() as client:
+        first = await client.generate(prompt="hi", model="llama3", stream=False)
+        second = await client.generate(prompt="hi", model="llama3", stream=False)
+        stream = await client.generate(prompt="hi", model="llama3", stream=True)
+        tokens = [token async for token in stream]
+        with pytest.raises(CircuitOpenError):
+            await client.create_embedding("text", model="llama3")
+
+    # Two failed attempts open each endpoint's breaker; later retries and requests are shed
+    assert [request.url.path for request in failing_server] == ["/api/generate"] * 2 + ["/api/embeddings"] * 2
+    assert "error" in first and "not responding" in second["response"]
+    assert "not responding" in "".join(tokens)
+
+@pytest.mark.asyncio
+async def test_retrieval_skips_the_judge_while_its_breaker_is_open(monkeypatch):
+    """Test that retrieval falls back to standard retrieval when the judge model is down"""
+    registry = CircuitBreakerRegistry(failure_threshold=1)
+    monkeypatch.setattr(breaker_module, "_registry_instance", registry)
+    _fail(registry.get("/api/generate", "gemma3:4b"), _server_error())
+
+    vector_store = MagicMock()
+    vector_store.get_stats.return_value = {"count": 1}
+    vector_store.search = AsyncMock(return_value=[
+        {"chunk_id": "chunk1", "content": "test query content", "metadata": {}, "distance": 0.1}
+    ])
+    judge = MagicMock(model="gemma3:4b")
+    judge.analyze_query = AsyncMock()
+    component = RetrievalComponent(vector_store=vector_store, retrieval_judge=judge)
+
+    documents, state = await component.retrieve("test query", top_k=5)
+
+    judge.analyze_query.assert_not_called()
+    assert [doc["chunk_id"] for doc in documents] == ["chunk1"]
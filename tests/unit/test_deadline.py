@@ -0,0 +1,144 @@
+"""
+Unit tests for request deadlines
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.rag.deadline import Deadline, deadline_scope, check_deadline, get_current_deadline
+from app.rag.engine.components.generation import GenerationComponent
+from app.rag.engine.components.retrieval import RetrievalComponent
+from app.rag.response_quality_pipeline import ResponseQualityPipeline
+
+def _deadline(remaining: float) -> Deadline:
+    """Deadline of 30 seconds with the given number of seconds left"""
+    deadline = Deadline(budget_seconds=30.0, stage_seconds={"generation": 10.0, "query_refinement": 3.0})
+    deadline.started_at -= 30.0 - remaining
+    return deadline
+
+def test_stages_must_leave_the_answer_reserve():
+    """Test that optional stages only run if the answer still fits afterwards"""
+    deadline = _deadline(remaining=12.0)
+
+    assert deadline.allows("query_refinement", seconds=1.5)
+    assert not deadline.allows("query_refinement")
+    assert deadline.allows("query_refinement", reserve=0)
+    assert Deadline().allows("query_refinement")
+    assert Deadline().remaining() is None
+
+def test_check_records_degradations():
+    """Test that a stage without time is recorded in the request's degradations"""
+    deadline = _deadline(remaining=5.0)
+
+    assert check_deadline("query_refinement") is True
+    with deadline_scope(deadline):
+        assert get_current_deadline() is deadline
+        assert check_deadline("query_refinement") is False
+    assert get_current_deadline() is None
+
+    assert deadline.degradations == [{"stage": "query_refinement", "action": "skipped", "remaining_seconds": pytest.approx(5.0, abs=0.1)}]
+    assert deadline.get_summary()["degradations"] == deadline.degradations
+
+@pytest.mark.asyncio
+async def test_retrieval_falls_back_to_standard_retrieval():
+    """Test that a request without time for the judge uses standard retrieval"""
+    vector_store = MagicMock()
+    vector_store.get_stats.return_value = {"count": 1}
+    vector_store.search = AsyncMock(return_value=[
+        {"chunk_id": "chunk1", "content": "test query content", "metadata": {}, "distance": 0.1}
+    ])
+    judge = MagicMock()
+    judge.analyze_query = AsyncMock()
+    component = RetrievalComponent(vector_store=vector_store, retrieval_judge=judge)
+    deadline = _deadline(remaining=8.0)
+
+    with deadline_scope(deadline):
+        documents, state = await component.retrieve("test query", top_k=5)
+
+    judge.analyze_query.assert_not_called()
+    assert [doc["chunk_id"] for doc in documents] == ["chunk1"]
+    assert deadline.degradations[0]["stage"] == "retrieval_judge"
+    assert deadline.degradations[0]["action"] == "standard_retrieval"
+
+def test_late_answers_are_shortened():
+    """Test that the answer is capped once there is no time for a full one"""
+    component = GenerationComponent(ollama_client=AsyncMock())
+
+    with deadline_scope(_deadline(remaining=20.0)):
+        assert component._apply_deadline({"temperature": 0.1}) == {"temperature": 0.1}
+    with deadline_scope(_deadline(remaining=2.0)) as deadline:
+        assert component._apply_deadline({"temperature": 0.1})["options"] == {"num_predict": 256}
+        assert component._apply_deadline({"max_tokens": 1000}) == {"max_tokens": 1000}
+    assert deadline.degradations[0]["action"] == "short_answer"
+
+@pytest.mark.asyncio
+async def test_shortened_answers_are_not_cached():
+    """Test that a deadline-capped answer is sent with options.num_predict and not cached"""
+    ollama_client = AsyncMock()
+    ollama_client.generate = AsyncMock(return_value={"response": "Short answer", "model": "llama3"})
+    cache_manager = MagicMock()
+    cache_manager.llm_response_cache.get_response.return_value = None
+    cache_manager.llm_response_cache.should_cache_response.return_value = True
+    component = GenerationComponent(ollama_client=ollama_client, cache_manager=cache_manager)
+
+    with deadline_scope(_deadline(remaining=2.0)):
+        await component.generate(query="q", model="llama3", model_parameters={"temperature": 0.1})
+    parameters = ollama_client.generate.call_args.kwargs["parameters"]
+    assert parameters["options"]["num_predict"] == 256 and "num_predict" not in parameters
+    cache_manager.llm_response_cache.set_response.assert_not_called()
+
+    with deadline_scope(_deadline(remaining=20.0)):
+        await component.generate(query="q", model="llama3", model_parameters={"temperature": 0.1})
+    cache_manager.llm_response_cache.set_response.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_quality_pipeline_skips_evaluation_when_out_of_time():
+    """Test that the synthesized response is returned unevaluated once the budget is spent"""
+    pipeline = ResponseQualityPipeline(llm_provider=AsyncMock(), enable_audit_reports=False)
+    pipeline.synthesizer.synthesize = AsyncMock(return_value={"response": "answer", "sources": []})
+    pipeline.evaluator.evaluate = AsyncMock()
+    pipeline.refiner.refine = AsyncMock()
+
+    result = await pipeline.process(query="q", context="c", sources=[], deadline=_deadline(remaining=1.0))
+
+    assert result["response"] == "answer"
+    pipeline.evaluator.evaluate.assert_not_called()
+    pipeline.refiner.refine.assert_not_called()
+    assert [d["stage"] for d in result["degradations"]] == ["response_evaluation"]
+
+@pytest.mark.asyncio
+async def test_quality_pipeline_stops_refining_when_out_of_time():
+    """Test that refinement rounds stop once another round no longer fits"""
+    pipeline = ResponseQualityPipeline(llm_provider=AsyncMock(), enable_audit_reports=False)
+    pipeline.synthesizer.synthesize = AsyncMock(return_value={"response": "answer", "sources": []})
+    pipeline.evaluator.evaluate = AsyncMock(return_value={"overall_score": 3, "hallucination_detected": False})
+    pipeline.refiner.refine = AsyncMock(return_value={"refined_response": "better answer"})
+
+    result = await pipeline.process(query="q", context="c", sources=[], deadline=_deadline(remaining=10.0))
+
+    pipeline.evaluator.evaluate.assert_awaited_once()
+    pipeline.refiner.refine.assert_not_called()
+    assert result["degradations"][0]["stage"] == "response_refinement"
+    assert result["refinement_iterations"] == 0
+
+@pytest.mark.asyncio
+async def test_streamed_responses_report_degradations():
+    """Test that the event stream tells the client which stages were skipped"""
+    import json
+    import uuid
+    from app.api.chat.utils.streaming import create_event_generator
+
+    async def tokens():
+        yield "Short "
+        yield "answer"
+
+    repository = MagicMock()
+    repository.add_message = AsyncMock(return_value=MagicMock(id=uuid.uuid4()))
+    degradations = [{"stage": "generation", "action": "short_answer", "remaining_seconds": 2.0}]
+
+    events = [event async for event in create_event_generator(
+        str(uuid.uuid4()), tokens(), repository, [], degradations
+    )]
+
+    assert events[1] == {"event": "degradations", "data": json.dumps(degradations)}
+    assert events[2:] == ["Short ", "answer"]
+    assert repository.add_message.call_args.kwargs["content"] == "Short answer"
@@ -0,0 +1,108 @@
+"""
+Unit tests for the Embedding Semantic Chunker
+"""
+import pytest
+from unittest.mock import AsyncMock
+
+import numpy as np
+
+from app.rag.chunkers.embedding_chunker import EmbeddingSemanticChunker
+
+TOPIC_A = "Cats are small domesticated felines that enjoy sleeping in the sun. "
+TOPIC_B = "Rust is a systems programming language focused on memory safety. "
+
+def _topic_embedding(text):
+    """Embed a window by counting how much of each topic it mentions"""
+    return [float(text.count("Cats")), float(text.count("Rust"))]
+
+@pytest.fixture
+def mock_ollama_client():
+    """Create a mock Ollama client whose embeddings separate the two topics"""
+    client = AsyncMock()
+
+    async def create_embeddings(texts, model=None):
+        return [_topic_embedding(text) for text in texts]
+
+    client.create_embeddings.side_effect = create_embeddings
+    return client
+
+@pytest.fixture
+def two_topic_text():
+    """Text with six sentences about one topic followed by six about another"""
+    return TOPIC_A * 6 + TOPIC_B * 6
+
+def test_split_sentences_preserves_text(two_topic_text):
+    """Test that sentences concatenate back to the original text"""
+    chunker = EmbeddingSemanticChunker(ollama_client=AsyncMock(), chunk_size=200)
+    sentences = chunker._split_sentences(two_topic_text)
+
+    assert len(sentences) == 12
+    assert "".join(sentences) == two_topic_text
+
+def test_breakpoints_from_vectorized_distances():
+    """Test that only the largest similarity drop becomes a breakpoint"""
+    chunker = EmbeddingSemanticChunker(ollama_client=AsyncMock(), breakpoint_percentile=90)
+    vectors = np.array([[1.0, 0.0], [1.0, 0.0], [0.0, 1.0], [0.0, 1.0]], dtype=np.float32)
+
+    assert chunker._find_breakpoints(vectors) == {2}
+
+@pytest.mark.asyncio
+async def test_splits_at_topic_change(mock_ollama_client, two_topic_text):
+    """Test that the chunk boundary falls where the topic changes"""
+    chunker = EmbeddingSemanticChunker(
+        ollama_client=mock_ollama_client,
+        chunk_size=600,
+        chunk_overlap=0,
+        buffer_size=0,
+        batch_size=5
+    )
+
+    chunks = await chunker.split_text_async(two_topic_text)
+
+    assert chunks == [(TOPIC_A * 6).strip(), (TOPIC_B * 6).strip()]
+    # Twelve sentences embedded five at a time
+    assert mock_ollama_client.create_embeddings.call_count == 3
+
+@pytest.mark.asyncio
+async def test_chunk_size_limit_is_respected(mock_ollama_client, two_topic_text):
+    """Test that chunks never exceed chunk_size even without a breakpoint"""
+    chunker = EmbeddingSemanticChunker(
+        ollama_client=mock_ollama_client,
+        chunk_size=200,
+        chunk_overlap=0
+    )
+
+    chunks = await chunker.split_text_async(two_topic_text)
+
+    assert len(chunks) > 2
+    assert all(len(chunk) <= 200 for chunk in chunks)
+
+@pytest.mark.asyncio
+async def test_pooled_embeddings_are_returned_for_reuse(mock_ollama_client, two_topic_text):
+    """Test that each chunk gets a normalized embedding when reuse is enabled"""
+    chunker = EmbeddingSemanticChunker(
+        ollama_client=mock_ollama_client,
+        chunk_size=600,
+        chunk_overlap=0,
+        buffer_size=0,
+        reuse_embeddings=True
+    )
+
+    chunks = await chunker.split_text_with_embeddings(two_topic_text)
+
+    assert [embedding for _, embedding in chunks] == [
+        pytest.approx([1.0, 0.0]),
+        pytest.approx([0.0, 1.0])
+    ]
+
+@pytest.mark.asyncio
+async def test_embedding_failure_falls_back_to_size_splitting(two_topic_text):
+    """Test that chunking still succeeds when the embedding call fails"""
+    client = AsyncMock()
+    client.create_embeddings.side_effect = Exception("embedding server down")
+    chunker = EmbeddingSemanticChunker(ollama_client=client, chunk_size=300, chunk_overlap=0)
+
+    chunks = await chunker.split_text_with_embeddings(two_topic_text)
+
+    assert all(embedding is None for _, embedding in chunks)
+    assert "".join(chunk for chunk, _ in chunks).replace(" ", "") == two_topic_text.replace(" ", "")
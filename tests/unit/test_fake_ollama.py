@@ -0,0 +1,77 @@
+"""
+Unit tests for the fake Ollama server and the load test statistics
+"""
+import asyncio
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.rag import ollama_client as ollama_module
+from app.rag.ollama_client import OllamaClient, close_ollama_http_client
+from scripts.fake_ollama import create_app, FakeOllamaSettings, fake_embedding
+from scripts.load_test import percentile, LatencyRecorder
+
+@pytest_asyncio.fixture
+async def fake_ollama(monkeypatch):
+    """Point the shared Ollama connection pool at an in-process fake server"""
+    app = create_app(FakeOllamaSettings(tokens_per_second=0, first_token_seconds=0, response_tokens=5, embedding_dimensions=8, embedding_seconds=0))
+    monkeypatch.setattr(ollama_module, "LLM_SINGLE_FLIGHT_ENABLED", False)
+    await close_ollama_http_client()
+    ollama_module._http_clients[asyncio.get_running_loop()] = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://fake")
+    yield app
+    await close_ollama_http_client()
+
+@pytest.mark.asyncio
+async def test_generate_is_deterministic(fake_ollama):
+    """Test that streamed and non-streamed generations return the same text for a prompt"""
+    async with OllamaClient(base_url="http://fake") as client:
+        first = await client.generate(prompt="What is RAG?", model="gemma3:4b", stream=False)
+        second = await client.generate(prompt="What is RAG?", model="gemma3:4b", stream=False)
+        stream = await client.generate(prompt="What is RAG?", model="gemma3:4b", stream=True)
+        tokens = [token async for token in stream]
+        short = await client.generate(prompt="What is RAG?", model="gemma3:4b", stream=False, parameters={"options": {"num_predict": 2}})
+        models = await client.list_models()
+
+    assert first["response"] == second["response"] == "".join(tokens)
+    assert len(tokens) == 5 and first["eval_count"] == 5
+    assert short["eval_count"] == 2
+    assert "gemma3:4b" in [model["name"] for model in models]
+    assert fake_ollama.state.stats["generate"] == 4
+
+@pytest.mark.asyncio
+async def test_embeddings_are_deterministic(fake_ollama):
+    """Test that single and batch embeddings agree and depend only on the text"""
+    async with OllamaClient(base_url="http://fake") as client:
+        single = await client.create_embedding("hello", model="nomic-embed-text")
+        batch = await client.create_embeddings(["hello", "world"], model="nomic-embed-text")
+
+    assert single == batch[0] == fake_embedding("hello", 8)
+    assert batch[1] != batch[0]
+    assert sum(value * value for value in single) == pytest.approx(1.0)
+
+@pytest.mark.asyncio
+async def test_first_token_latency_and_token_rate():
+    """Test that responses take the configured first-token latency plus token time"""
+    app = create_app(FakeOllamaSettings(tokens_per_second=100, first_token_seconds=0.05, response_tokens=6))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://fake") as client:
+        started = asyncio.get_running_loop().time()
+        response = await client.post("/api/generate", json={"model": "m", "prompt": "p", "stream": False})
+        elapsed = asyncio.get_running_loop().time() - started
+
+    assert response.json()["eval_count"] == 6
+    assert elapsed >= 0.05 + 5 * 0.01
+
+def test_load_test_percentiles():
+    """Test the nearest-rank percentiles of the load test report"""
+    values = [i / 1000 for i in range(1, 101)]
+    assert percentile(values, 0.50) == 0.05
+    assert percentile(values, 0.95) == 0.095
+    assert percentile(values, 0.99) == 0.099
+    assert percentile([], 0.5) == 0.0
+
+    recorder = LatencyRecorder()
+    for value in values:
+        recorder.record("chat/query", value, ok=value < 0.1)
+    report = recorder.report()["chat/query"]
+    assert report["count"] == 100 and report["errors"] == 1
+    assert (report["p50_ms"], report["p95_ms"], report["p99_ms"]) == (50.0, 95.0, 99.0)
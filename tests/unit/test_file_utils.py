@@ -0,0 +1,56 @@
+"""
+Unit tests for streaming upload helpers in file_utils
+"""
+import os
+import hashlib
+import pytest
+
+from app.utils.file_utils import write_stream_atomic, UploadTooLargeError
+
+async def _chunks(*parts: bytes):
+    """Yield the given byte strings as an async chunk stream"""
+    for part in parts:
+        yield part
+
+@pytest.mark.asyncio
+async def test_write_stream_atomic_hashes_and_counts(tmp_path):
+    """Test that the writer reports size and SHA-256 of the streamed content"""
+    destination = str(tmp_path / "doc" / "file.txt")
+    parts = [b"hello ", b"streaming ", b"world"]
+
+    result = await write_stream_atomic(_chunks(*parts), destination, max_size=1024)
+
+    content = b"".join(parts)
+    assert result["file_path"] == destination
+    assert result["size"] == len(content)
+    assert result["sha256"] == hashlib.sha256(content).hexdigest()
+    with open(destination, "rb") as f:
+        assert f.read() == content
+
+@pytest.mark.asyncio
+async def test_write_stream_atomic_empty_stream(tmp_path):
+    """Test that an empty stream produces an empty file"""
+    destination = str(tmp_path / "empty.txt")
+
+    result = await write_stream_atomic(_chunks(), destination)
+
+    assert result["size"] == 0
+    assert os.path.getsize(destination) == 0
+
+@pytest.mark.asyncio
+async def test_write_stream_atomic_rejects_oversized_stream(tmp_path):
+    """Test that exceeding the limit fails early and leaves no files behind"""
+    destination = str(tmp_path / "big.bin")
+    consumed = []
+
+    async def stream():
+        for i in range(10):
+            consumed.append(i)
+            yield b"x" * 10
+
+    with pytest.raises(UploadTooLargeError):
+        await write_stream_atomic(stream(), destination, max_size=25)
+
+    # Reading stops as soon as the limit is crossed
+    assert len(consumed) == 3
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,67 @@
+"""
+Unit tests for the ingest metrics monitor
+"""
+import pytest
+
+from app.rag.engine.utils.timing import TimingStats
+from app.rag.ingest_metrics import IngestMonitor, StageHistogram, INGEST_STAGES
+
+def test_histogram_percentiles_and_buckets():
+    """Test that the histogram reports percentiles and bucket counts"""
+    histogram = StageHistogram(window_size=100)
+    for i in range(1, 101):
+        histogram.observe(i / 100)
+
+    snapshot = histogram.snapshot()
+
+    assert snapshot["count"] == 100
+    assert snapshot["p50"] == pytest.approx(0.51)
+    assert snapshot["p95"] == pytest.approx(0.96)
+    assert snapshot["max"] == pytest.approx(1.0)
+    assert snapshot["buckets"]["le_0.01"] == 1
+    assert snapshot["buckets"]["le_1.0"] == 50
+    assert sum(snapshot["buckets"].values()) == 100
+
+def test_histogram_window_is_bounded():
+    """Test that only the most recent samples are kept for percentiles"""
+    histogram = StageHistogram(window_size=10)
+    for _ in range(20):
+        histogram.observe(5.0)
+    for _ in range(10):
+        histogram.observe(0.1)
+
+    snapshot = histogram.snapshot()
+
+    assert snapshot["count"] == 30
+    assert snapshot["window_count"] == 10
+    assert snapshot["max"] == pytest.approx(0.1)
+
+def test_record_timings_only_keeps_ingest_stages():
+    """Test that stages from a TimingStats are recorded by name"""
+    monitor = IngestMonitor()
+    stats = TimingStats()
+    stats.record_timing("load", 0.2)
+    stats.record_timing("split", 0.3)
+    stats.record_timing("unrelated", 1.0)
+
+    monitor.record_timings(stats)
+    stages = monitor.get_stats()["stages"]
+
+    assert set(stages) == set(INGEST_STAGES)
+    assert stages["load"]["count"] == 1
+    assert stages["split"]["total_seconds"] == pytest.approx(0.3)
+    assert stages["embed"]["count"] == 0
+
+def test_throughput_counts_recent_documents():
+    """Test that documents feed the counters and the throughput window"""
+    monitor = IngestMonitor(throughput_window_seconds=60)
+    monitor.record_document(chunks=10, size_bytes=1000)
+    monitor.record_document(chunks=5, size_bytes=500)
+
+    stats = monitor.get_stats()
+
+    assert stats["counters"] == {"documents": 2, "chunks": 15, "bytes": 1500}
+    assert stats["throughput"]["chunks_per_second"] > 0
+    assert stats["throughput"]["bytes_per_second"] == pytest.approx(
+        stats["throughput"]["chunks_per_second"] * 100
+    )
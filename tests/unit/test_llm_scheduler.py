@@ -0,0 +1,111 @@
+"""
+Unit tests for the priority-aware LLM scheduler
+"""
+import asyncio
+import pytest
+
+from app.rag.llm_scheduler import (
+    LLMScheduler,
+    llm_priority,
+    with_llm_priority,
+    get_current_priority,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_INTERACTIVE_AUX,
+    PRIORITY_BACKGROUND
+)
+
+async def _run_contended(scheduler, requests, model="llama3"):
+    """Queue requests behind a held slot, release it and return the grant order"""
+    order = []
+
+    async def request(name, priority):
+        async with scheduler.slot(model, priority):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    await scheduler.acquire(model, PRIORITY_INTERACTIVE)
+    tasks = [asyncio.create_task(request(name, priority)) for name, priority in requests]
+    await asyncio.sleep(0)
+    scheduler.release(model)
+    await asyncio.gather(*tasks)
+    return order
+
+@pytest.mark.asyncio
+async def test_interactive_requests_jump_the_queue():
+    """Test that queued chat requests are served before queued background work"""
+    scheduler = LLMScheduler(max_concurrency_per_model=1)
+    requests = [(f"bg{i}", PRIORITY_BACKGROUND) for i in range(3)] + [("chat", PRIORITY_INTERACTIVE)]
+
+    order = await _run_contended(scheduler, requests)
+
+    assert order[0] == "chat"
+
+@pytest.mark.asyncio
+async def test_background_work_is_not_starved():
+    """Test that background work gets its weighted share under constant chat load"""
+    scheduler = LLMScheduler(max_concurrency_per_model=1)
+    requests = [(f"chat{i}", PRIORITY_INTERACTIVE) for i in range(20)] + [("bg", PRIORITY_BACKGROUND)]
+
+    order = await _run_contended(scheduler, requests)
+
+    # With weights 8:1 the background request is served within the first ten
+    assert order.index("bg") < 10
+
+@pytest.mark.asyncio
+async def test_concurrency_cap_is_per_model():
+    """Test that each model has its own cap"""
+    scheduler = LLMScheduler(max_concurrency_per_model=1, model_concurrency={"embed": 2})
+    running = {"llama3": 0, "embed": 0}
+    peak = {"llama3": 0, "embed": 0}
+
+    async def request(model):
+        async with scheduler.slot(model):
+            running[model] += 1
+            peak[model] = max(peak[model], running[model])
+            await asyncio.sleep(0.01)
+            running[model] -= 1
+
+    await asyncio.gather(*[request(model) for model in ["llama3", "embed"] * 4])
+
+    assert peak == {"llama3": 1, "embed": 2}
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_frees_its_place():
+    """Test that a cancelled waiter neither holds nor leaks a slot"""
+    scheduler = LLMScheduler(max_concurrency_per_model=1)
+    await scheduler.acquire("llama3")
+    waiter = asyncio.create_task(scheduler.acquire("llama3"))
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    scheduler.release("llama3")
+
+    stats = scheduler.get_stats()["models"]["llama3"]
+    assert stats["active"] == 0
+    assert sum(stats["queued"].values()) == 0
+
+@pytest.mark.asyncio
+async def test_priority_follows_the_calling_component():
+    """Test that the decorator and context manager set the task's priority"""
+    @with_llm_priority(PRIORITY_BACKGROUND)
+    async def background_job():
+        return get_current_priority()
+
+    assert get_current_priority() == PRIORITY_INTERACTIVE
+    assert await background_job() == PRIORITY_BACKGROUND
+    with llm_priority(PRIORITY_INTERACTIVE_AUX):
+        assert get_current_priority() == PRIORITY_INTERACTIVE_AUX
+    assert get_current_priority() == PRIORITY_INTERACTIVE
+
+@pytest.mark.asyncio
+async def test_wait_times_are_recorded_per_priority():
+    """Test that queue wait time is exposed per priority class"""
+    scheduler = LLMScheduler(max_concurrency_per_model=1)
+
+    await _run_contended(scheduler, [("bg", PRIORITY_BACKGROUND)])
+
+    stats = scheduler.get_stats()
+    assert stats["requests"][PRIORITY_BACKGROUND] == 1
+    assert stats["wait_times"][PRIORITY_BACKGROUND]["count"] == 1
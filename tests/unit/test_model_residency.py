@@ -0,0 +1,106 @@
+"""
+Unit tests for the model residency manager
+"""
+import asyncio
+import json
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.rag import ollama_client as ollama_module
+from app.rag.ollama_client import OllamaClient, close_ollama_http_client
+from app.rag.model_residency import (
+    ModelResidencyManager,
+    MODEL_CLASS_CHAT,
+    MODEL_CLASS_EMBEDDING,
+    MODEL_CLASS_JUDGE,
+    parse_keep_alive
+)
+
+def _manager(**kwargs):
+    """Residency manager with one chat, one judge and one embedding model"""
+    return ModelResidencyManager(
+        model_classes={"chat": MODEL_CLASS_CHAT, "judge:7b": MODEL_CLASS_JUDGE, "embed": MODEL_CLASS_EMBEDDING},
+        keep_alive={MODEL_CLASS_CHAT: "30m", MODEL_CLASS_JUDGE: 300, MODEL_CLASS_EMBEDDING: None},
+        **kwargs
+    )
+
+@pytest_asyncio.fixture
+async def mock_server():
+    """Install a shared client backed by a mock Ollama server"""
+    requests = []
+
+    async def handler(request):
+        requests.append((request.url.path, json.loads(request.content) if request.content else None))
+        if request.url.path == "/api/ps":
+            return httpx.Response(200, json={"models": [{"name": "chat:latest", "size_vram": 1024}]})
+        return httpx.Response(200, json={"response": "", "done": True})
+
+    await close_ollama_http_client()
+    ollama_module._http_clients[asyncio.get_running_loop()] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    yield requests
+    await close_ollama_http_client()
+
+def test_parse_keep_alive():
+    """Test that durations stay strings and bare numbers become numbers"""
+    assert parse_keep_alive("30m") == "30m"
+    assert parse_keep_alive("-1") == -1
+    assert parse_keep_alive("") is None
+
+def test_keep_alive_is_set_per_model_class():
+    """Test that requests carry their model class's keep-alive unless set by the caller"""
+    manager = _manager()
+
+    assert manager.apply_keep_alive({"model": "chat"})["keep_alive"] == "30m"
+    assert manager.apply_keep_alive({"model": "judge:7b"})["keep_alive"] == 300
+    assert "keep_alive" not in manager.apply_keep_alive({"model": "embed"})
+    assert "keep_alive" not in manager.apply_keep_alive({"model": "unknown"})
+    assert manager.apply_keep_alive({"model": "chat", "keep_alive": 0})["keep_alive"] == 0
+
+@pytest.mark.asyncio
+async def test_refresh_and_warm_up(mock_server):
+    """Test that warm-up loads every configured model, chat first, then reads /api/ps"""
+    manager = _manager()
+
+    warmed = await manager.warm_up(OllamaClient())
+
+    assert warmed == ["chat:latest", "embed:latest", "judge:7b"]
+    paths = [path for path, _ in mock_server]
+    assert paths == ["/api/generate", "/api/embed", "/api/generate", "/api/ps"]
+    assert mock_server[0][1] == {"model": "chat:latest", "prompt": "", "stream": False, "keep_alive": "30m"}
+    assert manager.is_loaded("chat") is True
+    assert manager.is_loaded("judge:7b") is False
+
+def test_cold_start_times_are_learned():
+    """Test that load durations reported with responses update the cold start estimate"""
+    manager = _manager(cold_start_seconds=5.0)
+
+    manager.observe_response("judge:7b", {"load_duration": 10_000_000})
+    assert manager.cold_start_estimate("judge:7b") == 5.0
+
+    manager.observe_response("judge:7b", {"load_duration": 8_000_000_000})
+    assert manager.cold_start_estimate("judge:7b") == pytest.approx(8.0)
+    assert manager.is_loaded("judge:7b") is True
+
+def test_cold_judge_is_routed_to_loaded_model_when_budget_is_tight():
+    """Test that routing only happens when enabled, the model is cold and the load doesn't fit"""
+    manager = _manager(routing_enabled=True, cold_start_seconds=5.0)
+    manager.loaded = {"chat:latest": {}, "embed:latest": {}}
+    manager.refreshed_at = float("inf")
+
+    assert manager.select_model("judge:7b", latency_budget=2.0) == "chat:latest"
+    assert manager.select_model("judge:7b", latency_budget=10.0) == "judge:7b"
+    assert manager.select_model("judge:7b") == "judge:7b"
+    assert manager.stats["rerouted"] == 1
+
+    manager.routing_enabled = False
+    assert manager.select_model("judge:7b", latency_budget=2.0) == "judge:7b"
+
+def test_unknown_residency_keeps_preferred_model():
+    """Test that nothing is rerouted before the server was queried"""
+    manager = _manager(routing_enabled=True)
+    manager.loaded = {"chat:latest": {}}
+    manager.refreshed_at = None
+    manager._schedule_refresh = lambda: None
+
+    assert manager.select_model("judge:7b", latency_budget=0.1) == "judge:7b"
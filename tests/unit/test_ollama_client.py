@@ -0,0 +1,174 @@
+"""
+Unit tests for the shared Ollama connection pool
+"""
+import asyncio
+import json
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.rag import ollama_client as ollama_module
+from app.rag.ollama_client import OllamaClient, get_ollama_http_client, close_ollama_http_client
+
+@pytest_asyncio.fixture
+async def mock_pool():
+    """Install a shared client backed by a mock transport"""
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        # Keep requests in flight long enough for concurrent callers to overlap
+        await asyncio.sleep(0.05)
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": [{"name": "llama3"}]})
+        if request.url.path == "/api/embeddings":
+            return httpx.Response(200, json={"embedding": [0.1, 0.2]})
+        if not json.loads(request.content).get("stream"):
+            return httpx.Response(200, json={"response": "Hello", "done": True})
+        lines = [json.dumps({"response": "Hel"}), json.dumps({"response": "lo", "done": True})]
+        return httpx.Response(200, content="\n".join(lines).encode())
+
+    await close_ollama_http_client()
+    ollama_module._http_clients[asyncio.get_running_loop()] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    yield requests
+    await close_ollama_http_client()
+
+@pytest.mark.asyncio
+async def test_clients_share_one_pool():
+    """Test that every client instance uses the same HTTP client"""
+    await close_ollama_http_client()
+    try:
+        assert OllamaClient().client is OllamaClient().client
+        assert OllamaClient().client is get_ollama_http_client()
+    finally:
+        await close_ollama_http_client()
+
+@pytest.mark.asyncio
+async def test_streaming_and_short_calls_reuse_the_pool(mock_pool):
+    """Test that streaming no longer opens its own client"""
+    async with OllamaClient() as client:
+        models = await client.list_models()
+        stream = await client.generate(prompt="hi", stream=True)
+        tokens = [token async for token in stream]
+
+    assert models == [{"name": "llama3"}]
+    assert "".join(tokens) == "Hello"
+    assert len(mock_pool) == 2
+    # Leaving the context manager must not close the shared pool
+    assert not get_ollama_http_client().is_closed
+
+@pytest.mark.asyncio
+async def test_close_releases_the_pool():
+    """Test that closing the pool makes the next caller get a fresh client"""
+    first = get_ollama_http_client()
+    await close_ollama_http_client()
+
+    assert first.is_closed
+    second = get_ollama_http_client()
+    assert second is not first
+    await close_ollama_http_client()
+
+@pytest.mark.asyncio
+async def test_each_event_loop_keeps_its_own_pool():
+    """Test that another event loop gets its own client instead of replacing this loop's"""
+    await close_ollama_http_client()
+    try:
+        ours = get_ollama_http_client()
+        
+        async def other_loop_client():
+            client = get_ollama_http_client()
+            await close_ollama_http_client()
+            return client
+        
+        theirs = await asyncio.to_thread(asyncio.run, other_loop_client())
+        
+        assert theirs is not ours and theirs.is_closed
+        assert get_ollama_http_client() is ours and not ours.is_closed
+    finally:
+        await close_ollama_http_client()
+
+@pytest.mark.asyncio
+async def test_identical_requests_share_one_upstream_call(mock_pool):
+    """Test that concurrent identical generations are coalesced"""
+    client = OllamaClient()
+
+    responses = await asyncio.gather(*[
+        client.generate(prompt="same  question", stream=False) for _ in range(3)
+    ])
+    other = await client.generate(prompt="another question", stream=False)
+
+    assert [response["response"] for response in responses] == ["Hello"] * 3
+    assert other["response"] == "Hello"
+    assert len(mock_pool) == 2
+    # Each caller owns its result
+    responses[1]["response"] = "changed"
+    assert responses[0]["response"] == "Hello"
+
+@pytest.mark.asyncio
+async def test_requests_of_different_priority_are_not_coalesced(mock_pool):
+    """Test that an interactive request never waits on a background flight"""
+    from app.rag.llm_scheduler import llm_priority, PRIORITY_BACKGROUND
+
+    client = OllamaClient()
+
+    async def background_generate():
+        with llm_priority(PRIORITY_BACKGROUND):
+            return await client.generate(prompt="same question", stream=False)
+
+    await asyncio.gather(
+        background_generate(),
+        client.generate(prompt="same question", stream=False),
+        client.generate(prompt="same question", stream=False)
+    )
+
+    assert len(mock_pool) == 2
+
+@pytest.mark.asyncio
+async def test_streams_fan_out_to_every_subscriber(mock_pool):
+    """Test that concurrent identical streams read one upstream stream"""
+    client = OllamaClient()
+
+    async def read_stream():
+        stream = await client.generate(prompt="same question", stream=True)
+        return "".join([token async for token in stream])
+
+    texts = await asyncio.gather(read_stream(), read_stream(), read_stream())
+
+    assert texts == ["Hello"] * 3
+    assert len(mock_pool) == 1
+
+@pytest.mark.asyncio
+async def test_identical_embeddings_share_one_upstream_call(mock_pool):
+    """Test that concurrent embeddings of the same text are coalesced"""
+    client = OllamaClient()
+
+    embeddings = await asyncio.gather(*[client.create_embedding("text", model="embed") for _ in range(3)])
+    await client.create_embedding("text", model="other-embed")
+
+    assert embeddings == [[0.1, 0.2]] * 3
+    assert len(mock_pool) == 2
+
+@pytest.mark.asyncio
+async def test_stream_is_closed_when_its_only_subscriber_leaves():
+    """Test that the upstream stream stops once nobody reads it any more"""
+    from app.rag.single_flight import SingleFlight
+    closed = asyncio.Event()
+
+    async def upstream():
+        try:
+            for i in range(1000):
+                yield f"token{i} "
+                await asyncio.sleep(0.01)
+        finally:
+            closed.set()
+
+    async def factory():
+        return upstream()
+
+    group = SingleFlight()
+    stream = await group.stream("key", factory)
+    assert await stream.__anext__() == "token0 "
+    await stream.aclose()
+
+    assert closed.is_set()
+    assert group.get_stats()["in_flight_streams"] == 0
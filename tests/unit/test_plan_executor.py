@@ -345,4 +345,95 @@ class TestPlanExecutor:
         # Generate response for error plan
         error_response = executor._generate_simple_response(error_plan)
         assert "error" in error_response.lower()
-        assert "Test error" in error_response
\ No newline at end of file
+        assert "Test error" in error_response
+    
+    @pytest.mark.asyncio
+    async def test_independent_steps_run_concurrently(self):
+        """Test that independent steps overlap and results are recorded in step order"""
+        events = []
+        
+        def slow_tool(name, delay):
+            async def execute(input_data):
+                events.append(f"start {name}")
+                await asyncio.sleep(delay)
+                events.append(f"end {name}")
+                return {"result": name}
+            tool = MagicMock()
+            tool.execute = execute
+            return tool
+        
+        tools = {"rag": slow_tool("rag", 0.1), "database": slow_tool("database", 0.01)}
+        mock_registry = MagicMock()
+        mock_registry.get_tool.side_effect = tools.get
+        executor = PlanExecutor(tool_registry=mock_registry)
+        executor._synthesize_results = AsyncMock(side_effect=lambda query_id: events.append("synthesize") or {"synthesis": "done"})
+        
+        plan = QueryPlan(
+            query_id="test_id",
+            query="test query",
+            steps=[
+                {"type": "tool", "tool": "rag", "depends_on": []},
+                {"type": "tool", "tool": "database", "depends_on": []},
+                {"type": "synthesize", "depends_on": [0, 1]}
+            ]
+        )
+        
+        result = await executor.execute_plan(plan)
+        
+        assert events == ["start rag", "start database", "end database", "end rag", "synthesize"]
+        assert [step.get("result", step.get("synthesis")) for step in result["steps"]] == ["rag", "database", "done"]
+        assert plan.is_completed()
+    
+    @pytest.mark.asyncio
+    async def test_tool_concurrency_limit_and_timeout(self):
+        """Test that calls of one tool are limited and slow steps time out"""
+        active = []
+        peak = []
+        
+        async def execute(input_data):
+            active.append(input_data)
+            peak.append(len(active))
+            await asyncio.sleep(0.05 if input_data["query"] != "slow" else 10)
+            active.remove(input_data)
+            return {"result": input_data["query"]}
+        
+        tool = MagicMock()
+        tool.execute = execute
+        mock_registry = MagicMock()
+        mock_registry.get_tool.return_value = tool
+        executor = PlanExecutor(tool_registry=mock_registry, tool_concurrency={"rag": 1}, step_timeout=1.0)
+        
+        plan = QueryPlan(
+            query_id="test_id",
+            query="test query",
+            steps=[
+                {"type": "tool", "tool": "rag", "input": {"query": "a"}, "depends_on": []},
+                {"type": "tool", "tool": "rag", "input": {"query": "b"}, "depends_on": []},
+                {"type": "tool", "tool": "other", "input": {"query": "slow"}, "depends_on": [], "timeout": 0.05}
+            ]
+        )
+        
+        result = await executor.execute_plan(plan)
+        
+        assert max(peak) == 2  # one rag call alongside the other tool
+        assert [step.get("result") for step in result["steps"][:2]] == ["a", "b"]
+        assert "timed out" in result["steps"][2]["error"]
+    
+    @pytest.mark.asyncio
+    async def test_unresolvable_dependencies_are_reported(self):
+        """Test that steps waiting on each other fail instead of hanging"""
+        executor = PlanExecutor(tool_registry=MagicMock())
+        
+        plan = QueryPlan(
+            query_id="test_id",
+            query="test query",
+            steps=[
+                {"type": "synthesize", "depends_on": [1]},
+                {"type": "synthesize", "depends_on": [0]}
+            ]
+        )
+        
+        result = await executor.execute_plan(plan)
+        
+        assert len(result["steps"]) == 2
+        assert all("Unresolvable" in step["error"] for step in result["steps"])
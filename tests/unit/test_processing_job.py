@@ -5,9 +5,10 @@ import pytest
 import pytest_asyncio
 import asyncio
 import uuid
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import MagicMock, AsyncMock, patch
 
-from app.models.document import Document
+from app.models.document import Document, Chunk
 from app.rag.processing_job import ProcessingJob, WorkerPool, DocumentProcessingService
 
 @pytest.fixture
@@ -170,4 +171,199 @@ async def test_document_processing_service_cancel_job(document_processing_servic
     
     # Check job
     assert cancelled_job is not None
-    assert cancelled_job.status == "cancelled"
\ No newline at end of file
+    assert cancelled_job.status == "cancelled"
+
+class InMemoryJobStore:
+    """Job store keeping saved records in a dict, standing in for the database"""
+    def __init__(self):
+        self.records = {}
+        self.save_count = 0
+    
+    async def save_job(self, job):
+        self.save_count += 1
+        self.records[job.id] = SimpleNamespace(**job.to_record())
+    
+    async def load_unfinished_jobs(self):
+        return [
+            ProcessingJob.from_record(record) for record in self.records.values()
+            if record.status in ("pending", "processing")
+        ]
+
+def test_processing_job_record_round_trip(processing_job, sample_document_ids):
+    """Test that a job and its per-document status survive a save and restore"""
+    processing_job.status = "processing"
+    processing_job.document_status[sample_document_ids[0]] = "completed"
+    processing_job.document_status[sample_document_ids[1]] = "failed"
+    
+    restored = ProcessingJob.from_record(SimpleNamespace(**processing_job.to_record()))
+    
+    assert restored.id == processing_job.id
+    assert restored.document_ids == sample_document_ids
+    assert restored.status == "processing"
+    assert restored.processed_count == 1
+    assert restored.remaining_document_ids() == sample_document_ids[1:]
+
+@pytest.mark.asyncio
+async def test_document_processing_service_resumes_unfinished_documents(sample_document_ids):
+    """Test that a restarted service only processes documents not completed before"""
+    store = InMemoryJobStore()
+    interrupted = ProcessingJob(document_ids=sample_document_ids, status="processing")
+    interrupted.document_status[sample_document_ids[0]] = "completed"
+    await store.save_job(interrupted)
+    
+    processor = MagicMock()
+    processor.process_document = AsyncMock(side_effect=lambda document, analysis_result=None: document)
+    processor.analyze_documents = AsyncMock(return_value={})
+    
+    service = DocumentProcessingService(document_processor=processor, job_store=store)
+    await service.start()
+    try:
+        for _ in range(50):
+            if store.records[interrupted.id].status == "completed":
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        await service.stop()
+    
+    processed_ids = {call.args[0].id for call in processor.process_document.call_args_list}
+    assert processed_ids == set(sample_document_ids[1:])
+    
+    record = store.records[interrupted.id]
+    assert record.status == "completed"
+    assert record.job_metadata["document_status"] == {document_id: "completed" for document_id in sample_document_ids}
+
+@pytest.mark.asyncio
+async def test_document_processing_service_batches_checkpoints():
+    """Test that progress is written once per window, not once per document"""
+    store = InMemoryJobStore()
+    processor = MagicMock()
+    processor.process_document = AsyncMock(side_effect=lambda document, analysis_result=None: document)
+    processor.analyze_documents = AsyncMock(return_value={})
+    service = DocumentProcessingService(document_processor=processor, job_store=store)
+    
+    job = ProcessingJob(document_ids=[str(uuid.uuid4()) for _ in range(45)])
+    await service._process_job(job)
+    
+    assert job.status == "completed"
+    # start + three windows of up to 20 documents + completion
+    assert store.save_count == 5
+
+
+@pytest.mark.asyncio
+async def test_document_processing_service_records_throughput():
+    """Test that a job reports its chunk and byte throughput"""
+    processor = MagicMock()
+    processor.analyze_documents = AsyncMock(return_value={})
+    
+    def process(document, analysis_result=None):
+        document.chunks = [Chunk(content="a"), Chunk(content="b")]
+        document.metadata["file_size"] = 100
+        return document
+    processor.process_document = AsyncMock(side_effect=process)
+    service = DocumentProcessingService(document_processor=processor)
+    
+    job = ProcessingJob(document_ids=[str(uuid.uuid4()) for _ in range(3)])
+    await service._process_job(job)
+    
+    throughput = job.metadata["throughput"]
+    assert throughput["chunks"] == 6
+    assert throughput["bytes"] == 300
+    assert throughput["chunks_per_second"] > 0
+    assert throughput["bytes_per_second"] > 0
+
+@pytest.mark.asyncio
+async def test_document_processing_service_saves_window_in_one_bulk_write():
+    """Test that the chunks of a window are saved together"""
+    processor = MagicMock()
+    processor.analyze_documents = AsyncMock(return_value={})
+    
+    def process(document, analysis_result=None):
+        document.chunks = [Chunk(content=f"chunk of {document.id}")]
+        return document
+    processor.process_document = AsyncMock(side_effect=process)
+    repository = MagicMock()
+    repository.get_document_with_chunks = MagicMock(return_value=None)
+    repository.bulk_replace_chunks = AsyncMock(return_value=3)
+    service = DocumentProcessingService(document_processor=processor, document_repository=repository)
+    
+    job = ProcessingJob(document_ids=[str(uuid.uuid4()) for _ in range(3)])
+    await service._process_job(job)
+    
+    repository.bulk_replace_chunks.assert_awaited_once()
+    chunks_by_document = repository.bulk_replace_chunks.call_args.args[0]
+    assert set(chunks_by_document) == set(job.document_ids)
+    assert all(len(chunks) == 1 for chunks in chunks_by_document.values())
+    assert set(job.document_status.values()) == {"completed"}
+
+@pytest.mark.asyncio
+async def test_document_processing_service_failed_save_is_not_counted():
+    """Test that documents whose chunks could not be saved are failed and not counted as processed"""
+    processor = MagicMock()
+    processor.analyze_documents = AsyncMock(return_value={})
+    processor.process_document = AsyncMock(side_effect=lambda document, analysis_result=None: document)
+    repository = MagicMock()
+    repository.bulk_replace_chunks = AsyncMock(side_effect=RuntimeError("database is locked"))
+    service = DocumentProcessingService(document_processor=processor, document_repository=repository)
+    
+    job = ProcessingJob(document_ids=[str(uuid.uuid4()) for _ in range(3)])
+    documents = [Document(id=document_id, filename="test.txt", content="test") for document_id in job.document_ids]
+    for document in documents:
+        job.document_status[str(document.id)] = "completed"
+    job.update_progress(3)
+    
+    await service._save_documents(job, documents)
+    
+    assert set(job.document_status.values()) == {"failed"}
+    assert job.processed_count == 0
+    assert job.progress_percentage == 0
+
+@pytest.mark.asyncio
+async def test_document_processing_service_fails_unretrievable_documents():
+    """Test that a document that can't be fetched is failed, not counted as processed"""
+    processor = MagicMock()
+    processor.analyze_documents = AsyncMock(return_value={})
+    processor.process_document = AsyncMock(side_effect=lambda document, analysis_result=None: document)
+    service = DocumentProcessingService(document_processor=processor)
+    
+    job = ProcessingJob(document_ids=[str(uuid.uuid4()) for _ in range(3)])
+    missing_id = job.document_ids[1]
+    original_get_document = service._get_document
+    
+    async def get_document(document_id):
+        if document_id == missing_id:
+            raise RuntimeError("connection lost")
+        return await original_get_document(document_id)
+    
+    service._get_document = get_document
+    await service._process_job(job)
+    
+    assert job.document_status[missing_id] == "failed"
+    assert "connection lost" in job.metadata["document_errors"][missing_id]
+    assert job.processed_count == 2
+    assert job.remaining_document_ids() == [missing_id]
+    assert processor.process_document.await_count == 2
+
+@pytest.mark.asyncio
+async def test_document_processing_service_saves_with_own_session():
+    """Test that bulk writes open a session per write when a session factory is set"""
+    sessions = []
+    
+    class FakeSession:
+        async def __aenter__(self):
+            sessions.append(self)
+            return self
+        
+        async def __aexit__(self, *args):
+            return False
+    
+    service = DocumentProcessingService(document_processor=MagicMock(), session_factory=FakeSession)
+    job = ProcessingJob(document_ids=[str(uuid.uuid4())])
+    document = Document(id=job.document_ids[0], filename="test.txt", content="test", chunks=[Chunk(content="a")])
+    
+    with patch("app.db.repositories.document_repository.DocumentRepository") as repository_class:
+        repository_class.return_value.bulk_replace_chunks = AsyncMock(return_value=1)
+        await service._save_documents(job, [document])
+        await service._save_documents(job, [document])
+    
+    assert len(sessions) == 2
+    assert [call.args[0] for call in repository_class.call_args_list] == sessions
@@ -118,6 +118,21 @@ class TestQueryPlan:
         assert new_plan.current_step == original_plan.current_step
         assert new_plan.results == original_plan.results
         assert new_plan.completed == original_plan.completed
+    
+    def test_get_dependencies(self):
+        """Test that steps without declared dependencies depend on the previous step"""
+        plan = QueryPlan(
+            query_id="test_id",
+            query="test query",
+            steps=[
+                {"type": "tool", "tool": "rag", "depends_on": []},
+                {"type": "tool", "tool": "database", "depends_on": []},
+                {"type": "synthesize", "depends_on": [0, 1]},
+                {"type": "tool", "tool": "calculator"}
+            ]
+        )
+        
+        assert [plan.get_dependencies(index) for index in range(4)] == [[], [], [0, 1], [2]]
 
 
 class TestQueryPlanner:
@@ -204,6 +219,10 @@ class TestQueryPlanner:
         # Check that there's a synthesize step
         assert any(step["type"] == "synthesize" for step in plan.steps)
         
+        # Tool steps are independent; the synthesis depends on all of them
+        assert all(step["depends_on"] == [] for step in plan.steps[:-1])
+        assert plan.steps[-1]["depends_on"] == [0, 1, 2, 3]
+        
         # Check that the analyzer was called correctly
         mock_analyzer.analyze.assert_called_once_with("What is the combined population of France and Germany?")
     
@@ -11,6 +11,10 @@ from app.rag.response_evaluator import ResponseEvaluator
 from app.rag.response_refiner import ResponseRefiner
 from app.rag.audit_report_generator import AuditReportGenerator
 from app.rag.process_logger import ProcessLogger
+from app.rag.response_quality_pipeline import ResponseQualityPipeline, RESPONSE_QUALITY_TASK
+from app.rag.llm_scheduler import get_current_priority, PRIORITY_BACKGROUND
+from app.tasks.task_manager import TaskManager
+from app.tasks.task_models import Task, TaskStatus
 
 class TestResponseSynthesizer:
     """Tests for the ResponseSynthesizer class"""
@@ -386,5 +390,126 @@ class TestAuditReportGenerator:
         # Check that the LLM provider was called
         llm_provider.generate.assert_called_once()
 
+class TestDeferredResponseQuality:
+    """Tests for deferred quality checks in the ResponseQualityPipeline"""
+    
+    @pytest.fixture
+    def pipeline(self):
+        """Create a pipeline whose stages are mocked, with a mock task manager"""
+        task_manager = MagicMock()
+        task_manager.submit = AsyncMock(return_value="task-1")
+        pipeline = ResponseQualityPipeline(llm_provider=AsyncMock(), enable_audit_reports=False, task_manager=task_manager)
+        pipeline.synthesizer.synthesize = AsyncMock(return_value={"response": "answer", "sources": []})
+        pipeline.evaluator.evaluate = AsyncMock(side_effect=[
+            {"overall_score": 3, "hallucination_detected": True},
+            {"overall_score": 9, "hallucination_detected": False}
+        ])
+        pipeline.refiner.refine = AsyncMock(return_value={"refined_response": "corrected answer"})
+        return pipeline
+    
+    @pytest.mark.asyncio
+    async def test_response_returns_before_quality_checks(self, pipeline):
+        """Test that only the synthesis runs before the response is returned"""
+        result = await pipeline.process_deferred(query="q", context="c", sources=[], query_id="query-1")
+        
+        assert result["response"] == "answer"
+        assert result["quality_task_id"] == "task-1"
+        pipeline.evaluator.evaluate.assert_not_called()
+        submitted = pipeline.task_manager.submit.call_args.kwargs
+        assert submitted["task_type"] == RESPONSE_QUALITY_TASK
+        assert submitted["params"]["response"] == "answer"
+        pipeline.task_manager.register_task_handler.assert_called_once_with(RESPONSE_QUALITY_TASK, pipeline._run_quality_task)
+    
+    @pytest.mark.asyncio
+    async def test_hallucination_fix_is_pushed(self, pipeline):
+        """Test that the background check refines a hallucinated answer and pushes the revision"""
+        priorities = []
+        
+        async def evaluate(**kwargs):
+            priorities.append(get_current_priority())
+            return {"overall_score": 3, "hallucination_detected": True} if len(priorities) == 1 else {"overall_score": 9}
+        
+        pipeline.evaluator.evaluate = AsyncMock(side_effect=evaluate)
+        on_revision = AsyncMock()
+        await pipeline.process_deferred(query="q", context="c", sources=[], query_id="query-1", on_revision=on_revision)
+        task = Task(name="check", task_type=RESPONSE_QUALITY_TASK, params=pipeline.task_manager.submit.call_args.kwargs["params"])
+        
+        revision = await pipeline._run_quality_task(task)
+        
+        assert revision["revised_response"] == "corrected answer"
+        assert revision["pushed"] is True
+        on_revision.assert_awaited_once_with(revision)
+        assert priorities == [PRIORITY_BACKGROUND, PRIORITY_BACKGROUND]
+    
+    @pytest.mark.asyncio
+    async def test_low_scores_are_revised_without_pushing(self, pipeline):
+        """Test that refinements without hallucinations are only available as revisions"""
+        pipeline.evaluator.evaluate = AsyncMock(side_effect=[
+            {"overall_score": 3, "hallucination_detected": False},
+            {"overall_score": 9, "hallucination_detected": False}
+        ])
+        on_revision = AsyncMock()
+        await pipeline.process_deferred(query="q", context="c", sources=[], query_id="query-1", on_revision=on_revision)
+        task = Task(name="check", task_type=RESPONSE_QUALITY_TASK, params=pipeline.task_manager.submit.call_args.kwargs["params"])
+        
+        revision = await pipeline._run_quality_task(task)
+        
+        assert revision["revised_response"] == "corrected answer"
+        assert revision["pushed"] is False
+        on_revision.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_streamed_response_is_checked_through_the_task_manager(self):
+        """Test that a streamed response is checked in the background once the stream ends"""
+        task_manager = TaskManager(resource_check_interval=0.05, scheduler_check_interval=0.05)
+        pipeline = ResponseQualityPipeline(llm_provider=AsyncMock(), enable_audit_reports=False, task_manager=task_manager)
+        
+        async def tokens(**kwargs):
+            for token in ["an", "swer"]:
+                yield token
+        
+        pipeline.synthesizer.synthesize_stream = tokens
+        pipeline.evaluator.evaluate = AsyncMock(return_value={"overall_score": 9, "hallucination_detected": False})
+        await task_manager.start()
+        try:
+            result = await pipeline.process_deferred(query="q", context="c", sources=[], query_id="query-1", stream=True)
+            assert "".join([token async for token in result["response"]]) == "answer"
+            
+            for _ in range(100):
+                revision = pipeline.get_revision("query-1")
+                if revision and revision["status"] == TaskStatus.COMPLETED.value:
+                    break
+                await asyncio.sleep(0.05)
+        finally:
+            await task_manager.stop()
+        
+        assert revision["status"] == TaskStatus.COMPLETED.value
+        assert revision["revised_response"] is None
+        assert pipeline.evaluator.evaluate.call_args.kwargs["response"] == "answer"
+
+    @pytest.mark.asyncio
+    async def test_unfinished_or_failed_streams_are_not_checked(self, pipeline):
+        """Test that abandoned and failed streams drop their callback instead of being checked"""
+        from app.rag.ollama_client import StreamErrorMessage
+        
+        async def tokens(**kwargs):
+            for token in ["an", "swer"]:
+                yield token
+        
+        async def failing(**kwargs):
+            yield StreamErrorMessage("I encountered an error while generating a response: timeout")
+        
+        pipeline.synthesizer.synthesize_stream = tokens
+        result = await pipeline.process_deferred(query="q", context="c", sources=[], query_id="query-1", stream=True, on_revision=AsyncMock())
+        assert await result["response"].__anext__() == "an"
+        await result["response"].aclose()
+        
+        pipeline.synthesizer.synthesize_stream = failing
+        result = await pipeline.process_deferred(query="q", context="c", sources=[], query_id="query-2", stream=True, on_revision=AsyncMock())
+        assert "error" in "".join([token async for token in result["response"]])
+        
+        pipeline.task_manager.submit.assert_not_called()
+        assert pipeline.revision_callbacks == {}
+
 if __name__ == "__main__":
     pytest.main(["-xvs", "test_response_quality.py"])
\ No newline at end of file
@@ -5,7 +5,8 @@ import pytest
 import json
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from app.rag.agents.retrieval_judge import RetrievalJudge
+from app.cache.query_analysis_cache import QueryAnalysisCache
+from app.rag.agents.retrieval_judge import RetrievalJudge, get_query_analysis_stats
 from app.rag.ollama_client import OllamaClient
 
 
@@ -18,8 +19,13 @@ def mock_ollama_client():
 
 @pytest.fixture
 def retrieval_judge(mock_ollama_client):
-    """Create a RetrievalJudge with a mock OllamaClient"""
-    return RetrievalJudge(ollama_client=mock_ollama_client, model="test-model")
+    """Create a RetrievalJudge with a mock OllamaClient that always asks the LLM"""
+    return RetrievalJudge(
+        ollama_client=mock_ollama_client,
+        model="test-model",
+        analysis_cache=QueryAnalysisCache(persist=False),
+        fast_path_confidence=None
+    )
 
 
 @pytest.fixture
@@ -152,6 +158,42 @@ class TestRetrievalJudge:
         assert "How do neural networks work?" in prompt
         assert "refine the user's query" in prompt.lower()
 
+    @pytest.mark.asyncio
+    async def test_evaluate_and_refine(self, retrieval_judge, mock_ollama_client, sample_chunks):
+        """Test that scores and the refined query come from one LLM call"""
+        mock_ollama_client.generate.return_value = {
+            "response": json.dumps({
+                "relevance_scores": {"1": 0.3, "2": 0.2, "3": 0.1},
+                "needs_refinement": True,
+                "refined_query": "How do neural networks function in deep learning algorithms?",
+                "justification": "The chunks are only loosely related."
+            })
+        }
+
+        result = await retrieval_judge.evaluate_and_refine("How do neural networks work?", sample_chunks)
+
+        assert result["relevance_scores"] == {"chunk1": 0.3, "chunk2": 0.2, "chunk3": 0.1}
+        assert result["needs_refinement"] is True
+        assert result["refined_query"] == "How do neural networks function in deep learning algorithms?"
+        mock_ollama_client.generate.assert_called_once()
+        prompt = mock_ollama_client.generate.call_args[1]["prompt"]
+        assert "refined_query" in prompt
+        assert "evaluate the relevance" in prompt.lower()
+
+    @pytest.mark.asyncio
+    async def test_evaluate_and_refine_falls_back_to_original_query(self, retrieval_judge, mock_ollama_client, sample_chunks):
+        """Test that a missing refined query and unparseable responses keep the original query"""
+        mock_ollama_client.generate.return_value = {
+            "response": json.dumps({"relevance_scores": {"1": 0.2}, "needs_refinement": True})
+        }
+        result = await retrieval_judge.evaluate_and_refine("How do neural networks work?", sample_chunks)
+        assert result["refined_query"] == "How do neural networks work?"
+
+        mock_ollama_client.generate.return_value = {"response": "not json"}
+        result = await retrieval_judge.evaluate_and_refine("How do neural networks work?", sample_chunks)
+        assert result["needs_refinement"] is False
+        assert result["refined_query"] == "How do neural networks work?"
+
     @pytest.mark.asyncio
     async def test_optimize_context(self, retrieval_judge, mock_ollama_client, sample_chunks):
         """Test optimize_context method"""
@@ -197,6 +239,46 @@ class TestRetrievalJudge:
         assert result["parameters"]["reranking"] is True
         assert "Failed to parse" in result["justification"]
 
+    @pytest.mark.asyncio
+    async def test_simple_query_uses_heuristic_fast_path(self, mock_ollama_client):
+        """Test that a clearly simple query is analyzed without an LLM call"""
+        judge = RetrievalJudge(ollama_client=mock_ollama_client, analysis_cache=QueryAnalysisCache(persist=False))
+        before = get_query_analysis_stats()["fast_path"]
+
+        result = await judge.analyze_query("What is the vacation policy?")
+
+        assert result["complexity"] == "simple"
+        assert result["parameters"]["k"] == 5
+        mock_ollama_client.generate.assert_not_called()
+        assert get_query_analysis_stats()["fast_path"] == before + 1
+        assert get_query_analysis_stats()["fast_path_fraction"] > 0
+
+    @pytest.mark.asyncio
+    async def test_llm_analysis_is_cached_by_normalized_query(self, mock_ollama_client):
+        """Test that low-confidence queries ask the LLM once and reuse the cached analysis"""
+        mock_ollama_client.generate.return_value = {
+            "response": json.dumps({"complexity": "complex", "parameters": {"k": 12, "threshold": 0.3, "reranking": True}})
+        }
+        judge = RetrievalJudge(ollama_client=mock_ollama_client, analysis_cache=QueryAnalysisCache(persist=False))
+        query = "Why did revenue fall, and how does that compare with the forecast? What should we change?"
+
+        first = await judge.analyze_query(query)
+        second = await judge.analyze_query("  " + query.upper() + " ")
+
+        assert first == second
+        assert second["parameters"]["k"] == 12
+        mock_ollama_client.generate.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_unparseable_analysis_is_not_cached(self, retrieval_judge, mock_ollama_client):
+        """Test that the fallback analysis is not reused for later queries"""
+        mock_ollama_client.generate.return_value = {"response": "not json"}
+
+        await retrieval_judge.analyze_query("How do neural networks work?")
+        await retrieval_judge.analyze_query("How do neural networks work?")
+
+        assert mock_ollama_client.generate.call_count == 2
+
     @pytest.mark.asyncio
     async def test_extract_chunks_sample(self, retrieval_judge, sample_chunks):
         """Test _extract_chunks_sample method"""
@@ -2,10 +2,12 @@
 Unit tests for the Semantic Chunker
 """
 import pytest
+import asyncio
 from unittest.mock import AsyncMock, patch, MagicMock
 import json
 
 from app.rag.chunkers.semantic_chunker import SemanticChunker
+from app.cache.semantic_boundary_cache import SemanticBoundaryCache
 from langchain.schema import Document as LangchainDocument
 
 @pytest.fixture
@@ -215,4 +217,61 @@ async def test_semantic_chunker_long_text_processing(mock_ollama_client):
         
         # Verify result
         assert len(chunks) > 1
-        assert len(chunks) == (len(long_text) + 999) // 1000  # Ceiling division
\ No newline at end of file
+        assert len(chunks) == (len(long_text) + 999) // 1000  # Ceiling division
+
+@pytest.mark.asyncio
+async def test_semantic_chunker_processes_sections_concurrently():
+    """Test that long-text sections run concurrently up to the limit and merge in order"""
+    in_flight = 0
+    max_in_flight = 0
+    
+    async def slow_generate(prompt, model, stream):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {"response": "[300, 600]"}
+    
+    long_text = " ".join(f"Sentence number {i} about topic {i // 20}." for i in range(400))
+    
+    async def chunk_with(max_concurrency):
+        client = AsyncMock()
+        client.generate.side_effect = slow_generate
+        chunker = SemanticChunker(
+            ollama_client=client,
+            chunk_size=500,
+            chunk_overlap=0,
+            max_llm_context_length=3000,
+            cache_enabled=False,
+            max_concurrency=max_concurrency,
+            boundary_cache=SemanticBoundaryCache(persist=False)
+        )
+        return await chunker.split_text_async(long_text)
+    
+    sequential_chunks = await chunk_with(1)
+    assert max_in_flight == 1
+    
+    max_in_flight = 0
+    concurrent_chunks = await chunk_with(2)
+    
+    assert max_in_flight == 2
+    assert concurrent_chunks == sequential_chunks
+
+@pytest.mark.asyncio
+async def test_semantic_chunker_reuses_cached_section_boundaries(mock_ollama_client, sample_text):
+    """Test that a section seen before is chunked without another LLM call"""
+    boundary_cache = SemanticBoundaryCache(persist=False)
+    chunker = SemanticChunker(
+        ollama_client=mock_ollama_client,
+        chunk_overlap=0,
+        boundary_cache=boundary_cache
+    )
+    section = sample_text * 5
+    
+    first = await chunker._identify_semantic_boundaries(section)
+    second = await chunker._identify_semantic_boundaries(section)
+    
+    assert first == second
+    assert mock_ollama_client.generate.call_count == 1
+    assert boundary_cache.get_stats()["hits"] == 1